@@ -35,6 +35,7 @@ class Settings(BaseSettings):
     ollama_timeout_ms: int = Field(default=120000, validation_alias="OLLAMA_TIMEOUT_MS")
     max_concurrent_requests: int = Field(default=8, validation_alias="MAX_CONCURRENT_REQUESTS")
     request_queue_timeout: float = Field(default=15.0, validation_alias="REQUEST_QUEUE_TIMEOUT")
+    image_pool_workers: int = Field(default=2, validation_alias="IMAGE_POOL_WORKERS")
 
     # --- CORS ---
     cors_allowed_origins: str = Field(default=",".join(DEFAULT_ALLOWED_ORIGINS), validation_alias="CORS_ALLOWED_ORIGINS")
@@ -42,6 +43,21 @@ class Settings(BaseSettings):
     # --- Redis ---
     redis_url: str = Field(default="redis://localhost:6379/0", validation_alias="REDIS_URL")
 
+    # --- Shared rate limits (redis | local) ---
+    rate_limit_backend: str = Field(default="redis", validation_alias="RATE_LIMIT_BACKEND")
+    rate_limit_shm_path: Optional[str] = Field(default=None, validation_alias="RATE_LIMIT_SHM_PATH")
+    # Client tools/call requests on /mcp: sliding window per minute plus a burst bucket
+    mcp_tool_calls_per_minute: int = Field(default=300, validation_alias="MCP_TOOL_CALLS_PER_MINUTE")
+    mcp_tool_call_burst: int = Field(default=30, validation_alias="MCP_TOOL_CALL_BURST")
+    mcp_tool_call_refill_per_sec: float = Field(default=5.0, validation_alias="MCP_TOOL_CALL_REFILL_PER_SEC")
+
+    # --- Port-based auth in the request pipeline (X-Forwarded-Port 9100) ---
+    auth_middleware_enabled: bool = Field(default=False, validation_alias="AUTH_MIDDLEWARE_ENABLED")
+
+    # --- Shared search cache L2 (redis | disk | off) ---
+    search_cache_l2: str = Field(default="redis", validation_alias="SEARCH_CACHE_L2")
+    search_cache_dir: Optional[str] = Field(default=None, validation_alias="SEARCH_CACHE_DIR")
+
     # --- Providers / Backends ---
     ollama_base: AnyHttpUrl = Field(default="http://localhost:11434", validation_alias="OLLAMA_BASE")
     ollama_bearer_token: Optional[str] = Field(default=None, validation_alias="OLLAMA_BEARER_TOKEN")
@@ -150,6 +166,25 @@ class Settings(BaseSettings):
     jina_api_key: str | None = Field(default=None, validation_alias="JINA_API_KEY")
     jina_embed_model: str = Field(default="jina-embeddings-v3", validation_alias="JINA_EMBED_MODEL")
 
+    # Local embeddings (compute_backend model pool + micro-batching)
+    embed_max_batch_latency_ms: float = Field(default=10.0, validation_alias="EMBED_MAX_BATCH_LATENCY_MS")
+    embed_max_batch_size: int = Field(default=0, validation_alias="EMBED_MAX_BATCH_SIZE")  # 0 = hardware default
+    embed_model_pool_max_mb: int = Field(default=4096, validation_alias="EMBED_MODEL_POOL_MAX_MB")
+
+    # Embedding vector cache for /v1/embeddings (float32 | float16 | int8)
+    embedding_cache_dtype: str = Field(default="float16", validation_alias="EMBEDDING_CACHE_DTYPE")
+    embedding_cache_memory_mb: int = Field(default=256, validation_alias="EMBEDDING_CACHE_MEMORY_MB")
+    embedding_cache_disk_mb: int = Field(default=2048, validation_alias="EMBEDDING_CACHE_DISK_MB")  # 0 = memory only
+    embedding_cache_dir: str = Field(default="data/embedding_cache", validation_alias="EMBEDDING_CACHE_DIR")
+    # Comma-separated "hf/<repo>" and "local/<repo>" models /v1/embeddings may use
+    embedding_models: str = Field(
+        default="hf/sentence-transformers/all-MiniLM-L6-v2,hf/BAAI/bge-small-en-v1.5,hf/intfloat/multilingual-e5-small",
+        validation_alias="EMBEDDING_MODELS",
+    )
+
+    # Model registry snapshot (served on cold start until providers refresh)
+    model_registry_snapshot_path: str = Field(default="data/model_registry.json", validation_alias="MODEL_REGISTRY_SNAPSHOT_PATH")
+
     # OpenAI compatibility
     openai_model_aliases: Dict[str, str] = Field(default_factory=dict, validation_alias="OPENAI_MODEL_ALIASES")
 
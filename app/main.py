@@ -1,4 +1,5 @@
 from contextlib import asynccontextmanager
+import asyncio
 import logging
 # import logging (centralized)
 import redis.asyncio as redis
@@ -30,7 +31,7 @@ except Exception:
     _HAS_INSTRUMENTATOR = False
 
 try:
-    from .utils.metrics import MetricsMiddleware, get_metrics_response
+    from .utils.metrics import MetricsStage, get_metrics_response
     _HAS_CUSTOM_METRICS = True
 except Exception:
     _HAS_CUSTOM_METRICS = False
@@ -39,7 +40,8 @@ except Exception:
 try:
     from .utils.triforce_logging import (
         central_logger,
-        TriForceLoggingMiddleware,
+        log_writer,
+        TriForceLoggingStage,
         setup_triforce_logging,
     )
     _HAS_TRIFORCE_LOGGING = True
@@ -62,6 +64,16 @@ except Exception:
     _HAS_SYSTEM_LOG_COLLECTOR = False
 
 from .config import get_settings
+from .utils.http_client import HttpClient, http_clients
+from .utils.rate_limit import shared_limiter
+from .services.comfyui_tracker import close_comfyui_trackers
+from .services.image_pipeline import image_pipeline
+from .services.search_cache import search_cache
+from .services.vector_cache import vector_cache
+from .services.command_queue import command_queue
+from .utils.rammode_io import persist_engine
+from .utils.request_pipeline import RequestPipeline
+from .utils.auth_middleware import AuthStage
 
 # Import the router object from each route module
 from .routes.admin import router as admin_router
@@ -74,7 +86,7 @@ from .routes.mcp import router as mcp_router
 from .routes.mcp_node import router as mcp_node_router
 from .routes.mcp_remote import router as mcp_remote_router
 from .routes.models import router as models_router
-from .routes.openai_compat import router as openai_compat_router
+from .routes.openai_compat import router as openai_compat_router, embeddings_router as openai_embeddings_router
 from .routes.orchestration import router as orchestration_router
 from .routes.posts import router as posts_router
 from .routes.settings import router as settings_router
@@ -85,7 +97,7 @@ from .routes.tristar import router as tristar_router
 from .routes.tristar_settings import router as tristar_settings_router
 from .routes.mesh import router as mesh_router
 from .routes.oauth_service import router as oauth_router
-from .routes.perf_monitor import router as perf_monitor_router, perf_middleware
+from .routes.perf_monitor import router as perf_monitor_router, PerfMonitorStage, monitor as perf_monitor
 from .routes.distributed_compute import router as distributed_compute_router
 from .routes.tristar_gui import router as tristar_gui_router
 from .routes.client_chat import router as client_chat_router
@@ -117,6 +129,15 @@ async def _delayed_bootstrap():
 async def lifespan(app: FastAPI):
     # import logging (centralized)
 
+    # Fork image workers first, while the process has few threads
+    try:
+        await image_pipeline.start()
+    except Exception as e:
+        logger.warning(f"Image pipeline pool unavailable (using threads): {e}")
+
+    # RAM-mode: persist changes a previous process left unflushed
+    await persist_engine.start()
+
     # === Hardware Acceleration Auto-Detection ===
     try:
         from .services.hardware_accel import init_hardware_acceleration, get_hardware_config
@@ -131,6 +152,9 @@ async def lifespan(app: FastAPI):
     redis_connection = redis.from_url(settings.redis_url, encoding="utf-8", decode_responses=True)
     await FastAPILimiter.init(redis_connection)
 
+    # Start batched perf metric flusher
+    await perf_monitor.start()
+
     # Start periodic model registry refresh (every hour)
     from .services.model_registry import registry
     registry.start_periodic_refresh(interval_seconds=3600.0)
@@ -220,7 +244,6 @@ async def lifespan(app: FastAPI):
         if auto_bootstrap:
             # import logging (centralized)
             logger.info("Auto-bootstrapping CLI Agents...")
-            import asyncio
             # Verzögert starten um Server hochfahren zu lassen
             asyncio.create_task(_delayed_bootstrap())
         else:
@@ -251,6 +274,7 @@ async def lifespan(app: FastAPI):
     if _HAS_TRIFORCE_LOGGING:
         try:
             await central_logger.stop()
+            await asyncio.to_thread(log_writer.close)
         except Exception:
             pass
 
@@ -296,6 +320,24 @@ async def lifespan(app: FastAPI):
         except Exception:
             pass
 
+    # Flush pending perf metrics
+    try:
+        await perf_monitor.stop()
+    except Exception:
+        pass
+
+    await image_pipeline.shutdown()
+    await command_queue.stop()
+    await persist_engine.close()
+
+    # Close pooled upstream connections
+    await close_comfyui_trackers()
+    await http_clients.aclose()
+    await HttpClient.aclose_shared()
+
+    await shared_limiter.aclose()
+    await search_cache.aclose()
+    await vector_cache.aclose()
     await FastAPILimiter.close()
 
 def create_app() -> FastAPI:
@@ -375,6 +417,7 @@ def create_app() -> FastAPI:
     app.include_router(oauth_router, tags=["OAuth 2.0"])
     app.include_router(models_router, prefix="/v1", tags=["Models"])
     app.include_router(openai_compat_router, prefix="/v1/openai", tags=["OpenAI Compatibility"])
+    app.include_router(openai_embeddings_router, prefix="/v1", tags=["OpenAI Compatibility"])
     app.include_router(orchestration_router, prefix="/v1", tags=["Orchestration"])
     app.include_router(posts_router, prefix="/v1", tags=["Posts"])
     app.include_router(settings_router, prefix="/v1", tags=["Settings"])
@@ -437,21 +480,21 @@ def create_app() -> FastAPI:
     if _HAS_INSTRUMENTATOR:
         Instrumentator().instrument(app).expose(app, include_in_schema=False)
 
-    # Custom AILinux Metrics Middleware (LLM calls, circuit breaker, memory, etc.)
+    # Request pipeline: one pure-ASGI layer with shared per-request context
+    # (timing, trace id, auth decision) instead of one middleware per concern
+    stages = []
+    # Port-based auth (X-Forwarded-Port 9100) runs first
+    if settings.auth_middleware_enabled:
+        stages.append(AuthStage())
+    # Custom AILinux Metrics (LLM calls, circuit breaker, memory, etc.)
     if _HAS_CUSTOM_METRICS:
-        @app.middleware("http")
-        async def metrics_middleware(request: Request, call_next):
-            middleware = MetricsMiddleware()
-            return await middleware(request, call_next)
-
-    # Performance Monitor Middleware (Endpoint-Latenz-Tracking)
-    @app.middleware("http")
-    async def perf_middleware_handler(request: Request, call_next):
-        return await perf_middleware(request, call_next)
-
-    # TriForce Central Logging Middleware - logs ALL API traffic
+        stages.append(MetricsStage())
+    # Performance Monitor (Endpoint-Latenz-Tracking)
+    stages.append(PerfMonitorStage())
+    # TriForce Central Logging - logs ALL API traffic
     if _HAS_TRIFORCE_LOGGING:
-        app.add_middleware(TriForceLoggingMiddleware, central_logger=central_logger)
+        stages.append(TriForceLoggingStage(central_logger))
+    app.add_middleware(RequestPipeline, stages=stages)
 
     # Mount static files for GUI
     static_dir = Path(__file__).parent / "static"
@@ -32,6 +32,8 @@ from collections import OrderedDict
 from functools import lru_cache
 import threading
 
+from ..services.code_index import TrigramIndex, literal_plan, regex_plan
+
 logger = logging.getLogger(__name__)
 
 # Configuration
@@ -72,6 +74,8 @@ class LRUFileCache:
         self.max_size_bytes = max_size_mb * 1024 * 1024
         self.max_files = max_files
         self._cache: OrderedDict[str, CacheEntry] = OrderedDict()
+        self._cold: OrderedDict[str, None] = OrderedDict()  # non-hot paths in LRU order
+        self._index = TrigramIndex()  # trigram index over cached contents for ram_search
         self._agent_caches: Dict[str, Set[str]] = {}  # agent_id -> set of paths
         self._current_size = 0
         self._lock = threading.RLock()
@@ -91,6 +95,9 @@ class LRUFileCache:
                 # Mark as hot if accessed frequently
                 if entry.access_count >= HOT_ACCESS_THRESHOLD:
                     entry.is_hot = True
+                    self._cold.pop(path, None)
+                elif path in self._cold:
+                    self._cold.move_to_end(path)
                 return entry.content
             return None
 
@@ -105,9 +112,7 @@ class LRUFileCache:
 
         with self._lock:
             # Remove old entry if exists
-            if path in self._cache:
-                old_entry = self._cache.pop(path)
-                self._current_size -= old_entry.size
+            self._remove(path)
 
             # Evict LRU entries if needed
             while (self._current_size + content_size > self.max_size_bytes or
@@ -117,8 +122,7 @@ class LRUFileCache:
                 # Evict cold files first, then LRU
                 evict_path = self._find_eviction_candidate()
                 if evict_path:
-                    evicted = self._cache.pop(evict_path)
-                    self._current_size -= evicted.size
+                    evicted = self._remove(evict_path)
                     # Remove from agent cache
                     if evicted.agent_id and evicted.agent_id in self._agent_caches:
                         self._agent_caches[evicted.agent_id].discard(evict_path)
@@ -137,6 +141,8 @@ class LRUFileCache:
                 access_count=self._access_stats.get(path, 0)
             )
             self._cache[path] = entry
+            self._cold[path] = None
+            self._index.add(path, content)
             self._current_size += content_size
 
             # Track agent cache
@@ -149,23 +155,47 @@ class LRUFileCache:
 
     def _find_eviction_candidate(self) -> Optional[str]:
         """Find best candidate for eviction (cold files first, then LRU)."""
-        # First, try to evict cold files
-        for path, entry in self._cache.items():
-            if not entry.is_hot:
-                return path
+        # First, try to evict cold files (least recently used cold file)
+        if self._cold:
+            return next(iter(self._cold))
         # Otherwise, evict LRU (first item)
         if self._cache:
             return next(iter(self._cache))
         return None
 
+    def _remove(self, path: str) -> Optional[CacheEntry]:
+        """Drop an entry from the cache, the cold list and the search index."""
+        entry = self._cache.pop(path, None)
+        if entry is not None:
+            self._cold.pop(path, None)
+            self._index.remove(path)
+            self._current_size -= entry.size
+        return entry
+
     def invalidate(self, path: str) -> bool:
         """Remove file from cache."""
         with self._lock:
-            if path in self._cache:
-                entry = self._cache.pop(path)
-                self._current_size -= entry.size
-                return True
-            return False
+            return self._remove(path) is not None
+
+    def clear(self) -> int:
+        """Remove all files from cache."""
+        with self._lock:
+            count = len(self._cache)
+            self._cache.clear()
+            self._cold.clear()
+            self._index = TrigramIndex()
+            self._current_size = 0
+            self._agent_caches.clear()
+            return count
+
+    def search_candidates(self, query: str, regex: bool = False, flags: int = 0) -> List[CacheEntry]:
+        """Cached entries that may contain the query, via the trigram index."""
+        plan = regex_plan(query, flags) if regex else literal_plan(query)
+        with self._lock:
+            paths = self._index.candidates(plan)
+            if paths is None:
+                return list(self._cache.values())
+            return [self._cache[p] for p in sorted(paths) if p in self._cache]
 
     def invalidate_agent(self, agent_id: str) -> int:
         """Remove all files cached by specific agent."""
@@ -405,8 +435,11 @@ class AdaptiveCodeIlluminatorV4:
             pattern = re.compile(query, re.IGNORECASE) if regex else None
         except re.error as e:
             return {"error": f"Invalid regex: {e}"}
+        needle = query.lower()
 
-        for path, entry in self.cache._cache.items():
+        # Only files holding all trigrams of the query are scanned line by line
+        for entry in self.cache.search_candidates(query, regex, pattern.flags if pattern else 0):
+            path = entry.path
             searched += 1
             content = entry.content
             lines = content.splitlines()
@@ -416,7 +449,7 @@ class AdaptiveCodeIlluminatorV4:
                 if regex and pattern:
                     if pattern.search(line):
                         found = True
-                elif query.lower() in line.lower():
+                elif needle in line.lower():
                     found = True
 
                 if found:
@@ -577,10 +610,7 @@ class AdaptiveCodeIlluminatorV4:
             return {"invalidated": 1 if success else 0, "path": path}
         else:
             # Clear all
-            count = len(self.cache._cache)
-            self.cache._cache.clear()
-            self.cache._current_size = 0
-            self.cache._agent_caches.clear()
+            count = self.cache.clear()
             return {"invalidated": count, "action": "full_clear"}
 
 
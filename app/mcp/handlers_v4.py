@@ -20,6 +20,7 @@ from app.mcp.tool_registry_v4 import (
     get_handler,
     TOOL_ALIASES,
 )
+from app.utils.http_client import http_clients
 
 logger = logging.getLogger("ailinux.mcp.handlers")
 
@@ -42,18 +43,24 @@ class HandlerRegistry:
         """
         Call a tool handler by name (supports aliases).
         """
-        # Resolve alias to canonical name
-        canonical = resolve_alias(tool_name)
+        handler = self.resolve(tool_name)
+        if not handler:
+            raise ValueError(f"No handler for tool: {tool_name} (resolved: {resolve_alias(tool_name)})")
         
-        handler = self._handlers.get(canonical)
+        return await handler(params)
+    
+    def resolve(self, tool_name: str):
+        """Resolve a tool name (or alias) to its handler, None if unknown."""
+        # Resolve alias to canonical name
+        handler = self._handlers.get(resolve_alias(tool_name))
         if not handler:
             # Try original name as fallback
             handler = self._handlers.get(tool_name)
-        
-        if not handler:
-            raise ValueError(f"No handler for tool: {tool_name} (resolved: {canonical})")
-        
-        return await handler(params)
+        return handler
+    
+    def names(self):
+        """All registered handler names."""
+        return list(self._handlers)
     
     def register(self, name: str, handler) -> None:
         """Register a handler."""
@@ -138,7 +145,7 @@ class HandlerRegistry:
                         
                         url = f"https://generativelanguage.googleapis.com/v1beta/models/{model_id}:generateContent?key={api_key}"
                         
-                        async with aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(total=60)) as session:
+                        async with http_clients.session("gemini", timeout=aiohttp.ClientTimeout(total=60)) as session:
                             async with session.post(
                                 url,
                                 headers={"Content-Type": "application/json"},
@@ -155,7 +162,7 @@ class HandlerRegistry:
                                     logger.warning("Gemini quota exceeded, falling back to Groq")
                                     groq_key = os.environ.get("GROQ_API_KEY")
                                     if groq_key:
-                                        async with aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(total=60)) as fallback_session:
+                                        async with http_clients.session("groq", timeout=aiohttp.ClientTimeout(total=60)) as fallback_session:
                                             async with fallback_session.post(
                                                 "https://api.groq.com/openai/v1/chat/completions",
                                                 headers={
@@ -200,7 +207,7 @@ class HandlerRegistry:
                             messages.append({"role": "system", "content": system_prompt})
                         messages.append({"role": "user", "content": message})
                         
-                        async with aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(total=60)) as session:
+                        async with http_clients.session("groq", timeout=aiohttp.ClientTimeout(total=60)) as session:
                             async with session.post(
                                 "https://api.groq.com/openai/v1/chat/completions",
                                 headers={
@@ -240,7 +247,7 @@ class HandlerRegistry:
                         if system_prompt:
                             body["system"] = system_prompt
                         
-                        async with aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(total=120)) as session:
+                        async with http_clients.session("anthropic", timeout=aiohttp.ClientTimeout(total=120)) as session:
                             async with session.post(
                                 "https://api.anthropic.com/v1/messages",
                                 headers={
@@ -262,7 +269,7 @@ class HandlerRegistry:
                     
                     # Ollama (local)
                     elif provider == "ollama":
-                        async with aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(total=120)) as session:
+                        async with http_clients.session("ollama", timeout=aiohttp.ClientTimeout(total=120)) as session:
                             async with session.post(
                                 "http://localhost:11434/api/chat",
                                 json={
@@ -555,7 +562,7 @@ class HandlerRegistry:
                 
                 # 2. Ollama check
                 try:
-                    async with aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(total=5)) as session:
+                    async with http_clients.session("ollama", timeout=aiohttp.ClientTimeout(total=5)) as session:
                         async with session.get("http://localhost:11434/api/tags") as resp:
                             if resp.status == 200:
                                 data = await resp.json()
@@ -584,7 +591,7 @@ class HandlerRegistry:
                 
                 # 4. SearXNG check
                 try:
-                    async with aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(total=5)) as session:
+                    async with http_clients.session("searxng", timeout=aiohttp.ClientTimeout(total=5)) as session:
                         async with session.get("http://localhost:8888/healthz") as resp:
                             if resp.status == 200:
                                 health_data["services"]["searxng"] = {"status": "healthy"}
@@ -0,0 +1,213 @@
+"""
+Compiled Tool Dispatch Table for MCP tools/call
+
+Resolves every accepted tool name (canonical names, v4 short-name aliases
+and dotted/underscore variants) to its final handler once, at startup and
+again after a hot reload. A tools/call is then a single dict lookup.
+
+Also keeps per-tool call counters and latency histograms.
+"""
+
+from __future__ import annotations
+
+import bisect
+import logging
+import time
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional, Tuple
+
+logger = logging.getLogger("ailinux.mcp.dispatch")
+
+Handler = Callable[[Dict[str, Any]], Awaitable[Any]]
+
+# Upper bounds in milliseconds, the last bucket is +Inf
+LATENCY_BUCKETS_MS: Tuple[float, ...] = (
+    5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000, 30000, 60000,
+)
+
+
+@dataclass
+class ToolStats:
+    """Call counters and latency histogram for one tool."""
+    calls: int = 0
+    errors: int = 0
+    total_ms: float = 0.0
+    max_ms: float = 0.0
+    buckets: List[int] = field(default_factory=lambda: [0] * (len(LATENCY_BUCKETS_MS) + 1))
+
+    def observe(self, elapsed_ms: float, ok: bool) -> None:
+        self.calls += 1
+        if not ok:
+            self.errors += 1
+        self.total_ms += elapsed_ms
+        self.max_ms = max(self.max_ms, elapsed_ms)
+        self.buckets[bisect.bisect_left(LATENCY_BUCKETS_MS, elapsed_ms)] += 1
+
+    def quantile(self, q: float) -> Optional[float]:
+        """Upper bucket bound containing the q-quantile (None if unbounded)."""
+        if not self.calls:
+            return None
+        rank = q * self.calls
+        seen = 0
+        for idx, count in enumerate(self.buckets):
+            seen += count
+            if seen >= rank:
+                return LATENCY_BUCKETS_MS[idx] if idx < len(LATENCY_BUCKETS_MS) else None
+        return None
+
+    def to_dict(self) -> Dict[str, Any]:
+        histogram = {
+            (f"le_{int(bound)}ms" if bound is not None else "le_inf"): count
+            for bound, count in zip(list(LATENCY_BUCKETS_MS) + [None], self.buckets)
+        }
+        return {
+            "calls": self.calls,
+            "errors": self.errors,
+            "avg_ms": round(self.total_ms / self.calls, 2) if self.calls else 0.0,
+            "max_ms": round(self.max_ms, 2),
+            "p50_ms": self.quantile(0.5),
+            "p95_ms": self.quantile(0.95),
+            "histogram": histogram,
+        }
+
+
+@dataclass(frozen=True)
+class DispatchEntry:
+    """Final resolution of one accepted tool name."""
+    tool: str                   # resolved internal name (used for stats)
+    handler: Handler
+    via_v4: bool = False        # dispatched through handlers_v4.call_tool
+
+
+@dataclass
+class DispatchSources:
+    """Everything needed to (re)compile the table."""
+    tool_map: Callable[[], Dict[str, Handler]]
+    alias_reverse: Callable[[str], str]
+    alias_names: Callable[[], Iterable[str]]
+    v4_resolve: Callable[[str], Optional[Handler]]
+    v4_names: Callable[[], Iterable[str]]
+    v4_call: Callable[[str, Dict[str, Any]], Awaitable[Any]]
+
+
+class ToolDispatchTable:
+    """
+    O(1) name -> handler table for MCP tools/call.
+
+    Resolution order matches the former per-call lookup: reverse v4 alias,
+    exact name, '.'->'_' variant, '_'->'.' variant, then the v4 handler
+    registry.
+    """
+
+    def __init__(self):
+        self._entries: Dict[str, DispatchEntry] = {}
+        self._sources: Optional[DispatchSources] = None
+        self._stats: Dict[str, ToolStats] = {}
+        self.compiled_at: Optional[float] = None
+        self.compile_count = 0
+        self.unknown_calls = 0
+
+    @staticmethod
+    def _resolve(name: str, tool_map: Dict[str, Handler], alias_reverse: Callable[[str], str]) -> Tuple[str, Optional[Handler]]:
+        resolved = alias_reverse(name)
+        keys = [resolved]
+        if "." in resolved:
+            keys.append(resolved.replace(".", "_"))
+        if "_" in resolved:
+            keys.append(resolved.replace("_", "."))
+        for key in keys:
+            handler = tool_map.get(key)
+            if handler:
+                return key, handler
+        return resolved, None
+
+    def compile(self, sources: Optional[DispatchSources] = None) -> int:
+        """Build the table from ``sources`` (or the last sources). Returns entry count."""
+        if sources is not None:
+            self._sources = sources
+        if self._sources is None:
+            raise RuntimeError("ToolDispatchTable has no sources to compile")
+
+        src = self._sources
+        start = time.perf_counter()
+        tool_map = src.tool_map()
+        v4_names = list(src.v4_names())
+
+        candidates = set(tool_map) | set(src.alias_names()) | set(v4_names)
+        for name in list(tool_map):
+            candidates.add(name.replace("_", "."))
+            candidates.add(name.replace(".", "_"))
+
+        entries: Dict[str, DispatchEntry] = {}
+        for name in candidates:
+            resolved, handler = self._resolve(name, tool_map, src.alias_reverse)
+            if handler:
+                entries[name] = DispatchEntry(tool=resolved, handler=handler)
+                continue
+            v4_handler = src.v4_resolve(resolved)
+            if v4_handler:
+                entries[name] = DispatchEntry(tool=resolved, handler=v4_handler, via_v4=True)
+
+        self._entries = entries  # atomic swap
+        self.compiled_at = time.time()
+        self.compile_count += 1
+        logger.info(
+            "Compiled MCP tool dispatch table: %d names -> %d handlers in %.1fms",
+            len(entries),
+            len({id(e.handler) for e in entries.values()}),
+            (time.perf_counter() - start) * 1000,
+        )
+        return len(entries)
+
+    def lookup(self, name: str) -> Optional[DispatchEntry]:
+        """Entry for ``name``; names mixing '.' and '_' retry with one separator."""
+        entry = self._entries.get(name)
+        if entry is None and "." in name:
+            entry = self._entries.get(name.replace(".", "_"))
+            if entry is None and "_" in name:
+                entry = self._entries.get(name.replace("_", "."))
+        return entry
+
+    def __contains__(self, name: str) -> bool:
+        return self.lookup(name) is not None
+
+    async def call(self, name: str, arguments: Dict[str, Any]) -> Any:
+        """Dispatch a tool call and record its latency."""
+        entry = self.lookup(name)
+        if entry is None:
+            self.unknown_calls += 1
+            raise ValueError(f"Unknown tool: {name}")
+
+        start = time.perf_counter()
+        ok = False
+        try:
+            if entry.via_v4:
+                result = await self._sources.v4_call(entry.tool, arguments)
+            else:
+                result = await entry.handler(arguments)
+            ok = True
+            return result
+        finally:
+            elapsed_ms = (time.perf_counter() - start) * 1000
+            stats = self._stats.get(entry.tool)
+            if stats is None:
+                stats = self._stats[entry.tool] = ToolStats()
+            stats.observe(elapsed_ms, ok)
+
+    def get_stats(self, tool: Optional[str] = None) -> Dict[str, Any]:
+        if tool is not None:
+            entry = self.lookup(tool)
+            key = entry.tool if entry else tool
+            stats = self._stats.get(key)
+            return {"tool": key, **(stats.to_dict() if stats else ToolStats().to_dict())}
+        return {
+            "entries": len(self._entries),
+            "compile_count": self.compile_count,
+            "compiled_at": self.compiled_at,
+            "unknown_calls": self.unknown_calls,
+            "tools": {name: stats.to_dict() for name, stats in sorted(self._stats.items())},
+        }
+
+
+# Singleton, survives hot reloads of app.routes.mcp
+tool_dispatch = ToolDispatchTable()
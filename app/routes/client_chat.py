@@ -30,6 +30,7 @@ OPENROUTER_BASE_URL = "https://openrouter.ai/api/v1"
 
 # JWT Config - Import from auth module to share secret
 from .client_auth import JWT_SECRET, JWT_ALGORITHM
+from ..utils.http_client import http_clients
 
 
 
@@ -199,7 +200,7 @@ async def call_ollama(
         }
     }
 
-    async with httpx.AsyncClient(timeout=300.0) as client:
+    async with http_clients.client("ollama", timeout=300.0) as client:
         try:
             response = await client.post(
                 f"{OLLAMA_BASE_URL}/api/chat",
@@ -296,7 +297,7 @@ async def call_openrouter(
         "max_tokens": max_tokens,
     }
 
-    async with httpx.AsyncClient(timeout=120.0) as client:
+    async with http_clients.client("openrouter", timeout=120.0) as client:
         response = await client.post(
             f"{OPENROUTER_BASE_URL}/chat/completions",
             headers=headers,
@@ -381,7 +382,7 @@ async def client_chat(
             logger.warning(f"Model nicht erlaubt für {tier.value}, Fallback: {model}")
 
         # Token-Limit prüfen
-        limit_check = tier_service.check_token_limit(user_id, model)
+        limit_check = await tier_service.check_token_limit(user_id, model)
         if not limit_check["allowed"]:
             raise HTTPException(429, f"Token-Limit erreicht ({limit_check['limit']}/Tag)")
 
@@ -412,7 +413,7 @@ async def client_chat(
         else:
             # Cloud-Modelle: Token-Limit prüfen (außer Enterprise)
             if tier != UserTier.ENTERPRISE:
-                limit_check = tier_service.check_token_limit(user_id, model)
+                limit_check = await tier_service.check_token_limit(user_id, model)
                 if not limit_check["allowed"]:
                     raise HTTPException(429, f"Token-Limit erreicht ({limit_check['limit']}/Tag). Nutze Ollama-Modelle für unlimited.")
 
@@ -447,7 +448,7 @@ async def client_chat(
     if tokens and user_id != "anonymous" and response_text:
         # Pro mit Ollama = nicht tracken (unlimited)
         if not (tier == UserTier.PRO and is_ollama):
-            tier_service.track_tokens(user_id, tokens, model)
+            await tier_service.track_tokens(user_id, tokens, model)
 
     return ChatResponse(
         response=response_text,
@@ -578,7 +579,7 @@ async def analyze_file(
 async def ollama_status():
     """Prüfe Ollama Backend Status"""
     try:
-        async with httpx.AsyncClient(timeout=5.0) as client:
+        async with http_clients.client("ollama", timeout=5.0) as client:
             response = await client.get(f"{OLLAMA_BASE_URL}/api/tags")
             if response.status_code == 200:
                 data = response.json()
@@ -631,14 +632,14 @@ async def exclude_model(model_id: str, reason: str = "manual"):
 @router.post("/tokens/reset/{user_id}")
 async def reset_user_tokens(user_id: str):
     """Reset Token-Usage für einen User (Admin)"""
-    result = tier_service.reset_token_usage(user_id)
+    result = await tier_service.reset_token_usage(user_id)
     return result
 
 
 @router.get("/tokens/usage/{user_id}")
 async def get_user_token_usage(user_id: str):
     """Hole Token-Verbrauch für einen User"""
-    return tier_service.get_token_usage(user_id)
+    return await tier_service.get_token_usage(user_id)
 
 
 @router.get("/tokens/usage")
@@ -648,4 +649,4 @@ async def get_current_user_token_usage(
 ):
     """Hole eigenen Token-Verbrauch"""
     user_id, tier = get_user_and_tier_from_headers(authorization, x_user_id)
-    return tier_service.get_token_usage(user_id)
+    return await tier_service.get_token_usage(user_id)
@@ -148,21 +148,15 @@ async def worker_websocket(
 
                 elif msg_type == "task_progress":
                     # Progress-Update vom Client - Task Status aktualisieren
+                    # Setzt den Task auf PROCESSING und verlängert seine Lease
                     task_id = message.get("task_id")
                     progress = message.get("progress", 0)  # 0-100
-                    if task_id and session_id in manager._clients:
-                        task = manager._task_queue.get(task_id)
-                        if task and task.assigned_to == session_id:
-                            # Update task status to PROCESSING when progress is received
-                            from ..services.distributed_compute import TaskStatus
-                            task.status = TaskStatus.PROCESSING
-                            # Log progress for monitoring
-                            logger.debug(f"Task {task_id} progress: {progress}%")
+                    if task_id:
+                        await manager.task_progress(session_id, task_id, progress)
 
                 elif msg_type == "capability_update":
                     # Client kann Models hinzufügen/entfernen
-                    if session_id in manager._clients:
-                        manager._clients[session_id].supported_models = message.get("supported_models", [])
+                    await manager.update_client_models(session_id, message.get("supported_models", []))
 
                 elif msg_type == "disconnect":
                     break
@@ -2,12 +2,14 @@ from __future__ import annotations
 from .widget_handlers import handle_weather, handle_crypto_prices, handle_stock_indices, handle_market_overview, handle_google_deep_search, handle_current_time, handle_list_timezones
 
 import base64
+import hashlib
 import logging
+import sys
 from datetime import datetime, timezone
 
 # Logger für MCP Routes
 logger = logging.getLogger("ailinux.mcp.routes")
-from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional, Tuple
 import json
 
 from fastapi import APIRouter, Depends, HTTPException, Request, Response, status
@@ -19,10 +21,14 @@ from ..services.wordpress import wordpress_service
 from ..services import chat as chat_service
 from ..services.model_registry import registry
 from ..utils.throttle import request_slot
+from ..utils.rate_limit import SlidingWindow, TokenBucket, shared_limiter
+from ..utils.request_pipeline import forwarded_client_ip
+from ..config import get_settings
 from ..services.ollama_mcp import OLLAMA_TOOLS, OLLAMA_HANDLERS
 from ..services.tristar_mcp import TRISTAR_TOOLS, TRISTAR_HANDLERS
 from ..services.gemini_access import GEMINI_ACCESS_TOOLS, GEMINI_ACCESS_HANDLERS
 from ..services.command_queue import QUEUE_TOOLS, QUEUE_HANDLERS
+from ..services.code_index import CodeIndex
 from ..routes.mesh import MESH_TOOLS, MESH_HANDLERS
 from ..services.mcp_filter import MESH_FILTER_TOOLS, MESH_FILTER_HANDLERS
 # New Client-Server Architecture
@@ -71,7 +77,8 @@ from ..mcp.handlers_v4 import (
     get_compatibility_handlers,
 )
 from ..services.compatibility_layer import compatibility_layer
-from ..services.system_control import system_control, HOTRELOAD_TOOLS, HOTRELOAD_HANDLERS
+from ..services.system_control import system_control, hot_reloader, HOTRELOAD_TOOLS, HOTRELOAD_HANDLERS
+from ..mcp.tool_dispatch import DispatchSources, tool_dispatch
 from ..services.memory_index import MEMORY_INDEX_TOOLS, MEMORY_INDEX_HANDLERS, memory_index
 from ..services.mcp_debugger import mcp_debugger
 from ..services.llm_compat import LLM_COMPAT_TOOLS, LLM_COMPAT_HANDLERS, llm_compat
@@ -857,6 +864,11 @@ async def mcp_status() -> Dict[str, Any]:
     return payload
 
 
+@router.get("/mcp/tools/stats", tags=["MCP"], summary="Per-tool call counters and latency histograms")
+async def mcp_tool_stats(tool: Optional[str] = None) -> Dict[str, Any]:
+    return tool_dispatch.get_stats(tool)
+
+
 # ============================================================================
 # INIT ENDPOINTS - Shortcode Documentation & Auto-Decode
 # Für CLI Coding Agents: /v1/init, /mcp/init, /triforce/init
@@ -1161,7 +1173,7 @@ async def rate_limit_stats_endpoint(
     - Violations
     """
     from ..services.agent_bootstrap import rate_limiter
-    return rate_limiter.get_stats(agent_id)
+    return await rate_limiter.get_stats(agent_id)
 
 
 @router.post("/shortcode/extract", tags=["Bootstrap"], summary="Extract shortcodes from text")
@@ -2059,113 +2071,54 @@ async def handle_execute_mcp_tool(params: Dict[str, Any]) -> Dict[str, Any]:
     return await handler(tool_params)
 
 
+# Shared (cross-worker) limits for client tools/call requests; internal
+# calls via handle_tools_call are not limited
+def _tool_call_policies() -> Tuple[SlidingWindow, TokenBucket]:
+    settings = get_settings()
+    return (
+        SlidingWindow(settings.mcp_tool_calls_per_minute, 60),
+        TokenBucket(settings.mcp_tool_call_burst, settings.mcp_tool_call_refill_per_sec),
+    )
+
+
+def _mcp_client_key(request: Optional[Request]) -> str:
+    """Rate-limit identity: the credential validated by require_mcp_auth, else the client IP."""
+    if request is None:
+        return "ip:unknown"
+    principal = getattr(request.state, "mcp_principal", None)
+    if principal:
+        return principal
+    ctx = getattr(request.state, "request_context", None)
+    client_ip = ctx.client_ip if ctx else forwarded_client_ip(request.headers, request.client.host if request.client else None)
+    return "ip:" + (client_ip or "unknown")
+
+
+async def _tool_call_rate_limit(request: Optional[Request], req_id: Any, cost: int = 1) -> Optional[Dict[str, Any]]:
+    """JSON-RPC error response if the client exceeded its tools/call limit."""
+    policies = _tool_call_policies()
+    # A batch larger than the burst could never pass; it is charged the full burst instead
+    cost = min(cost, *(policy.limit for policy in policies))
+    result = await shared_limiter.acquire(f"mcp_tools:{_mcp_client_key(request)}", *policies, cost=cost)
+    if result.allowed:
+        return None
+    return {
+        "jsonrpc": "2.0",
+        "error": {"code": -32000, "message": "Rate limit exceeded", "data": result.to_dict()},
+        "id": req_id,
+    }
+
+
 async def handle_tools_call(params: Dict[str, Any]) -> Dict[str, Any]:
     """MCP tools/call method - executes a tool."""
     tool_name = params.get("name")
     arguments = params.get("arguments", {})
 
-    # Resolve v4 short names to internal names
-    tool_name = resolve_alias_reverse(tool_name) if tool_name else tool_name
-
     if not tool_name:
         raise ValueError("'name' parameter is required for tools/call")
 
-    # Map tool names to internal handlers
-    tool_map = {
-        "acknowledge_policy": handle_acknowledge_policy,
-        "chat": handle_llm_invoke,
-        "list_models": handle_models_list,
-        "ask_specialist": handle_specialists_invoke,
-        "crawl_url": handle_crawl_url,
-        "web_search": handle_web_search,
-        # Extended Multi-Search (v3.0 - Grokipedia + AILinux News)
-        "multi_search": handle_multi_search,
-        # Smart Search (v4.0 - LLM-Powered with Cerebras/Groq)
-        "smart_search": handle_smart_search,
-        "quick_smart_search": handle_quick_smart_search,
-        "search_llm_config": handle_search_llm_config,
-        "search_health": handle_search_health,
-        "weather": handle_weather,
-        "crypto_prices": handle_crypto_prices,
-        "stock_indices": handle_stock_indices,
-        "market_overview": handle_market_overview,
-        "google_deep_search": handle_google_deep_search,
-        "current_time": handle_current_time,
-        "list_timezones": handle_list_timezones,
-        "ailinux_search": handle_ailinux_search,
-        "grokipedia_search": handle_grokipedia_search,
-        "image_search": handle_image_search,
-        # TriStar Integration
-        "tristar_models": handle_tristar_models,
-        "tristar_init": handle_tristar_init,
-        "tristar_memory_store": handle_tristar_memory_store,
-        "tristar_memory_search": handle_tristar_memory_search,
-        # Codebase Access
-        "codebase_structure": handle_codebase_structure,
-        "codebase_file": handle_codebase_file,
-        "codebase_search": handle_codebase_search,
-        "codebase_routes": handle_codebase_routes,
-        "codebase_services": handle_codebase_services,
-        "codebase_edit": handle_codebase_edit,
-        "codebase_create": handle_codebase_create,
-        "codebase_backup": handle_codebase_backup,
-        # CLI Agents
-        "cli-agents_list": handle_cli_agents_list,
-        "cli-agents_get": handle_cli_agents_get,
-        "cli-agents_start": handle_cli_agents_start,
-        "cli-agents_stop": handle_cli_agents_stop,
-        "cli-agents_restart": handle_cli_agents_restart,
-        "cli-agents_call": handle_cli_agents_call,
-        "cli-agents_broadcast": handle_cli_agents_broadcast,
-        "cli-agents_output": handle_cli_agents_output,
-        "cli-agents_stats": handle_cli_agents_stats,
-        # System & Compatibility
-        "check_compatibility": handle_check_compatibility,
-        "debug_mcp_request": handle_debug_mcp_request,
-            "restart_backend": handle_restart_backend,
-            "restart_agent": handle_restart_agent,
-            "execute_mcp_tool": handle_execute_mcp_tool,
-        }
-    # Merge with dynamic handlers from services
-    tool_map.update(OLLAMA_HANDLERS)
-    tool_map.update(TRISTAR_HANDLERS)
-    tool_map.update(GEMINI_ACCESS_HANDLERS)
-    tool_map.update(QUEUE_HANDLERS)
-    tool_map.update(MESH_HANDLERS)
-    tool_map.update(MESH_FILTER_HANDLERS)
-    tool_map.update(INIT_HANDLERS)
-    tool_map.update(MODEL_INIT_HANDLERS)
-    tool_map.update(BOOTSTRAP_HANDLERS)
-    tool_map.update(ADAPTIVE_CODE_HANDLERS)
-    tool_map.update(ADAPTIVE_CODE_V4_HANDLERS)  # Enhanced V4 handlers
-    tool_map.update(LLM_COMPAT_HANDLERS)
-    tool_map.update(HOTRELOAD_HANDLERS)
-    tool_map.update(MEMORY_INDEX_HANDLERS)
-    # === NEW CLIENT-SERVER ARCHITECTURE HANDLERS ===
-    tool_map.update(VAULT_HANDLERS)
-    tool_map.update(CHAT_ROUTER_HANDLERS)
-    tool_map.update(TASK_SPAWNER_HANDLERS)
-
-    handler = tool_map.get(tool_name)
-    # Compatibility fallback
-    if not handler and "." in tool_name:
-        handler = tool_map.get(tool_name.replace(".", "_"))
-    if not handler and "_" in tool_name:
-        handler = tool_map.get(tool_name.replace("_", "."))
-
-    # Try v4 handlers first
-    if not handler:
-        try:
-            v4_result = await call_v4_tool(tool_name, arguments)
-            if v4_result:
-                return {"content": [{"type": "text", "text": json.dumps(v4_result, separators=(chr(44), chr(58)))}], "isError": False}
-        except Exception:
-            pass  # Fall through to error
-
-    if not handler:
-        raise ValueError(f"Unknown tool: {tool_name}")
-
-    result = await handler(arguments)
+    # O(1) lookup in the compiled dispatch table; v4 short names, name variants
+    # and v4 registry handlers are resolved at compile time
+    result = await tool_dispatch.call(tool_name, arguments)
     return {
         "content": [
             {"type": "text", "text": json.dumps(result, separators=(',', ':'))}
@@ -2298,6 +2251,9 @@ BLOCKED_PATHS = {
     "__pycache__", ".venv", "node_modules", ".claude",
 }
 
+# Trigram index for codebase_search, refreshed from file mtimes
+_code_index = CodeIndex(BACKEND_ROOT, ALLOWED_EXTENSIONS, skip_dirs=BLOCKED_PATHS)
+
 
 def _safe_path(relative_path: str) -> Optional[Path]:
     """Validates and returns safe path within backend root.
@@ -2627,6 +2583,7 @@ async def handle_codebase_edit(params: Dict[str, Any]) -> Dict[str, Any]:
 
         # Write new content
         safe_path.write_text(new_content, encoding="utf-8")
+        _code_index.mark_changed()
 
         # Log the edit
         _log_edit("edit", file_path, {
@@ -2750,6 +2707,7 @@ class {ClassName}Service:
 
     # Write file
     safe_path.write_text(content, encoding="utf-8")
+    _code_index.mark_changed()
 
     # Log the creation
     _log_edit("create", file_path, {
@@ -2902,34 +2860,15 @@ async def handle_codebase_search(params: Dict[str, Any]) -> Dict[str, Any]:
     if not safe_root or not safe_root.exists():
         raise ValueError(f"Path not found: {path}")
 
-    results = []
     pattern = re.compile(query, re.IGNORECASE)
-
-    for py_file in safe_root.rglob(file_pattern):
-        if "__pycache__" in str(py_file):
-            continue
-        if py_file.suffix not in ALLOWED_EXTENSIONS:
-            continue
-
-        try:
-            lines = py_file.read_text(encoding="utf-8").splitlines()
-            for i, line in enumerate(lines):
-                if pattern.search(line):
-                    start = max(0, i - context_lines)
-                    end = min(len(lines), i + context_lines + 1)
-                    results.append({
-                        "file": str(py_file.relative_to(BACKEND_ROOT)),
-                        "line": i + 1,
-                        "match": line.strip(),
-                        "context": lines[start:end],
-                    })
-                    if len(results) >= max_results:
-                        break
-        except (PermissionError, UnicodeDecodeError):
-            continue
-
-        if len(results) >= max_results:
-            break
+    # Only files containing the pattern's literal trigrams are read
+    results = await _code_index.search(
+        pattern,
+        under=str(safe_root.relative_to(BACKEND_ROOT)),
+        file_pattern=file_pattern,
+        max_results=max_results,
+        context_lines=context_lines,
+    )
 
     return {
         "query": query,
@@ -3429,6 +3368,120 @@ except Exception as e:
     mcp_logger.warning(f"v4 handler init failed (non-critical): {e}")
 
 
+# ============================================================================
+# Compiled tools/call dispatch table
+# ============================================================================
+
+# Core tools/call handlers defined in this module
+TOOL_CALL_HANDLERS: Dict[str, Handler] = {
+    "acknowledge_policy": handle_acknowledge_policy,
+    "chat": handle_llm_invoke,
+    "list_models": handle_models_list,
+    "ask_specialist": handle_specialists_invoke,
+    "crawl_url": handle_crawl_url,
+    "web_search": handle_web_search,
+    # Extended Multi-Search (v3.0 - Grokipedia + AILinux News)
+    "multi_search": handle_multi_search,
+    # Smart Search (v4.0 - LLM-Powered with Cerebras/Groq)
+    "smart_search": handle_smart_search,
+    "quick_smart_search": handle_quick_smart_search,
+    "search_llm_config": handle_search_llm_config,
+    "search_health": handle_search_health,
+    "weather": handle_weather,
+    "crypto_prices": handle_crypto_prices,
+    "stock_indices": handle_stock_indices,
+    "market_overview": handle_market_overview,
+    "google_deep_search": handle_google_deep_search,
+    "current_time": handle_current_time,
+    "list_timezones": handle_list_timezones,
+    "ailinux_search": handle_ailinux_search,
+    "grokipedia_search": handle_grokipedia_search,
+    "image_search": handle_image_search,
+    # TriStar Integration
+    "tristar_models": handle_tristar_models,
+    "tristar_init": handle_tristar_init,
+    "tristar_memory_store": handle_tristar_memory_store,
+    "tristar_memory_search": handle_tristar_memory_search,
+    # Codebase Access
+    "codebase_structure": handle_codebase_structure,
+    "codebase_file": handle_codebase_file,
+    "codebase_search": handle_codebase_search,
+    "codebase_routes": handle_codebase_routes,
+    "codebase_services": handle_codebase_services,
+    "codebase_edit": handle_codebase_edit,
+    "codebase_create": handle_codebase_create,
+    "codebase_backup": handle_codebase_backup,
+    # CLI Agents
+    "cli-agents_list": handle_cli_agents_list,
+    "cli-agents_get": handle_cli_agents_get,
+    "cli-agents_start": handle_cli_agents_start,
+    "cli-agents_stop": handle_cli_agents_stop,
+    "cli-agents_restart": handle_cli_agents_restart,
+    "cli-agents_call": handle_cli_agents_call,
+    "cli-agents_broadcast": handle_cli_agents_broadcast,
+    "cli-agents_output": handle_cli_agents_output,
+    "cli-agents_stats": handle_cli_agents_stats,
+    # System & Compatibility
+    "check_compatibility": handle_check_compatibility,
+    "debug_mcp_request": handle_debug_mcp_request,
+    "restart_backend": handle_restart_backend,
+    "restart_agent": handle_restart_agent,
+    "execute_mcp_tool": handle_execute_mcp_tool,
+}
+
+# Service handler dicts merged into tools/call, looked up by module on every
+# compile so that a hot reload of the service picks up its new handlers.
+_TOOL_HANDLER_SOURCES = [
+    ("app.services.ollama_mcp", "OLLAMA_HANDLERS", OLLAMA_HANDLERS),
+    ("app.services.tristar_mcp", "TRISTAR_HANDLERS", TRISTAR_HANDLERS),
+    ("app.services.gemini_access", "GEMINI_ACCESS_HANDLERS", GEMINI_ACCESS_HANDLERS),
+    ("app.services.command_queue", "QUEUE_HANDLERS", QUEUE_HANDLERS),
+    ("app.routes.mesh", "MESH_HANDLERS", MESH_HANDLERS),
+    ("app.services.mcp_filter", "MESH_FILTER_HANDLERS", MESH_FILTER_HANDLERS),
+    ("app.services.init_service", "INIT_HANDLERS", INIT_HANDLERS),
+    ("app.services.gemini_model_init", "MODEL_INIT_HANDLERS", MODEL_INIT_HANDLERS),
+    ("app.services.agent_bootstrap", "BOOTSTRAP_HANDLERS", BOOTSTRAP_HANDLERS),
+    ("app.mcp.adaptive_code", "ADAPTIVE_CODE_HANDLERS", ADAPTIVE_CODE_HANDLERS),
+    ("app.mcp.adaptive_code_v4", "ADAPTIVE_CODE_V4_HANDLERS", ADAPTIVE_CODE_V4_HANDLERS),  # Enhanced V4 handlers
+    ("app.services.llm_compat", "LLM_COMPAT_HANDLERS", LLM_COMPAT_HANDLERS),
+    ("app.services.system_control", "HOTRELOAD_HANDLERS", HOTRELOAD_HANDLERS),
+    ("app.services.memory_index", "MEMORY_INDEX_HANDLERS", MEMORY_INDEX_HANDLERS),
+    # === NEW CLIENT-SERVER ARCHITECTURE HANDLERS ===
+    ("app.services.api_vault", "VAULT_HANDLERS", VAULT_HANDLERS),
+    ("app.services.chat_router", "CHAT_ROUTER_HANDLERS", CHAT_ROUTER_HANDLERS),
+    ("app.services.task_spawner", "TASK_SPAWNER_HANDLERS", TASK_SPAWNER_HANDLERS),
+]
+
+
+def _build_tool_call_map() -> Dict[str, Handler]:
+    tool_map = dict(TOOL_CALL_HANDLERS)
+    for module_name, attr, fallback in _TOOL_HANDLER_SOURCES:
+        module = sys.modules.get(module_name)
+        tool_map.update(getattr(module, attr, fallback) if module else fallback)
+    return tool_map
+
+
+def _recompile_tool_dispatch(result=None) -> None:
+    """Hot-reload listener: rebuild the dispatch table after a module reload."""
+    if result is not None and not result.success:
+        return
+    try:
+        tool_dispatch.compile()
+    except Exception as exc:
+        mcp_logger.error(f"Tool dispatch recompile failed: {exc}")
+
+
+tool_dispatch.compile(DispatchSources(
+    tool_map=_build_tool_call_map,
+    alias_reverse=resolve_alias_reverse,
+    alias_names=lambda: TOOL_ALIASES.values(),
+    v4_resolve=handler_registry.resolve,
+    v4_names=lambda: list(handler_registry.names()) + list(TOOL_ALIASES),
+    v4_call=call_v4_tool,
+))
+hot_reloader.add_reload_listener("mcp_tool_dispatch", _recompile_tool_dispatch)
+
+
 from fastapi.responses import StreamingResponse
 import uuid
 import asyncio
@@ -3704,6 +3757,11 @@ async def mcp_messages_handler(request: Request, session_id: Optional[str] = Non
         if method == "notifications/initialized":
             return JSONResponse(content={"jsonrpc": "2.0", "result": {}, "id": req_id})
 
+        if method == "tools/call":
+            limited = await _tool_call_rate_limit(request, req_id)
+            if limited:
+                return JSONResponse(content=limited, status_code=429)
+
         # Handle other MCP methods through standard handlers
         handler = MCP_HANDLERS.get(method)
         # Try v4 handlers as fallback
@@ -3785,9 +3843,15 @@ async def mcp_messages_handler(request: Request, session_id: Optional[str] = Non
 async def _process_mcp_request(
     body: Dict[str, TypingAny],
     request: Request,
-    session_id: Optional[str] = None
+    session_id: Optional[str] = None,
+    charge_rate_limit: bool = True
 ) -> Dict[str, TypingAny]:
-    """Process a single JSON-RPC request and return the response."""
+    """
+    Process a single JSON-RPC request and return the response.
+
+    With charge_rate_limit=False a tools/call is not charged against the
+    client's limit; batches charge all their calls up front.
+    """
     import time as _time
     from ..utils.triforce_logging import multi_logger
 
@@ -3847,6 +3911,11 @@ async def _process_mcp_request(
         await multi_logger.log_mcp(method, params, result, latency_ms)
         return {"jsonrpc": "2.0", "result": result, "id": req_id}
 
+    if method == "tools/call" and charge_rate_limit:
+        limited = await _tool_call_rate_limit(request, req_id)
+        if limited:
+            return limited
+
     # Find handler
     handler = MCP_HANDLERS.get(method)
     # Compatibility fallback
@@ -3885,6 +3954,81 @@ async def _process_mcp_request(
         }
 
 
+# Batch elements run concurrently, bounded per connection
+MCP_BATCH_CONCURRENCY = 8
+MCP_BATCH_ITEM_TIMEOUT = 120.0  # seconds per element
+
+
+def _batch_budget(session_id: Optional[str]) -> asyncio.Semaphore:
+    """
+    Concurrency budget for a batch.
+
+    Sessions share one budget across their connections. Without a session the
+    budget belongs to the request, i.e. to the connection it arrived on.
+    """
+    session = _mcp_sessions.get(session_id) if session_id else None
+    if session is None:
+        return asyncio.Semaphore(MCP_BATCH_CONCURRENCY)
+    if "batch_slots" not in session:
+        session["batch_slots"] = asyncio.Semaphore(MCP_BATCH_CONCURRENCY)
+    return session["batch_slots"]
+
+
+async def _process_mcp_batch(
+    items: List[TypingAny],
+    request: Request,
+    session_id: Optional[str] = None
+) -> List[Dict[str, TypingAny]]:
+    """
+    Process a JSON-RPC batch concurrently.
+
+    Responses keep the order of the batch and carry the id of their request.
+    Notifications (no "id") produce no response. A failing or timed-out
+    element only yields an error response for that element.
+    """
+    slots = _batch_budget(session_id)
+
+    # One rate-limit charge for all tools/call elements, so a batch is
+    # accepted or refused as a whole
+    tool_calls = sum(1 for item in items if isinstance(item, dict) and item.get("method") == "tools/call")
+    limited = await _tool_call_rate_limit(request, None, cost=tool_calls) if tool_calls else None
+
+    async def run(item: TypingAny) -> Optional[Dict[str, TypingAny]]:
+        if isinstance(item, dict) and limited and item.get("method") == "tools/call":
+            return None if "id" not in item else {**limited, "id": item.get("id")}
+        if not isinstance(item, dict):
+            return {
+                "jsonrpc": "2.0",
+                "error": {"code": -32600, "message": "Invalid Request", "data": "batch element must be an object"},
+                "id": None
+            }
+        is_notification = "id" not in item and bool(item.get("method"))
+        req_id = item.get("id")
+        async with slots:
+            try:
+                response = await asyncio.wait_for(
+                    _process_mcp_request(item, request, session_id, charge_rate_limit=False),
+                    timeout=MCP_BATCH_ITEM_TIMEOUT
+                )
+            except asyncio.TimeoutError:
+                response = {
+                    "jsonrpc": "2.0",
+                    "error": {"code": -32000, "message": "Request timed out", "data": f"exceeded {MCP_BATCH_ITEM_TIMEOUT:.0f}s"},
+                    "id": req_id
+                }
+            except Exception as e:
+                logger.exception("MCP batch element %r failed", item.get("method"))
+                response = {
+                    "jsonrpc": "2.0",
+                    "error": {"code": -32603, "message": "Internal error", "data": str(e)},
+                    "id": req_id
+                }
+        return None if is_notification else response
+
+    results = await asyncio.gather(*(run(item) for item in items))
+    return [response for response in results if response is not None]
+
+
 @router.post("/mcp", tags=["MCP"], summary="Unified MCP endpoint (Streamable HTTP + Legacy)")
 @router.post("/mcp/", tags=["MCP"], summary="Unified MCP endpoint (Streamable HTTP + Legacy)")
 async def mcp_unified_endpoint(request: Request):
@@ -3938,11 +4082,12 @@ async def mcp_unified_endpoint(request: Request):
 
     # Handle batch requests (JSON array)
     if isinstance(body, list):
-        responses = []
-        for item in body:
-            response = await _process_mcp_request(item, request, session_id)
-            if response is not None:  # Skip notification responses
-                responses.append(response)
+        if not body:
+            return JSONResponse(
+                content={"jsonrpc": "2.0", "error": {"code": -32600, "message": "Invalid Request", "data": "empty batch"}, "id": None},
+                status_code=400
+            )
+        responses = await _process_mcp_batch(body, request, session_id)
 
         if not responses:
             return JSONResponse(status_code=202)  # All notifications, no response needed
@@ -68,6 +68,7 @@ from ..utils.mcp_auth import (
     _extract_basic_auth,
     _safe_compare,
 )
+from ..utils.http_client import http_clients
 
 router = APIRouter(tags=["MCP Remote Server"])
 
@@ -152,8 +153,7 @@ async def auto_authorize(request: Request):
         callback_url = f"{redirect_uri}?{urlencode(callback_params)}"
 
         # Perform the callback (HIT the CLI tool's local server)
-        import httpx
-        async with httpx.AsyncClient(timeout=5.0) as client:
+        async with http_clients.client("default", timeout=5.0) as client:
             # CLI tools usually expect a GET request to their callback
             await client.get(callback_url)
 
@@ -30,6 +30,7 @@ from ..services.mesh_coordinator import (
     TaskPhase,
     MeshAgent,
 )
+from ..utils.http_client import http_clients
 
 router = APIRouter(prefix="/mesh", tags=["Mesh AI"])
 
@@ -532,8 +533,8 @@ async def _get_ollama(session, ip):
     except: return []
 
 async def get_mesh_resources(fmt="summary"):
-    import aiohttp, asyncio
-    async with aiohttp.ClientSession(connector=aiohttp.TCPConnector(limit=10)) as s:
+    import asyncio
+    async with http_clients.session("mesh") as s:
         nodes = await asyncio.gather(*[_check_node(s, n, c) for n, c in FEDERATION_NODES.items()])
         ollama = await asyncio.gather(*[_get_ollama(s, c["ip"]) for c in FEDERATION_NODES.values()])
     for i, n in enumerate(nodes): n["ollama_models"] = ollama[i]
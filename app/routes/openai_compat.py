@@ -6,12 +6,16 @@ from fastapi_limiter.depends import RateLimiter
 
 from ..services.openai_compat import (
     OpenAIChatCompletionRequest,
+    OpenAIEmbeddingRequest,
     create_chat_completion,
+    create_embeddings,
     stream_chat_completion,
 )
 from ..services.model_registry import registry
 
 router = APIRouter(tags=["openai-compat"])
+# /v1/embeddings für Clients, die den OpenAI-Pfad ohne /openai-Präfix erwarten
+embeddings_router = APIRouter(tags=["openai-compat"])
 
 
 @router.get("/")
@@ -20,7 +24,7 @@ async def get_openai_metadata():
     return {
         "object": "api",
         "version": "v1",
-        "endpoints": ["/models", "/chat/completions"]
+        "endpoints": ["/models", "/chat/completions", "/embeddings"]
     }
 
 
@@ -112,4 +116,17 @@ async def openai_chat_completions_root(payload: OpenAIChatCompletionRequest):
     """Alternative endpoint at /v1/openai for compatibility."""
     if payload.stream:
         return await stream_chat_completion(payload)
-    return await create_chat_completion(payload)
\ No newline at end of file
+    return await create_chat_completion(payload)
+
+
+@router.post(
+    "/embeddings",
+    dependencies=[Depends(RateLimiter(times=20, seconds=10))],
+)
+@embeddings_router.post(
+    "/embeddings",
+    dependencies=[Depends(RateLimiter(times=20, seconds=10))],
+)
+async def openai_embeddings(payload: OpenAIEmbeddingRequest):
+    """OpenAI-kompatible Embeddings, gebatcht und über den Vektor-Cache."""
+    return await create_embeddings(payload)
@@ -1,15 +1,25 @@
 """
-Performance Monitor v2.0
+Performance Monitor v3.0
 Redis-basiertes Latenz-Tracking für alle Endpoints und LLM-Calls.
 Shared across all Uvicorn workers.
+
+Messungen werden im Prozess gepuffert und periodisch per Pipeline an Redis
+geschrieben (redis.asyncio), der Request-Pfad macht also keinen Redis-Roundtrip.
+Latenzen landen in einer mergebaren DDSketch-Struktur statt in Listen.
 """
-from fastapi import APIRouter, Request
+from fastapi import APIRouter
 from fastapi.responses import JSONResponse
-from typing import Optional
+from typing import Dict, List, Optional
 from time import perf_counter
-import statistics
-import json
-import redis
+import asyncio
+import logging
+import math
+import redis.asyncio as aioredis
+
+from ..config import get_settings
+from ..utils.request_pipeline import PipelineStage, RequestContext
+
+logger = logging.getLogger("ailinux.perf_monitor")
 
 router = APIRouter(prefix="/perf", tags=["Performance Monitor"])
 
@@ -18,7 +28,79 @@ router = APIRouter(prefix="/perf", tags=["Performance Monitor"])
 # ============================================================================
 
 REDIS_PREFIX = "perf:"
-MAX_LATENCIES = 100  # Letzte 100 Messungen behalten
+KEY_TTL = 86400           # 24h
+FLUSH_INTERVAL = 1.0      # Sekunden zwischen Batch-Flushes
+MAX_PENDING_KEYS = 5000   # Schutz gegen unbegrenzte Pfad-Kardinalität
+
+
+class LatencySketch:
+    """
+    DDSketch mit relativer Genauigkeit ``alpha``.
+
+    Werte werden logarithmischen Buckets zugeordnet; Quantile haben einen
+    relativen Fehler <= alpha. Bucket-Zähler sind additiv und lassen sich
+    daher per HINCRBY über alle Worker hinweg in Redis mergen.
+    """
+
+    ALPHA = 0.01
+    GAMMA = (1 + ALPHA) / (1 - ALPHA)
+    LOG_GAMMA = math.log(GAMMA)
+    MIN_VALUE = 0.01  # ms, alles darunter landet in Bucket 0
+
+    def __init__(self, bins: Optional[Dict[int, int]] = None):
+        self.bins: Dict[int, int] = dict(bins or {})
+
+    @classmethod
+    def index(cls, value: float) -> int:
+        if value <= cls.MIN_VALUE:
+            return 0
+        return max(1, math.ceil(math.log(value / cls.MIN_VALUE) / cls.LOG_GAMMA))
+
+    @classmethod
+    def value(cls, index: int) -> float:
+        if index <= 0:
+            return cls.MIN_VALUE
+        return cls.MIN_VALUE * 2 * cls.GAMMA ** index / (cls.GAMMA + 1)
+
+    def add(self, value: float) -> None:
+        idx = self.index(value)
+        self.bins[idx] = self.bins.get(idx, 0) + 1
+
+    @property
+    def count(self) -> int:
+        return sum(self.bins.values())
+
+    def quantile(self, q: float) -> Optional[float]:
+        total = self.count
+        if not total:
+            return None
+        rank = q * (total - 1)
+        seen = 0
+        for idx in sorted(self.bins):
+            seen += self.bins[idx]
+            if seen > rank:
+                return self.value(idx)
+        return self.value(max(self.bins))
+
+    @classmethod
+    def from_redis(cls, data: Dict[str, str]) -> "LatencySketch":
+        return cls({int(k): int(v) for k, v in data.items()})
+
+
+class _PendingStats:
+    """Noch nicht geflushte Messungen für einen Key."""
+
+    __slots__ = ("type", "name", "calls", "errors", "sum_ms", "last_ms", "sketch")
+
+    def __init__(self, type: str, name: str):
+        self.type = type
+        self.name = name
+        self.calls = 0
+        self.errors = 0
+        self.sum_ms = 0.0
+        self.last_ms = 0.0
+        self.sketch = LatencySketch()
+
 
 class RedisPerfMonitor:
     """Redis-basierter Performance Monitor - Shared across Workers."""
@@ -32,26 +114,34 @@ class RedisPerfMonitor:
         return cls._instance
     
     def _init(self):
-        self._redis: Optional[redis.Redis] = None
+        self._redis: Optional[aioredis.Redis] = None
         self.enabled: bool = True
+        self._pending: Dict[str, _PendingStats] = {}
+        self._flush_task: Optional[asyncio.Task] = None
+        self._flush_lock: Optional[asyncio.Lock] = None
+        self.dropped = 0
+        self.flushes = 0
     
     @property
-    def redis(self) -> redis.Redis:
+    def redis(self) -> aioredis.Redis:
         if self._redis is None:
-            self._redis = redis.Redis(host='localhost', port=6379, db=0, decode_responses=True)
+            self._redis = aioredis.from_url(get_settings().redis_url, decode_responses=True)
         return self._redis
     
     def _key(self, type: str, name: str) -> str:
         # Sanitize name for Redis key
         safe_name = name.replace(" ", "_").replace("/", "-")
         return f"{REDIS_PREFIX}{type}:{safe_name}"
+
+    def _index_key(self, type: str) -> str:
+        return f"{REDIS_PREFIX}index:{type}"
     
     def record_endpoint(self, path: str, method: str, latency_ms: float, error: bool = False):
         if not self.enabled:
             return
         try:
             key = self._key("endpoint", f"{method}_{path}")
-            self._record(key, f"{method} {path}", latency_ms, error)
+            self._record(key, "endpoint", f"{method} {path}", latency_ms, error)
         except Exception:
             pass  # Fail silently
     
@@ -60,78 +150,173 @@ class RedisPerfMonitor:
             return
         try:
             key = self._key("model", model_id)
-            self._record(key, model_id, latency_ms, error)
+            self._record(key, "model", model_id, latency_ms, error)
         except Exception:
             pass  # Fail silently
     
-    def _record(self, key: str, name: str, latency_ms: float, error: bool):
-        pipe = self.redis.pipeline()
-        # Increment counters
-        pipe.hincrby(key, "calls", 1)
+    def _record(self, key: str, type: str, name: str, latency_ms: float, error: bool):
+        """Puffert eine Messung im Prozess (kein I/O)."""
+        pending = self._pending.get(key)
+        if pending is None:
+            if len(self._pending) >= MAX_PENDING_KEYS:
+                self.dropped += 1
+                return
+            pending = self._pending[key] = _PendingStats(type, name)
+        pending.calls += 1
         if error:
-            pipe.hincrby(key, "errors", 1)
-        # Store name
-        pipe.hset(key, "name", name)
-        # Add latency to list (capped)
-        lat_key = f"{key}:latencies"
-        pipe.rpush(lat_key, round(latency_ms, 2))
-        pipe.ltrim(lat_key, -MAX_LATENCIES, -1)
-        # Set expiry (24h)
-        pipe.expire(key, 86400)
-        pipe.expire(lat_key, 86400)
-        pipe.execute()
-    
-    def _get_stats(self, key: str) -> Optional[dict]:
+            pending.errors += 1
+        pending.sum_ms += latency_ms
+        pending.last_ms = latency_ms
+        pending.sketch.add(latency_ms)
+        self._ensure_flusher()
+
+    # ------------------------------------------------------------------
+    # Background flush
+    # ------------------------------------------------------------------
+
+    def _ensure_flusher(self) -> None:
+        if self._flush_task is not None and not self._flush_task.done():
+            return
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return  # Kein Event-Loop (Sync-Kontext) - nächster Async-Call startet den Flusher
+        self._flush_task = loop.create_task(self._flush_loop())
+
+    async def _flush_loop(self) -> None:
+        while True:
+            await asyncio.sleep(FLUSH_INTERVAL)
+            try:
+                await self.flush()
+            except Exception as e:
+                logger.debug(f"Perf flush failed: {e}")
+
+    async def flush(self) -> None:
+        """Schreibt alle gepufferten Messungen in einem Pipeline-Batch nach Redis."""
+        if self._flush_lock is None:
+            self._flush_lock = asyncio.Lock()
+        async with self._flush_lock:
+            if not self._pending:
+                return
+            pending, self._pending = self._pending, {}
+
+            pipe = self.redis.pipeline(transaction=False)
+            for key, stats in pending.items():
+                sketch_key = f"{key}:sketch"
+                pipe.hincrby(key, "calls", stats.calls)
+                if stats.errors:
+                    pipe.hincrby(key, "errors", stats.errors)
+                pipe.hincrbyfloat(key, "sum_ms", round(stats.sum_ms, 3))
+                pipe.hset(key, mapping={"name": stats.name, "last_ms": round(stats.last_ms, 2)})
+                for idx, count in stats.sketch.bins.items():
+                    pipe.hincrby(sketch_key, str(idx), count)
+                pipe.sadd(self._index_key(stats.type), key)
+                # Set expiry (24h)
+                pipe.expire(key, KEY_TTL)
+                pipe.expire(sketch_key, KEY_TTL)
+                pipe.expire(self._index_key(stats.type), KEY_TTL)
+            await pipe.execute()
+            self.flushes += 1
+
+    async def start(self) -> None:
+        """Startet den Flusher (aus dem App-Lifespan)."""
+        self._ensure_flusher()
+
+    async def stop(self) -> None:
+        """Stoppt den Flusher und schreibt verbleibende Messungen."""
+        if self._flush_task is not None:
+            self._flush_task.cancel()
+            try:
+                await self._flush_task
+            except (asyncio.CancelledError, Exception):
+                pass
+            self._flush_task = None
         try:
-            data = self.redis.hgetall(key)
-            if not data:
-                return None
-            
-            lat_key = f"{key}:latencies"
-            latencies = [float(x) for x in self.redis.lrange(lat_key, 0, -1)]
-            
-            result = {
-                "name": data.get("name", "unknown"),
-                "calls": int(data.get("calls", 0)),
-                "errors": int(data.get("errors", 0)),
-                "latency": None
+            await self.flush()
+        except Exception as e:
+            logger.debug(f"Final perf flush failed: {e}")
+        if self._redis is not None:
+            await self._redis.aclose()
+            self._redis = None
+
+    # ------------------------------------------------------------------
+    # Read path
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def _build_stats(data: Dict[str, str], sketch_data: Dict[str, str]) -> dict:
+        calls = int(data.get("calls", 0))
+        result = {
+            "name": data.get("name", "unknown"),
+            "calls": calls,
+            "errors": int(data.get("errors", 0)),
+            "latency": None
+        }
+
+        sketch = LatencySketch.from_redis(sketch_data)
+        if calls and sketch.bins:
+            result["latency"] = {
+                "current_ms": round(float(data.get("last_ms", 0.0)), 2),
+                "avg_ms": round(float(data.get("sum_ms", 0.0)) / calls, 2),
+                "min_ms": round(sketch.value(min(sketch.bins)), 2),
+                "max_ms": round(sketch.value(max(sketch.bins)), 2),
+                "p50_ms": round(sketch.quantile(0.5), 2),
+                "p95_ms": round(sketch.quantile(0.95), 2),
+                "p99_ms": round(sketch.quantile(0.99), 2),
             }
-            
-            if latencies:
-                sorted_lat = sorted(latencies)
-                result["latency"] = {
-                    "current_ms": round(latencies[-1], 2),
-                    "avg_ms": round(statistics.mean(latencies), 2),
-                    "min_ms": round(min(latencies), 2),
-                    "max_ms": round(max(latencies), 2),
-                    "p95_ms": round(sorted_lat[int(len(sorted_lat) * 0.95)] if len(sorted_lat) >= 20 else max(latencies), 2),
-                }
-            
-            return result
+
+        return result
+
+    async def _get_many(self, keys: List[str]) -> List[Optional[dict]]:
+        if not keys:
+            return []
+        pipe = self.redis.pipeline(transaction=False)
+        for key in keys:
+            pipe.hgetall(key)
+            pipe.hgetall(f"{key}:sketch")
+        raw = await pipe.execute()
+        return [
+            self._build_stats(raw[i], raw[i + 1]) if raw[i] else None
+            for i in range(0, len(raw), 2)
+        ]
+
+    async def _get_stats(self, key: str) -> Optional[dict]:
+        try:
+            return (await self._get_many([key]))[0]
         except Exception:
             return None
     
-    def get_model_latency(self, model_id: str) -> Optional[dict]:
+    async def get_model_latency(self, model_id: str) -> Optional[dict]:
         """Holt aktuelle Latenz für ein Model (für Chat-Anzeige)."""
         key = self._key("model", model_id)
-        stats = self._get_stats(key)
+        stats = await self._get_stats(key)
         return stats.get("latency") if stats else None
     
-    def _get_all_stats(self, type: str) -> list:
+    async def _get_all_stats(self, type: str) -> list:
         try:
-            pattern = f"{REDIS_PREFIX}{type}:*"
-            keys = [k for k in self.redis.keys(pattern) if not k.endswith(":latencies")]
-            return [s for s in (self._get_stats(k) for k in keys) if s]
+            index_key = self._index_key(type)
+            keys = sorted(await self.redis.smembers(index_key))
+            stats = await self._get_many(keys)
+            stale = [key for key, s in zip(keys, stats) if s is None]
+            if stale:
+                # Abgelaufene Keys aus dem Index entfernen
+                await self.redis.srem(index_key, *stale)
+            return [s for s in stats if s]
         except Exception:
             return []
     
-    def get_summary(self) -> dict:
-        endpoints = self._get_all_stats("endpoint")
-        models = self._get_all_stats("model")
+    async def get_summary(self) -> dict:
+        endpoints = await self._get_all_stats("endpoint")
+        models = await self._get_all_stats("model")
         
         return {
             "enabled": self.enabled,
             "storage": "redis",
+            "buffer": {
+                "pending_keys": len(self._pending),
+                "dropped": self.dropped,
+                "flushes": self.flushes,
+            },
             "endpoints": {
                 "count": len(endpoints),
                 "top_slowest": sorted(
@@ -146,11 +331,18 @@ class RedisPerfMonitor:
             }
         }
     
-    def reset(self):
+    async def reset(self):
+        self._pending.clear()
         try:
-            keys = self.redis.keys(f"{REDIS_PREFIX}*")
+            keys: List[str] = []
+            for type in ("endpoint", "model"):
+                index_key = self._index_key(type)
+                members = await self.redis.smembers(index_key)
+                keys.extend(members)
+                keys.extend(f"{key}:sketch" for key in members)
+                keys.append(index_key)
             if keys:
-                self.redis.delete(*keys)
+                await self.redis.delete(*keys)
         except Exception:
             pass
 
@@ -197,59 +389,46 @@ async def track_model_call(model_id: str, coro):
 
 
 # ============================================================================
-# Middleware für Request-Timing (optional einbinden in main.py)
+# Request-Timing (Stage der Request-Pipeline, siehe utils/request_pipeline.py)
 # ============================================================================
 
-async def perf_middleware(request: Request, call_next):
-    """FastAPI Middleware für Endpoint-Timing."""
-    if not monitor.enabled:
-        return await call_next(request)
-    
-    path = request.url.path
-    
-    # Skip: Unwichtige/hochfrequente Endpoints
-    SKIP_PREFIXES = (
-        "/health",
-        "/docs", 
-        "/openapi",
-        "/favicon",
-        "/perf",           # Eigene Perf-Endpoints
-        "/v1/models",      # Model-Listen (häufig gepollt)
-        "/v1/mcp/status",  # MCP Status-Polling
-        "/v1/triforce/health",
-        "/v1/tristar/health",
-    )
-    
-    SKIP_CONTAINS = (
-        "/models/list",
-        "/list_models",
-        "status",
-        "health",
-    )
-    
-    # Nur relevante Calls tracken
-    should_skip = (
+# Skip: Unwichtige/hochfrequente Endpoints
+SKIP_PREFIXES = (
+    "/health",
+    "/docs", 
+    "/openapi",
+    "/favicon",
+    "/perf",           # Eigene Perf-Endpoints
+    "/v1/models",      # Model-Listen (häufig gepollt)
+    "/v1/mcp/status",  # MCP Status-Polling
+    "/v1/triforce/health",
+    "/v1/tristar/health",
+)
+
+SKIP_CONTAINS = (
+    "/models/list",
+    "/list_models",
+    "status",
+    "health",
+)
+
+
+def should_track(path: str, method: str) -> bool:
+    """Nur relevante Calls tracken"""
+    return not (
         path.startswith(SKIP_PREFIXES) or
         any(s in path for s in SKIP_CONTAINS) or
-        request.method == "OPTIONS"
+        method == "OPTIONS"
     )
-    
-    if should_skip:
-        return await call_next(request)
-    
-    start = perf_counter()
-    error = False
-    try:
-        response = await call_next(request)
-        if response.status_code >= 400:
-            error = True
-        return response
-    except Exception as e:
-        error = True
-        raise
-    finally:
-        latency_ms = (perf_counter() - start) * 1000
-        monitor.record_endpoint(path, request.method, latency_ms, error)
+
+
+class PerfMonitorStage(PipelineStage):
+    """Endpoint-Latenz-Tracking für die Request-Pipeline."""
+
+    def on_finish(self, ctx: RequestContext):
+        if monitor.enabled and should_track(ctx.path, ctx.method):
+            error = ctx.error is not None or ctx.status_code >= 400
+            monitor.record_endpoint(ctx.path, ctx.method, ctx.latency * 1000, error)
 
 
 # ============================================================================
@@ -259,7 +438,7 @@ async def perf_middleware(request: Request, call_next):
 @router.get("/status")
 async def perf_status():
     """Basis-Status des Performance Monitors."""
-    summary = monitor.get_summary()
+    summary = await monitor.get_summary()
     return {
         "status": "ok",
         "enabled": monitor.enabled,
@@ -272,13 +451,13 @@ async def perf_status():
 @router.get("/summary")
 async def perf_summary():
     """Vollständige Performance-Übersicht."""
-    return monitor.get_summary()
+    return await monitor.get_summary()
 
 
 @router.get("/model/{model_id:path}")
 async def perf_model(model_id: str):
     """Latenz-Stats für ein spezifisches Model."""
-    latency = monitor.get_model_latency(model_id)
+    latency = await monitor.get_model_latency(model_id)
     if latency:
         return {"model": model_id, "latency": latency}
     return {"model": model_id, "latency": None, "message": "Noch keine Daten"}
@@ -288,14 +467,14 @@ async def perf_model(model_id: str):
 async def perf_models():
     """Alle Model-Latenzen."""
     return {
-        "models": monitor._get_all_stats("model")
+        "models": await monitor._get_all_stats("model")
     }
 
 
 @router.get("/endpoints")
 async def perf_endpoints():
     """Alle Endpoint-Latenzen."""
-    endpoints = monitor._get_all_stats("endpoint")
+    endpoints = await monitor._get_all_stats("endpoint")
     return {
         "endpoints": sorted(
             [e for e in endpoints if e.get("latency")],
@@ -308,7 +487,7 @@ async def perf_endpoints():
 @router.post("/reset")
 async def perf_reset():
     """Stats zurücksetzen."""
-    monitor.reset()
+    await monitor.reset()
     return {"status": "reset", "message": "Alle Performance-Daten gelöscht"}
 
 
@@ -326,4 +505,4 @@ async def perf_toggle(enabled: Optional[bool] = None):
 # Export für andere Module
 # ============================================================================
 
-__all__ = ["router", "monitor", "ModelTimer", "track_model_call", "perf_middleware"]
+__all__ = ["router", "monitor", "ModelTimer", "track_model_call", "PerfMonitorStage", "should_track"]
@@ -254,10 +254,10 @@ async def triforce_init(request: InitRequest) -> Dict[str, Any]:
         return {
             "status": "online",
             "version": "2.60",
-            "llm_mesh": get_llm_status(),
+            "llm_mesh": await get_llm_status(),
             "memory_stats": await memory_service.get_stats(),
             "circuit_breakers": circuit_registry.get_all_status(),
-            "rate_limits": rate_limiter.get_all_usage(),
+            "rate_limits": await rate_limiter.get_all_usage(),
             "timestamp": datetime.now(timezone.utc).isoformat()
         }
 
@@ -349,7 +349,7 @@ async def mesh_consensus(request: LLMConsensusRequest) -> Dict[str, Any]:
 async def mesh_status() -> Dict[str, Any]:
     """Get status of all LLMs in the mesh"""
     return {
-        "llms": get_llm_status(),
+        "llms": await get_llm_status(),
         "available": get_available_llms(),
         "models": MODEL_ALIASES,
         "timestamp": datetime.now(timezone.utc).isoformat()
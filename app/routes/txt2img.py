@@ -7,6 +7,7 @@ ComfyUI workflows for Stable Diffusion based image generation.
 
 from __future__ import annotations
 
+import asyncio
 import base64
 import json
 import logging
@@ -22,6 +23,7 @@ sys.path.append(os.getcwd())
 
 from app.config import get_settings
 from app.schemas.txt2img import ImageData, Txt2ImgRequest, Txt2ImgResponse
+from app.services.comfyui_tracker import get_comfyui_tracker
 from app.services.model_registry import registry
 import comfy_client
 
@@ -57,6 +59,7 @@ def get_comfy_client():
             username=settings.stable_diffusion_username,
             password=settings.stable_diffusion_password,
             timeout=settings.request_timeout,
+            tracker=get_comfyui_tracker(str(settings.comfyui_url)),
         )
     return _comfy_client
 
@@ -356,7 +359,26 @@ async def generate_image_stream(request: Txt2ImgRequest):
                 }
             )
 
-            result = await client.wait_for_result(prompt_id, max_wait=timeout)
+            # Forward ComfyUI progress events while waiting for the result
+            progress: asyncio.Queue = asyncio.Queue()
+            waiter = asyncio.create_task(
+                client.wait_for_result(prompt_id, max_wait=timeout, on_progress=progress.put_nowait)
+            )
+            next_event: Optional[asyncio.Task] = None
+            try:
+                while not waiter.done():
+                    next_event = asyncio.create_task(progress.get())
+                    done, _ = await asyncio.wait({waiter, next_event}, return_when=asyncio.FIRST_COMPLETED)
+                    if next_event in done:
+                        event = next_event.result()
+                        if not event.get("done"):
+                            yield _encode_event({"status": "progress", **event})
+                result = waiter.result()
+            finally:
+                # Also reached on client disconnect: leave no task behind
+                waiter.cancel()
+                if next_event is not None:
+                    next_event.cancel()
             images = await _collect_images(client, result, request.seed)
 
             if images:
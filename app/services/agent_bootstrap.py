@@ -23,11 +23,12 @@ import os
 import re
 import shutil
 import time
-from collections import defaultdict
 from dataclasses import dataclass, field
 from datetime import datetime, timezone
 from typing import Any, Callable, Dict, List, Optional, Set, Tuple
 
+from ..utils.rate_limit import SlidingWindow, TokenBucket, shared_limiter
+
 logger = logging.getLogger("ailinux.agent_bootstrap")
 
 
@@ -309,20 +310,24 @@ class AgentRateLimiter:
     - Per-Agent Limits
     - Burst Protection
     - Priorisierung
+
+    Zustand liegt im Shared Limiter, die Limits gelten daher über alle Worker:
+    Sliding Window pro Minute/Stunde, Token Bucket für Bursts.
     """
 
     def __init__(self, config: Dict[str, int] = None):
         self._config = config or RATE_LIMIT_CONFIG
-        self._buckets: Dict[str, Dict[str, Any]] = defaultdict(lambda: {
-            "tokens": self._config["burst"],
-            "last_update": time.time(),
-            "minute_count": 0,
-            "hour_count": 0,
-            "minute_reset": time.time(),
-            "hour_reset": time.time(),
-            "violations": 0,
-        })
-        self._lock = asyncio.Lock()
+        self._minute = SlidingWindow(self._config["per_minute"], 60)
+        self._hour = SlidingWindow(self._config["per_hour"], 3600)
+        self._burst = TokenBucket(
+            self._config["burst"],
+            self._config["burst"] / self._config["burst_window_seconds"],
+        )
+        self._agents: Set[str] = set()
+
+    @property
+    def _policies(self) -> Tuple[Any, ...]:
+        return (self._minute, self._hour, self._burst)
 
     async def check_rate_limit(self, agent_id: str, priority: str = "normal") -> Tuple[bool, Optional[str]]:
         """
@@ -339,67 +344,56 @@ class AgentRateLimiter:
         if priority == "critical":
             return True, None
 
-        async with self._lock:
-            bucket = self._buckets[agent_id]
-            now = time.time()
-
-            # Minute Counter Reset
-            if now - bucket["minute_reset"] > 60:
-                bucket["minute_count"] = 0
-                bucket["minute_reset"] = now
-
-            # Hour Counter Reset
-            if now - bucket["hour_reset"] > 3600:
-                bucket["hour_count"] = 0
-                bucket["hour_reset"] = now
-
-            # Token Bucket Refill
-            elapsed = now - bucket["last_update"]
-            refill = elapsed / self._config["burst_window_seconds"] * self._config["burst"]
-            bucket["tokens"] = min(self._config["burst"], bucket["tokens"] + refill)
-            bucket["last_update"] = now
-
-            # Check Limits
-            if bucket["minute_count"] >= self._config["per_minute"]:
-                bucket["violations"] += 1
-                return False, f"Rate limit exceeded: {self._config['per_minute']}/minute"
-
-            if bucket["hour_count"] >= self._config["per_hour"]:
-                bucket["violations"] += 1
-                return False, f"Rate limit exceeded: {self._config['per_hour']}/hour"
+        self._agents.add(agent_id)
+        result = await shared_limiter.acquire(f"agent:{agent_id}", *self._policies)
+        if result.allowed:
+            return True, None
 
-            if bucket["tokens"] < 1:
-                return False, "Burst limit exceeded, please slow down"
+        if result.policy is self._burst:
+            return False, "Burst limit exceeded, please slow down"
 
-            # Consume Token
-            bucket["tokens"] -= 1
-            bucket["minute_count"] += 1
-            bucket["hour_count"] += 1
+        await shared_limiter.incr(f"agent:{agent_id}:violations", 1, 86400)
+        if result.policy is self._minute:
+            return False, f"Rate limit exceeded: {self._config['per_minute']}/minute"
+        return False, f"Rate limit exceeded: {self._config['per_hour']}/hour"
 
-            return True, None
+    async def _agent_stats(self, agent_id: str) -> Dict[str, Any]:
+        key = f"agent:{agent_id}"
+        minute = await shared_limiter.peek(key, self._minute)
+        hour = await shared_limiter.peek(key, self._hour)
+        burst = await shared_limiter.peek(key, self._burst)
+        return {
+            "tokens": burst.limit - burst.current,
+            "minute_count": round(minute.current),
+            "hour_count": round(hour.current),
+            "violations": await shared_limiter.get(f"{key}:violations"),
+        }
 
-    def get_stats(self, agent_id: Optional[str] = None) -> Dict[str, Any]:
+    async def get_stats(self, agent_id: Optional[str] = None) -> Dict[str, Any]:
         """Gibt Rate Limit Stats zurück"""
         if agent_id:
-            bucket = self._buckets.get(agent_id, {})
+            stats = await self._agent_stats(agent_id)
             return {
                 "agent_id": agent_id,
-                "tokens_remaining": bucket.get("tokens", 0),
-                "minute_count": bucket.get("minute_count", 0),
-                "hour_count": bucket.get("hour_count", 0),
-                "violations": bucket.get("violations", 0),
+                "tokens_remaining": stats["tokens"],
+                "minute_count": stats["minute_count"],
+                "hour_count": stats["hour_count"],
+                "violations": stats["violations"],
             }
 
+        # Agents, die dieser Worker gesehen hat; die Zähler selbst sind shared
+        agents = {}
+        for aid in sorted(self._agents):
+            stats = await self._agent_stats(aid)
+            agents[aid] = {
+                "tokens": stats["tokens"],
+                "minute_count": stats["minute_count"],
+                "violations": stats["violations"],
+            }
         return {
-            "agents": {
-                aid: {
-                    "tokens": b["tokens"],
-                    "minute_count": b["minute_count"],
-                    "violations": b["violations"],
-                }
-                for aid, b in self._buckets.items()
-            },
+            "agents": agents,
             "config": self._config,
+            "limiter": shared_limiter.stats(),
         }
 
 
@@ -816,12 +810,12 @@ class AgentChatProcessor:
 
         return result
 
-    def get_stats(self) -> Dict[str, Any]:
+    async def get_stats(self) -> Dict[str, Any]:
         """Gibt Processing Stats zurück"""
         return {
             "outputs_processed": self._processed_count,
             "commands_extracted": self._command_count,
-            "rate_limiter": rate_limiter.get_stats(),
+            "rate_limiter": await rate_limiter.get_stats(),
         }
 
 
@@ -936,7 +930,7 @@ async def handle_process_agent_output(params: Dict[str, Any]) -> Dict[str, Any]:
 
 async def handle_rate_limit_stats(params: Dict[str, Any]) -> Dict[str, Any]:
     """Handle rate_limit_stats tool"""
-    return rate_limiter.get_stats(params.get("agent_id"))
+    return await rate_limiter.get_stats(params.get("agent_id"))
 
 
 async def handle_execution_log(params: Dict[str, Any]) -> Dict[str, Any]:
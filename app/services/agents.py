@@ -6,7 +6,7 @@ from typing import Any, Dict, Iterable, List, Optional
 from ..schemas import CrawlJobRequest
 from .crawler.manager import crawler_manager
 from .wordpress import wordpress_service
-import httpx
+from ..utils.http_client import http_clients
 
 
 @dataclass(slots=True)
@@ -224,7 +224,7 @@ async def invoke_tool(
         if not file_url:
             raise ValueError("file_url is required")
         
-        async with httpx.AsyncClient() as client:
+        async with http_clients.client("default", timeout=5.0) as client:
             response = await client.get(file_url)
             response.raise_for_status()
             file_content = response.content
@@ -21,9 +21,9 @@ API Docs: https://docs.anthropic.com/en/api/
 
 import os
 import json
-import httpx
 from typing import Dict, Any, Optional, List
 from datetime import datetime
+from ..utils.http_client import http_clients
 
 ANTHROPIC_API_URL = "https://api.anthropic.com/v1"
 ANTHROPIC_VERSION = "2023-06-01"
@@ -78,7 +78,7 @@ async def handle_anthropic_chat(params: Dict[str, Any]) -> Dict[str, Any]:
     if tools:
         payload["tools"] = tools
     
-    async with httpx.AsyncClient(timeout=120.0) as client:
+    async with http_clients.client("anthropic", timeout=120.0) as client:
         response = await client.post(
             f"{ANTHROPIC_API_URL}/messages",
             headers=_headers(),
@@ -111,7 +111,7 @@ async def handle_anthropic_vision(params: Dict[str, Any]) -> Dict[str, Any]:
         content.append({"type": "image", "source": {"type": "base64", "media_type": media_type, "data": image_base64}})
     content.append({"type": "text", "text": prompt})
     
-    async with httpx.AsyncClient(timeout=120.0) as client:
+    async with http_clients.client("anthropic", timeout=120.0) as client:
         response = await client.post(
             f"{ANTHROPIC_API_URL}/messages",
             headers=_headers(),
@@ -133,7 +133,7 @@ async def handle_anthropic_count_tokens(params: Dict[str, Any]) -> Dict[str, Any
     if system:
         payload["system"] = system
     
-    async with httpx.AsyncClient(timeout=30.0) as client:
+    async with http_clients.client("anthropic", timeout=30.0) as client:
         response = await client.post(
             f"{ANTHROPIC_API_URL}/messages/count_tokens",
             headers=_headers(),
@@ -147,7 +147,7 @@ async def handle_anthropic_count_tokens(params: Dict[str, Any]) -> Dict[str, Any
 
 async def handle_anthropic_models(params: Dict[str, Any]) -> Dict[str, Any]:
     """GET /v1/models - List all available Claude models"""
-    async with httpx.AsyncClient(timeout=30.0) as client:
+    async with http_clients.client("anthropic", timeout=30.0) as client:
         response = await client.get(f"{ANTHROPIC_API_URL}/models", headers=_headers())
         response.raise_for_status()
         return response.json()
@@ -156,7 +156,7 @@ async def handle_anthropic_models(params: Dict[str, Any]) -> Dict[str, Any]:
 async def handle_anthropic_model_get(params: Dict[str, Any]) -> Dict[str, Any]:
     """GET /v1/models/{model_id} - Get specific model details"""
     model_id = params.get("model_id")
-    async with httpx.AsyncClient(timeout=30.0) as client:
+    async with http_clients.client("anthropic", timeout=30.0) as client:
         response = await client.get(f"{ANTHROPIC_API_URL}/models/{model_id}", headers=_headers())
         response.raise_for_status()
         return response.json()
@@ -168,7 +168,7 @@ async def handle_anthropic_batch_create(params: Dict[str, Any]) -> Dict[str, Any
     """POST /v1/messages/batches - Create batch for async processing (50% cost reduction)"""
     requests = params.get("requests", [])  # List of {custom_id, params}
     
-    async with httpx.AsyncClient(timeout=60.0) as client:
+    async with http_clients.client("anthropic", timeout=60.0) as client:
         response = await client.post(
             f"{ANTHROPIC_API_URL}/messages/batches",
             headers=_headers(),
@@ -190,7 +190,7 @@ async def handle_anthropic_batch_list(params: Dict[str, Any]) -> Dict[str, Any]:
     if after_id:
         url += f"&after_id={after_id}"
     
-    async with httpx.AsyncClient(timeout=30.0) as client:
+    async with http_clients.client("anthropic", timeout=30.0) as client:
         response = await client.get(url, headers=_headers())
         response.raise_for_status()
         return response.json()
@@ -199,7 +199,7 @@ async def handle_anthropic_batch_list(params: Dict[str, Any]) -> Dict[str, Any]:
 async def handle_anthropic_batch_get(params: Dict[str, Any]) -> Dict[str, Any]:
     """GET /v1/messages/batches/{batch_id} - Get batch status"""
     batch_id = params.get("batch_id")
-    async with httpx.AsyncClient(timeout=30.0) as client:
+    async with http_clients.client("anthropic", timeout=30.0) as client:
         response = await client.get(
             f"{ANTHROPIC_API_URL}/messages/batches/{batch_id}",
             headers=_headers()
@@ -211,7 +211,7 @@ async def handle_anthropic_batch_get(params: Dict[str, Any]) -> Dict[str, Any]:
 async def handle_anthropic_batch_cancel(params: Dict[str, Any]) -> Dict[str, Any]:
     """POST /v1/messages/batches/{batch_id}/cancel - Cancel batch"""
     batch_id = params.get("batch_id")
-    async with httpx.AsyncClient(timeout=30.0) as client:
+    async with http_clients.client("anthropic", timeout=30.0) as client:
         response = await client.post(
             f"{ANTHROPIC_API_URL}/messages/batches/{batch_id}/cancel",
             headers=_headers()
@@ -223,7 +223,7 @@ async def handle_anthropic_batch_cancel(params: Dict[str, Any]) -> Dict[str, Any
 async def handle_anthropic_batch_results(params: Dict[str, Any]) -> Dict[str, Any]:
     """GET /v1/messages/batches/{batch_id}/results - Get batch results"""
     batch_id = params.get("batch_id")
-    async with httpx.AsyncClient(timeout=60.0) as client:
+    async with http_clients.client("anthropic", timeout=60.0) as client:
         response = await client.get(
             f"{ANTHROPIC_API_URL}/messages/batches/{batch_id}/results",
             headers=_headers()
@@ -256,7 +256,7 @@ async def handle_anthropic_file_upload(params: Dict[str, Any]) -> Dict[str, Any]
     else:
         return {"error": "No file provided"}
     
-    async with httpx.AsyncClient(timeout=60.0) as client:
+    async with http_clients.client("anthropic", timeout=60.0) as client:
         response = await client.post(
             f"{ANTHROPIC_API_URL}/files",
             headers={"x-api-key": _get_api_key(), "anthropic-version": ANTHROPIC_VERSION, "anthropic-beta": "files-api-2025-04-14"},
@@ -269,7 +269,7 @@ async def handle_anthropic_file_upload(params: Dict[str, Any]) -> Dict[str, Any]
 
 async def handle_anthropic_file_list(params: Dict[str, Any]) -> Dict[str, Any]:
     """GET /v1/files - List uploaded files"""
-    async with httpx.AsyncClient(timeout=30.0) as client:
+    async with http_clients.client("anthropic", timeout=30.0) as client:
         response = await client.get(
             f"{ANTHROPIC_API_URL}/files",
             headers=_headers("files-api-2025-04-14")
@@ -281,7 +281,7 @@ async def handle_anthropic_file_list(params: Dict[str, Any]) -> Dict[str, Any]:
 async def handle_anthropic_file_get(params: Dict[str, Any]) -> Dict[str, Any]:
     """GET /v1/files/{file_id} - Get file info"""
     file_id = params.get("file_id")
-    async with httpx.AsyncClient(timeout=30.0) as client:
+    async with http_clients.client("anthropic", timeout=30.0) as client:
         response = await client.get(
             f"{ANTHROPIC_API_URL}/files/{file_id}",
             headers=_headers("files-api-2025-04-14")
@@ -293,7 +293,7 @@ async def handle_anthropic_file_get(params: Dict[str, Any]) -> Dict[str, Any]:
 async def handle_anthropic_file_delete(params: Dict[str, Any]) -> Dict[str, Any]:
     """DELETE /v1/files/{file_id} - Delete file"""
     file_id = params.get("file_id")
-    async with httpx.AsyncClient(timeout=30.0) as client:
+    async with http_clients.client("anthropic", timeout=30.0) as client:
         response = await client.delete(
             f"{ANTHROPIC_API_URL}/files/{file_id}",
             headers=_headers("files-api-2025-04-14")
@@ -401,7 +401,7 @@ async def handle_anthropic_thinking(params):
     model = params.get("model", "claude-sonnet-4-5-20250929")
     budget = params.get("budget_tokens", 5000)
     
-    async with httpx.AsyncClient(timeout=180.0) as client:
+    async with http_clients.client("anthropic", timeout=180.0) as client:
         r = await client.post(f"{ANTHROPIC_API_URL}/messages",
             headers=_headers("interleaved-thinking-2025-05-14"),
             json={"model": model, "max_tokens": 8000,
@@ -422,7 +422,7 @@ async def handle_anthropic_cite(params):
     content = [{"type": "document", "source": {"type": "text", "media_type": "text/plain", "data": doc},
                 "title": params.get("title", "Doc"), "citations": {"enabled": True}},
                {"type": "text", "text": q}]
-    async with httpx.AsyncClient(timeout=120.0) as client:
+    async with http_clients.client("anthropic", timeout=120.0) as client:
         r = await client.post(f"{ANTHROPIC_API_URL}/messages", headers=_headers(),
             json={"model": params.get("model", "claude-haiku-4-5-20251001"), "max_tokens": 2000,
                   "messages": [{"role": "user", "content": content}]})
@@ -439,7 +439,7 @@ async def handle_anthropic_compare(params):
     models = params.get("models", ["claude-haiku-4-5-20251001", "claude-sonnet-4-5-20250929"])
     results = {}
     import time
-    async with httpx.AsyncClient(timeout=120.0) as client:
+    async with http_clients.client("anthropic", timeout=120.0) as client:
         for m in models:
             try:
                 t0 = time.time()
@@ -456,7 +456,7 @@ async def handle_anthropic_compare(params):
 async def handle_anthropic_cost_estimate(params):
     """Kosten-Schätzung"""
     text, model = params.get("text"), params.get("model", "claude-sonnet-4-5-20250929")
-    async with httpx.AsyncClient(timeout=30.0) as client:
+    async with http_clients.client("anthropic", timeout=30.0) as client:
         r = await client.post(f"{ANTHROPIC_API_URL}/messages/count_tokens", headers=_headers(),
             json={"model": model, "messages": [{"role": "user", "content": text}]})
         r.raise_for_status()
@@ -309,90 +309,103 @@ def _ensure_structure_prompt(messages: List[dict[str, str]]) -> List[dict[str, s
     return [{"role": "system", "content": STRUCTURE_PROMPT}] + messages
 
 
-async def _get_initial_response(
+async def _stream_with_fallback(
+    primary: AsyncGenerator[str, None],
+    messages: List[dict[str, str]],
+    temperature: Optional[float],
+    timeout: float,
+    provider_label: str,
+) -> AsyncGenerator[str, None]:
+    """Forward chunks from ``primary``; fall back to Ollama only if nothing was sent yet.
+
+    Once a chunk has reached the client, switching providers would splice two
+    different answers together, so mid-stream failures are re-raised instead.
+    """
+    started = False
+    try:
+        async for chunk in primary:
+            started = True
+            yield chunk
+    except Exception as exc:
+        if started:
+            logger.warning("%s failed mid-stream (%s), not falling back", provider_label, exc)
+            raise
+        async for chunk in _fallback_to_ollama(messages, temperature, timeout, provider_label, exc):
+            yield chunk
+
+
+async def _stream_provider(
     model: ModelInfo,
     request_model: str,
     messages: List[dict[str, str]],
     temperature: Optional[float],
     settings,
-) -> str:
-    chunks = []
+    *,
+    stream: bool = True,
+) -> AsyncGenerator[str, None]:
+    """Dispatch to the provider streamer and forward chunks as they arrive."""
     if model.provider == "ollama":
         async for chunk in _stream_ollama(
             request_model,
             messages,
             temperature=temperature,
-            stream=True,
+            stream=stream,
             timeout=int(settings.request_timeout),
         ):
-            chunks.append(chunk)
-    elif model.provider == "mistral":
+            yield chunk
+        return
+
+    if model.provider == "mistral":
         if not settings.mistral_api_key:
             raise api_error("Mistral support is not configured", status_code=503, code="mistral_unavailable")
-        try:
-            async for chunk in _stream_mistral(
-                request_model,
-                messages,
-                api_key=settings.mistral_api_key,
-                organisation_id=settings.mistral_organisation_id,
-                temperature=temperature,
-                stream=True,
-                timeout=int(settings.request_timeout),
-            ):
-                chunks.append(chunk)
-        except Exception as exc:
-            async for chunk in _fallback_to_ollama(messages, temperature, settings.request_timeout, "Mistral", exc):
-                chunks.append(chunk)
+        primary = _stream_mistral(
+            request_model,
+            messages,
+            api_key=settings.mistral_api_key,
+            organisation_id=settings.mistral_organisation_id,
+            temperature=temperature,
+            stream=stream,
+            timeout=int(settings.request_timeout),
+        )
+        label = "Mistral"
     elif model.provider == "gemini":
         if not settings.gemini_api_key:
             raise api_error("Gemini support is not configured", status_code=503, code="gemini_unavailable")
-        try:
-            async for chunk in _stream_gemini(
-                request_model,
-                messages,
-                api_key=settings.gemini_api_key,
-                temperature=temperature,
-                stream=True,
-                timeout=int(settings.request_timeout),
-            ):
-                chunks.append(chunk)
-        except Exception as exc:
-            async for chunk in _fallback_to_ollama(messages, temperature, settings.request_timeout, "Gemini", exc):
-                chunks.append(chunk)
+        primary = _stream_gemini(
+            request_model,
+            messages,
+            api_key=settings.gemini_api_key,
+            temperature=temperature,
+            stream=stream,
+            timeout=int(settings.request_timeout),
+        )
+        label = "Gemini"
     elif model.provider == "gpt-oss":
         if not settings.gpt_oss_api_key or not settings.gpt_oss_base_url:
             raise api_error("GPT-OSS support is not configured (missing API key or base URL)", status_code=503, code="gpt_oss_unavailable")
-        try:
-            async for chunk in _stream_gpt_oss(
-                model.id,
-                messages,
-                api_key=settings.gpt_oss_api_key,
-                base_url=settings.gpt_oss_base_url,
-                temperature=temperature,
-                stream=True,
-                timeout=int(settings.request_timeout),
-            ):
-                chunks.append(chunk)
-        except Exception as exc:
-            async for chunk in _fallback_to_ollama(messages, temperature, settings.request_timeout, "GPT-OSS", exc):
-                chunks.append(chunk)
+        primary = _stream_gpt_oss(
+            model.id,
+            messages,
+            api_key=settings.gpt_oss_api_key,
+            base_url=settings.gpt_oss_base_url,
+            temperature=temperature,
+            stream=stream,
+            timeout=int(settings.request_timeout),
+        )
+        label = "GPT-OSS"
     elif model.provider == "anthropic":
         if not settings.anthropic_api_key:
             raise api_error("Anthropic Claude support is not configured", status_code=503, code="anthropic_unavailable")
-        try:
-            async for chunk in _stream_anthropic(
-                request_model,
-                messages,
-                api_key=settings.anthropic_api_key,
-                temperature=temperature,
-                stream=True,
-                timeout=settings.anthropic_timeout_ms / 1000.0,
-                max_tokens=settings.anthropic_max_tokens,
-            ):
-                chunks.append(chunk)
-        except Exception as exc:
-            async for chunk in _fallback_to_ollama(messages, temperature, settings.request_timeout, "Anthropic", exc):
-                chunks.append(chunk)
+        primary = _stream_anthropic(
+            request_model,
+            messages,
+            api_key=settings.anthropic_api_key,
+            temperature=temperature,
+            stream=stream,
+            timeout=settings.anthropic_timeout_ms / 1000.0,
+            max_tokens=settings.anthropic_max_tokens,
+        )
+        label = "Anthropic"
     elif model.provider in OPENAI_COMPATIBLE_PROVIDERS:
         # Handle Groq, Cerebras, Together, Fireworks, OpenRouter
         provider_config = OPENAI_COMPATIBLE_PROVIDERS[model.provider]
@@ -400,63 +413,73 @@ async def _get_initial_response(
         if not api_key:
             raise api_error(f"{model.provider.title()} support is not configured", status_code=503, code=f"{model.provider}_unavailable")
         timeout_ms = getattr(settings, provider_config["timeout_setting"], 30000)
-        try:
-            async for chunk in _stream_openai_compatible(
-                request_model,
-                messages,
-                api_key=api_key,
-                base_url=provider_config["base_url"],
-                extra_headers=provider_config.get("headers", {}),
-                temperature=temperature,
-                stream=True,
-                timeout=timeout_ms / 1000.0,
-                provider=model.provider,
-            ):
-                chunks.append(chunk)
-        except Exception as exc:
-            async for chunk in _fallback_to_ollama(messages, temperature, settings.request_timeout, model.provider.title(), exc):
-                chunks.append(chunk)
+        primary = _stream_openai_compatible(
+            request_model,
+            messages,
+            api_key=api_key,
+            base_url=provider_config["base_url"],
+            extra_headers=provider_config.get("headers", {}),
+            temperature=temperature,
+            stream=stream,
+            timeout=timeout_ms / 1000.0,
+            provider=model.provider,
+        )
+        label = model.provider.title()
     elif model.provider == "cohere":
         if not settings.cohere_api_key:
             raise api_error("Cohere support is not configured", status_code=503, code="cohere_unavailable")
-        try:
-            async for chunk in _stream_cohere(
-                request_model,
-                messages,
-                api_key=settings.cohere_api_key,
-                temperature=temperature,
-                stream=True,
-                timeout=settings.cohere_timeout_ms / 1000.0,
-            ):
-                chunks.append(chunk)
-        except Exception as exc:
-            async for chunk in _fallback_to_ollama(messages, temperature, settings.request_timeout, "Cohere", exc):
-                chunks.append(chunk)
+        primary = _stream_cohere(
+            request_model,
+            messages,
+            api_key=settings.cohere_api_key,
+            temperature=temperature,
+            stream=stream,
+            timeout=settings.cohere_timeout_ms / 1000.0,
+        )
+        label = "Cohere"
     elif model.provider == "cloudflare":
         if not settings.cloudflare_account_id or not settings.cloudflare_api_token:
             raise api_error("Cloudflare Workers AI support is not configured", status_code=503, code="cloudflare_unavailable")
-        try:
-            async for chunk in _stream_cloudflare(
-                request_model,
-                messages,
-                account_id=settings.cloudflare_account_id,
-                api_token=settings.cloudflare_api_token,
-                temperature=temperature,
-                stream=True,
-                timeout=30.0,
-            ):
-                chunks.append(chunk)
-        except Exception as exc:
-            async for chunk in _fallback_to_ollama(messages, temperature, settings.request_timeout, "Cloudflare", exc):
-                chunks.append(chunk)
+        primary = _stream_cloudflare(
+            request_model,
+            messages,
+            account_id=settings.cloudflare_account_id,
+            api_token=settings.cloudflare_api_token,
+            temperature=temperature,
+            stream=stream,
+            timeout=30.0,
+        )
+        label = "Cloudflare"
     else:
         raise api_error("Unsupported provider", status_code=400, code="unsupported_provider")
 
-    if not chunks:
-        logger.warning("Provider stream was empty for model %s", request_model)
-        raise api_error("Provider returned an empty response", status_code=502, code="empty_provider_response")
+    async for chunk in _stream_with_fallback(primary, messages, temperature, settings.request_timeout, label):
+        yield chunk
+
+
+class _PhraseWindow:
+    """Detect trigger phrases across chunk boundaries without buffering the stream.
+
+    Only the last ``len(longest phrase) - 1`` characters are retained between
+    ``feed`` calls, so memory stays constant regardless of answer length.
+    """
+
+    def __init__(self, phrases: Iterable[str]):
+        self.phrases = [p.lower() for p in phrases]
+        self._keep = max((len(p) for p in self.phrases), default=1) - 1
+        self._tail = ""
+        self.matched: Optional[str] = None
 
-    return "".join(chunks)
+    def feed(self, chunk: str) -> Optional[str]:
+        if self.matched is not None or not chunk:
+            return self.matched
+        window = self._tail + chunk.lower()
+        for phrase in self.phrases:
+            if phrase in window:
+                self.matched = phrase
+                return phrase
+        self._tail = window[-self._keep:] if self._keep > 0 else ""
+        return None
 
 
 # =============================================================================
@@ -534,216 +557,189 @@ async def stream_chat(
     except Exception as mcp_exc:
         logger.warning(f"MCP Filter error (non-fatal): {mcp_exc}")
 
-    # Get initial response
-    initial_response = await _get_initial_response(model, request_model, formatted_messages, temperature, settings)
-
-    # Check for uncertainty (web search)
-    if any(phrase in initial_response.lower() for phrase in UNCERTAINTY_PHRASES):
-        yield "Ich bin mir nicht sicher, aber ich werde im Web danach suchen...\n\n"
-        
-        search_results = await web_search.search_web(user_query)
-        
-        if not search_results:
-            yield "Ich konnte keine relevanten Informationen online finden."
-            return
-
-        context = "Web search results:\n"
-        for res in search_results:
-            context += f"- Title: {res['title']}\n"
-            context += f"  URL: {res['url']}\n"
-            context += f"  Snippet: {res['snippet']}\n\n"
-
-        augmented_messages = formatted_messages + [
-            {"role": "system", "content": "Here is some context from a web search:"},
-            {"role": "system", "content": context},
-            {"role": "user", "content": f"Based on the web search results, please answer my original question: {user_query}"}
-        ]
-        logger.debug("Web search augmented messages length: %d", len(json.dumps(augmented_messages)))
+    # Forward provider chunks as they arrive. Uncertainty detection runs on a
+    # rolling window of the stream; augmentation follows as a separate segment.
+    uncertainty = _PhraseWindow(UNCERTAINTY_PHRASES)
+    search_task: Optional[asyncio.Task] = None
+    produced = False
+    try:
+        async for chunk in _stream_provider(model, request_model, formatted_messages, temperature, settings):
+            produced = True
+            if search_task is None and uncertainty.feed(chunk):
+                # Start the lookup now so it overlaps with the rest of the answer
+                search_task = asyncio.create_task(web_search.search_web(user_query))
+            yield chunk
+
+        if not produced:
+            logger.warning("Provider stream was empty for model %s", request_model)
+            raise api_error("Provider returned an empty response", status_code=502, code="empty_provider_response")
+
+        if search_task is not None:
+            async for chunk in _web_search_followup(
+                model, request_model, formatted_messages, user_query, search_task,
+                temperature=temperature, stream=stream, settings=settings,
+            ):
+                yield chunk
+        elif any(phrase in user_query.lower() for phrase in CRAWLER_PHRASES):
+            async for chunk in _crawl_followup(
+                model, request_model, formatted_messages, user_query,
+                temperature=temperature, stream=stream, settings=settings,
+            ):
+                yield chunk
+    finally:
+        # Provider error, client disconnect or a follow-up that returned
+        # before awaiting it: never leave the lookup running
+        if search_task is not None:
+            search_task.cancel()
 
-        try:
-            if model.provider == "ollama":
-                async for chunk in _stream_ollama(
-                    request_model, augmented_messages, temperature=temperature, stream=stream, timeout=settings.request_timeout
-                ):
-                    yield chunk
-            elif model.provider == "mistral":
-                async for chunk in _stream_mistral(
-                    request_model, augmented_messages, api_key=settings.mistral_api_key, organisation_id=settings.mistral_organisation_id, temperature=temperature, stream=stream, timeout=settings.request_timeout
-                ):
-                    yield chunk
-            elif model.provider == "gemini":
-                async for chunk in _stream_gemini(
-                    request_model, augmented_messages, api_key=settings.gemini_api_key, temperature=temperature, stream=stream, timeout=settings.request_timeout
-                ):
-                    yield chunk
-            elif model.provider == "gpt-oss":
-                if not settings.gpt_oss_api_key:
-                    raise api_error("GPT-OSS support is not configured", status_code=503, code="gpt_oss_unavailable")
-                async for chunk in _stream_gpt_oss(
-                    model.id,
-                    augmented_messages,
-                    api_key=settings.gpt_oss_api_key,
-                    base_url=settings.gpt_oss_base_url,
-                    temperature=temperature,
-                    stream=stream,
-                    timeout=int(settings.request_timeout),
-                ):
-                    yield chunk
-            elif model.provider == "anthropic":
-                if not settings.anthropic_api_key:
-                    raise api_error("Anthropic Claude support is not configured", status_code=503, code="anthropic_unavailable")
-                async for chunk in _stream_anthropic(
-                    request_model,
-                    augmented_messages,
-                    api_key=settings.anthropic_api_key,
-                    temperature=temperature,
-                    stream=stream,
-                    timeout=settings.anthropic_timeout_ms / 1000.0,
-                    max_tokens=settings.anthropic_max_tokens,
-                ):
-                    yield chunk
-        except Exception as exc:
-            logger.exception("Error during web search augmented chat streaming: %s", exc)
-            raise
-    # Check for crawler phrases
-    elif any(phrase in user_query.lower() for phrase in CRAWLER_PHRASES):
-        yield "Okay, ich werde versuchen, die angeforderten Informationen zu crawlen...\n\n"
 
-        # Extract potential URLs from the user query with SSRF protection
-        urls = _extract_safe_urls(user_query)
-        if not urls:
-            yield "Ich konnte keine sicheren Links in Ihrer Anfrage finden, die ich crawlen könnte."
-            return
+async def _web_search_followup(
+    model: ModelInfo,
+    request_model: str,
+    formatted_messages: List[dict[str, str]],
+    user_query: str,
+    search_task: "asyncio.Task",
+    *,
+    temperature: Optional[float],
+    stream: bool,
+    settings,
+) -> AsyncGenerator[str, None]:
+    """Follow-up segment answering ``user_query`` again with web search context."""
+    yield "\n\nIch bin mir nicht sicher, aber ich werde im Web danach suchen...\n\n"
 
-        # Extract keywords from the user query (excluding URLs and crawler phrases)
-        keywords = [word for word in user_query.lower().split() if word not in CRAWLER_PHRASES and not word.startswith("http")]
-        if not keywords:
-            keywords = ["information"] # Default keyword if none provided
+    search_results = await search_task
 
-        try:
-                job = await crawler_manager.create_job(
-                    keywords=keywords,
-                    seeds=urls,
-                    max_depth=5,
-                    max_pages=50,
-                    allow_external=True,
-                    requested_by="chat_tool",
-                    user_context=user_query,
-                    ollama_assisted=True,
-                    ollama_query=user_query,
-                    priority="high",  # <<< ensure AI-requested crawls are high priority
-                )
-                yield f"Crawl job {job.id} gestartet. Status: {job.status}. Bitte warten Sie, während ich die Ergebnisse sammle.\n\n"
-
-                    # Poll job status until completed or failed
-                job_status = job.status
-                while job_status in ["queued", "running"]:
-                    await asyncio.sleep(5) # Poll every 5 seconds
-                    updated_job = await crawler_manager.get_job(job.id)
-                    if updated_job:
-                        job_status = updated_job.status
-                        yield f"Crawl job {job.id} Status: {job_status}. Seiten gecrawlt: {updated_job.pages_crawled}.\n"
-                    else:
-                        yield f"Fehler: Crawl job {job.id} nicht gefunden.\n"
-                        break
-                
-                if job_status == "completed" and updated_job and updated_job.results:
-                    yield "Crawling abgeschlossen. Ich analysiere die Ergebnisse...\n\n"
-                    
-                    crawl_results_context = "Gecrawlte Ergebnisse:\n"
-                    for result_id in updated_job.results[:3]: # Limit context to top 3 results
-                        result = await crawler_manager.get_result(result_id)
-                        if result:
-                            title = result.title or "Kein Titel"
-                            url = result.url or "Keine URL"
-                            content_snippet = ""
-                            if result.extracted_content_ollama: # Prioritize Ollama extracted content
-                                content_snippet = result.extracted_content_ollama[:500] + "..." if len(result.extracted_content_ollama) > 500 else result.extracted_content_ollama
-                                crawl_results_context += f"- Titel: {title}\n"
-                                crawl_results_context += f"  URL: {url}\n"
-                                crawl_results_context += f"  Extrahierter Inhalt (Ollama): {content_snippet}\n\n"
-                            elif result.summary:
-                                content_snippet = result.summary[:500] + "..." if len(result.summary) > 500 else result.summary
-                                crawl_results_context += f"- Titel: {title}\n"
-                                crawl_results_context += f"  URL: {url}\n"
-                                crawl_results_context += f"  Zusammenfassung: {content_snippet}\n\n"
-                            elif result.excerpt:
-                                content_snippet = result.excerpt[:500] + "..." if len(result.excerpt) > 500 else result.excerpt
-                                crawl_results_context += f"- Titel: {title}\n"
-                                crawl_results_context += f"  URL: {url}\n"
-                                crawl_results_context += f"  Auszug: {content_snippet}\n\n"
-
-                    augmented_messages = formatted_messages + [
-                        {"role": "system", "content": "Hier ist Kontext aus einem Crawl-Job:"},
-                        {"role": "system", "content": crawl_results_context},
-                        {"role": "user", "content": f"Basierend auf den gecrawlten Ergebnissen, beantworten Sie bitte meine ursprüngliche Frage: {user_query}"}
-                    ]
-                    logger.debug("Crawler augmented messages length: %d", len(json.dumps(augmented_messages)))
+    if not search_results:
+        yield "Ich konnte keine relevanten Informationen online finden."
+        return
 
-                    try:
-                        if model.provider == "ollama":
-                            async for chunk in _stream_ollama(
-                                request_model, augmented_messages, temperature=temperature, stream=stream, timeout=settings.request_timeout
-                            ):
-                                yield chunk
-                        elif model.provider == "mistral":
-                            async for chunk in _stream_mistral(
-                                request_model, augmented_messages, api_key=settings.mistral_api_key, organisation_id=settings.mistral_organisation_id, temperature=temperature, stream=stream, timeout=settings.request_timeout
-                            ):
-                                yield chunk
-                        elif model.provider == "gemini":
-                            async for chunk in _stream_gemini(
-                                request_model, augmented_messages, api_key=settings.gemini_api_key, temperature=temperature, stream=stream, timeout=settings.request_timeout
-                            ):
-                                yield chunk
-                        elif model.provider == "gpt-oss":
-                            if not settings.gpt_oss_api_key:
-                                raise api_error("GPT-OSS support is not configured", status_code=503, code="gpt_oss_unavailable")
-                            async for chunk in _stream_gpt_oss(
-                                model.id,
-                                augmented_messages,
-                                api_key=settings.gpt_oss_api_key,
-                                base_url=settings.gpt_oss_base_url,
-                                temperature=temperature,
-                                stream=stream,
-                                timeout=int(settings.request_timeout),
-                            ):
-                                yield chunk
-                        elif model.provider == "anthropic":
-                            if not settings.anthropic_api_key:
-                                raise api_error("Anthropic Claude support is not configured", status_code=503, code="anthropic_unavailable")
-                            async for chunk in _stream_anthropic(
-                                request_model,
-                                augmented_messages,
-                                api_key=settings.anthropic_api_key,
-                                temperature=temperature,
-                                stream=stream,
-                                timeout=settings.anthropic_timeout_ms / 1000.0,
-                                max_tokens=settings.anthropic_max_tokens,
-                            ):
-                                yield chunk
-                    except Exception as exc:
-                        logger.error("Error during web search augmented chat streaming: %s", exc)
-                        raise
-                    # Successfully streamed augmented response, exit early
-                    return
-                elif job_status == "failed":
-                    yield f"Crawl job {job.id} fehlgeschlagen: {updated_job.error or 'Unbekannter Fehler'}.\n"
-                    return
-                else:
-                    # Provide more context when no relevant results are found
-                    if updated_job and updated_job.pages_crawled > 0:
-                        yield f"Crawl job {job.id} abgeschlossen. Es wurden {updated_job.pages_crawled} Seiten gecrawlt, aber keine Ergebnisse, die direkt auf Ihre Anfrage passen, wurden gefunden. Versuchen Sie, Ihre Suchanfrage zu präzisieren oder andere Keywords zu verwenden.\n"
-                    else:
-                        yield f"Crawl job {job.id} abgeschlossen, aber es wurden keine Seiten gecrawlt oder relevante Ergebnisse gefunden. Die angegebenen URLs waren möglicherweise nicht erreichbar oder enthielten keine durchsuchbaren Inhalte. Versuchen Sie, Ihre Anfrage zu überprüfen oder andere Links anzugeben.\n"
-                    return
-        except Exception as exc:
-            logger.exception("Crawler tool failed: %s", exc)
-            yield f"Entschuldigung, beim Starten des Crawl-Tools ist ein Fehler aufgetreten: {exc}.\n"
-            return
+    context = "Web search results:\n"
+    for res in search_results:
+        context += f"- Title: {res['title']}\n"
+        context += f"  URL: {res['url']}\n"
+        context += f"  Snippet: {res['snippet']}\n\n"
+
+    augmented_messages = formatted_messages + [
+        {"role": "system", "content": "Here is some context from a web search:"},
+        {"role": "system", "content": context},
+        {"role": "user", "content": f"Based on the web search results, please answer my original question: {user_query}"}
+    ]
+    logger.debug("Web search augmented messages length: %d", len(json.dumps(augmented_messages)))
+
+    try:
+        async for chunk in _stream_provider(
+            model, request_model, augmented_messages, temperature, settings, stream=stream
+        ):
+            yield chunk
+    except Exception as exc:
+        logger.exception("Error during web search augmented chat streaming: %s", exc)
+        raise
+
+
+async def _crawl_followup(
+    model: ModelInfo,
+    request_model: str,
+    formatted_messages: List[dict[str, str]],
+    user_query: str,
+    *,
+    temperature: Optional[float],
+    stream: bool,
+    settings,
+) -> AsyncGenerator[str, None]:
+    """Follow-up segment that crawls URLs from the query and answers from the results."""
+    yield "\n\nOkay, ich werde versuchen, die angeforderten Informationen zu crawlen...\n\n"
+
+    # Extract potential URLs from the user query with SSRF protection
+    urls = _extract_safe_urls(user_query)
+    if not urls:
+        yield "Ich konnte keine sicheren Links in Ihrer Anfrage finden, die ich crawlen könnte."
+        return
 
-    # Only yield initial response if crawler wasn't triggered
-    yield initial_response
+    # Extract keywords from the user query (excluding URLs and crawler phrases)
+    keywords = [word for word in user_query.lower().split() if word not in CRAWLER_PHRASES and not word.startswith("http")]
+    if not keywords:
+        keywords = ["information"] # Default keyword if none provided
+
+    try:
+        job = await crawler_manager.create_job(
+            keywords=keywords,
+            seeds=urls,
+            max_depth=5,
+            max_pages=50,
+            allow_external=True,
+            requested_by="chat_tool",
+            user_context=user_query,
+            ollama_assisted=True,
+            ollama_query=user_query,
+            priority="high",  # <<< ensure AI-requested crawls are high priority
+        )
+        yield f"Crawl job {job.id} gestartet. Status: {job.status}. Bitte warten Sie, während ich die Ergebnisse sammle.\n\n"
+
+        # Poll job status until completed or failed
+        job_status = job.status
+        updated_job = None
+        while job_status in ["queued", "running"]:
+            await asyncio.sleep(5) # Poll every 5 seconds
+            updated_job = await crawler_manager.get_job(job.id)
+            if updated_job:
+                job_status = updated_job.status
+                yield f"Crawl job {job.id} Status: {job_status}. Seiten gecrawlt: {updated_job.pages_crawled}.\n"
+            else:
+                yield f"Fehler: Crawl job {job.id} nicht gefunden.\n"
+                break
+
+        if job_status == "completed" and updated_job and updated_job.results:
+            yield "Crawling abgeschlossen. Ich analysiere die Ergebnisse...\n\n"
+
+            crawl_results_context = "Gecrawlte Ergebnisse:\n"
+            for result_id in updated_job.results[:3]: # Limit context to top 3 results
+                result = await crawler_manager.get_result(result_id)
+                if result:
+                    title = result.title or "Kein Titel"
+                    url = result.url or "Keine URL"
+                    content_snippet = ""
+                    if result.extracted_content_ollama: # Prioritize Ollama extracted content
+                        content_snippet = result.extracted_content_ollama[:500] + "..." if len(result.extracted_content_ollama) > 500 else result.extracted_content_ollama
+                        crawl_results_context += f"- Titel: {title}\n"
+                        crawl_results_context += f"  URL: {url}\n"
+                        crawl_results_context += f"  Extrahierter Inhalt (Ollama): {content_snippet}\n\n"
+                    elif result.summary:
+                        content_snippet = result.summary[:500] + "..." if len(result.summary) > 500 else result.summary
+                        crawl_results_context += f"- Titel: {title}\n"
+                        crawl_results_context += f"  URL: {url}\n"
+                        crawl_results_context += f"  Zusammenfassung: {content_snippet}\n\n"
+                    elif result.excerpt:
+                        content_snippet = result.excerpt[:500] + "..." if len(result.excerpt) > 500 else result.excerpt
+                        crawl_results_context += f"- Titel: {title}\n"
+                        crawl_results_context += f"  URL: {url}\n"
+                        crawl_results_context += f"  Auszug: {content_snippet}\n\n"
+
+            augmented_messages = formatted_messages + [
+                {"role": "system", "content": "Hier ist Kontext aus einem Crawl-Job:"},
+                {"role": "system", "content": crawl_results_context},
+                {"role": "user", "content": f"Basierend auf den gecrawlten Ergebnissen, beantworten Sie bitte meine ursprüngliche Frage: {user_query}"}
+            ]
+            logger.debug("Crawler augmented messages length: %d", len(json.dumps(augmented_messages)))
+
+            try:
+                async for chunk in _stream_provider(
+                    model, request_model, augmented_messages, temperature, settings, stream=stream
+                ):
+                    yield chunk
+            except Exception as exc:
+                logger.error("Error during crawler augmented chat streaming: %s", exc)
+                raise
+        elif job_status == "failed":
+            yield f"Crawl job {job.id} fehlgeschlagen: {(updated_job or job).error or 'Unbekannter Fehler'}.\n"
+        else:
+            # Provide more context when no relevant results are found
+            if updated_job and updated_job.pages_crawled > 0:
+                yield f"Crawl job {job.id} abgeschlossen. Es wurden {updated_job.pages_crawled} Seiten gecrawlt, aber keine Ergebnisse, die direkt auf Ihre Anfrage passen, wurden gefunden. Versuchen Sie, Ihre Suchanfrage zu präzisieren oder andere Keywords zu verwenden.\n"
+            else:
+                yield f"Crawl job {job.id} abgeschlossen, aber es wurden keine Seiten gecrawlt oder relevante Ergebnisse gefunden. Die angegebenen URLs waren möglicherweise nicht erreichbar oder enthielten keine durchsuchbaren Inhalte. Versuchen Sie, Ihre Anfrage zu überprüfen oder andere Links anzugeben.\n"
+    except Exception as exc:
+        logger.exception("Crawler tool failed: %s", exc)
+        yield f"Entschuldigung, beim Starten des Crawl-Tools ist ein Fehler aufgetreten: {exc}.\n"
 
 
 async def _stream_ollama(
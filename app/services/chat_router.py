@@ -15,6 +15,7 @@ from dataclasses import dataclass
 from enum import Enum
 import logging
 import aiohttp
+from ..utils.http_client import http_clients
 
 logger = logging.getLogger(__name__)
 
@@ -401,7 +402,7 @@ class APIProxy:
     
     async def _openai_chat(self, api_key: str, model: str, messages: list, temp: float, max_tokens: int) -> str:
         """OpenAI API Call"""
-        async with aiohttp.ClientSession(timeout=self.timeout) as session:
+        async with http_clients.session("openai", timeout=self.timeout) as session:
             async with session.post(
                 "https://api.openai.com/v1/chat/completions",
                 headers={
@@ -432,7 +433,7 @@ class APIProxy:
             else:
                 chat_messages.append(msg)
         
-        async with aiohttp.ClientSession(timeout=self.timeout) as session:
+        async with http_clients.session("anthropic", timeout=self.timeout) as session:
             body = {
                 "model": model,
                 "messages": chat_messages,
@@ -468,7 +469,7 @@ class APIProxy:
                 "parts": [{"text": msg["content"]}]
             })
         
-        async with aiohttp.ClientSession(timeout=self.timeout) as session:
+        async with http_clients.session("gemini", timeout=self.timeout) as session:
             async with session.post(
                 f"https://generativelanguage.googleapis.com/v1beta/models/{model}:generateContent?key={api_key}",
                 headers={"Content-Type": "application/json"},
@@ -488,7 +489,7 @@ class APIProxy:
     
     async def _mistral_chat(self, api_key: str, model: str, messages: list, temp: float, max_tokens: int) -> str:
         """Mistral API Call"""
-        async with aiohttp.ClientSession(timeout=self.timeout) as session:
+        async with http_clients.session("mistral", timeout=self.timeout) as session:
             async with session.post(
                 "https://api.mistral.ai/v1/chat/completions",
                 headers={
@@ -510,7 +511,7 @@ class APIProxy:
     
     async def _groq_chat(self, api_key: str, model: str, messages: list, temp: float, max_tokens: int) -> str:
         """Groq API Call"""
-        async with aiohttp.ClientSession(timeout=self.timeout) as session:
+        async with http_clients.session("groq", timeout=self.timeout) as session:
             async with session.post(
                 "https://api.groq.com/openai/v1/chat/completions",
                 headers={
@@ -532,7 +533,7 @@ class APIProxy:
     
     async def _cerebras_chat(self, api_key: str, model: str, messages: list, temp: float, max_tokens: int) -> str:
         """Cerebras API Call"""
-        async with aiohttp.ClientSession(timeout=self.timeout) as session:
+        async with http_clients.session("cerebras", timeout=self.timeout) as session:
             async with session.post(
                 "https://api.cerebras.ai/v1/chat/completions",
                 headers={
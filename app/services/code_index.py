@@ -0,0 +1,511 @@
+"""
+Trigram code-search index.
+
+TrigramIndex maps every three-character substring of the lowercased text
+of a document to the documents containing it. A literal or regex search
+is first turned into a plan of literals the match must contain, so only
+the documents holding all of their trigrams are read and verified with
+the real pattern.
+
+CodeIndex keeps such an index over the text files of a source tree. It is
+refreshed from file mtimes, at most every REFRESH_INTERVAL seconds, and
+persisted as JSON so a restart does not re-read the tree. File contents
+are served from an LRU cache with O(1) eviction.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import re
+import time
+from array import array
+from collections import OrderedDict
+from pathlib import Path, PurePosixPath
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple, Union
+
+try:
+    from re import _constants as sre_constants, _parser as sre_parse
+except ImportError:  # Python < 3.11
+    import sre_constants
+    import sre_parse
+
+logger = logging.getLogger("ailinux.code_index")
+
+INDEX_DIR = Path("/var/tristar/code_index")
+INDEX_VERSION = 1
+REFRESH_INTERVAL = 5.0              # seconds between mtime scans
+SAVE_INTERVAL = 60.0                # seconds between index writes after changes
+MAX_INDEX_FILE_BYTES = 1024 * 1024  # larger files are not indexed, only scanned
+CONTENT_CACHE_BYTES = 64 * 1024 * 1024
+
+# Characters whose case mapping differs between str.lower() and re.IGNORECASE;
+# documents containing them are always candidates for regex searches
+_CASE_SPECIAL = frozenset("İıſKÅẞ")
+
+# Query plans: None = any document, ("lit", text), ("and", [plans]), ("or", [plans])
+Plan = Optional[Tuple[str, Any]]
+
+
+# ============================================================================
+# Query plans
+# ============================================================================
+
+def literal_plan(query: str) -> Plan:
+    """Plan for a case-insensitive substring search."""
+    text = query.lower()
+    return ("lit", text) if len(text) >= 3 else None
+
+
+def regex_plan(pattern: str, flags: int = 0) -> Plan:
+    """
+    Plan for a regex search: the literal runs every match must contain.
+    ``flags`` are those the pattern is compiled with (re.VERBOSE changes
+    what is literal). Anything the plan cannot express makes it broader,
+    never narrower.
+    """
+    try:
+        parsed = sre_parse.parse(pattern, flags)
+    except Exception:
+        return None
+    return _sequence_plan(list(parsed))
+
+
+def _sequence_plan(items: Iterable[Tuple[Any, Any]]) -> Plan:
+    parts: List[Tuple[str, Any]] = []
+    run: List[str] = []
+
+    def end_run():
+        if len(run) >= 3:
+            parts.append(("lit", "".join(run).lower()))
+        run.clear()
+
+    for op, av in items:
+        if op is sre_constants.LITERAL and av < 128:
+            run.append(chr(av))
+            continue
+        end_run()
+        sub: Plan = None
+        if op is sre_constants.SUBPATTERN:
+            sub = _sequence_plan(list(av[-1]))
+        elif op is sre_constants.BRANCH:
+            alternatives = [_sequence_plan(list(branch)) for branch in av[1]]
+            if all(alt is not None for alt in alternatives):
+                sub = ("or", alternatives)
+        elif op in (sre_constants.MAX_REPEAT, sre_constants.MIN_REPEAT):
+            low, _, repeated = av
+            if low >= 1:
+                sub = _sequence_plan(list(repeated))
+        if sub is not None:
+            parts.append(sub)
+    end_run()
+
+    if not parts:
+        return None
+    return parts[0] if len(parts) == 1 else ("and", parts)
+
+
+# ============================================================================
+# Trigram index
+# ============================================================================
+
+class TrigramIndex:
+    """
+    Trigram postings over string-keyed documents.
+
+    Posting lists are append-only arrays of document ids: a changed
+    document gets a new, higher id, so the lists stay sorted. Ids of
+    removed documents are dropped lazily by compact().
+    """
+
+    def __init__(self):
+        self._ids: Dict[str, int] = {}
+        self._keys: Dict[int, str] = {}
+        self._postings: Dict[str, array] = {}
+        self._always: Set[int] = set()  # not indexed, candidates for every query
+        self._next_id = 0
+        self._stale = 0
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    def add(self, key: str, text: Optional[str]):
+        """Index a document; text None adds it as an always-candidate."""
+        self.remove(key)
+        doc_id = self._next_id
+        self._next_id += 1
+        self._ids[key] = doc_id
+        self._keys[doc_id] = key
+
+        if text is None:
+            self._always.add(doc_id)
+            return
+        lowered = text.lower()
+        if len(lowered) != len(text) or not _CASE_SPECIAL.isdisjoint(text):
+            self._always.add(doc_id)
+            return
+        postings = self._postings
+        for gram in {lowered[i:i + 3] for i in range(len(lowered) - 2)}:
+            posting = postings.get(gram)
+            if posting is None:
+                postings[gram] = posting = array("I")
+            posting.append(doc_id)
+
+    def remove(self, key: str):
+        doc_id = self._ids.pop(key, None)
+        if doc_id is None:
+            return
+        del self._keys[doc_id]
+        if doc_id in self._always:
+            self._always.discard(doc_id)
+        else:
+            self._stale += 1
+            if self._stale > max(1000, len(self._ids)):
+                self.compact()
+
+    def compact(self):
+        """Drop ids of removed documents from the posting lists."""
+        if not self._stale:
+            return
+        live = self._keys
+        for gram in list(self._postings):
+            kept = array("I", (doc_id for doc_id in self._postings[gram] if doc_id in live))
+            if kept:
+                self._postings[gram] = kept
+            else:
+                del self._postings[gram]
+        self._stale = 0
+
+    def candidates(self, plan: Plan) -> Optional[Set[str]]:
+        """Keys of documents that may match; None means all documents."""
+        ids = self._evaluate(plan)
+        if ids is None:
+            return None
+        keys = self._keys
+        found = {keys[doc_id] for doc_id in ids if doc_id in keys}
+        found.update(keys[doc_id] for doc_id in self._always)
+        return found
+
+    def _evaluate(self, plan: Plan) -> Optional[Set[int]]:
+        if plan is None:
+            return None
+        kind, value = plan
+        if kind == "lit":
+            grams = {value[i:i + 3] for i in range(len(value) - 2)}
+            postings = sorted((self._postings.get(gram, ()) for gram in grams), key=len)
+            if not postings:
+                return None
+            result = set(postings[0])
+            for posting in postings[1:]:
+                if not result:
+                    break
+                result.intersection_update(posting)
+            return result
+        results = [self._evaluate(sub) for sub in value]
+        if kind == "and":
+            known = [r for r in results if r is not None]
+            if not known:
+                return None
+            known.sort(key=len)
+            result = set(known[0])
+            for other in known[1:]:
+                result &= other
+            return result
+        # "or"
+        if any(r is None for r in results):
+            return None
+        return set().union(*results)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "documents": len(self._ids),
+            "unindexed": len(self._always),
+            "trigrams": len(self._postings),
+            "postings": sum(len(p) for p in self._postings.values()),
+            "stale_ids": self._stale,
+        }
+
+    def to_dict(self) -> Dict[str, Any]:
+        self.compact()
+        return {
+            "next_id": self._next_id,
+            "ids": self._ids,
+            "always": sorted(self._always),
+            "postings": {gram: posting.tolist() for gram, posting in self._postings.items()},
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "TrigramIndex":
+        index = cls()
+        index._next_id = data["next_id"]
+        index._ids = dict(data["ids"])
+        index._keys = {doc_id: key for key, doc_id in index._ids.items()}
+        index._always = set(data["always"])
+        index._postings = {gram: array("I", ids) for gram, ids in data["postings"].items()}
+        return index
+
+
+# ============================================================================
+# Content cache
+# ============================================================================
+
+class ContentCache:
+    """LRU cache of file texts bounded by size; O(1) lookups and evictions."""
+
+    def __init__(self, max_bytes: int = CONTENT_CACHE_BYTES):
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[str, Tuple[int, int, str]]" = OrderedDict()
+        self._bytes = 0
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: str, mtime_ns: int, size: int) -> Optional[str]:
+        entry = self._entries.get(key)
+        if entry is None or entry[0] != mtime_ns or entry[1] != size:
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry[2]
+
+    def put(self, key: str, mtime_ns: int, size: int, text: str):
+        self.invalidate(key)
+        if size > self.max_bytes // 4:
+            return
+        self._entries[key] = (mtime_ns, size, text)
+        self._bytes += size
+        while self._bytes > self.max_bytes:
+            _, (_, evicted_size, _) = self._entries.popitem(last=False)
+            self._bytes -= evicted_size
+
+    def invalidate(self, key: str):
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._bytes -= entry[1]
+
+    def stats(self) -> Dict[str, Any]:
+        return {"entries": len(self._entries), "bytes": self._bytes, "hits": self.hits, "misses": self.misses}
+
+
+# ============================================================================
+# Source tree index
+# ============================================================================
+
+def _path_matches(rel: str, file_pattern: str) -> bool:
+    """Path.rglob semantics: a leading '**/' also matches zero directories."""
+    path = PurePosixPath(rel)
+    while True:
+        if path.match(file_pattern):
+            return True
+        if not file_pattern.startswith("**/"):
+            return False
+        file_pattern = file_pattern[3:]
+
+
+class CodeIndex:
+    """Trigram index over the text files of a source tree."""
+
+    def __init__(
+        self,
+        root: Union[str, Path],
+        extensions: Iterable[str],
+        skip_dirs: Iterable[str] = (),
+        index_path: Optional[Path] = None,
+    ):
+        self.root = Path(root)
+        self.extensions = frozenset(extensions)
+        self.skip_dirs = frozenset(d.lower() for d in skip_dirs)
+        if index_path is None:
+            digest = hashlib.md5(str(self.root).encode()).hexdigest()[:8]
+            index_path = INDEX_DIR / f"trigrams-{digest}.json"
+        self.index_path = index_path
+        self.contents = ContentCache()
+        self._index = TrigramIndex()
+        self._files: Dict[str, Tuple[int, int]] = {}  # relative path -> (mtime_ns, size)
+        self._loaded = False
+        self._last_refresh = 0.0
+        self._last_save = 0.0
+        self._unsaved = False
+        self._lock = asyncio.Lock()
+        self._stats = {"searches": 0, "files_scanned": 0, "files_reindexed": 0, "refreshes": 0}
+
+    # --- maintenance (worker thread) ---
+
+    def _load(self):
+        try:
+            data = json.loads(self.index_path.read_text())
+            if data.get("version") != INDEX_VERSION or data.get("root") != str(self.root):
+                return
+            self._index = TrigramIndex.from_dict(data["index"])
+            self._files = {rel: (meta[0], meta[1]) for rel, meta in data["files"].items()}
+            logger.info(f"Code index loaded: {len(self._files)} files from {self.index_path}")
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            logger.warning(f"Code index {self.index_path} unreadable, rebuilding: {e}")
+            self._index = TrigramIndex()
+            self._files = {}
+
+    def _save(self):
+        data = {
+            "version": INDEX_VERSION,
+            "root": str(self.root),
+            "files": self._files,
+            "index": self._index.to_dict(),
+        }
+        try:
+            self.index_path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = self.index_path.with_suffix(".tmp")
+            tmp.write_text(json.dumps(data, separators=(",", ":")))
+            os.replace(tmp, self.index_path)
+            self._unsaved = False
+            self._last_save = time.monotonic()
+        except OSError as e:
+            logger.warning(f"Could not save code index: {e}")
+
+    def _scan(self) -> Dict[str, Tuple[int, int]]:
+        found: Dict[str, Tuple[int, int]] = {}
+        root = str(self.root)
+        for dirpath, dirnames, filenames in os.walk(root):
+            dirnames[:] = [d for d in dirnames if not d.startswith(".") and d.lower() not in self.skip_dirs]
+            for name in filenames:
+                if os.path.splitext(name)[1] not in self.extensions:
+                    continue
+                path = os.path.join(dirpath, name)
+                try:
+                    st = os.stat(path)
+                except OSError:
+                    continue
+                found[os.path.relpath(path, root)] = (st.st_mtime_ns, st.st_size)
+        return found
+
+    def _refresh(self) -> int:
+        if not self._loaded:
+            self._load()
+            self._loaded = True
+
+        current = self._scan()
+        removed = self._files.keys() - current.keys()
+        changed = [rel for rel, meta in current.items() if self._files.get(rel) != meta]
+
+        for rel in removed:
+            self._index.remove(rel)
+            self.contents.invalidate(rel)
+            del self._files[rel]
+        for rel in changed:
+            mtime_ns, size = current[rel]
+            text = None
+            if size <= MAX_INDEX_FILE_BYTES:
+                try:
+                    text = (self.root / rel).read_text(encoding="utf-8")
+                except (OSError, UnicodeDecodeError):
+                    pass
+            self._index.add(rel, text)
+            self.contents.invalidate(rel)
+            self._files[rel] = (mtime_ns, size)
+
+        if removed or changed:
+            self._unsaved = True
+            self._stats["files_reindexed"] += len(changed)
+            logger.debug(f"Code index refreshed: {len(changed)} changed, {len(removed)} removed")
+        if self._unsaved and (not self._last_save or time.monotonic() - self._last_save >= SAVE_INTERVAL):
+            self._save()
+        self._stats["refreshes"] += 1
+        return len(removed) + len(changed)
+
+    def _read(self, rel: str) -> Optional[str]:
+        mtime_ns, size = self._files[rel]
+        text = self.contents.get(rel, mtime_ns, size)
+        if text is None:
+            try:
+                text = (self.root / rel).read_text(encoding="utf-8")
+            except (OSError, UnicodeDecodeError):
+                return None
+            self.contents.put(rel, mtime_ns, size, text)
+        return text
+
+    def _grep(
+        self,
+        pattern: "re.Pattern[str]",
+        plan: Plan,
+        under: str,
+        file_pattern: str,
+        max_results: int,
+        context_lines: int,
+    ) -> List[Dict[str, Any]]:
+        candidates = self._index.candidates(plan)
+        paths = sorted(self._files if candidates is None else candidates)
+        prefix = "" if under in ("", ".") else under.rstrip("/") + "/"
+
+        results: List[Dict[str, Any]] = []
+        for rel in paths:
+            if prefix and not rel.startswith(prefix):
+                continue
+            if not _path_matches(rel[len(prefix):], file_pattern):
+                continue
+            text = self._read(rel)
+            if text is None:
+                continue
+            self._stats["files_scanned"] += 1
+            lines = text.splitlines()
+            for i, line in enumerate(lines):
+                if pattern.search(line):
+                    start = max(0, i - context_lines)
+                    end = min(len(lines), i + context_lines + 1)
+                    results.append({
+                        "file": rel,
+                        "line": i + 1,
+                        "match": line.strip(),
+                        "context": lines[start:end],
+                    })
+                    if len(results) >= max_results:
+                        return results
+        return results
+
+    # --- API ---
+
+    async def refresh(self, force: bool = False) -> int:
+        """Re-index files whose mtime or size changed."""
+        async with self._lock:
+            if not force and time.monotonic() - self._last_refresh < REFRESH_INTERVAL:
+                return 0
+            changed = await asyncio.to_thread(self._refresh)
+            self._last_refresh = time.monotonic()
+            return changed
+
+    def mark_changed(self):
+        """A file was written through the API: rescan on the next search."""
+        self._last_refresh = 0.0
+
+    async def search(
+        self,
+        pattern: "re.Pattern[str]",
+        under: str = "",
+        file_pattern: str = "*",
+        max_results: int = 50,
+        context_lines: int = 2,
+    ) -> List[Dict[str, Any]]:
+        """
+        Lines matching ``pattern`` in files below ``under`` (relative to the
+        root) whose path matches ``file_pattern``. Paths in the results are
+        relative to the root.
+        """
+        await self.refresh()
+        plan = regex_plan(pattern.pattern, pattern.flags)
+        async with self._lock:
+            self._stats["searches"] += 1
+            return await asyncio.to_thread(
+                self._grep, pattern, plan, under, file_pattern, max_results, context_lines
+            )
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "root": str(self.root),
+            "files": len(self._files),
+            "index": self._index.stats(),
+            "content_cache": self.contents.stats(),
+            **self._stats,
+        }
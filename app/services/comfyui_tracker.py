@@ -0,0 +1,327 @@
+"""
+ComfyUI job completion tracking over the ComfyUI websocket.
+
+ComfyUI pushes execution events of a prompt to the websocket of the client_id
+that queued it. One connection per ComfyUI server is shared by all requests of
+this process and its events are demultiplexed by prompt_id into per-prompt
+futures and progress listeners.
+
+While the websocket is down, completion is checked with the targeted
+/history/{prompt_id} endpoint instead of fetching the full history.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import inspect
+import json
+import logging
+import time
+import uuid
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional
+
+import aiohttp
+
+from ..utils.http_client import http_clients
+
+logger = logging.getLogger("ailinux.comfyui.tracker")
+
+ProgressCallback = Callable[[Dict[str, Any]], Any]
+
+CONNECT_TIMEOUT = 2.0       # how long start() waits for the websocket
+RECHECK_INTERVAL = 30.0     # history check while waiting on the websocket (missed events)
+POLL_INTERVALS = (0.5, 1.0, 2.0)  # history polling backoff without websocket
+RECONNECT_MAX_DELAY = 30.0
+JOB_RETENTION = 600.0       # seconds a finished, unclaimed job is kept
+
+
+@dataclass
+class _PromptJob:
+    prompt_id: str
+    future: asyncio.Future
+    outputs: Dict[str, Any] = field(default_factory=dict)
+    cached_nodes: List[str] = field(default_factory=list)
+    node: Optional[str] = None
+    value: int = 0
+    max: int = 0
+    listeners: List[ProgressCallback] = field(default_factory=list)
+    updated_at: float = field(default_factory=time.monotonic)
+
+    def progress(self) -> Dict[str, Any]:
+        return {
+            "prompt_id": self.prompt_id,
+            "node": self.node,
+            "value": self.value,
+            "max": self.max,
+            "done": self.future.done(),
+        }
+
+
+def _error_message(entry: Dict[str, Any]) -> str:
+    status = entry.get("status") or {}
+    if status.get("error"):
+        return str(status["error"])
+    for message in status.get("messages", []):
+        if isinstance(message, list) and len(message) == 2 and message[0] == "execution_error":
+            return message[1].get("exception_message", "Unknown error")
+    return status.get("status_str") or "Unknown error"
+
+
+class ComfyUICompletionTracker:
+    """Shared websocket listener for one ComfyUI server."""
+
+    def __init__(self, base_url: str, headers: Optional[Dict[str, str]] = None):
+        self.base_url = base_url.rstrip("/")
+        self.headers = headers or {}
+        # Unique per process, ComfyUI only keeps the latest socket per client_id
+        self.client_id = f"ailinux_backend-{uuid.uuid4().hex[:12]}"
+        self._jobs: Dict[str, _PromptJob] = {}
+        self._reader: Optional[asyncio.Task] = None
+        self._connected = asyncio.Event()
+        self._closed = False
+
+    @property
+    def ws_url(self) -> str:
+        scheme, _, rest = self.base_url.partition("://")
+        ws_scheme = "wss" if scheme == "https" else "ws"
+        return f"{ws_scheme}://{rest}/ws?clientId={self.client_id}"
+
+    @property
+    def connected(self) -> bool:
+        return self._connected.is_set()
+
+    async def start(self) -> bool:
+        """Start the listener if needed; returns whether the websocket is up."""
+        if self._closed:
+            return False
+        if self._reader is not None and not self._reader.done():
+            return self.connected  # running, possibly waiting to reconnect
+        self._reader = asyncio.create_task(self._run())
+        try:
+            await asyncio.wait_for(self._connected.wait(), timeout=CONNECT_TIMEOUT)
+        except asyncio.TimeoutError:
+            pass
+        return self.connected
+
+    async def _run(self):
+        delay = 1.0
+        while not self._closed:
+            try:
+                session = http_clients.aiohttp_session("comfyui")
+                async with session.ws_connect(self.ws_url, headers=self.headers, heartbeat=30) as ws:
+                    self._connected.set()
+                    delay = 1.0
+                    logger.info(f"ComfyUI websocket connected: {self.base_url}")
+                    # Events sent while we were disconnected are lost
+                    for job in list(self._jobs.values()):
+                        if not job.future.done():
+                            asyncio.create_task(self._refresh(job))
+                    async for msg in ws:
+                        if msg.type == aiohttp.WSMsgType.TEXT:
+                            self._dispatch(msg.data)
+                        elif msg.type in (aiohttp.WSMsgType.ERROR, aiohttp.WSMsgType.CLOSED):
+                            break
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.debug(f"ComfyUI websocket {self.base_url} unavailable: {e}")
+            finally:
+                self._connected.clear()
+            if self._closed:
+                break
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, RECONNECT_MAX_DELAY)
+
+    # ------------------------------------------------------------------
+    # Event demultiplexing
+    # ------------------------------------------------------------------
+    def _job(self, prompt_id: str) -> _PromptJob:
+        job = self._jobs.get(prompt_id)
+        if job is None:
+            now = time.monotonic()
+            for stale_id, stale in list(self._jobs.items()):
+                if stale.future.done() and now - stale.updated_at > JOB_RETENTION:
+                    del self._jobs[stale_id]
+            job = _PromptJob(prompt_id, asyncio.get_running_loop().create_future())
+            self._jobs[prompt_id] = job
+        return job
+
+    def _dispatch(self, raw: str):
+        try:
+            message = json.loads(raw)
+        except ValueError:
+            return
+        kind = message.get("type")
+        data = message.get("data") or {}
+        prompt_id = data.get("prompt_id")
+        if not prompt_id:
+            return  # status broadcasts
+
+        job = self._job(prompt_id)
+        if job.future.done():
+            return
+        job.updated_at = time.monotonic()
+
+        if kind == "executing":
+            job.node = data.get("node")
+            if job.node is None:  # end of prompt
+                self._resolve(job)
+            else:
+                self._notify(job)
+        elif kind == "progress":
+            job.node = data.get("node", job.node)
+            job.value = data.get("value", 0)
+            job.max = data.get("max", 0)
+            self._notify(job)
+        elif kind == "executed":
+            job.outputs[str(data.get("node"))] = data.get("output") or {}
+        elif kind == "execution_cached":
+            job.cached_nodes.extend(data.get("nodes") or [])
+        elif kind == "execution_success":
+            self._resolve(job)
+        elif kind == "execution_error":
+            self._resolve(job, error=data.get("exception_message") or "Unknown error")
+        elif kind == "execution_interrupted":
+            self._resolve(job, error="Execution interrupted")
+
+    def _resolve(self, job: _PromptJob, error: Optional[str] = None, entry: Optional[Dict[str, Any]] = None):
+        if job.future.done():
+            return
+        if entry is None:
+            if error:
+                status = {"status_str": "error", "completed": False, "error": error}
+            else:
+                status = {"status_str": "success", "completed": True}
+            entry = {"status": status, "outputs": job.outputs}
+        job.updated_at = time.monotonic()
+        job.future.set_result(entry)
+        self._notify(job)
+
+    def _notify(self, job: _PromptJob):
+        event = job.progress()
+        for listener in list(job.listeners):
+            try:
+                result = listener(event)
+                if inspect.isawaitable(result):
+                    asyncio.ensure_future(result)
+            except Exception as e:
+                logger.debug(f"ComfyUI progress listener failed: {e}")
+
+    # ------------------------------------------------------------------
+    # /history fallback
+    # ------------------------------------------------------------------
+    async def _fetch_history(self, prompt_id: str) -> Optional[Dict[str, Any]]:
+        try:
+            async with http_clients.client("comfyui", timeout=10.0, headers=self.headers) as client:
+                resp = await client.get(f"{self.base_url}/history/{prompt_id}")
+                if resp.status_code != 200:
+                    return None
+                return resp.json().get(prompt_id)
+        except Exception as e:
+            logger.debug(f"ComfyUI history lookup for {prompt_id} failed: {e}")
+            return None
+
+    async def _refresh(self, job: _PromptJob):
+        entry = await self._fetch_history(job.prompt_id)
+        if not entry:
+            return
+        status = entry.get("status") or {}
+        if status.get("completed") or entry.get("outputs"):
+            self._resolve(job, entry=entry)
+        elif (status.get("status_str") or "").lower() == "error":
+            self._resolve(job, entry={**entry, "status": {**status, "error": _error_message(entry)}})
+
+    # ------------------------------------------------------------------
+    # Public API
+    # ------------------------------------------------------------------
+    async def wait(
+        self,
+        prompt_id: str,
+        timeout: float,
+        on_progress: Optional[ProgressCallback] = None,
+    ) -> Dict[str, Any]:
+        """
+        Wait for a prompt to finish and return its history entry
+        ({"status": {...}, "outputs": {...}}).
+
+        Raises asyncio.TimeoutError if the prompt does not finish in time.
+        """
+        job = self._job(prompt_id)
+        if on_progress:
+            job.listeners.append(on_progress)
+        deadline = time.monotonic() + timeout
+        try:
+            was_connected = self.connected
+            if not await self.start() or not was_connected:
+                await self._refresh(job)
+
+            attempt = 0
+            while not job.future.done():
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise asyncio.TimeoutError(f"ComfyUI prompt {prompt_id} did not finish within {timeout:g}s")
+                if self.connected:
+                    interval = RECHECK_INTERVAL
+                else:
+                    interval = POLL_INTERVALS[min(attempt, len(POLL_INTERVALS) - 1)]
+                    attempt += 1
+                try:
+                    await asyncio.wait_for(asyncio.shield(job.future), timeout=min(remaining, interval))
+                except asyncio.TimeoutError:
+                    await self._refresh(job)
+
+            entry = job.future.result()
+            # Cached nodes send no "executed" event, their outputs are only in the history
+            if entry.get("status", {}).get("completed") and (job.cached_nodes or not entry.get("outputs")):
+                entry = await self._fetch_history(prompt_id) or entry
+            return entry
+        finally:
+            if on_progress and on_progress in job.listeners:
+                job.listeners.remove(on_progress)
+            if job.future.done() and not job.listeners:
+                self._jobs.pop(prompt_id, None)
+
+    def progress(self, prompt_id: str) -> Optional[Dict[str, Any]]:
+        job = self._jobs.get(prompt_id)
+        return job.progress() if job else None
+
+    def active(self) -> List[Dict[str, Any]]:
+        return [job.progress() for job in self._jobs.values() if not job.future.done()]
+
+    async def close(self):
+        self._closed = True
+        if self._reader:
+            self._reader.cancel()
+            try:
+                await self._reader
+            except (asyncio.CancelledError, Exception):
+                pass
+        for job in self._jobs.values():
+            if not job.future.done():
+                job.future.cancel()
+        self._jobs.clear()
+
+
+_trackers: Dict[str, ComfyUICompletionTracker] = {}
+
+
+def get_comfyui_tracker(base_url: str, headers: Optional[Dict[str, str]] = None) -> ComfyUICompletionTracker:
+    """Return the shared tracker for a ComfyUI server."""
+    key = base_url.rstrip("/")
+    tracker = _trackers.get(key)
+    if tracker is None:
+        tracker = _trackers[key] = ComfyUICompletionTracker(key, headers)
+    elif headers:
+        tracker.headers = headers
+    return tracker
+
+
+def comfyui_trackers() -> List[ComfyUICompletionTracker]:
+    return list(_trackers.values())
+
+
+async def close_comfyui_trackers():
+    for tracker in list(_trackers.values()):
+        await tracker.close()
+    _trackers.clear()
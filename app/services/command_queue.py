@@ -13,18 +13,30 @@ Version: 2.80
 
 import asyncio
 import heapq
+import itertools
 import json
 import logging
+import os
+import shutil
 import time
 import uuid
-from collections import defaultdict
+from collections import OrderedDict, defaultdict
 from dataclasses import dataclass, field
 from datetime import datetime, timezone
 from enum import Enum
+from pathlib import Path
 from typing import Any, Callable, Dict, List, Optional, Set, Tuple
 
 logger = logging.getLogger("ailinux.command_queue")
 
+SNAPSHOT_EVERY = 2000      # WAL-Datensätze bis zum nächsten Snapshot
+WAL_SYNC_INTERVAL = 1.0    # Sekunden zwischen fsyncs des WAL
+RETAIN_FINISHED = 1000     # abgeschlossene Kommandos, die abrufbar bleiben
+FINISHED_TTL = 3600        # Sekunden, die ein abgeschlossenes Kommando abrufbar bleibt
+
+# (priority, timestamp, seq, command_id)
+ReadyEntry = Tuple[int, float, int, str]
+
 
 class CommandPriority(int, Enum):
     """Prioritätsstufen für Kommandos"""
@@ -45,6 +57,9 @@ class CommandStatus(str, Enum):
     CANCELLED = "cancelled"
 
 
+FINISHED_STATES = (CommandStatus.COMPLETED, CommandStatus.FAILED, CommandStatus.CANCELLED)
+
+
 class CommandType(str, Enum):
     """Typen von Kommandos"""
     CHAT = "chat"
@@ -93,6 +108,145 @@ class Command:
             "retries": self.retries,
         }
 
+    def to_record(self) -> Dict[str, Any]:
+        """Persistierte Form: to_dict() plus Sortierschlüssel und Retry-Limit"""
+        return {**self.to_dict(), "timestamp": self.timestamp, "max_retries": self.max_retries}
+
+    @classmethod
+    def from_record(cls, data: Dict[str, Any]) -> "Command":
+        return cls(
+            priority=data["priority"],
+            # Ältere Snapshots haben keinen Zeitstempel
+            timestamp=data.get("timestamp") or time.time(),
+            id=data["id"],
+            type=CommandType(data["type"]),
+            payload=data["payload"],
+            target_agent=data.get("target_agent"),
+            status=CommandStatus(data["status"]),
+            result=data.get("result"),
+            error=data.get("error"),
+            created_at=data["created_at"],
+            started_at=data.get("started_at"),
+            completed_at=data.get("completed_at"),
+            assigned_to=data.get("assigned_to"),
+            retries=data.get("retries", 0),
+            max_retries=data.get("max_retries", 3),
+        )
+
+
+class CommandLog:
+    """
+    Persistenz der Queue: Snapshot (state.json) plus Append-only WAL (state.wal).
+
+    Jede Änderung hängt den neuen Stand des Kommandos als eine JSON-Zeile an
+    das WAL an, statt den gesamten Zustand neu zu schreiben. Nach
+    SNAPSHOT_EVERY Datensätzen wird das WAL nach state.wal.1 rotiert und ein
+    neuer Snapshot im Hintergrund geschrieben. Alle Datensätze setzen einen
+    Zustand absolut, ein erneutes Einspielen ist daher unschädlich.
+    """
+
+    def __init__(self, snapshot_path: str):
+        self.snapshot_path = Path(snapshot_path)
+        self.wal_path = self.snapshot_path.with_suffix(".wal")
+        self.rotated_path = self.snapshot_path.with_suffix(".wal.1")
+        self.records = 0
+        self._wal = None
+        self._last_sync = 0.0
+        self._sync_pending = False
+
+    @property
+    def available(self) -> bool:
+        return self._wal is not None
+
+    def load(self) -> Dict[str, Dict[str, Any]]:
+        """Snapshot laden und die WAL-Dateien darauf anwenden"""
+        state: Dict[str, Dict[str, Any]] = {}
+        if self.snapshot_path.exists():
+            for record in json.loads(self.snapshot_path.read_text()).get("commands", []):
+                state[record["id"]] = record
+        for path in (self.rotated_path, self.wal_path):
+            if not path.exists():
+                continue
+            with open(path, encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        logger.warning(f"Ignoring torn record at end of {path}")
+                        break
+                    if entry.get("op") == "put":
+                        state[entry["cmd"]["id"]] = entry["cmd"]
+                    elif entry.get("op") == "del":
+                        state.pop(entry["id"], None)
+        return state
+
+    def open(self, records: List[Dict[str, Any]]):
+        """Startzustand als Snapshot festschreiben und ein leeres WAL beginnen"""
+        self.snapshot_path.parent.mkdir(parents=True, exist_ok=True)
+        mode = "a"
+        try:
+            self.write_snapshot(records)
+            mode = "w"
+        except OSError as e:
+            logger.error(f"Failed to write queue snapshot, keeping WAL: {e}")
+        self._wal = open(self.wal_path, mode, encoding="utf-8")
+
+    def append(self, op: str, **fields):
+        if self._wal is None:
+            return
+        try:
+            self._wal.write(json.dumps({"op": op, **fields}, separators=(",", ":")) + "\n")
+            self._wal.flush()
+        except (OSError, TypeError, ValueError) as e:
+            logger.error(f"Failed to append to queue WAL: {e}")
+            return
+        self.records += 1
+        now = time.monotonic()
+        if not self._sync_pending and now - self._last_sync >= WAL_SYNC_INTERVAL:
+            self._sync_pending = True
+            self._last_sync = now
+            asyncio.get_running_loop().run_in_executor(None, self._sync, self._wal.fileno())
+
+    def _sync(self, fd: int):
+        try:
+            os.fsync(fd)
+        except OSError:
+            pass  # WAL wurde inzwischen rotiert
+        finally:
+            self._sync_pending = False
+
+    def rotate(self):
+        """Aktuelles WAL beiseitelegen; neue Datensätze gehen in ein frisches WAL"""
+        self._wal.close()
+        if self.rotated_path.exists():
+            # Letzter Snapshot ist fehlgeschlagen: dessen Datensätze behalten
+            with open(self.rotated_path, "ab") as dst, open(self.wal_path, "rb") as src:
+                shutil.copyfileobj(src, dst)
+            os.remove(self.wal_path)
+        else:
+            os.replace(self.wal_path, self.rotated_path)
+        self._wal = open(self.wal_path, "a", encoding="utf-8")
+        self.records = 0
+
+    def write_snapshot(self, records: List[Dict[str, Any]]):
+        tmp = self.snapshot_path.with_suffix(".tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(
+                {"timestamp": datetime.now(timezone.utc).isoformat(), "commands": records},
+                f, separators=(",", ":"),
+            )
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, self.snapshot_path)
+        self.rotated_path.unlink(missing_ok=True)
+
+    def close(self):
+        if self._wal is not None:
+            self._wal.flush()
+            os.fsync(self._wal.fileno())
+            self._wal.close()
+            self._wal = None
+
 
 @dataclass
 class AgentStatus:
@@ -130,29 +284,33 @@ class CommandQueue:
     Zentrale Command Queue für alle Agenten.
 
     Features:
-    - Priority Queue (heapq)
+    - Priority Queues (heapq) pro Kommando-Typ und pro Ziel-Agent
     - Load Balancing (least busy agent)
     - Capability-based Routing
     - Automatic Retry
     - Research Distribution
+    - Persistenz über WAL + Snapshot (CommandLog)
     """
 
     def __init__(self, max_queue_size: int = 1000, persistence_file: str = "/var/tristar/queue/state.json"):
-        self._queue: List[Command] = []  # Priority heap
         self._commands: Dict[str, Command] = {}  # ID -> Command
         self._agents: Dict[str, AgentStatus] = {}
-        self._agent_queues: Dict[str, List[Command]] = defaultdict(list)
+        # Ready-Heaps: ungezielte Kommandos nach Typ, gezielte nach Agent und Typ.
+        # Einträge sind gültig, solange _queued[id] ihre seq enthält.
+        self._ready_by_type: Dict[str, List[ReadyEntry]] = defaultdict(list)
+        self._ready_by_target: Dict[str, Dict[str, List[ReadyEntry]]] = defaultdict(lambda: defaultdict(list))
+        self._queued: Dict[str, int] = {}
+        self._seq = itertools.count()
+        self._finished: "OrderedDict[str, float]" = OrderedDict()  # ID -> Abschlusszeit
         self._max_queue_size = max_queue_size
         self._persistence_file = persistence_file
+        self._log = CommandLog(persistence_file)
+        self._compaction: Optional[asyncio.Task] = None
         self._lock = asyncio.Lock()
+        self._ready = asyncio.Condition(self._lock)
         self._workers: Dict[str, asyncio.Task] = {}
         self._running = False
 
-        # Ensure directory exists
-        import os
-        from pathlib import Path
-        Path(self._persistence_file).parent.mkdir(parents=True, exist_ok=True)
-
         # Capabilities mapping
         self._capability_map = {
             "research": ["gemini", "kimi", "nova", "claude"],
@@ -167,57 +325,74 @@ class CommandQueue:
         self._load_state()
 
     def _load_state(self):
-        """Load queue state from file"""
+        """Load queue state from snapshot + WAL"""
         try:
-            from pathlib import Path
-            path = Path(self._persistence_file)
-            if path.exists():
-                data = json.loads(path.read_text())
-                
-                # Restore commands
-                for cmd_data in data.get("commands", []):
-                    cmd = Command(
-                        priority=cmd_data["priority"],
-                        timestamp=time.time(), # Reset timestamp to now to keep order relative
-                        id=cmd_data["id"],
-                        type=CommandType(cmd_data["type"]),
-                        payload=cmd_data["payload"],
-                        target_agent=cmd_data["target_agent"],
-                        status=CommandStatus(cmd_data["status"]),
-                        result=cmd_data.get("result"),
-                        error=cmd_data.get("error"),
-                        created_at=cmd_data["created_at"],
-                        started_at=cmd_data.get("started_at"),
-                        completed_at=cmd_data.get("completed_at"),
-                        assigned_to=cmd_data.get("assigned_to"),
-                        retries=cmd_data.get("retries", 0)
-                    )
-                    self._commands[cmd.id] = cmd
-                    
-                    # Re-queue pending/queued items
-                    if cmd.status in (CommandStatus.PENDING, CommandStatus.QUEUED):
-                        heapq.heappush(self._queue, cmd)
-                    # Handle running items (likely crashed during run)
-                    elif cmd.status == CommandStatus.RUNNING:
-                        cmd.status = CommandStatus.QUEUED # Reset to queued
-                        heapq.heappush(self._queue, cmd)
-                        logger.warning(f"Recovered running command {cmd.id} to queue")
-
-                logger.info(f"Loaded {len(self._commands)} commands from persistence")
+            records = self._log.load()
         except Exception as e:
             logger.error(f"Failed to load queue state: {e}")
+            records = {}
+
+        finished: List[Tuple[float, str]] = []
+        for data in records.values():
+            try:
+                cmd = Command.from_record(data)
+            except (KeyError, ValueError) as e:
+                logger.warning(f"Skipping unreadable queue record: {e}")
+                continue
+            self._commands[cmd.id] = cmd
+
+            # Re-queue pending/queued items
+            if cmd.status in (CommandStatus.PENDING, CommandStatus.QUEUED):
+                self._push(cmd)
+            # Handle running items (likely crashed during run)
+            elif cmd.status == CommandStatus.RUNNING:
+                cmd.status = CommandStatus.QUEUED # Reset to queued
+                self._push(cmd)
+                logger.warning(f"Recovered running command {cmd.id} to queue")
+            else:
+                finished.append((_parse_time(cmd.completed_at), cmd.id))
+
+        for finished_at, cmd_id in sorted(finished):
+            self._finished[cmd_id] = finished_at
+        self._prune_finished()
 
-    def _save_state(self):
-        """Save queue state to file"""
         try:
-            data = {
-                "timestamp": datetime.now(timezone.utc).isoformat(),
-                "commands": [cmd.to_dict() for cmd in self._commands.values()]
-            }
-            with open(self._persistence_file, "w") as f:
-                json.dump(data, f, indent=2)
+            self._log.open([cmd.to_record() for cmd in self._commands.values()])
         except Exception as e:
-            logger.error(f"Failed to save queue state: {e}")
+            logger.error(f"Queue persistence unavailable, running in memory: {e}")
+
+        if self._commands:
+            logger.info(f"Loaded {len(self._commands)} commands from persistence")
+
+    def _persist(self, cmd: Command):
+        """Neuen Stand eines Kommandos ins WAL schreiben"""
+        self._log.append("put", cmd=cmd.to_record())
+        if self._log.records >= SNAPSHOT_EVERY and (self._compaction is None or self._compaction.done()):
+            self._compaction = asyncio.create_task(self._compact())
+
+    async def _compact(self):
+        """Snapshot schreiben und das WAL leeren"""
+        try:
+            async with self._lock:
+                if not self._log.available:
+                    return
+                records = [cmd.to_record() for cmd in self._commands.values()]
+                self._log.rotate()
+            await asyncio.to_thread(self._log.write_snapshot, records)
+            logger.debug(f"Queue snapshot written: {len(records)} commands")
+        except Exception as e:
+            logger.error(f"Failed to compact queue state: {e}")
+
+    def _prune_finished(self):
+        """Abgeschlossene Kommandos über RETAIN_FINISHED / FINISHED_TTL hinaus verwerfen"""
+        cutoff = time.time() - FINISHED_TTL
+        while self._finished:
+            cmd_id, finished_at = next(iter(self._finished.items()))
+            if len(self._finished) <= RETAIN_FINISHED and finished_at >= cutoff:
+                break
+            self._finished.popitem(last=False)
+            self._commands.pop(cmd_id, None)
+            self._log.append("del", id=cmd_id)
 
     async def start(self):
         """Start queue processing"""
@@ -229,6 +404,11 @@ class CommandQueue:
         self._running = False
         for task in self._workers.values():
             task.cancel()
+        if self._compaction is not None:
+            await self._compaction
+        if self._log.available:
+            await self._compact()
+            self._log.close()
         logger.info("Command Queue stopped")
 
     def register_agent(
@@ -248,6 +428,12 @@ class CommandQueue:
             name=name,
             type=agent_type,
             capabilities=capabilities,
+            queue_size=sum(
+                1
+                for heap in self._ready_by_target.get(agent_id, {}).values()
+                for entry in heap
+                if self._queued.get(entry[3]) == entry[2]
+            ),
         )
         self._agents[agent_id] = status
         logger.info(f"Agent registered: {agent_id} ({agent_type})")
@@ -273,6 +459,77 @@ class CommandQueue:
 
         return caps
 
+    # ------------------------------------------------------------------
+    # Ready-Heaps
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def _type_key(cmd: Command) -> str:
+        return cmd.type.value if isinstance(cmd.type, CommandType) else cmd.type
+
+    def _push(self, cmd: Command):
+        """Kommando in seinen Ready-Heap einreihen"""
+        seq = next(self._seq)
+        self._queued[cmd.id] = seq  # ältere Einträge desselben Kommandos werden ungültig
+        entry = (cmd.priority, cmd.timestamp, seq, cmd.id)
+        if cmd.target_agent:
+            heapq.heappush(self._ready_by_target[cmd.target_agent][self._type_key(cmd)], entry)
+            agent = self._agents.get(cmd.target_agent)
+            if agent:
+                agent.queue_size += 1
+        else:
+            heapq.heappush(self._ready_by_type[self._type_key(cmd)], entry)
+
+    def _head(self, heap: List[ReadyEntry]) -> Optional[ReadyEntry]:
+        while heap and self._queued.get(heap[0][3]) != heap[0][2]:
+            heapq.heappop(heap)
+        return heap[0] if heap else None
+
+    def _take(self, agent_id: Optional[str]) -> Optional[Command]:
+        """Bestes passendes Kommando entnehmen (Lock muss gehalten werden)"""
+        if agent_id:
+            agent = self._agents.get(agent_id)
+            if not agent or not agent.available:
+                return None
+            heaps = [
+                heap for cmd_type, heap in self._ready_by_type.items()
+                if self._handles(agent, cmd_type)
+            ] + [
+                heap for cmd_type, heap in self._ready_by_target.get(agent_id, {}).items()
+                if self._handles(agent, cmd_type)
+            ]
+        else:
+            agent = None
+            heaps = list(self._ready_by_type.values()) + [
+                heap for by_type in self._ready_by_target.values() for heap in by_type.values()
+            ]
+
+        best: Optional[ReadyEntry] = None
+        best_heap: Optional[List[ReadyEntry]] = None
+        for heap in heaps:
+            head = self._head(heap)
+            if head is not None and (best is None or head < best):
+                best, best_heap = head, heap
+        if best is None:
+            return None
+
+        heapq.heappop(best_heap)
+        del self._queued[best[3]]
+        cmd = self._commands[best[3]]
+        if cmd.target_agent:
+            target = self._agents.get(cmd.target_agent)
+            if target:
+                target.queue_size = max(0, target.queue_size - 1)
+
+        cmd.status = CommandStatus.RUNNING
+        cmd.started_at = datetime.now(timezone.utc).isoformat()
+        if agent:
+            cmd.assigned_to = agent.id
+            agent.current_command = cmd.id
+            agent.available = False
+        self._persist(cmd)
+        return cmd
+
     async def enqueue(
         self,
         payload: Dict[str, Any],
@@ -293,7 +550,7 @@ class CommandQueue:
             Das erstellte Command-Objekt
         """
         async with self._lock:
-            if len(self._queue) >= self._max_queue_size:
+            if len(self._queued) >= self._max_queue_size:
                 raise ValueError("Queue is full")
 
             cmd = Command(
@@ -305,74 +562,49 @@ class CommandQueue:
                 status=CommandStatus.QUEUED,
             )
 
-            heapq.heappush(self._queue, cmd)
             self._commands[cmd.id] = cmd
-            
-            self._save_state()
+            self._push(cmd)
+            self._persist(cmd)
+            self._ready.notify_all()
 
             logger.debug(f"Command enqueued: {cmd.id} ({command_type.value})")
 
             return cmd
 
-    async def dequeue(self, agent_id: Optional[str] = None) -> Optional[Command]:
+    async def dequeue(self, agent_id: Optional[str] = None, wait: float = 0.0) -> Optional[Command]:
         """
         Holt das nächste Kommando für einen Agenten.
 
         Args:
             agent_id: Optional - nur Kommandos für diesen Agenten
+            wait: Sekunden, die auf ein passendes Kommando gewartet wird (0 = nicht warten)
 
         Returns:
             Das nächste Command oder None
         """
-        async with self._lock:
-            if not self._queue:
-                return None
-
-            if agent_id:
-                agent = self._agents.get(agent_id)
-                if not agent:
-                    return None
-
-                # Suche passendes Kommando für Agent
-                for i, cmd in enumerate(self._queue):
-                    if cmd.target_agent and cmd.target_agent != agent_id:
-                        continue
-                    if not self._can_handle(agent, cmd):
-                        continue
-
-                    # Gefunden - entfernen und zurückgeben
-                    self._queue.pop(i)
-                    heapq.heapify(self._queue)
-                    cmd.status = CommandStatus.RUNNING
-                    cmd.assigned_to = agent_id
-                    cmd.started_at = datetime.now(timezone.utc).isoformat()
-                    agent.current_command = cmd.id
-                    agent.available = False
-                    self._save_state()
+        deadline = time.monotonic() + wait
+        async with self._ready:
+            while True:
+                cmd = self._take(agent_id)
+                remaining = deadline - time.monotonic()
+                if cmd is not None or remaining <= 0:
                     return cmd
+                try:
+                    await asyncio.wait_for(self._ready.wait(), timeout=remaining)
+                except asyncio.TimeoutError:
+                    return self._take(agent_id)
 
-                return None
-
-            else:
-                # Erstes verfügbares Kommando
-                cmd = heapq.heappop(self._queue)
-                cmd.status = CommandStatus.RUNNING
-                cmd.started_at = datetime.now(timezone.utc).isoformat()
-                self._save_state()
-                return cmd
+    def _handles(self, agent: AgentStatus, cmd_type: str) -> bool:
+        required_caps = self._capability_map.get(cmd_type, ["*"])
+        if "*" in required_caps:
+            return True
+        return bool(agent.capabilities & set(required_caps))
 
     def _can_handle(self, agent: AgentStatus, cmd: Command) -> bool:
         """Prüft ob Agent das Kommando bearbeiten kann"""
         if not agent.available:
             return False
-
-        cmd_type = cmd.type.value if isinstance(cmd.type, CommandType) else cmd.type
-        required_caps = self._capability_map.get(cmd_type, ["*"])
-
-        if "*" in required_caps:
-            return True
-
-        return bool(agent.capabilities & set(required_caps))
+        return self._handles(agent, self._type_key(cmd))
 
     async def complete(
         self,
@@ -399,7 +631,7 @@ class CommandQueue:
                 if cmd.retries < cmd.max_retries:
                     cmd.retries += 1
                     cmd.status = CommandStatus.QUEUED
-                    heapq.heappush(self._queue, cmd)
+                    self._push(cmd)
                     logger.warning(f"Command {command_id} failed, retrying ({cmd.retries}/{cmd.max_retries})")
 
             # Agent freigeben
@@ -413,8 +645,12 @@ class CommandQueue:
                         agent.completed_count += 1
                     else:
                         agent.failed_count += 1
-            
-            self._save_state()
+
+            self._persist(cmd)
+            if cmd.status in FINISHED_STATES:
+                self._finished[cmd.id] = time.time()
+                self._prune_finished()
+            self._ready.notify_all()
 
     async def get_command(self, command_id: str) -> Optional[Command]:
         """Holt ein Kommando nach ID"""
@@ -527,7 +763,13 @@ class CommandQueue:
 
         return {
             "total_commands": len(self._commands),
-            "queue_size": len(self._queue),
+            "queue_size": len(self._queued),
+            "persistence": {
+                "file": self._persistence_file,
+                "available": self._log.available,
+                "wal_records": self._log.records,
+                "finished_retained": len(self._finished),
+            },
             "by_status": dict(by_status),
             "by_type": dict(by_type),
             "by_priority": dict(by_priority),
@@ -544,8 +786,6 @@ class CommandQueue:
         if not agent:
             return None
 
-        # Zähle Kommandos für diesen Agenten
-        pending = sum(1 for cmd in self._queue if cmd.target_agent == agent_id)
         completed = sum(
             1 for cmd in self._commands.values()
             if cmd.assigned_to == agent_id and cmd.status == CommandStatus.COMPLETED
@@ -553,11 +793,18 @@ class CommandQueue:
 
         return {
             **agent.to_dict(),
-            "pending_commands": pending,
+            "pending_commands": agent.queue_size,
             "total_completed": completed,
         }
 
 
+def _parse_time(value: Optional[str]) -> float:
+    try:
+        return datetime.fromisoformat(value).timestamp()
+    except (TypeError, ValueError):
+        return time.time()
+
+
 # Singleton instance
 command_queue = CommandQueue()
 
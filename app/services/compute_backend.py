@@ -22,9 +22,14 @@ Verwendung:
     result = compute.matmul(a, b)
 """
 
+import asyncio
 import logging
+import threading
 from abc import ABC, abstractmethod
-from typing import Any, Dict, List, Optional, Union, TYPE_CHECKING
+from collections import OrderedDict
+from typing import (
+    Any, Awaitable, Callable, Dict, Hashable, List, Optional, Sequence, Tuple, Union, TYPE_CHECKING,
+)
 from dataclasses import dataclass
 from enum import Enum, auto
 
@@ -101,6 +106,207 @@ class ComputeBackend(ABC):
         raise NotImplementedError("Subclass must implement to_cpu()")
 
 
+class ModelPool:
+    """
+    Prozessweiter Cache geladener Modelle.
+
+    Schlüssel ist (Modellname, Device). Verdrängt wird nach LRU, sobald der
+    geschätzte Speicherbedarf aller Modelle ``max_bytes`` überschreitet; das
+    zuletzt geladene Modell bleibt immer erhalten.
+    """
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self._models: "OrderedDict[Tuple[str, str], Tuple[Any, int]]" = OrderedDict()
+        self._total_bytes = 0
+        self._lock = threading.Lock()
+        self._load_locks: Dict[Tuple[str, str], threading.Lock] = {}
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def _footprint(handle: Any) -> int:
+        """Schätzt den Speicherbedarf über die Parameter aller torch-Module"""
+        modules = handle if isinstance(handle, tuple) else (handle,)
+        total = 0
+        for module in modules:
+            parameters = getattr(module, "parameters", None)
+            if callable(parameters):
+                try:
+                    total += sum(p.numel() * p.element_size() for p in parameters())
+                except Exception:
+                    pass
+        return total
+
+    def get(self, name: str, device: str, loader: Callable[[], Any]) -> Any:
+        """Liefert das Modell aus dem Pool oder lädt es (blockierend) über ``loader``"""
+        key = (name, device)
+        with self._lock:
+            entry = self._models.get(key)
+            if entry is not None:
+                self._models.move_to_end(key)
+                self.hits += 1
+                return entry[0]
+            load_lock = self._load_locks.setdefault(key, threading.Lock())
+
+        # Nur ein Thread lädt dasselbe Modell, die anderen warten darauf
+        with load_lock:
+            with self._lock:
+                entry = self._models.get(key)
+                if entry is not None:
+                    self._models.move_to_end(key)
+                    self.hits += 1
+                    return entry[0]
+            handle = loader()
+            size = self._footprint(handle)
+            with self._lock:
+                self.misses += 1
+                self._models[key] = (handle, size)
+                self._total_bytes += size
+                while self._total_bytes > self.max_bytes and len(self._models) > 1:
+                    old_key, (_, old_size) = self._models.popitem(last=False)
+                    self._total_bytes -= old_size
+                    logger.info(f"ModelPool: verdränge {old_key[0]} ({old_key[1]}, {old_size / 1024**2:.0f} MB)")
+            logger.info(f"ModelPool: {name} auf {device} geladen ({size / 1024**2:.0f} MB)")
+            return handle
+
+    def clear(self) -> None:
+        with self._lock:
+            self._models.clear()
+            self._total_bytes = 0
+
+    def get_status(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "models": [f"{name}@{device}" for name, device in self._models],
+                "memory_mb": round(self._total_bytes / 1024**2, 1),
+                "max_memory_mb": round(self.max_bytes / 1024**2, 1),
+                "hits": self.hits,
+                "misses": self.misses,
+            }
+
+
+class EmbeddingBatcher:
+    """
+    Micro-Batching für Embedding-Aufrufe.
+
+    Gleichzeitige ``submit()``-Aufrufe mit gleichem Schlüssel (Modell +
+    Optionen) werden zu einem Batch zusammengefasst. Ein Batch wird
+    abgeschickt, sobald ``max_batch_size`` Texte anliegen oder spätestens
+    nach ``max_latency_ms``. ``batch_fn(key, texts)`` muss pro Text genau
+    ein Ergebnis in Eingabereihenfolge liefern.
+    """
+
+    def __init__(
+        self,
+        batch_fn: Callable[[Hashable, List[str]], Awaitable[Sequence[Any]]],
+        *,
+        max_batch_size: int = 32,
+        max_latency_ms: float = 10.0,
+    ):
+        self._batch_fn = batch_fn
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_latency = max(0.0, max_latency_ms) / 1000.0
+        self._pending: Dict[Hashable, List[Tuple[List[str], "asyncio.Future"]]] = {}
+        self._pending_count: Dict[Hashable, int] = {}
+        self._timers: Dict[Hashable, asyncio.TimerHandle] = {}
+        self._tasks: "set[asyncio.Task]" = set()
+        self.batches = 0
+        self.requests = 0
+
+    async def submit(self, key: Hashable, texts: List[str]) -> Sequence[Any]:
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self.requests += 1
+        self._pending.setdefault(key, []).append((texts, future))
+        self._pending_count[key] = self._pending_count.get(key, 0) + len(texts)
+
+        if self._pending_count[key] >= self.max_batch_size:
+            self._flush(key)
+        elif key not in self._timers:
+            self._timers[key] = loop.call_later(self.max_latency, self._flush, key)
+        return await future
+
+    def _flush(self, key: Hashable) -> None:
+        timer = self._timers.pop(key, None)
+        if timer is not None:
+            timer.cancel()
+        requests = self._pending.pop(key, [])
+        self._pending_count.pop(key, None)
+        if requests:
+            self.batches += 1
+            task = asyncio.ensure_future(self._run_batch(key, requests))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _run_batch(self, key: Hashable, requests: List[Tuple[List[str], "asyncio.Future"]]) -> None:
+        texts = [text for request_texts, _ in requests for text in request_texts]
+        try:
+            results = await self._batch_fn(key, texts)
+        except Exception as exc:
+            for _, future in requests:
+                if not future.done():
+                    future.set_exception(exc)
+            return
+        except BaseException:
+            # Batch task cancelled (shutdown): don't leave the other waiters hanging
+            for _, future in requests:
+                future.cancel()
+            raise
+
+        offset = 0
+        for request_texts, future in requests:
+            end = offset + len(request_texts)
+            if not future.done():
+                future.set_result(results[offset:end])
+            offset = end
+
+    def get_status(self) -> Dict[str, Any]:
+        return {
+            "max_batch_size": self.max_batch_size,
+            "max_latency_ms": self.max_latency * 1000,
+            "requests": self.requests,
+            "batches": self.batches,
+            "avg_batch_requests": round(self.requests / self.batches, 2) if self.batches else 0.0,
+        }
+
+
+_model_pool: Optional[ModelPool] = None
+
+
+def get_model_pool() -> ModelPool:
+    """Prozessweiter Modell-Pool (Singleton)"""
+    global _model_pool
+    if _model_pool is None:
+        from ..config import get_settings
+        _model_pool = ModelPool(get_settings().embed_model_pool_max_mb * 1024 * 1024)
+    return _model_pool
+
+
+def make_embedding_batcher(
+    batch_fn: Callable[[Hashable, List[str]], Awaitable[Sequence[Any]]],
+) -> EmbeddingBatcher:
+    """EmbeddingBatcher mit Batch-Größe/Latenz aus den Settings"""
+    from ..config import get_settings
+    settings = get_settings()
+    batch_size = settings.embed_max_batch_size or max(8, get_hardware_config().recommended_batch_size * 4)
+    return EmbeddingBatcher(
+        batch_fn,
+        max_batch_size=batch_size,
+        max_latency_ms=settings.embed_max_batch_latency_ms,
+    )
+
+
+def _batch_key(model: str, options: Dict[str, Any]) -> Optional[Hashable]:
+    """Batch-Schlüssel aus Modell + Optionen; None wenn Optionen nicht hashbar sind"""
+    key = (model, tuple(sorted(options.items())))
+    try:
+        hash(key)
+    except TypeError:
+        return None
+    return key
+
+
 class PyTorchBackend(ComputeBackend):
     """PyTorch-basiertes Compute-Backend (CUDA/ROCm/CPU)"""
 
@@ -108,6 +314,7 @@ class PyTorchBackend(ComputeBackend):
         self._device = device
         self._torch = None
         self._actual_device = None
+        self._batcher: Optional[EmbeddingBatcher] = None
 
     def _lazy_init(self):
         """Lazy-Load PyTorch"""
@@ -180,13 +387,62 @@ class PyTorchBackend(ComputeBackend):
             memory_used_mb=memory_mb,
         )
 
+    def _load_encoder(self, model_name: str) -> Any:
+        """Lädt SentenceTransformer oder (Fallback) Tokenizer + AutoModel"""
+        try:
+            from sentence_transformers import SentenceTransformer
+            return SentenceTransformer(model_name, device=self.device)
+        except ImportError:
+            # Fallback zu transformers
+            from transformers import AutoTokenizer, AutoModel
+            tokenizer = AutoTokenizer.from_pretrained(model_name)
+            encoder = AutoModel.from_pretrained(model_name).to(self.device)
+            encoder.eval()
+            return tokenizer, encoder
+
+    def _encode_batch(self, model_name: str, texts: List[str], options: Dict[str, Any]) -> Any:
+        """Blockierende Batch-Kodierung mit gepooltem Modell (läuft im Thread)"""
+        handle = get_model_pool().get(model_name, self.device, lambda: self._load_encoder(model_name))
+
+        if not isinstance(handle, tuple):
+            return handle.encode(
+                texts,
+                convert_to_tensor=True,
+                show_progress_bar=False,
+                **options
+            )
+
+        tokenizer, encoder = handle
+        inputs = tokenizer(
+            texts,
+            padding=True,
+            truncation=True,
+            return_tensors="pt"
+        ).to(self.device)
+
+        with self._torch.no_grad():
+            outputs = encoder(**inputs)
+            # Mean-Pooling nur über echte Tokens, damit Padding im Batch das Ergebnis nicht verändert
+            mask = inputs["attention_mask"].unsqueeze(-1).to(outputs.last_hidden_state.dtype)
+            summed = (outputs.last_hidden_state * mask).sum(dim=1)
+            return summed / mask.sum(dim=1).clamp(min=1e-9)
+
+    async def _run_batch(self, key: Hashable, texts: List[str]) -> Any:
+        model_name, options = key
+        return await asyncio.to_thread(self._encode_batch, model_name, texts, dict(options))
+
+    def _get_batcher(self) -> EmbeddingBatcher:
+        if self._batcher is None:
+            self._batcher = make_embedding_batcher(self._run_batch)
+        return self._batcher
+
     async def embed(
         self,
         texts: List[str],
         model: Optional[str] = None,
         **kwargs
     ) -> ComputeResult:
-        """Erstellt Embeddings mit SentenceTransformers oder HuggingFace"""
+        """Erstellt Embeddings mit SentenceTransformers oder HuggingFace (gepoolt + gebatcht)"""
         self._lazy_init()
         if not self._torch:
             raise RuntimeError("PyTorch nicht verfügbar")
@@ -194,36 +450,12 @@ class PyTorchBackend(ComputeBackend):
         import time
         start = time.perf_counter()
 
-        try:
-            from sentence_transformers import SentenceTransformer
-
-            model_name = model or "sentence-transformers/all-MiniLM-L6-v2"
-            encoder = SentenceTransformer(model_name, device=self.device)
-            embeddings = encoder.encode(
-                texts,
-                convert_to_tensor=True,
-                show_progress_bar=False,
-                **kwargs
-            )
-
-        except ImportError:
-            # Fallback zu transformers
-            from transformers import AutoTokenizer, AutoModel
-
-            model_name = model or "sentence-transformers/all-MiniLM-L6-v2"
-            tokenizer = AutoTokenizer.from_pretrained(model_name)
-            encoder = AutoModel.from_pretrained(model_name).to(self.device)
-
-            inputs = tokenizer(
-                texts,
-                padding=True,
-                truncation=True,
-                return_tensors="pt"
-            ).to(self.device)
-
-            with self._torch.no_grad():
-                outputs = encoder(**inputs)
-                embeddings = outputs.last_hidden_state.mean(dim=1)
+        model_name = model or "sentence-transformers/all-MiniLM-L6-v2"
+        key = _batch_key(model_name, kwargs)
+        if key is None:
+            embeddings = await asyncio.to_thread(self._encode_batch, model_name, texts, kwargs)
+        else:
+            embeddings = await self._get_batcher().submit(key, texts)
 
         elapsed_ms = (time.perf_counter() - start) * 1000
 
@@ -620,6 +852,10 @@ class ComputeManager:
                     "available": self._llama.is_available() if self._llama else False,
                 },
             },
+            "embeddings": {
+                "model_pool": get_model_pool().get_status(),
+                "batcher": self._pytorch._batcher.get_status() if self._pytorch and self._pytorch._batcher else None,
+            },
             "hardware": {
                 "accelerator": hw_config.primary_accelerator.name,
                 "gpu_count": len(hw_config.gpus),
@@ -6,7 +6,7 @@ import random
 import re
 import uuid
 from collections import OrderedDict, defaultdict, deque
-from dataclasses import dataclass, field, asdict
+from dataclasses import dataclass, field
 from datetime import datetime, timedelta, timezone
 from pathlib import Path
 from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
@@ -141,8 +141,8 @@ def is_ssrf_safe(url: str) -> Tuple[bool, str]:
         return False, f"URL validation error: {e}"
 import gzip
 import jsonlines
-from rank_bm25 import BM25Okapi
 from ...config import get_settings
+from .search_index import CrawlerSearchIndex, shard_date
 from .shared_state import CrawlerSharedState, shared_crawler_state
 
 logger = __import__("logging").getLogger("ailinux.crawler")
@@ -535,6 +535,7 @@ class CrawlerManager:
         self._flush_interval = int(getattr(settings, "crawler_flush_interval", 3600))
         self._retention_days = int(getattr(settings, "crawler_retention_days", 30))
         self._load_train_index()
+        self._search_index = CrawlerSearchIndex(self._train_dir / "index")
 
     def _load_train_index(self) -> None:
         if self._train_index_path.exists():
@@ -652,6 +653,9 @@ class CrawlerManager:
                     records_flushed += 1
                     size_flushed += len(json.dumps(data).encode("utf-8"))
             self._train_buffer.clear()
+            # Detach the live segment together with the buffer, then write it off the loop
+            live = self._search_index.take_live()
+            await asyncio.to_thread(self._search_index.seal, shard_name, live)
 
             # Update train index
             found = False
@@ -709,6 +713,7 @@ class CrawlerManager:
                                 with gzip.open(gzipped_shard_path, "wb") as f_out:
                                     f_out.writelines(f_in)
                             shard_path.unlink() # Delete original
+                            self._search_index.drop(shard_info["name"])
                             logger.info("Gzipped and archived shard: %s", shard_path.name)
                         except Exception as exc:
                             logger.error("Error gzipping shard %s: %s", shard_path.name, exc)
@@ -1042,58 +1047,26 @@ class CrawlerManager:
         min_score: float = 0.35,
         freshness_days: int = 7,
     ) -> List[Dict[str, Any]]:
-        all_results: List[Dict[str, Any]] = []
-        query_tokens = query.lower().split()
-        max_scan_docs = 10000  # Safety limit to prevent OOM
-
-        # 1. Search RAM first
-        async with self._store._lock:
-            for result in self._store._records.values():
-                if result.normalized_text:
-                    all_results.append(asdict(result))
-
-        # 2. Search disk shards
+        # Select fresh shard segments; the live segment (unflushed results) is always searched
         cutoff_date = datetime.now(timezone.utc) - timedelta(days=freshness_days)
         async with self._lock:
+            shard_paths = []
             for shard_info in self._train_index["shards"]:
                 shard_path = self._train_dir / shard_info["name"]
                 if not shard_path.exists():
                     continue
-
-                try:
-                    date_str = shard_info["name"].replace("crawl-train-", "").replace(".jsonl", "")
-                    shard_date = datetime.strptime(date_str, "%Y%m%d-%H").replace(tzinfo=timezone.utc)
-                    if shard_date < cutoff_date:
-                        continue
-                except ValueError:
+                shard_ts = shard_date(shard_info["name"])
+                if shard_ts is None or shard_ts < cutoff_date:
                     continue
-
-                with jsonlines.open(shard_path, mode="r") as reader:
-                    for obj in reader:
-                        # Reconstruct CrawlResult from dict for consistent processing
-                        result = CrawlResult.from_dict(obj)
-                        if result.normalized_text:
-                            all_results.append(obj)
-                        if len(all_results) >= max_scan_docs:
-                            break
-                if len(all_results) >= max_scan_docs:
-                    break
-
-        # 3. Rerank results (BM25)
-        if not all_results:
-            return []
-
-        corpus = [res["normalized_text"] for res in all_results if res.get("normalized_text")]
-        if not corpus:
-            return []
-
-        tokenized_corpus = [doc.lower().split() for doc in corpus]
-        bm25 = BM25Okapi(tokenized_corpus)
-        doc_scores = bm25.get_scores(query_tokens)
+                shard_paths.append(shard_path)
+            # Segment builds and reads touch disk and flock; keep them off the event loop
+            await asyncio.to_thread(self._search_index.ensure_segments, shard_paths)
+            hits = await asyncio.to_thread(
+                self._search_index.search, query, [path.name for path in shard_paths]
+            )
 
         scored_results = []
-        for i, res in enumerate(all_results):
-            res_score = doc_scores[i] # BM25 score
+        for res, res_score in hits:
             # Combine with original score, if any, or just use BM25
             final_score = (res.get("score", 0.0) + res_score) / 2.0 if res.get("score") else res_score
             if final_score >= min_score:
@@ -1102,7 +1075,7 @@ class CrawlerManager:
                     "title": res["title"],
                     "excerpt": res["excerpt"],
                     "score": final_score,
-                    "ts": res["created_at"],
+                    "ts": res["ts"],
                     "source_domain": res["source_domain"],
                 })
 
@@ -1385,6 +1358,7 @@ class CrawlerManager:
                 )
                 await self._store.add(result)
                 self._train_buffer.append(result)
+                self._search_index.add(result)
                 if len(self._train_buffer) >= self._train_buffer_max_size:
                     # Trigger background flush
                     asyncio.create_task(self.flush_to_jsonl())
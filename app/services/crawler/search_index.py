@@ -0,0 +1,344 @@
+from __future__ import annotations
+
+import fcntl
+import json
+import math
+import os
+import threading
+from collections import Counter
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+import jsonlines
+
+logger = __import__("logging").getLogger("ailinux.crawler.index")
+
+# BM25Okapi defaults (rank_bm25)
+BM25_K1 = 1.5
+BM25_B = 0.75
+BM25_EPSILON = 0.25
+
+LIVE_SEGMENT = "__live__"
+
+
+def shard_date(shard_name: str) -> Optional[datetime]:
+    """Parse the hour bucket from a shard name (crawl-train-YYYYMMDD-HH.jsonl)."""
+    date_str = shard_name.replace("crawl-train-", "").replace(".jsonl", "")
+    try:
+        return datetime.strptime(date_str, "%Y%m%d-%H").replace(tzinfo=timezone.utc)
+    except ValueError:
+        return None
+
+
+def tokenize(text: str) -> List[str]:
+    return text.lower().split()
+
+
+class _Segment:
+    """Postings, doc lengths and stored fields for one JSONL shard."""
+
+    __slots__ = ("name", "docs", "postings", "total_len")
+
+    def __init__(self, name: str) -> None:
+        self.name = name
+        self.docs: Dict[str, Dict[str, Any]] = {}
+        self.postings: Dict[str, Dict[str, int]] = {}
+        self.total_len = 0
+
+    def add(self, doc_id: str, text: str, fields: Dict[str, Any]) -> None:
+        if doc_id in self.docs:
+            self.remove(doc_id)
+        tokens = tokenize(text)
+        for term, tf in Counter(tokens).items():
+            self.postings.setdefault(term, {})[doc_id] = tf
+        self.docs[doc_id] = dict(fields, len=len(tokens))
+        self.total_len += len(tokens)
+
+    def remove(self, doc_id: str) -> None:
+        doc = self.docs.pop(doc_id, None)
+        if doc is None:
+            return
+        self.total_len -= doc["len"]
+        for term in list(self.postings):
+            postings = self.postings[term]
+            if postings.pop(doc_id, None) is not None and not postings:
+                del self.postings[term]
+
+    def snapshot(self, terms: Iterable[str]) -> "_Segment":
+        """Copy holding the postings of ``terms``, enough to score a query."""
+        copy = _Segment(self.name)
+        copy.docs = dict(self.docs)
+        copy.postings = {term: dict(self.postings[term]) for term in terms if term in self.postings}
+        copy.total_len = self.total_len
+        return copy
+
+    def merge(self, other: "_Segment") -> None:
+        for doc_id in other.docs:
+            if doc_id in self.docs:
+                self.remove(doc_id)
+        for term, postings in other.postings.items():
+            self.postings.setdefault(term, {}).update(postings)
+        self.docs.update(other.docs)
+        self.total_len += other.total_len
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"name": self.name, "docs": self.docs, "postings": self.postings}
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "_Segment":
+        segment = cls(data["name"])
+        segment.docs = data.get("docs", {})
+        segment.postings = data.get("postings", {})
+        segment.total_len = sum(doc.get("len", 0) for doc in segment.docs.values())
+        return segment
+
+
+class CrawlerSearchIndex:
+    """Incrementally maintained BM25 inverted index over crawl results.
+
+    Results are added to an in-memory live segment as they are stored. When the
+    train buffer is flushed to a JSONL shard, the live segment is sealed into a
+    per-shard segment file, so archiving a shard only drops its segment. Queries
+    only read the postings of their own terms.
+
+    Scores follow rank_bm25's BM25Okapi with corpus statistics taken from the
+    selected segments. Terms occurring in more than half of the documents get
+    ``epsilon * ln(2)`` as idf floor instead of ``epsilon * mean(idf)``, since the
+    mean would require a full vocabulary pass per query.
+
+    Every crawler process keeps its own live segment but shares the segment
+    files. Writers hold ``index.lock`` and merge into the segment as it is on
+    disk; readers reload a cached segment when its file changed.
+
+    ensure_segments() and search() may run in a worker thread while the event
+    loop keeps adding results; the live segment is guarded by ``_live_lock``
+    and queries score a snapshot of it.
+    """
+
+    def __init__(self, index_dir: Path) -> None:
+        self.index_dir = index_dir
+        self.segment_dir = index_dir / "segments"
+        self.segment_dir.mkdir(parents=True, exist_ok=True)
+        self._manifest_path = index_dir / "manifest.json"
+        self._lock_fd = os.open(index_dir / "index.lock", os.O_RDWR | os.O_CREAT, 0o644)
+        self._live = _Segment(LIVE_SEGMENT)
+        self._live_lock = threading.Lock()
+        # Loaded segments with the (mtime_ns, size) of the file they were read from
+        self._segments: Dict[str, Tuple[_Segment, Tuple[int, int]]] = {}
+        self._known: set[str] = set()
+        self._unreadable: set[str] = set()  # known, but the segment file must be rebuilt
+        self._load_manifest()
+
+    # ------------------------------------------------------------------
+    # Persistence helpers
+    # ------------------------------------------------------------------
+    @contextmanager
+    def _locked(self) -> Iterator[None]:
+        fcntl.flock(self._lock_fd, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(self._lock_fd, fcntl.LOCK_UN)
+
+    def _load_manifest(self) -> None:
+        if not self._manifest_path.exists():
+            return
+        try:
+            data = json.loads(self._manifest_path.read_text(encoding="utf-8"))
+            self._known = set(data.get("segments", []))
+        except (json.JSONDecodeError, OSError):
+            logger.warning("Could not read search index manifest, segments will be rebuilt.")
+            self._known = set()
+
+    def _save_manifest(self) -> None:
+        self._atomic_write(self._manifest_path, {"segments": sorted(self._known)})
+
+    def _segment_path(self, name: str) -> Path:
+        return self.segment_dir / f"{name}.json"
+
+    @staticmethod
+    def _atomic_write(path: Path, payload: Dict[str, Any]) -> None:
+        tmp_path = path.with_suffix(path.suffix + ".tmp")
+        with open(tmp_path, "w", encoding="utf-8") as handle:
+            json.dump(payload, handle, ensure_ascii=False, separators=(",", ":"))
+        os.replace(tmp_path, path)
+
+    def _save_segment(self, segment: _Segment) -> None:
+        path = self._segment_path(segment.name)
+        self._atomic_write(path, segment.to_dict())
+        st = path.stat()
+        self._segments[segment.name] = (segment, (st.st_mtime_ns, st.st_size))
+
+    def _get_segment(self, name: str) -> Optional[_Segment]:
+        """Segment ``name`` as currently on disk (cached while its file is unchanged)."""
+        if name not in self._known:
+            return None
+        path = self._segment_path(name)
+        cached = self._segments.get(name)
+        try:
+            st = path.stat()
+            version = (st.st_mtime_ns, st.st_size)
+            if cached is not None and cached[1] == version:
+                return cached[0]
+            segment = _Segment.from_dict(json.loads(path.read_text(encoding="utf-8")))
+        except (json.JSONDecodeError, OSError) as exc:
+            logger.warning("Search index segment %s unreadable (%s), will rebuild", name, exc)
+            self._segments.pop(name, None)
+            self._unreadable.add(name)
+            return None
+        self._segments[name] = (segment, version)
+        return segment
+
+    # ------------------------------------------------------------------
+    # Maintenance
+    # ------------------------------------------------------------------
+    @staticmethod
+    def _stored_fields(record: Dict[str, Any]) -> Dict[str, Any]:
+        created_at = record.get("created_at")
+        if isinstance(created_at, datetime):
+            created_at = created_at.isoformat()
+        return {
+            "url": record.get("url"),
+            "title": record.get("title"),
+            "excerpt": record.get("excerpt"),
+            "score": record.get("score", 0.0),
+            "ts": created_at,
+            "source_domain": record.get("source_domain"),
+        }
+
+    def add(self, result: Any) -> None:
+        """Index a freshly stored CrawlResult in the live segment."""
+        if not result.normalized_text:
+            return
+        record = {
+            "url": result.url,
+            "title": result.title,
+            "excerpt": result.excerpt,
+            "score": result.score,
+            "created_at": result.created_at,
+            "source_domain": result.source_domain,
+        }
+        with self._live_lock:
+            self._live.add(result.id, result.normalized_text, self._stored_fields(record))
+
+    def take_live(self) -> _Segment:
+        """Detach the live segment; results added afterwards go to a fresh one."""
+        with self._live_lock:
+            live, self._live = self._live, _Segment(LIVE_SEGMENT)
+        return live
+
+    def seal(self, shard_name: str, live: _Segment) -> None:
+        """Merge a segment taken with take_live() into the segment of the shard it was flushed to."""
+        if not live.docs:
+            return
+        with self._locked():
+            # Other processes seal into the same shard: merge into the file, not the cache
+            self._load_manifest()
+            segment = self._get_segment(shard_name) or _Segment(shard_name)
+            segment.merge(live)
+            self._save_segment(segment)
+            if shard_name not in self._known:
+                self._known.add(shard_name)
+                self._save_manifest()
+
+    def drop(self, shard_name: str) -> None:
+        """Remove the segment of an archived or deleted shard."""
+        with self._locked():
+            self._load_manifest()
+            self._segments.pop(shard_name, None)
+            if shard_name in self._known:
+                self._known.discard(shard_name)
+                self._save_manifest()
+            try:
+                self._segment_path(shard_name).unlink()
+            except FileNotFoundError:
+                pass
+
+    def ensure_segments(self, shard_paths: Iterable[Path]) -> None:
+        """Build segments for shards written before the index existed."""
+        self._load_manifest()
+        missing = [
+            path for path in shard_paths
+            if path.name not in self._known or path.name in self._unreadable
+        ]
+        if not missing:
+            return
+        with self._locked():
+            self._load_manifest()
+            self._build_segments(missing)
+
+    def _build_segments(self, shard_paths: List[Path]) -> None:
+        added = False
+        for shard_path in shard_paths:
+            name = shard_path.name
+            if name in self._known and name not in self._unreadable:
+                continue
+            segment = _Segment(name)
+            try:
+                with jsonlines.open(shard_path, mode="r") as reader:
+                    for obj in reader:
+                        if obj.get("normalized_text") and obj.get("id"):
+                            segment.add(obj["id"], obj["normalized_text"], self._stored_fields(obj))
+            except (OSError, jsonlines.InvalidLineError) as exc:
+                logger.warning("Could not index shard %s: %s", name, exc)
+                continue
+            self._save_segment(segment)
+            self._unreadable.discard(name)
+            if name not in self._known:
+                self._known.add(name)
+                added = True
+            logger.info("Indexed legacy shard %s (%d docs)", name, len(segment.docs))
+        if added:
+            self._save_manifest()
+
+    # ------------------------------------------------------------------
+    # Query
+    # ------------------------------------------------------------------
+    def search(
+        self, query: str, shard_names: Iterable[str], *, include_live: bool = True
+    ) -> List[Tuple[Dict[str, Any], float]]:
+        """Return ``(stored_fields, bm25_score)`` for documents matching any query term."""
+        shard_names = set(shard_names)
+        for name in [name for name in self._segments if name not in shard_names]:
+            del self._segments[name]  # fell out of the freshness window
+        segments = [seg for seg in (self._get_segment(name) for name in sorted(shard_names)) if seg]
+        query_tokens = tokenize(query)
+        if include_live:
+            with self._live_lock:
+                segments.append(self._live.snapshot(set(query_tokens)))
+
+        corpus_size = sum(len(seg.docs) for seg in segments)
+        if corpus_size == 0:
+            return []
+        avgdl = sum(seg.total_len for seg in segments) / corpus_size
+
+        idf: Dict[str, float] = {}
+        for term in set(query_tokens):
+            freq = sum(len(seg.postings.get(term, ())) for seg in segments)
+            if freq == 0:
+                continue
+            value = math.log(corpus_size - freq + 0.5) - math.log(freq + 0.5)
+            idf[term] = value if value >= 0 else BM25_EPSILON * math.log(2)
+
+        scores: Dict[Tuple[int, str], float] = {}
+        for term in query_tokens:  # duplicates count twice, as in BM25Okapi
+            term_idf = idf.get(term)
+            if term_idf is None:
+                continue
+            for seg_idx, seg in enumerate(segments):
+                for doc_id, tf in seg.postings.get(term, {}).items():
+                    doc_len = seg.docs[doc_id]["len"]
+                    denom = tf + BM25_K1 * (1 - BM25_B + BM25_B * doc_len / avgdl)
+                    key = (seg_idx, doc_id)
+                    scores[key] = scores.get(key, 0.0) + term_idf * tf * (BM25_K1 + 1) / denom
+
+        return [(segments[seg_idx].docs[doc_id], score) for (seg_idx, doc_id), score in scores.items()]
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "segments": len(self._known),
+            "loaded_segments": len(self._segments),
+            "live_docs": len(self._live.docs),
+        }
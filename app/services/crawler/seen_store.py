@@ -0,0 +1,443 @@
+from __future__ import annotations
+
+import fcntl
+import hashlib
+import heapq
+import math
+import mmap
+import os
+import struct
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+logger = __import__("logging").getLogger("ailinux.crawler.seen")
+
+DIGEST_SIZE = 20  # sha1
+
+BLOOM_MAGIC = b"TFBLOOM1"
+SNAPSHOT_MAGIC = b"TFSEEN1\n"
+# magic, capacity of filter 0, target error rate, filters, reserved,
+# items in the newest filter, items added in total, snapshot generation
+_HEADER = struct.Struct("<8sQdIIQQQ")
+HEADER_SIZE = 128
+
+GROWTH = 2          # each new filter holds twice as many items ...
+TIGHTENING = 0.5    # ... at half the error rate of the previous one
+MAX_FILTERS = 32
+
+_READ_CHUNK = DIGEST_SIZE * 4096
+
+
+def url_digest(key: str) -> bytes:
+    """20-byte digest of a seen-set key (sha1 hex keys are decoded, not rehashed)."""
+    if len(key) == 2 * DIGEST_SIZE:
+        try:
+            return bytes.fromhex(key)
+        except ValueError:
+            pass
+    return hashlib.sha1(key.encode("utf-8")).digest()
+
+
+def _filter_geometry(capacity: int, error_rate: float, index: int) -> Tuple[int, int, int]:
+    """(capacity, bits, hash count) of the index-th filter of a scalable Bloom filter."""
+    items = capacity * GROWTH ** index
+    p = error_rate * (1 - TIGHTENING) * TIGHTENING ** index
+    bits = math.ceil(-items * math.log(p) / (math.log(2) ** 2))
+    bits = (bits + 63) // 64 * 64
+    return items, bits, max(1, math.ceil(-math.log2(p)))
+
+
+class SeenUrlStore:
+    """Probabilistic seen-URL set with exact confirmation, shared between processes.
+
+    Files (all in ``directory``):
+
+    - ``<name>.bloom``: scalable Bloom filter, memory-mapped by every process.
+      A miss is final; bits are only ever set, so lookups need no lock.
+    - ``<name>.snap``: sorted, deduplicated digests, binary searched via mmap.
+    - ``<name>.log``: digests appended since the snapshot, mirrored in memory.
+    - ``<name>.lock``: flock serializing writers across processes.
+
+    Once the log holds ``compact_every`` records, :meth:`compact` merges it into
+    a new snapshot and bumps the generation in the Bloom header so that other
+    processes reopen the snapshot and log.
+    """
+
+    def __init__(
+        self,
+        directory: Path,
+        name: str = "seen-urls",
+        *,
+        capacity: int = 1_000_000,
+        error_rate: float = 0.001,
+        compact_every: int = 100_000,
+    ) -> None:
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.compact_every = compact_every
+        self._bloom_path = self.directory / f"{name}.bloom"
+        self._snapshot_path = self.directory / f"{name}.snap"
+        self._log_path = self.directory / f"{name}.log"
+        self._lock_path = self.directory / f"{name}.lock"
+        self._compact_lock_path = self.directory / f"{name}.compact.lock"
+
+        self._lock_fd = os.open(self._lock_path, os.O_RDWR | os.O_CREAT, 0o644)
+        self._bloom_fd: Optional[int] = None
+        self._bloom: Optional[mmap.mmap] = None
+        self._filters: List[Tuple[int, int, int, int]] = []  # (offset, capacity, bits, k)
+        self._snapshot: Optional[mmap.mmap] = None
+        self._snapshot_records = 0
+        self._log_fd: Optional[int] = None
+        self._tail: Set[bytes] = set()
+        self._tail_bytes = 0
+        self._generation = -1
+
+        with self._locked():
+            fresh = self._open_bloom(capacity, error_rate)
+            self._repair_log()
+            self._sync()
+            if fresh:
+                self._rebuild_bloom()
+
+    # ------------------------------------------------------------------
+    # Locking and file handling
+    # ------------------------------------------------------------------
+    @contextmanager
+    def _locked(self, exclusive: bool = True) -> Iterator[None]:
+        fcntl.flock(self._lock_fd, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+        try:
+            yield
+        finally:
+            fcntl.flock(self._lock_fd, fcntl.LOCK_UN)
+
+    def _header(self) -> Tuple[Any, ...]:
+        return _HEADER.unpack_from(self._bloom, 0)
+
+    def _write_header(self, **changes: Any) -> None:
+        magic, capacity, error_rate, filters, reserved, filter_count, total, generation = self._header()
+        values = {
+            "filters": filters,
+            "filter_count": filter_count,
+            "total": total,
+            "generation": generation,
+        }
+        values.update(changes)
+        _HEADER.pack_into(
+            self._bloom, 0, magic, capacity, error_rate, values["filters"], reserved,
+            values["filter_count"], values["total"], values["generation"],
+        )
+
+    def _open_bloom(self, capacity: int, error_rate: float) -> bool:
+        """Open or create the Bloom file. Returns True if it had to be created."""
+        fd = os.open(self._bloom_path, os.O_RDWR | os.O_CREAT, 0o644)
+        fresh = os.fstat(fd).st_size < HEADER_SIZE
+        if not fresh:
+            magic = os.pread(fd, len(BLOOM_MAGIC), 0)
+            if magic != BLOOM_MAGIC:
+                logger.warning("Seen-URL bloom file %s is corrupt, rebuilding", self._bloom_path)
+                fresh = True
+        if fresh:
+            _, bits, _ = _filter_geometry(capacity, error_rate, 0)
+            os.ftruncate(fd, 0)
+            os.ftruncate(fd, HEADER_SIZE + bits // 8)
+            os.pwrite(fd, _HEADER.pack(BLOOM_MAGIC, capacity, error_rate, 1, 0, 0, 0, 0), 0)
+        self._bloom_fd = fd
+        self._map_bloom()
+        return fresh
+
+    def _map_bloom(self) -> None:
+        if self._bloom is not None:
+            self._bloom.close()
+        self._bloom = mmap.mmap(self._bloom_fd, 0)
+        _, capacity, error_rate, filters, *_ = self._header()
+        self._filters = []
+        offset = HEADER_SIZE
+        for index in range(filters):
+            items, bits, k = _filter_geometry(capacity, error_rate, index)
+            self._filters.append((offset, items, bits, k))
+            offset += bits // 8
+
+    def _repair_log(self) -> None:
+        """Drop a torn record at the end of the log (crash during append)."""
+        try:
+            size = self._log_path.stat().st_size
+        except FileNotFoundError:
+            return
+        if size % DIGEST_SIZE:
+            logger.warning("Truncating torn record in %s", self._log_path)
+            os.truncate(self._log_path, size - size % DIGEST_SIZE)
+
+    def _sync(self) -> None:
+        """Catch up with changes made by other processes. Caller holds the lock."""
+        _, _, _, filters, _, _, _, generation = self._header()
+        if filters != len(self._filters):
+            self._map_bloom()
+        if generation != self._generation:
+            self._reopen_exact()
+            self._generation = generation
+        size = os.fstat(self._log_fd).st_size
+        size -= size % DIGEST_SIZE
+        if size > self._tail_bytes:
+            data = os.pread(self._log_fd, size - self._tail_bytes, self._tail_bytes)
+            self._tail.update(data[i:i + DIGEST_SIZE] for i in range(0, len(data), DIGEST_SIZE))
+            self._tail_bytes = size
+
+    def _reopen_exact(self) -> None:
+        if self._snapshot is not None:
+            self._snapshot.close()
+            self._snapshot = None
+        self._snapshot_records = 0
+        try:
+            with open(self._snapshot_path, "rb") as handle:
+                if handle.read(len(SNAPSHOT_MAGIC)) == SNAPSHOT_MAGIC:
+                    size = os.fstat(handle.fileno()).st_size
+                    self._snapshot_records = (size - len(SNAPSHOT_MAGIC)) // DIGEST_SIZE
+                    if self._snapshot_records:
+                        self._snapshot = mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ)
+                else:
+                    logger.warning("Ignoring seen-URL snapshot %s with bad header", self._snapshot_path)
+        except FileNotFoundError:
+            pass
+
+        if self._log_fd is not None:
+            os.close(self._log_fd)
+        self._log_fd = os.open(self._log_path, os.O_RDWR | os.O_CREAT | os.O_APPEND, 0o644)
+        self._tail = set()
+        self._tail_bytes = 0
+
+    # ------------------------------------------------------------------
+    # Bloom filter
+    # ------------------------------------------------------------------
+    @staticmethod
+    def _positions(digest: bytes, bits: int, k: int) -> Iterator[int]:
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:16], "little") | 1
+        for i in range(k):
+            yield (h1 + i * h2) % bits
+
+    def _bloom_contains(self, digest: bytes) -> bool:
+        bloom = self._bloom
+        for offset, _, bits, k in reversed(self._filters):
+            if all(bloom[offset + pos // 8] & (1 << (pos % 8)) for pos in self._positions(digest, bits, k)):
+                return True
+        return False
+
+    def _bloom_add(self, digest: bytes) -> None:
+        offset, items, bits, k = self._filters[-1]
+        bloom = self._bloom
+        for pos in self._positions(digest, bits, k):
+            bloom[offset + pos // 8] |= 1 << (pos % 8)
+        _, capacity, error_rate, filters, _, filter_count, total, _ = self._header()
+        filter_count += 1
+        if filter_count >= items and filters < MAX_FILTERS:
+            _, new_bits, _ = _filter_geometry(capacity, error_rate, filters)
+            os.ftruncate(self._bloom_fd, offset + bits // 8 + new_bits // 8)
+            self._write_header(filters=filters + 1, filter_count=0, total=total + 1)
+            self._map_bloom()
+        else:
+            self._write_header(filter_count=filter_count, total=total + 1)
+
+    def _rebuild_bloom(self) -> None:
+        added = 0
+        for digest in self._iter_exact():
+            self._bloom_add(digest)
+            added += 1
+        if added:
+            logger.info("Rebuilt seen-URL bloom filter from %d stored digests", added)
+
+    # ------------------------------------------------------------------
+    # Exact store
+    # ------------------------------------------------------------------
+    def _snapshot_contains(self, digest: bytes) -> bool:
+        snap = self._snapshot
+        lo, hi = 0, self._snapshot_records
+        base = len(SNAPSHOT_MAGIC)
+        while lo < hi:
+            mid = (lo + hi) // 2
+            start = base + mid * DIGEST_SIZE
+            probe = snap[start:start + DIGEST_SIZE]
+            if probe == digest:
+                return True
+            if probe < digest:
+                lo = mid + 1
+            else:
+                hi = mid
+        return False
+
+    def _exact_contains(self, digest: bytes) -> bool:
+        return digest in self._tail or self._snapshot_contains(digest)
+
+    def _iter_exact(self) -> Iterator[bytes]:
+        if self._snapshot is not None:
+            base = len(SNAPSHOT_MAGIC)
+            for i in range(self._snapshot_records):
+                start = base + i * DIGEST_SIZE
+                yield self._snapshot[start:start + DIGEST_SIZE]
+        yield from self._tail
+
+    # ------------------------------------------------------------------
+    # Public API
+    # ------------------------------------------------------------------
+    def contains(self, key: str) -> bool:
+        digest = url_digest(key)
+        if self._header()[3] != len(self._filters):
+            with self._locked(exclusive=False):
+                self._sync()
+        if not self._bloom_contains(digest):
+            return False
+        with self._locked(exclusive=False):
+            self._sync()
+            return self._exact_contains(digest)
+
+    def add(self, key: str) -> bool:
+        """Add ``key``. Returns True if it was not seen before."""
+        return self.add_many((key,)) == 1
+
+    def add_many(self, keys: Iterable[str]) -> int:
+        """Add keys under one lock. Returns the number of new keys."""
+        added = 0
+        with self._locked():
+            self._sync()
+            buffer = bytearray()
+            for key in keys:
+                digest = url_digest(key)
+                if self._bloom_contains(digest) and self._exact_contains(digest):
+                    continue
+                buffer += digest
+                self._tail.add(digest)
+                self._bloom_add(digest)
+                added += 1
+            if buffer:
+                os.write(self._log_fd, bytes(buffer))
+                self._tail_bytes += len(buffer)
+        return added
+
+    def __len__(self) -> int:
+        return self._header()[6]
+
+    @property
+    def needs_compaction(self) -> bool:
+        return self._tail_bytes // DIGEST_SIZE >= self.compact_every
+
+    def compact(self) -> bool:
+        """Merge the log into a new snapshot. Safe to call from a worker thread.
+
+        Only the final swap runs under the writer lock; the merge itself works
+        on the immutable snapshot and the log prefix present when it started.
+        Returns False if another process is already compacting.
+        """
+        compact_fd = os.open(self._compact_lock_path, os.O_RDWR | os.O_CREAT, 0o644)
+        lock_fd = os.open(self._lock_path, os.O_RDWR)
+        try:
+            try:
+                fcntl.flock(compact_fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                return False
+
+            fcntl.flock(lock_fd, fcntl.LOCK_EX)
+            try:
+                generation = self._header()[7]
+                log_fd = os.open(self._log_path, os.O_RDONLY | os.O_CREAT, 0o644)
+                prefix = os.fstat(log_fd).st_size
+                prefix -= prefix % DIGEST_SIZE
+                try:
+                    snap_handle = open(self._snapshot_path, "rb")
+                except FileNotFoundError:
+                    snap_handle = None
+            finally:
+                fcntl.flock(lock_fd, fcntl.LOCK_UN)
+
+            try:
+                tmp_snapshot = self._snapshot_path.with_suffix(".snap.tmp")
+                records = self._write_merged(tmp_snapshot, snap_handle, log_fd, prefix)
+
+                fcntl.flock(lock_fd, fcntl.LOCK_EX)
+                try:
+                    if self._header()[7] != generation:
+                        os.unlink(tmp_snapshot)
+                        return False
+                    size = os.fstat(log_fd).st_size
+                    size -= size % DIGEST_SIZE
+                    rest = os.pread(log_fd, size - prefix, prefix) if size > prefix else b""
+                    tmp_log = self._log_path.with_suffix(".log.tmp")
+                    with open(tmp_log, "wb") as handle:
+                        handle.write(rest)
+                        handle.flush()
+                        os.fsync(handle.fileno())
+                    os.replace(tmp_snapshot, self._snapshot_path)
+                    os.replace(tmp_log, self._log_path)
+                    self._fsync_dir()
+                    self._write_header(generation=generation + 1)
+                finally:
+                    fcntl.flock(lock_fd, fcntl.LOCK_UN)
+            finally:
+                os.close(log_fd)
+                if snap_handle is not None:
+                    snap_handle.close()
+
+            logger.info(
+                "Compacted seen-URL store: %d digests in snapshot, %d left in log",
+                records, len(rest) // DIGEST_SIZE,
+            )
+            return True
+        finally:
+            os.close(lock_fd)
+            os.close(compact_fd)
+
+    def _write_merged(self, path: Path, snap_handle: Any, log_fd: int, prefix: int) -> int:
+        def snapshot_digests() -> Iterator[bytes]:
+            if snap_handle is None or snap_handle.read(len(SNAPSHOT_MAGIC)) != SNAPSHOT_MAGIC:
+                return
+            while True:
+                chunk = snap_handle.read(_READ_CHUNK)
+                chunk = chunk[: len(chunk) - len(chunk) % DIGEST_SIZE]
+                if not chunk:
+                    return
+                for i in range(0, len(chunk), DIGEST_SIZE):
+                    yield chunk[i:i + DIGEST_SIZE]
+
+        data = os.pread(log_fd, prefix, 0) if prefix else b""
+        logged = sorted({data[i:i + DIGEST_SIZE] for i in range(0, len(data), DIGEST_SIZE)})
+
+        records = 0
+        last = None
+        with open(path, "wb") as handle:
+            handle.write(SNAPSHOT_MAGIC)
+            for digest in heapq.merge(snapshot_digests(), logged):
+                if digest != last:
+                    handle.write(digest)
+                    records += 1
+                    last = digest
+            handle.flush()
+            os.fsync(handle.fileno())
+        return records
+
+    def _fsync_dir(self) -> None:
+        fd = os.open(self.directory, os.O_RDONLY)
+        try:
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+
+    def stats(self) -> Dict[str, Any]:
+        _, capacity, error_rate, filters, _, filter_count, total, generation = self._header()
+        return {
+            "entries": total,
+            "bloom_filters": filters,
+            "bloom_bytes": len(self._bloom) - HEADER_SIZE,
+            "bloom_error_rate": error_rate,
+            "snapshot_records": self._snapshot_records,
+            "log_records": self._tail_bytes // DIGEST_SIZE,
+            "generation": generation,
+        }
+
+    def close(self) -> None:
+        for handle in (self._bloom, self._snapshot):
+            if handle is not None:
+                handle.close()
+        for fd in (self._bloom_fd, self._log_fd, self._lock_fd):
+            if fd is not None:
+                os.close(fd)
+        self._bloom = self._snapshot = None
+        self._bloom_fd = self._log_fd = None
@@ -3,21 +3,33 @@ from __future__ import annotations
 import asyncio
 import json
 from pathlib import Path
-from typing import Dict, Optional, Set
+from typing import Any, Dict, Optional
 
 from ...config import get_settings
+from .seen_store import SeenUrlStore
+
+logger = __import__("logging").getLogger("ailinux.crawler.state")
 
 
 class CrawlerSharedState:
-    """Shared state for crawler instances (seen set + idempotency cache)."""
+    """Shared state for crawler instances (seen set + idempotency cache).
+
+    Seen URLs live in a :class:`SeenUrlStore` next to the JSON file, which
+    only keeps the idempotency map.
+    """
 
-    def __init__(self, persist_name: str = "crawler-shared-state.json") -> None:
+    def __init__(
+        self,
+        persist_name: str = "crawler-shared-state.json",
+        seen_store_name: str = "seen-urls",
+    ) -> None:
         settings = get_settings()
         spool_dir = Path(getattr(settings, "crawler_spool_dir", "data/crawler_spool"))
         spool_dir.mkdir(parents=True, exist_ok=True)
 
         self._persist_path = spool_dir / persist_name
-        self._seen_urls: Set[str] = set()
+        self._seen = SeenUrlStore(spool_dir, seen_store_name)
+        self._compact_task: Optional[asyncio.Task] = None
         self._idempotency_map: Dict[str, str] = {}
         self._dirty = False
         self._flush_every = 200
@@ -37,18 +49,20 @@ class CrawlerSharedState:
                 data = json.load(handle)
             seen = data.get("seen_urls", [])
             idempotency = data.get("idempotency_map", {})
-            if isinstance(seen, list):
-                self._seen_urls.update(map(str, seen))
             if isinstance(idempotency, dict):
                 self._idempotency_map.update({str(k): str(v) for k, v in idempotency.items()})
+            if isinstance(seen, list) and seen:
+                # Pre seen-store format: move the URL hashes over, the next
+                # flush drops them from the JSON file
+                added = self._seen.add_many(map(str, seen))
+                logger.info("Migrated %d seen URLs into the seen-URL store", added)
+                self._dirty = True
         except (json.JSONDecodeError, OSError):
             # Corrupted file – start fresh but keep file for future flushes
-            self._seen_urls.clear()
             self._idempotency_map.clear()
 
     async def _flush(self) -> None:
         payload = {
-            "seen_urls": sorted(self._seen_urls),
             "idempotency_map": dict(self._idempotency_map),
         }
         await asyncio.to_thread(
@@ -75,16 +89,26 @@ class CrawlerSharedState:
     # ------------------------------------------------------------------
     async def mark_url_seen(self, url_hash: str) -> bool:
         """Mark URL hash as seen. Returns True if newly added."""
-        async with self._lock:
-            if url_hash in self._seen_urls:
-                return False
-            self._seen_urls.add(url_hash)
-            await self._mark_dirty()
-            return True
+        added = self._seen.add(url_hash)
+        if added and self._seen.needs_compaction:
+            self._schedule_compaction()
+        return added
 
     async def has_seen(self, url_hash: str) -> bool:
-        async with self._lock:
-            return url_hash in self._seen_urls
+        return self._seen.contains(url_hash)
+
+    def _schedule_compaction(self) -> None:
+        if self._compact_task is None or self._compact_task.done():
+            self._compact_task = asyncio.create_task(self._compact())
+
+    async def _compact(self) -> None:
+        try:
+            await asyncio.to_thread(self._seen.compact)
+        except Exception as exc:
+            logger.warning("Seen-URL store compaction failed: %s", exc)
+
+    def seen_stats(self) -> Dict[str, Any]:
+        return self._seen.stats()
 
     # ------------------------------------------------------------------
     # Idempotency keyed jobs
@@ -19,15 +19,20 @@ Use Cases:
 """
 
 import asyncio
+import heapq
+import itertools
 import logging
 import secrets
 import time
 from dataclasses import dataclass, field
 from enum import Enum
-from typing import Any, Callable, Dict, List, Optional
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
 
 logger = logging.getLogger("ailinux.distributed_compute")
 
+STALE_CLIENT_TIMEOUT = 120.0  # Sekunden ohne Heartbeat
+STALE_SWEEP_INTERVAL = 30.0   # Prüfintervall für Stale Clients
+
 
 class TaskStatus(Enum):
     """Status eines verteilten Tasks"""
@@ -62,6 +67,8 @@ class ComputeTask:
     assigned_to: Optional[str] = None  # Client Session ID
     assigned_at: Optional[float] = None
     completed_at: Optional[float] = None
+    queued_at: Optional[float] = None
+    lease_expires: Optional[float] = None  # Lease des Clients, danach Re-Queue
 
     # Ergebnis
     result: Optional[Any] = None
@@ -77,13 +84,17 @@ class ComputeTask:
     callback_id: Optional[str] = None
 
     def is_expired(self) -> bool:
-        """Prüft ob Task Timeout überschritten hat"""
-        # Check timeout for both ASSIGNED and PROCESSING states
+        """Prüft ob die Lease des Tasks abgelaufen ist"""
+        # Check lease for both ASSIGNED and PROCESSING states
         # Tasks can get stuck in PROCESSING if worker dies mid-task
-        if self.assigned_at and self.status in (TaskStatus.ASSIGNED, TaskStatus.PROCESSING):
-            return time.time() - self.assigned_at > self.timeout_seconds
+        if self.lease_expires and self.status in (TaskStatus.ASSIGNED, TaskStatus.PROCESSING):
+            return time.time() > self.lease_expires
         return False
 
+    def sort_key(self) -> Tuple[int, float]:
+        """Reihenfolge in der Queue: Priorität, dann Alter"""
+        return (-self.priority.value, self.created_at)
+
     def to_client_payload(self) -> Dict[str, Any]:
         """Payload für Client"""
         return {
@@ -148,11 +159,16 @@ class DistributedComputeManager:
     Verwaltet die Verteilung von Tasks an Clients.
 
     Features:
-    - Task Queue mit Prioritäten
-    - Client Pool Management
-    - Automatische Task-Zuweisung
-    - Timeout Handling
+    - Task Queue mit Prioritäten (Heap pro Model)
+    - Client Pool Management (Ready-Heap pro Model, nach Score)
+    - Event-getriebene Zuweisung: Task eingereicht, Client frei, Client neu
+    - Task-Leases mit Re-Queue bei Ablauf
     - Credit/Incentive System
+
+    Ein freier Client wird unter jedem unterstützten Model eingetragen und
+    übernimmt den besten wartenden Task über alle diese Queues (Work Stealing).
+    Heap-Einträge werden lazy invalidiert: gültig ist nur der Eintrag mit der
+    aktuellen Sequenznummer des Tasks bzw. Clients.
     """
 
     # Credit-Belohnungen pro Task-Typ (Compute-Einheiten)
@@ -173,6 +189,18 @@ class DistributedComputeManager:
         self._clients: Dict[str, ConnectedClient] = {}  # session_id -> Client
         self._callbacks: Dict[str, Callable] = {}       # callback_id -> callback
 
+        # Scheduler-Indizes
+        self._pending: Dict[str, List[Tuple[int, float, int, str]]] = {}  # model_id -> Task-Heap
+        self._queued: Dict[str, int] = {}                                 # task_id -> Sequenz
+        self._ready: Dict[str, List[Tuple[float, int, str]]] = {}         # model_id -> Client-Heap
+        self._ready_seq: Dict[str, int] = {}                              # session_id -> Sequenz
+        self._leases: List[Tuple[float, str]] = []                        # (lease_expires, task_id)
+        self._dirty: Set[str] = set()                                     # Models mit neuen Tasks/Clients
+        self._seq = itertools.count()
+        self._waiters: Dict[str, List[asyncio.Future]] = {}               # task_id -> get_task_result
+        self._wakeup = asyncio.Event()
+        self._next_sweep = 0.0
+
         # Statistiken
         self._stats = {
             "total_tasks_created": 0,
@@ -181,21 +209,28 @@ class DistributedComputeManager:
             "total_compute_time": 0.0,
             "total_credits_distributed": 0.0,
         }
+        self._sched_stats = {
+            "dispatched": 0,
+            "requeued": 0,
+            "leases_expired": 0,
+            "queue_wait_total": 0.0,
+            "queue_wait_max": 0.0,
+        }
 
-        # Background Task für Queue-Processing
+        # Background Task für den Scheduler
         self._running = False
         self._process_task: Optional[asyncio.Task] = None
 
     async def start(self):
-        """Startet den Queue-Processor"""
+        """Startet den Scheduler"""
         if self._running:
             return
         self._running = True
-        self._process_task = asyncio.create_task(self._process_queue())
+        self._process_task = asyncio.create_task(self._run_scheduler())
         logger.info("Distributed Compute Manager started")
 
     async def stop(self):
-        """Stoppt den Queue-Processor"""
+        """Stoppt den Scheduler"""
         self._running = False
         if self._process_task:
             self._process_task.cancel()
@@ -230,7 +265,8 @@ class DistributedComputeManager:
         logger.info(f"Client registered: {session_id} ({capability}, {gpu_name}, {estimated_tflops} TFLOPS)")
 
         # Sofort verfügbare Tasks zuweisen
-        await self._try_assign_tasks()
+        self._mark_ready(client)
+        await self._kick()
 
         return client
 
@@ -239,25 +275,33 @@ class DistributedComputeManager:
         if session_id not in self._clients:
             return
 
-        client = self._clients[session_id]
+        client = self._clients.pop(session_id)
+        self._ready_seq.pop(session_id, None)
 
         # Aktiven Task zurück in Queue
         if client.current_task:
             task = self._task_queue.get(client.current_task)
-            if task and task.status == TaskStatus.ASSIGNED:
-                task.status = TaskStatus.PENDING
-                task.assigned_to = None
-                task.assigned_at = None
-                task.retry_count += 1
+            if task and task.assigned_to == session_id and task.status in (TaskStatus.ASSIGNED, TaskStatus.PROCESSING):
+                self._requeue(task)
 
-        del self._clients[session_id]
         logger.info(f"Client unregistered: {session_id}")
+        await self._kick()
 
     async def client_heartbeat(self, session_id: str):
         """Heartbeat von Client"""
         if session_id in self._clients:
             self._clients[session_id].last_heartbeat = time.time()
 
+    async def update_client_models(self, session_id: str, supported_models: List[str]):
+        """Client hat Models hinzugefügt/entfernt"""
+        client = self._clients.get(session_id)
+        if not client:
+            return
+        client.supported_models = supported_models
+        if client.is_available:
+            self._mark_ready(client)  # neu indexieren
+            await self._kick()
+
     # === Task Management ===
 
     async def submit_task(
@@ -293,7 +337,8 @@ class DistributedComputeManager:
         logger.info(f"Task submitted: {task_id} ({task_type}, {model_id})")
 
         # Sofort zuweisen versuchen
-        await self._try_assign_tasks()
+        self._enqueue(task)
+        await self._kick()
 
         return task_id
 
@@ -339,7 +384,7 @@ class DistributedComputeManager:
 
     async def get_task_result(self, task_id: str, wait: bool = True, timeout: float = 30.0) -> Optional[Any]:
         """Wartet auf und gibt Task-Ergebnis zurück"""
-        start = time.time()
+        deadline = time.time() + timeout
 
         while True:
             task = self._task_queue.get(task_id)
@@ -355,10 +400,23 @@ class DistributedComputeManager:
             if not wait:
                 return None
 
-            if time.time() - start > timeout:
+            remaining = deadline - time.time()
+            if remaining <= 0:
                 raise TimeoutError(f"Task {task_id} timed out waiting for result")
 
-            await asyncio.sleep(0.1)
+            # Aufwecken beim Abschluss statt Polling
+            waiter = asyncio.get_running_loop().create_future()
+            self._waiters.setdefault(task_id, []).append(waiter)
+            try:
+                await asyncio.wait_for(waiter, timeout=remaining)
+            except asyncio.TimeoutError:
+                pass
+            finally:
+                waiters = self._waiters.get(task_id)
+                if waiters and waiter in waiters:
+                    waiters.remove(waiter)
+                if not waiters:
+                    self._waiters.pop(task_id, None)
 
     async def cancel_task(self, task_id: str) -> bool:
         """Bricht einen Task ab"""
@@ -370,6 +428,9 @@ class DistributedComputeManager:
             return False
 
         task.status = TaskStatus.CANCELLED
+        task.lease_expires = None
+        self._queued.pop(task_id, None)
+        self._finish(task)
 
         # Client benachrichtigen
         if task.assigned_to and task.assigned_to in self._clients:
@@ -378,63 +439,157 @@ class DistributedComputeManager:
                 "type": "cancel_task",
                 "task_id": task_id,
             })
-            client.is_available = True
-            client.current_task = None
+            if client.session_id in self._clients and client.current_task == task_id:
+                self._mark_ready(client)
+                await self._kick()
 
         return True
 
-    # === Task Processing ===
-
-    async def _process_queue(self):
-        """Background-Task für Queue-Verarbeitung"""
-        while self._running:
-            try:
-                # Expired Tasks behandeln
-                await self._handle_expired_tasks()
-
-                # Tasks zuweisen
-                await self._try_assign_tasks()
-
-                # Stale Clients entfernen
-                await self._cleanup_stale_clients()
-
-            except Exception as e:
-                logger.error(f"Queue processing error: {e}")
+    async def task_progress(self, session_id: str, task_id: str, progress: float = 0):
+        """Progress vom Client: Task läuft, Lease wird verlängert"""
+        task = self._task_queue.get(task_id)
+        if not task or task.assigned_to != session_id:
+            return
+        if task.status not in (TaskStatus.ASSIGNED, TaskStatus.PROCESSING):
+            return
+        task.status = TaskStatus.PROCESSING
+        self._grant_lease(task)
+        logger.debug(f"Task {task_id} progress: {progress}%")
+
+    # === Scheduler ===
+
+    def _enqueue(self, task: ComputeTask):
+        """Task in die Queue seines Models"""
+        seq = next(self._seq)
+        self._queued[task.task_id] = seq
+        task.queued_at = time.time()
+        heapq.heappush(self._pending.setdefault(task.model_id, []), (*task.sort_key(), seq, task.task_id))
+        self._dirty.add(task.model_id)
+
+    def _requeue(self, task: ComputeTask):
+        """Task zurück in die Queue, behält seinen Platz (created_at)"""
+        task.status = TaskStatus.PENDING
+        task.assigned_to = None
+        task.assigned_at = None
+        task.lease_expires = None
+        task.retry_count += 1
+        self._sched_stats["requeued"] += 1
+        self._enqueue(task)
+
+    def _mark_ready(self, client: ConnectedClient):
+        """Client frei: unter allen unterstützten Models eintragen"""
+        client.is_available = True
+        client.current_task = None
+        seq = next(self._seq)
+        self._ready_seq[client.session_id] = seq
+        score = -client.get_priority_score()
+        for model_id in client.supported_models:
+            heap = self._ready.setdefault(model_id, [])
+            heapq.heappush(heap, (score, seq, client.session_id))
+            if len(heap) > 2 * len(self._clients) + 8:
+                # Models ohne wartende Tasks werden von _dispatch nie geleert
+                self._compact_ready(model_id)
+            self._dirty.add(model_id)
+
+    def _ready_entry_valid(self, model_id: str, seq: int, session_id: str) -> bool:
+        client = self._clients.get(session_id)
+        return bool(client and client.is_available and self._ready_seq.get(session_id) == seq
+                    and model_id in client.supported_models)
+
+    def _compact_ready(self, model_id: str):
+        """Entfernt veraltete Einträge aus dem Ready-Heap eines Models"""
+        heap = [entry for entry in self._ready.get(model_id, ())
+                if self._ready_entry_valid(model_id, entry[1], entry[2])]
+        if heap:
+            heapq.heapify(heap)
+            self._ready[model_id] = heap
+        else:
+            self._ready.pop(model_id, None)
 
-            await asyncio.sleep(1.0)
+    def _grant_lease(self, task: ComputeTask):
+        task.lease_expires = time.time() + task.timeout_seconds
+        heapq.heappush(self._leases, (task.lease_expires, task.task_id))
 
-    async def _try_assign_tasks(self):
-        """Versucht wartende Tasks an verfügbare Clients zuzuweisen"""
-        # Pending Tasks nach Priorität sortieren
-        pending_tasks = [
-            t for t in self._task_queue.values()
-            if t.status == TaskStatus.PENDING
-        ]
-        pending_tasks.sort(key=lambda t: (-t.priority.value, t.created_at))
+    def _head_task(self, model_id: str) -> Optional[ComputeTask]:
+        heap = self._pending.get(model_id)
+        while heap:
+            _, _, seq, task_id = heap[0]
+            task = self._task_queue.get(task_id)
+            if task and task.status == TaskStatus.PENDING and self._queued.get(task_id) == seq:
+                return task
+            heapq.heappop(heap)
+        self._pending.pop(model_id, None)
+        return None
+
+    def _head_client(self, model_id: str) -> Optional[ConnectedClient]:
+        heap = self._ready.get(model_id)
+        while heap:
+            _, seq, session_id = heap[0]
+            if self._ready_entry_valid(model_id, seq, session_id):
+                return self._clients[session_id]
+            heapq.heappop(heap)
+        self._ready.pop(model_id, None)
+        return None
+
+    async def _kick(self):
+        """Scheduler aufwecken (ohne laufenden Scheduler direkt zuweisen)"""
+        if self._running:
+            self._wakeup.set()
+        else:
+            await self._dispatch()
+
+    async def _dispatch(self):
+        """
+        Weist Tasks der geänderten Models zu.
+
+        Die Models werden nach ihrem besten wartenden Task abgearbeitet, so
+        gilt die Priorität auch über Model-Grenzen hinweg.
+        """
+        candidates = []
+        for model_id in self._dirty:
+            task = self._head_task(model_id)
+            if task and self._head_client(model_id):
+                candidates.append((task.sort_key(), model_id))
+        self._dirty.clear()
+        heapq.heapify(candidates)
+
+        while candidates:
+            key, model_id = heapq.heappop(candidates)
+            task = self._head_task(model_id)
+            client = self._head_client(model_id)
+            if not task or not client:
+                continue
+            if task.sort_key() != key:
+                # Kopf hat sich durch eine frühere Zuweisung geändert
+                heapq.heappush(candidates, (task.sort_key(), model_id))
+                continue
 
-        # Verfügbare Clients nach Score sortieren
-        available_clients = [
-            c for c in self._clients.values()
-            if c.is_available
-        ]
-        available_clients.sort(key=lambda c: -c.get_priority_score())
+            heapq.heappop(self._pending[model_id])
+            heapq.heappop(self._ready[model_id])
+            self._queued.pop(task.task_id, None)
+            self._ready_seq.pop(client.session_id, None)
+            await self._assign_task(task, client)
 
-        for task in pending_tasks:
-            for client in available_clients:
-                if client.can_handle(task):
-                    await self._assign_task(task, client)
-                    available_clients.remove(client)
-                    break
+            task = self._head_task(model_id)
+            if task and self._head_client(model_id):
+                heapq.heappush(candidates, (task.sort_key(), model_id))
 
     async def _assign_task(self, task: ComputeTask, client: ConnectedClient):
         """Weist Task einem Client zu"""
+        now = time.time()
         task.status = TaskStatus.ASSIGNED
         task.assigned_to = client.session_id
-        task.assigned_at = time.time()
+        task.assigned_at = now
+        self._grant_lease(task)
 
         client.is_available = False
         client.current_task = task.task_id
 
+        wait = now - (task.queued_at or task.created_at)
+        self._sched_stats["dispatched"] += 1
+        self._sched_stats["queue_wait_total"] += wait
+        self._sched_stats["queue_wait_max"] = max(self._sched_stats["queue_wait_max"], wait)
+
         # Task an Client senden
         await self._send_to_client(client, {
             "type": "task_assignment",
@@ -443,43 +598,92 @@ class DistributedComputeManager:
 
         logger.info(f"Task {task.task_id} assigned to {client.session_id}")
 
-    async def _handle_expired_tasks(self):
-        """Behandelt Tasks mit Timeout"""
+    def _expire_leases(self):
+        """Behandelt Tasks mit abgelaufener Lease"""
         now = time.time()
 
-        for task in list(self._task_queue.values()):
-            if task.is_expired():
-                logger.warning(f"Task {task.task_id} expired")
-
-                # Client freigeben
-                if task.assigned_to and task.assigned_to in self._clients:
-                    client = self._clients[task.assigned_to]
-                    client.is_available = True
-                    client.current_task = None
-                    client.tasks_failed += 1
-
-                # Retry oder Fail
-                if task.retry_count < task.max_retries:
-                    task.status = TaskStatus.PENDING
-                    task.assigned_to = None
-                    task.assigned_at = None
-                    task.retry_count += 1
-                else:
-                    task.status = TaskStatus.TIMEOUT
-                    task.error = "Max retries exceeded"
-                    self._stats["total_tasks_failed"] += 1
+        while self._leases and self._leases[0][0] <= now:
+            expires, task_id = heapq.heappop(self._leases)
+            task = self._task_queue.get(task_id)
+            if not task or task.lease_expires != expires:
+                continue  # erledigt oder Lease verlängert
+            if task.status not in (TaskStatus.ASSIGNED, TaskStatus.PROCESSING):
+                continue
+
+            logger.warning(f"Task {task.task_id} expired")
+            self._sched_stats["leases_expired"] += 1
+
+            # Client freigeben
+            client = self._clients.get(task.assigned_to) if task.assigned_to else None
+            if client and client.current_task == task.task_id:
+                client.tasks_failed += 1
+                self._mark_ready(client)
+
+            # Retry oder Fail
+            if task.retry_count < task.max_retries:
+                self._requeue(task)
+            else:
+                task.status = TaskStatus.TIMEOUT
+                task.error = "Max retries exceeded"
+                task.lease_expires = None
+                self._stats["total_tasks_failed"] += 1
+                self._finish(task)
+
+    def _next_timeout(self) -> float:
+        """Sekunden bis zur nächsten Lease oder zum nächsten Stale-Check"""
+        while self._leases:
+            expires, task_id = self._leases[0]
+            task = self._task_queue.get(task_id)
+            if task and task.lease_expires == expires:
+                break
+            heapq.heappop(self._leases)
+        wake_at = self._next_sweep
+        if self._leases:
+            wake_at = min(wake_at, self._leases[0][0])
+        return max(0.0, wake_at - time.time())
+
+    async def _run_scheduler(self):
+        """Background-Task: schläft bis zum nächsten Event oder Lease-Ablauf"""
+        self._next_sweep = time.time() + STALE_SWEEP_INTERVAL
+        self._dirty.update(self._pending)
+        while self._running:
+            self._wakeup.clear()
+            try:
+                # Expired Leases behandeln
+                self._expire_leases()
+
+                # Stale Clients entfernen
+                if time.time() >= self._next_sweep:
+                    self._next_sweep = time.time() + STALE_SWEEP_INTERVAL
+                    await self._cleanup_stale_clients()
+
+                # Tasks zuweisen
+                await self._dispatch()
+
+            except Exception as e:
+                logger.error(f"Queue processing error: {e}")
+
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self._next_timeout())
+            except asyncio.TimeoutError:
+                pass
 
     async def _cleanup_stale_clients(self):
         """Entfernt inaktive Clients"""
         now = time.time()
-        stale_timeout = 120  # 2 Minuten
 
         for session_id in list(self._clients.keys()):
             client = self._clients[session_id]
-            if now - client.last_heartbeat > stale_timeout:
+            if now - client.last_heartbeat > STALE_CLIENT_TIMEOUT:
                 logger.info(f"Removing stale client: {session_id}")
                 await self.unregister_client(session_id)
 
+    def _finish(self, task: ComputeTask):
+        """Weckt get_task_result-Wartende"""
+        for waiter in self._waiters.pop(task.task_id, []):
+            if not waiter.done():
+                waiter.set_result(None)
+
     # === Result Handling ===
 
     async def report_task_result(
@@ -505,6 +709,7 @@ class DistributedComputeManager:
 
         # Task aktualisieren
         task.completed_at = time.time()
+        task.lease_expires = None
 
         if success:
             task.status = TaskStatus.COMPLETED
@@ -527,9 +732,10 @@ class DistributedComputeManager:
         client.total_compute_time += compute_time
         self._stats["total_compute_time"] += compute_time
 
-        # Client freigeben
-        client.is_available = True
-        client.current_task = None
+        # Client freigeben, nächsten Task zuweisen
+        self._mark_ready(client)
+        await self._kick()
+        self._finish(task)
 
         # Callback ausführen
         if task.callback_id and task.callback_id in self._callbacks:
@@ -543,9 +749,6 @@ class DistributedComputeManager:
 
         logger.info(f"Task {task_id} {'completed' if success else 'failed'}")
 
-        # Nächsten Task zuweisen
-        await self._try_assign_tasks()
-
     # === WebSocket Communication ===
 
     async def _send_to_client(self, client: ConnectedClient, message: Dict[str, Any]):
@@ -581,6 +784,15 @@ class DistributedComputeManager:
                 "available": sum(1 for c in self._clients.values() if c.is_available),
                 "total_tflops": sum(c.estimated_tflops for c in self._clients.values()),
             },
+            "scheduler": {
+                "dispatched": self._sched_stats["dispatched"],
+                "requeued": self._sched_stats["requeued"],
+                "leases_expired": self._sched_stats["leases_expired"],
+                "avg_queue_wait_ms": round(
+                    self._sched_stats["queue_wait_total"] / self._sched_stats["dispatched"] * 1000, 2
+                ) if self._sched_stats["dispatched"] else 0.0,
+                "max_queue_wait_ms": round(self._sched_stats["queue_wait_max"] * 1000, 2),
+            },
             "totals": self._stats,
             "top_contributors": self._get_top_contributors(5),
         }
@@ -11,6 +11,7 @@ from dataclasses import dataclass, field
 from enum import Enum
 from typing import Optional, Dict, Any, List
 from datetime import datetime
+from ...utils.http_client import http_clients
 
 logger = logging.getLogger(__name__)
 
@@ -75,7 +76,7 @@ class ServerNode:
     async def register_with_hub(self) -> bool:
         """Registriert diesen Node beim Hub"""
         try:
-            async with aiohttp.ClientSession() as session:
+            async with http_clients.session("federation") as session:
                 payload = {
                     "node_id": self.node_id,
                     "role": self.role.value,
@@ -113,7 +114,7 @@ class ServerNode:
     async def send_heartbeat(self) -> bool:
         """Sendet Heartbeat an Hub"""
         try:
-            async with aiohttp.ClientSession() as session:
+            async with http_clients.session("federation") as session:
                 payload = {
                     "node_id": self.node_id,
                     "status": self.status.value,
@@ -155,7 +156,7 @@ class ServerNode:
     async def forward_to_hub(self, request: Dict[str, Any]) -> Dict[str, Any]:
         """Leitet Request an Hub weiter (für Auth, Rate Limit, etc.)"""
         try:
-            async with aiohttp.ClientSession() as session:
+            async with http_clients.session("federation") as session:
                 headers = {}
                 if self.hub_token:
                     headers["Authorization"] = f"Bearer {self.hub_token}"
@@ -174,12 +175,12 @@ class ServerNode:
     async def report_completion(self, request_id: str, metrics: Dict[str, Any]):
         """Meldet abgeschlossenen Request an Hub (async, fire-and-forget)"""
         try:
-            async with aiohttp.ClientSession() as session:
+            async with http_clients.session("federation") as session:
                 headers = {}
                 if self.hub_token:
                     headers["Authorization"] = f"Bearer {self.hub_token}"
                     
-                await session.post(
+                async with session.post(
                     f"{self.hub_url}/v1/federation/completion",
                     json={
                         "node_id": self.node_id,
@@ -188,7 +189,8 @@ class ServerNode:
                     },
                     headers=headers,
                     timeout=aiohttp.ClientTimeout(total=5)
-                )
+                ):
+                    pass  # releases the pooled connection
         except Exception as e:
             logger.warning(f"Completion report failed: {e}")
 
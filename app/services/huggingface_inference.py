@@ -27,6 +27,7 @@ from typing import Any, Dict, List, Optional, Union
 import httpx
 
 from ..config import get_settings
+from .compute_backend import EmbeddingBatcher, make_embedding_batcher
 
 logger = logging.getLogger("ailinux.huggingface")
 settings = get_settings()
@@ -83,6 +84,7 @@ class HuggingFaceInference:
         self._client: Optional[httpx.AsyncClient] = None
         self._rate_limit_remaining: int = 100
         self._rate_limit_reset: Optional[datetime] = None
+        self._embed_batcher: Optional[EmbeddingBatcher] = None
 
     @property
     def client(self) -> httpx.AsyncClient:
@@ -339,6 +341,20 @@ class HuggingFaceInference:
         if isinstance(texts, str):
             texts = [texts]
 
+        # Gleichzeitige Aufrufe für dasselbe Modell werden zu einem Request gebündelt
+        if self._embed_batcher is None:
+            self._embed_batcher = make_embedding_batcher(self._embed_batch)
+        embeddings = list(await self._embed_batcher.submit(model, texts))
+
+        return {
+            "embeddings": embeddings,
+            "model": model,
+            "dimension": len(embeddings[0]) if embeddings and len(embeddings) > 0 else 0,
+            "count": len(embeddings),
+        }
+
+    async def _embed_batch(self, model: str, texts: List[str]) -> List[Any]:
+        """Single upstream request for a coalesced batch of texts."""
         payload = {"inputs": texts}
         result = await self._request(model, payload)
 
@@ -353,12 +369,11 @@ class HuggingFaceInference:
         else:
             embeddings = result.get("embeddings", [])
 
-        return {
-            "embeddings": embeddings,
-            "model": model,
-            "dimension": len(embeddings[0]) if embeddings and len(embeddings) > 0 else 0,
-            "count": len(embeddings),
-        }
+        if len(embeddings) != len(texts):
+            raise HuggingFaceInferenceError(
+                f"Expected {len(texts)} embeddings from {model}, got {len(embeddings)}"
+            )
+        return embeddings
 
     # ═══════════════════════════════════════════════════════════════════════
     # TEXT-TO-IMAGE
@@ -0,0 +1,269 @@
+"""
+Image preprocessing off the event loop.
+
+Decoding, flattening, downscaling and re-encoding an upload with PIL costs
+tens to hundreds of milliseconds of CPU. These jobs run in a small process
+pool instead. Image bytes travel through shared memory, so only a few
+integers are pickled per job. Optimized results are cached by content hash,
+and concurrent requests for the same image share one job.
+
+The pool uses the fork start method: importing the ``app`` package in a
+spawned worker would build the whole application. start() forks the workers
+during startup, while the process has few threads.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import base64
+import hashlib
+import io
+import logging
+import multiprocessing
+import os
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import dataclass
+from multiprocessing import resource_tracker, shared_memory
+from typing import Any, Dict, Optional, Tuple
+
+from PIL import Image
+
+from ..config import get_settings
+from ..utils.singleflight import SingleFlight
+
+logger = logging.getLogger("ailinux.image_pipeline")
+
+JPEG_QUALITY = 85
+CACHE_MAX_BYTES = 64 * 1024 * 1024
+HASH_IN_THREAD_BYTES = 1024 * 1024   # hash larger inputs off the loop
+_OUTPUT_SLACK = 1024 * 1024
+
+
+@dataclass(frozen=True)
+class OptimizedImage:
+    """Preprocessed image, raw and base64 encoded."""
+    data: bytes
+    b64: str
+    media_type: Optional[str]  # None: not decodable, input returned unchanged
+    width: int = 0
+    height: int = 0
+
+    @property
+    def nbytes(self) -> int:
+        return len(self.data) + len(self.b64)
+
+
+def _optimize_bytes(image_bytes: bytes, max_size: int, quality: int) -> Tuple[bytes, Optional[str], int, int]:
+    """Flatten to RGB, downscale to max_size and re-encode as JPEG."""
+    try:
+        with Image.open(io.BytesIO(image_bytes)) as img:
+            # Convert to RGB to avoid transparency issues/palette modes
+            if img.mode in ('RGBA', 'LA') or (img.mode == 'P' and 'transparency' in img.info):
+                background = Image.new('RGB', img.size, (255, 255, 255))
+                if img.mode == 'P':
+                    img = img.convert('RGBA')
+                background.paste(img, mask=img.split()[-1])
+                img = background
+            elif img.mode != 'RGB':
+                img = img.convert('RGB')
+
+            width, height = img.size
+            if width > max_size or height > max_size:
+                ratio = min(max_size / width, max_size / height)
+                new_size = (int(width * ratio), int(height * ratio))
+                img = img.resize(new_size, Image.Resampling.LANCZOS)
+
+            out_io = io.BytesIO()
+            img.save(out_io, format='JPEG', quality=quality)
+            return out_io.getvalue(), "image/jpeg", img.size[0], img.size[1]
+    except Exception:
+        return image_bytes, None, 0, 0
+
+
+def _optimize_inline(image_bytes: bytes, max_size: int, quality: int) -> OptimizedImage:
+    data, media_type, width, height = _optimize_bytes(image_bytes, max_size, quality)
+    return OptimizedImage(data, base64.b64encode(data).decode("ascii"), media_type, width, height)
+
+
+def _optimize_shared(
+    in_name: str, in_len: int, out_name: str, out_cap: int, max_size: int, quality: int
+) -> Tuple[int, int, Optional[str], int, int]:
+    """
+    Worker entry point. Reads the input from shared memory and writes the
+    result followed by its base64 form into the output segment.
+
+    Returns (raw_len, b64_len, media_type, width, height); raw_len -1 means the
+    result does not fit into the output segment.
+    """
+    src = shared_memory.SharedMemory(name=in_name)
+    dst = shared_memory.SharedMemory(name=out_name)
+    try:
+        data, media_type, width, height = _optimize_bytes(bytes(src.buf[:in_len]), max_size, quality)
+        encoded = base64.b64encode(data)
+        if len(data) + len(encoded) > out_cap:
+            return -1, 0, None, 0, 0
+        dst.buf[:len(data)] = data
+        dst.buf[len(data):len(data) + len(encoded)] = encoded
+        return len(data), len(encoded), media_type, width, height
+    finally:
+        src.close()
+        dst.close()
+
+
+def _output_capacity(in_len: int, max_size: int) -> int:
+    # JPEG of a max_size^2 RGB image stays below its raw size; pages of the
+    # segment are only allocated when written
+    raw = max(in_len, max_size * max_size * 3 + _OUTPUT_SLACK)
+    return raw + 4 * ((raw + 2) // 3)
+
+
+class ImagePipeline:
+    """Process pool plus content-hash cache for image preprocessing."""
+
+    def __init__(self, max_workers: Optional[int] = None, cache_max_bytes: int = CACHE_MAX_BYTES):
+        self._max_workers = max_workers
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._cache: "OrderedDict[Tuple[bytes, int, int], OptimizedImage]" = OrderedDict()
+        self._cache_bytes = 0
+        self._cache_max_bytes = cache_max_bytes
+        self._inflight: SingleFlight[OptimizedImage] = SingleFlight()
+        self._stats = {"hits": 0, "misses": 0, "shared_hits": 0, "pool_jobs": 0, "inline_jobs": 0, "pool_restarts": 0}
+
+    @property
+    def workers(self) -> int:
+        if self._max_workers is None:
+            configured = getattr(get_settings(), "image_pool_workers", 2)
+            self._max_workers = max(0, min(configured, os.cpu_count() or 1))
+        return self._max_workers
+
+    # ------------------------------------------------------------------
+    # Pool lifecycle
+    # ------------------------------------------------------------------
+    def _ensure_pool(self) -> Optional[ProcessPoolExecutor]:
+        if self._pool is None and self.workers > 0:
+            # Workers must share our resource tracker, otherwise each one
+            # would unlink the segments it attached to when it exits
+            resource_tracker.ensure_running()
+            self._pool = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=multiprocessing.get_context("fork"),
+            )
+        return self._pool
+
+    async def start(self):
+        """Fork the workers now instead of on the first upload."""
+        pool = self._ensure_pool()
+        if pool is None:
+            logger.info("Image pipeline: process pool disabled, using threads")
+            return
+        loop = asyncio.get_running_loop()
+        await asyncio.gather(*(loop.run_in_executor(pool, os.getpid) for _ in range(self.workers)))
+        logger.info(f"Image pipeline: {self.workers} worker processes ready")
+
+    def _reset_pool(self):
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+        self._stats["pool_restarts"] += 1
+
+    async def shutdown(self):
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+
+    # ------------------------------------------------------------------
+    # Processing
+    # ------------------------------------------------------------------
+    async def optimize(self, image_bytes: bytes, max_size: int = 1024, quality: int = JPEG_QUALITY) -> OptimizedImage:
+        """Return the image as RGB JPEG no larger than max_size (cached)."""
+        if len(image_bytes) > HASH_IN_THREAD_BYTES:
+            digest = await asyncio.to_thread(lambda: hashlib.blake2b(image_bytes, digest_size=16).digest())
+        else:
+            digest = hashlib.blake2b(image_bytes, digest_size=16).digest()
+        key = (digest, max_size, quality)
+
+        cached = self._cache.get(key)
+        if cached is not None:
+            self._cache.move_to_end(key)
+            self._stats["hits"] += 1
+            return cached
+
+        if key in self._inflight:
+            self._stats["shared_hits"] += 1
+        else:
+            self._stats["misses"] += 1
+
+        async def process() -> OptimizedImage:
+            result = await self._process(image_bytes, max_size, quality)
+            self._remember(key, result)
+            return result
+
+        return await self._inflight.run(key, process)
+
+    async def _process(self, image_bytes: bytes, max_size: int, quality: int) -> OptimizedImage:
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(max(1, self.workers) * 2)
+        async with self._slots:
+            pool = self._ensure_pool()
+            if pool is not None:
+                try:
+                    result = await self._process_in_pool(pool, image_bytes, max_size, quality)
+                    if result is not None:
+                        self._stats["pool_jobs"] += 1
+                        return result
+                except BrokenProcessPool:
+                    logger.warning("Image pipeline worker died, restarting pool")
+                    self._reset_pool()
+            self._stats["inline_jobs"] += 1
+            return await asyncio.to_thread(_optimize_inline, image_bytes, max_size, quality)
+
+    async def _process_in_pool(
+        self, pool: ProcessPoolExecutor, image_bytes: bytes, max_size: int, quality: int
+    ) -> Optional[OptimizedImage]:
+        out_cap = _output_capacity(len(image_bytes), max_size)
+        src = shared_memory.SharedMemory(create=True, size=max(1, len(image_bytes)))
+        try:
+            dst = shared_memory.SharedMemory(create=True, size=out_cap)
+        except BaseException:
+            src.close()
+            src.unlink()
+            raise
+        try:
+            src.buf[:len(image_bytes)] = image_bytes
+            raw_len, b64_len, media_type, width, height = await asyncio.get_running_loop().run_in_executor(
+                pool, _optimize_shared, src.name, len(image_bytes), dst.name, out_cap, max_size, quality
+            )
+            if raw_len < 0:
+                return None
+            data = image_bytes if media_type is None else bytes(dst.buf[:raw_len])
+            encoded = bytes(dst.buf[raw_len:raw_len + b64_len]).decode("ascii")
+            return OptimizedImage(data, encoded, media_type, width, height)
+        finally:
+            for segment in (src, dst):
+                segment.close()
+                segment.unlink()
+
+    def _remember(self, key: Tuple[bytes, int, int], result: OptimizedImage):
+        if result.nbytes > self._cache_max_bytes // 4:
+            return
+        self._cache[key] = result
+        self._cache_bytes += result.nbytes
+        while self._cache_bytes > self._cache_max_bytes and self._cache:
+            _, evicted = self._cache.popitem(last=False)
+            self._cache_bytes -= evicted.nbytes
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "workers": self.workers,
+            "pool_running": self._pool is not None,
+            "cache_entries": len(self._cache),
+            "cache_bytes": self._cache_bytes,
+            "inflight": len(self._inflight),
+            **self._stats,
+        }
+
+
+image_pipeline = ImagePipeline()
@@ -20,7 +20,7 @@ import time
 from dataclasses import dataclass, field
 from typing import Dict, List, Optional, Any, Literal
 from enum import Enum
-import httpx
+from ..utils.http_client import http_clients
 
 logger = logging.getLogger("mesh_brain")
 
@@ -54,7 +54,7 @@ class BrainNode:
     async def check_health(self) -> bool:
         """Prüfe ob Node erreichbar"""
         try:
-            async with httpx.AsyncClient(timeout=5) as client:
+            async with http_clients.client("mesh", timeout=5) as client:
                 start = time.time()
                 resp = await client.get(f"{self.base_url}/api/tags")
                 self.last_latency_ms = (time.time() - start) * 1000
@@ -83,7 +83,7 @@ class BrainNode:
             payload["system"] = system
         
         try:
-            async with httpx.AsyncClient(timeout=120) as client:
+            async with http_clients.client("mesh", timeout=120) as client:
                 start = time.time()
                 resp = await client.post(
                     f"{self.base_url}/api/generate",
@@ -26,7 +26,7 @@ import random
 from dataclasses import dataclass, field
 from typing import Dict, List, Optional, Any
 from enum import Enum
-import httpx
+from ..utils.http_client import http_clients
 
 logger = logging.getLogger("mesh_brain_v2")
 
@@ -203,7 +203,7 @@ class MeshBrainV2:
     async def _check_ollama_health(self, node: OllamaNode):
         """Check Ollama node health"""
         try:
-            async with httpx.AsyncClient(timeout=5) as client:
+            async with http_clients.client("mesh", timeout=5) as client:
                 start = time.time()
                 resp = await client.get(f"{node.base_url}/api/tags")
                 latency = (time.time() - start) * 1000
@@ -386,7 +386,7 @@ class MeshBrainV2:
         if system:
             payload["system"] = system
             
-        async with httpx.AsyncClient(timeout=120) as client:
+        async with http_clients.client("mesh", timeout=120) as client:
             resp = await client.post(f"{node.base_url}/api/generate", json=payload)
             if resp.status_code == 200:
                 data = resp.json()
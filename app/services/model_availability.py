@@ -10,13 +10,13 @@ Prüft und trackt Model-Verfügbarkeit:
 Unavailable Models werden NICHT an Client geliefert.
 """
 import asyncio
-import httpx
 import os
 import logging
 from datetime import datetime, timedelta
 from typing import Dict, List, Optional, Set
 from dataclasses import dataclass, field
 from enum import Enum
+from ..utils.http_client import http_clients
 
 logger = logging.getLogger("ailinux.model_availability")
 
@@ -201,7 +201,7 @@ class ModelAvailabilityService:
             key = self._api_keys.get("gemini")
             if key:
                 try:
-                    async with httpx.AsyncClient(timeout=10) as client:
+                    async with http_clients.client("gemini", timeout=10) as client:
                         resp = await client.get(
                             f"https://generativelanguage.googleapis.com/v1beta/models?key={key}"
                         )
@@ -213,7 +213,7 @@ class ModelAvailabilityService:
         
         elif provider == "ollama":
             try:
-                async with httpx.AsyncClient(timeout=5) as client:
+                async with http_clients.client("ollama", timeout=5) as client:
                     resp = await client.get("http://localhost:11434/api/tags")
                     results["status"] = "healthy" if resp.status_code == 200 else "offline"
             except:
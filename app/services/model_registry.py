@@ -3,14 +3,17 @@ from __future__ import annotations
 import asyncio
 import logging
 import json
+import os
 import re
+import time
 from dataclasses import dataclass, field
-from typing import Dict, Iterable, List, Optional
+from pathlib import Path
+from typing import Awaitable, Callable, Dict, Iterable, List, Optional
 
 import httpx
 
 from ..config import get_settings
-from ..utils.http_client import HttpClient
+from ..utils.http_client import HttpClient, http_clients
 
 logger = logging.getLogger("ailinux.model_registry")
 
@@ -130,15 +133,56 @@ def detect_capabilities(model_name: str, supported_methods: List[str] = None) ->
     return list(set(capabilities)), roles, api_method
 
 
+# Per-provider staleness overrides (seconds); local Ollama changes with pulls
+PROVIDER_TTL_SECONDS: Dict[str, float] = {
+    "ollama": 60.0,
+}
+
+
+@dataclass
+class _ProviderState:
+    """Last good discovery result of one provider."""
+    models: List[ModelInfo] = field(default_factory=list)
+    fetched_at: float = 0.0  # wall clock, 0 = never
+    task: asyncio.Task | None = None
+    failures: int = 0
+    last_error: str | None = None
+
+
+@dataclass(frozen=True)
+class _RegistrySnapshot:
+    """Immutable merged view served to readers."""
+    models: List[ModelInfo]
+    by_id: Dict[str, ModelInfo]
+    by_provider: Dict[str, List[ModelInfo]]
+
+
 class ModelRegistry:
     def __init__(self) -> None:
         self._settings = get_settings()
         self._lock = asyncio.Lock()
-        self._cache: List[ModelInfo] | None = None
-        self._cache_expiry: float = 0.0
         self._ttl_seconds: float = 300.0  # Increased from 30s to 5m to reduce API load
         self._refresh_task: asyncio.Task | None = None
         self._refresh_interval: float = 3600.0
+        self._snapshot_path = Path(self._settings.model_registry_snapshot_path)
+        self._persist_task: asyncio.Task | None = None
+        # Discovery sources in merge order; each refreshes on its own schedule
+        # Note: Stable Diffusion discovery disabled - use ComfyUI txt2img endpoint directly
+        self._discoverers: Dict[str, Callable[[], Awaitable[List[ModelInfo]]]] = {
+            "ollama": self._discover_ollama,
+            "gemini": self._discover_gemini,
+            "mistral": self._discover_mistral,
+            "groq": self._discover_groq,
+            "cerebras": self._discover_cerebras,
+            "cohere": self._discover_cohere,
+            "openrouter": self._discover_openrouter,
+            "together": self._discover_together,
+            "fireworks": self._discover_fireworks,
+            "cloudflare": self._discover_cloudflare,
+            "github": self._discover_github_models,
+        }
+        self._providers: Dict[str, _ProviderState] = {name: _ProviderState() for name in self._discoverers}
+        self._snapshot: _RegistrySnapshot | None = None
         self._sd_discovery_disabled: bool = False
         self._sd_discovery_warned: bool = False
         # Normalize long-lived aliases (historic spellings) to a single canonical ID
@@ -171,14 +215,26 @@ class ModelRegistry:
         """Force a discovery cycle and return the latest model list."""
         return await self.list_models(force_refresh=True)
 
+    def _provider_ttl(self, name: str) -> float:
+        return PROVIDER_TTL_SECONDS.get(name, self._ttl_seconds)
+
     async def _refresh_loop(self) -> None:
+        """Refresh each provider once its own interval has passed."""
         while True:
-            try:
-                await self.refresh_models_now()
-                logger.debug("Model registry refreshed successfully")
-            except Exception as exc:
-                logger.exception("Failed to refresh model registry: %s", exc)
-            await asyncio.sleep(self._refresh_interval)
+            now = time.time()
+            due = [
+                name for name, state in self._providers.items()
+                if now - state.fetched_at >= min(self._refresh_interval, self._provider_ttl(name))
+            ]
+            if due:
+                results = await asyncio.gather(
+                    *(self._refresh_provider(name) for name in due), return_exceptions=True
+                )
+                for name, result in zip(due, results):
+                    if isinstance(result, Exception):
+                        logger.warning("Failed to refresh %s models: %s", name, result)
+                logger.debug("Model registry refreshed providers: %s", ", ".join(due))
+            await asyncio.sleep(min(60.0, self._refresh_interval))
 
     def start_periodic_refresh(self, interval_seconds: float = 3600.0) -> None:
         """Start background task to refresh models on the given interval."""
@@ -202,73 +258,187 @@ class ModelRegistry:
             pass
         logger.info("Stopped model registry periodic refresh")
 
-    async def list_models(self, force_refresh: bool = False) -> List[ModelInfo]:
-        async with self._lock:
-            now = asyncio.get_running_loop().time()
-            if (
-                not force_refresh
-                and self._cache
-                and self._cache_expiry > now
-            ):
-                return list(self._cache)
-
-            models: List[ModelInfo] = []
-
-            # Discover from all sources concurrently
-            # Note: Stable Diffusion discovery disabled - use ComfyUI txt2img endpoint directly
-            results = await asyncio.gather(
-                self._discover_ollama(),
-                self._discover_gemini(),
-                self._discover_mistral(),
-                self._discover_groq(),
-                self._discover_cerebras(),
-                self._discover_cohere(),
-                self._discover_openrouter(),
-                self._discover_together(),
-                self._discover_fireworks(),
-                self._discover_cloudflare(),
-                self._discover_github_models(),
-                return_exceptions=True
-            )
+    # ------------------------------------------------------------------
+    # Per-provider refresh (stale-while-revalidate)
+    # ------------------------------------------------------------------
 
-            for result in results:
-                if isinstance(result, Exception):
-                    logger.warning("Model discovery failed: %s", result)
-                elif isinstance(result, list):
-                    models.extend(result)
-
-            # Add static hosted models (Anthropic, GPT-OSS)
-            models.extend(self._discover_static_hosted())
-
-            # Deduplicate by canonical ID and merge capabilities/roles if the same model was discovered multiple times
-            deduped: Dict[str, ModelInfo] = {}
-            for entry in models:
-                normalized = self._normalize_entry(entry)
-                existing = deduped.get(normalized.id)
-                if existing:
-                    merged_capabilities = sorted(set(existing.capabilities) | set(normalized.capabilities))
-                    merged_roles = list(set(existing.roles) | set(normalized.roles))
-                    deduped[normalized.id] = ModelInfo(
-                        id=normalized.id,
-                        provider=existing.provider or normalized.provider,
-                        capabilities=merged_capabilities,
-                        roles=merged_roles,
-                        api_method=existing.api_method or normalized.api_method,
-                    )
-                else:
-                    deduped[normalized.id] = normalized
+    async def _refresh_provider(self, name: str) -> None:
+        """Run one provider discovery, sharing an in-flight refresh."""
+        state = self._providers[name]
+        if state.task is None or state.task.done():
+            state.task = asyncio.get_running_loop().create_task(self._run_discovery(name))
+        await asyncio.shield(state.task)
+
+    async def _run_discovery(self, name: str) -> None:
+        state = self._providers[name]
+        try:
+            models = await self._discoverers[name]()
+        except Exception as exc:
+            state.failures += 1
+            state.last_error = str(exc)
+            state.fetched_at = time.time()  # retry after the TTL, keep last good models
+            logger.warning("Model discovery failed for %s: %s", name, exc)
+            return
+
+        models = list(models or [])
+        if not models and state.models:
+            # Provider unreachable (discoverers return [] on connection errors)
+            state.failures += 1
+            state.last_error = "empty discovery result"
+            state.fetched_at = time.time()
+            logger.info("Model discovery for %s returned nothing, keeping %d cached models", name, len(state.models))
+            return
 
-            self._cache = list(deduped.values())
-            self._cache_expiry = now + self._ttl_seconds
-            return list(self._cache)
+        state.models = models
+        state.fetched_at = time.time()
+        state.failures = 0
+        state.last_error = None
+        self._rebuild()
+        self._schedule_persist()
+
+    def _revalidate_stale(self) -> None:
+        """Kick background refreshes for providers past their TTL."""
+        now = time.time()
+        loop = asyncio.get_running_loop()
+        for name, state in self._providers.items():
+            if now - state.fetched_at < self._provider_ttl(name):
+                continue
+            if state.task is None or state.task.done():
+                state.task = loop.create_task(self._run_discovery(name))
+
+    def _rebuild(self) -> None:
+        """Merge provider results into a new indexed snapshot (atomic swap)."""
+        models: List[ModelInfo] = []
+        for state in self._providers.values():
+            models.extend(state.models)
+
+        # Add static hosted models (Anthropic, GPT-OSS)
+        models.extend(self._discover_static_hosted())
+
+        # Deduplicate by canonical ID and merge capabilities/roles if the same model was discovered multiple times
+        deduped: Dict[str, ModelInfo] = {}
+        for entry in models:
+            normalized = self._normalize_entry(entry)
+            existing = deduped.get(normalized.id)
+            if existing:
+                merged_capabilities = sorted(set(existing.capabilities) | set(normalized.capabilities))
+                merged_roles = list(set(existing.roles) | set(normalized.roles))
+                deduped[normalized.id] = ModelInfo(
+                    id=normalized.id,
+                    provider=existing.provider or normalized.provider,
+                    capabilities=merged_capabilities,
+                    roles=merged_roles,
+                    api_method=existing.api_method or normalized.api_method,
+                )
+            else:
+                deduped[normalized.id] = normalized
+
+        by_provider: Dict[str, List[ModelInfo]] = {}
+        for entry in deduped.values():
+            by_provider.setdefault(entry.provider, []).append(entry)
+
+        self._snapshot = _RegistrySnapshot(
+            models=list(deduped.values()),
+            by_id=deduped,
+            by_provider=by_provider,
+        )
+
+    # ------------------------------------------------------------------
+    # Disk snapshot (instant cold start)
+    # ------------------------------------------------------------------
+
+    def _schedule_persist(self) -> None:
+        if self._persist_task is None or self._persist_task.done():
+            self._persist_task = asyncio.get_running_loop().create_task(self._persist())
+
+    async def _persist(self) -> None:
+        await asyncio.sleep(1.0)  # coalesce refreshes finishing together
+        payload = {
+            name: {
+                "fetched_at": state.fetched_at,
+                "models": [entry.to_dict() for entry in state.models],
+            }
+            for name, state in self._providers.items()
+            if state.models
+        }
+        try:
+            await asyncio.to_thread(self._write_snapshot, payload)
+        except OSError as exc:
+            logger.warning("Could not persist model registry snapshot: %s", exc)
+
+    def _write_snapshot(self, payload: Dict[str, object]) -> None:
+        self._snapshot_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self._snapshot_path.with_suffix(self._snapshot_path.suffix + ".tmp")
+        with open(tmp_path, "w", encoding="utf-8") as handle:
+            json.dump(payload, handle, separators=(",", ":"))
+        os.replace(tmp_path, self._snapshot_path)
+
+    def _load_snapshot(self) -> bool:
+        try:
+            payload = json.loads(self._snapshot_path.read_text(encoding="utf-8"))
+        except FileNotFoundError:
+            return False
+        except (OSError, ValueError) as exc:
+            logger.warning("Ignoring unreadable model registry snapshot %s: %s", self._snapshot_path, exc)
+            return False
+
+        loaded = 0
+        for name, data in payload.items():
+            state = self._providers.get(name)
+            if state is None:
+                continue
+            state.models = [ModelInfo(**entry) for entry in data.get("models", [])]
+            state.fetched_at = float(data.get("fetched_at", 0.0))
+            loaded += len(state.models)
+        self._rebuild()
+        logger.info("Loaded %d models from registry snapshot %s", loaded, self._snapshot_path)
+        return True
+
+    # ------------------------------------------------------------------
+    # Read path
+    # ------------------------------------------------------------------
+
+    async def _current_snapshot(self, force_refresh: bool = False) -> _RegistrySnapshot:
+        if self._snapshot is None:
+            async with self._lock:
+                if self._snapshot is None and not self._load_snapshot():
+                    # Nothing to serve yet: wait for the first discovery round
+                    await asyncio.gather(*(self._refresh_provider(name) for name in self._providers))
+                    self._rebuild()
+
+        if force_refresh:
+            await asyncio.gather(*(self._refresh_provider(name) for name in self._providers))
+        else:
+            self._revalidate_stale()
+        return self._snapshot
+
+    async def list_models(self, force_refresh: bool = False) -> List[ModelInfo]:
+        """Return the current model list; stale providers refresh in the background."""
+        snapshot = await self._current_snapshot(force_refresh)
+        return list(snapshot.models)
 
     async def get_model(self, model_id: str) -> Optional[ModelInfo]:
         canonical_id = self._normalize_id(model_id)
-        models = await self.list_models()
-        for entry in models:
-            if entry.id == canonical_id:
-                return entry
-        return None
+        snapshot = await self._current_snapshot()
+        return snapshot.by_id.get(canonical_id)
+
+    async def list_models_by_provider(self, provider: str) -> List[ModelInfo]:
+        snapshot = await self._current_snapshot()
+        return list(snapshot.by_provider.get(provider, []))
+
+    def provider_status(self) -> Dict[str, Dict[str, object]]:
+        """Age, size and error state per provider."""
+        now = time.time()
+        return {
+            name: {
+                "models": len(state.models),
+                "age_seconds": round(now - state.fetched_at, 1) if state.fetched_at else None,
+                "refreshing": state.task is not None and not state.task.done(),
+                "failures": state.failures,
+                "last_error": state.last_error,
+            }
+            for name, state in self._providers.items()
+        }
 
     async def _discover_ollama(self) -> List[ModelInfo]:
         settings = self._settings
@@ -330,7 +500,7 @@ class ModelRegistry:
             auth = httpx.BasicAuth(settings.stable_diffusion_username, settings.stable_diffusion_password)
 
         try:
-            async with httpx.AsyncClient(timeout=settings.request_timeout, auth=auth) as client:
+            async with http_clients.client("comfyui", timeout=settings.request_timeout, auth=auth) as client:
                 response = await client.get(sd_url)
                 response.raise_for_status()
         except httpx.RequestError as exc:
@@ -387,7 +557,7 @@ class ModelRegistry:
             ]
             for url in endpoints:
                 try:
-                    async with httpx.AsyncClient(timeout=settings.request_timeout, auth=auth) as client:
+                    async with http_clients.client("comfyui", timeout=settings.request_timeout, auth=auth) as client:
                         response = await client.get(url)
                         response.raise_for_status()
                         payload = response.json()
@@ -434,13 +604,13 @@ class ModelRegistry:
 
         models: List[ModelInfo] = []
         try:
-            async with httpx.AsyncClient(timeout=10.0) as client:
-                response = await client.get(
-                    "https://generativelanguage.googleapis.com/v1beta/models",
-                    params={"key": settings.gemini_api_key}
-                )
-                response.raise_for_status()
-                data = response.json()
+            response = await http_clients.request(
+                "gemini", "GET",
+                "https://generativelanguage.googleapis.com/v1beta/models",
+                params={"key": settings.gemini_api_key},
+                timeout=10.0,
+            )
+            data = response.json()
         except httpx.RequestError as exc:
             logger.warning("Failed to discover Gemini models: %s", exc)
             return self._gemini_fallback_models()
@@ -512,13 +682,13 @@ class ModelRegistry:
 
         models: List[ModelInfo] = []
         try:
-            async with httpx.AsyncClient(timeout=10.0) as client:
-                response = await client.get(
-                    "https://api.mistral.ai/v1/models",
-                    headers={"Authorization": f"Bearer {settings.mistral_api_key}"}
-                )
-                response.raise_for_status()
-                data = response.json()
+            response = await http_clients.request(
+                "mistral", "GET",
+                "https://api.mistral.ai/v1/models",
+                headers={"Authorization": f"Bearer {settings.mistral_api_key}"},
+                timeout=10.0,
+            )
+            data = response.json()
         except httpx.RequestError as exc:
             logger.warning("Failed to discover Mistral models: %s", exc)
             return self._mistral_fallback_models()
@@ -616,13 +786,13 @@ class ModelRegistry:
 
         models: List[ModelInfo] = []
         try:
-            async with httpx.AsyncClient(timeout=10.0) as client:
-                response = await client.get(
-                    f"{settings.groq_base_url}/models",
-                    headers={"Authorization": f"Bearer {settings.groq_api_key}"}
-                )
-                response.raise_for_status()
-                data = response.json()
+            response = await http_clients.request(
+                "groq", "GET",
+                f"{settings.groq_base_url}/models",
+                headers={"Authorization": f"Bearer {settings.groq_api_key}"},
+                timeout=10.0,
+            )
+            data = response.json()
         except httpx.RequestError as exc:
             logger.warning("Failed to discover Groq models: %s", exc)
             return self._groq_fallback_models()
@@ -671,13 +841,13 @@ class ModelRegistry:
 
         models: List[ModelInfo] = []
         try:
-            async with httpx.AsyncClient(timeout=10.0) as client:
-                response = await client.get(
-                    f"{settings.cerebras_base_url}/models",
-                    headers={"Authorization": f"Bearer {settings.cerebras_api_key}"}
-                )
-                response.raise_for_status()
-                data = response.json()
+            response = await http_clients.request(
+                "cerebras", "GET",
+                f"{settings.cerebras_base_url}/models",
+                headers={"Authorization": f"Bearer {settings.cerebras_api_key}"},
+                timeout=10.0,
+            )
+            data = response.json()
         except httpx.RequestError as exc:
             logger.warning("Failed to discover Cerebras models: %s", exc)
             return self._cerebras_fallback_models()
@@ -722,13 +892,13 @@ class ModelRegistry:
 
         models: List[ModelInfo] = []
         try:
-            async with httpx.AsyncClient(timeout=10.0) as client:
-                response = await client.get(
-                    "https://api.cohere.ai/v1/models",
-                    headers={"Authorization": f"Bearer {settings.cohere_api_key}"}
-                )
-                response.raise_for_status()
-                data = response.json()
+            response = await http_clients.request(
+                "cohere", "GET",
+                "https://api.cohere.ai/v1/models",
+                headers={"Authorization": f"Bearer {settings.cohere_api_key}"},
+                timeout=10.0,
+            )
+            data = response.json()
         except httpx.RequestError as exc:
             logger.warning("Failed to discover Cohere models: %s", exc)
             return self._cohere_fallback_models()
@@ -792,17 +962,17 @@ class ModelRegistry:
 
         models: List[ModelInfo] = []
         try:
-            async with httpx.AsyncClient(timeout=15.0) as client:
-                response = await client.get(
-                    f"{settings.openrouter_base_url}/models",
-                    headers={
-                        "Authorization": f"Bearer {settings.openrouter_api_key}",
-                        "HTTP-Referer": "https://api.ailinux.me",
-                        "X-Title": "AILinux TriForce"
-                    }
-                )
-                response.raise_for_status()
-                data = response.json()
+            response = await http_clients.request(
+                "openrouter", "GET",
+                f"{settings.openrouter_base_url}/models",
+                headers={
+                    "Authorization": f"Bearer {settings.openrouter_api_key}",
+                    "HTTP-Referer": "https://api.ailinux.me",
+                    "X-Title": "AILinux TriForce"
+                },
+                timeout=15.0,
+            )
+            data = response.json()
         except httpx.RequestError as exc:
             logger.warning("Failed to discover OpenRouter models: %s", exc)
             return self._openrouter_fallback_models()
@@ -862,13 +1032,13 @@ class ModelRegistry:
 
         models: List[ModelInfo] = []
         try:
-            async with httpx.AsyncClient(timeout=10.0) as client:
-                response = await client.get(
-                    f"{settings.together_base_url}/models",
-                    headers={"Authorization": f"Bearer {settings.together_api_key}"}
-                )
-                response.raise_for_status()
-                data = response.json()
+            response = await http_clients.request(
+                "together", "GET",
+                f"{settings.together_base_url}/models",
+                headers={"Authorization": f"Bearer {settings.together_api_key}"},
+                timeout=10.0,
+            )
+            data = response.json()
         except httpx.RequestError as exc:
             logger.warning("Failed to discover Together AI models: %s", exc)
             return self._together_fallback_models()
@@ -924,13 +1094,13 @@ class ModelRegistry:
 
         models: List[ModelInfo] = []
         try:
-            async with httpx.AsyncClient(timeout=10.0) as client:
-                response = await client.get(
-                    f"{settings.fireworks_base_url}/models",
-                    headers={"Authorization": f"Bearer {settings.fireworks_api_key}"}
-                )
-                response.raise_for_status()
-                data = response.json()
+            response = await http_clients.request(
+                "fireworks", "GET",
+                f"{settings.fireworks_base_url}/models",
+                headers={"Authorization": f"Bearer {settings.fireworks_api_key}"},
+                timeout=10.0,
+            )
+            data = response.json()
         except httpx.RequestError as exc:
             logger.warning("Failed to discover Fireworks AI models: %s", exc)
             return self._fireworks_fallback_models()
@@ -980,13 +1150,13 @@ class ModelRegistry:
 
         models: List[ModelInfo] = []
         try:
-            async with httpx.AsyncClient(timeout=10.0) as client:
-                response = await client.get(
-                    f"https://api.cloudflare.com/client/v4/accounts/{settings.cloudflare_account_id}/ai/models/search",
-                    headers={"Authorization": f"Bearer {settings.cloudflare_api_token}"}
-                )
-                response.raise_for_status()
-                data = response.json()
+            response = await http_clients.request(
+                "cloudflare", "GET",
+                f"https://api.cloudflare.com/client/v4/accounts/{settings.cloudflare_account_id}/ai/models/search",
+                headers={"Authorization": f"Bearer {settings.cloudflare_api_token}"},
+                timeout=10.0,
+            )
+            data = response.json()
         except httpx.RequestError as exc:
             logger.warning("Failed to discover Cloudflare models: %s", exc)
             return self._cloudflare_fallback_models()
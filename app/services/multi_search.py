@@ -11,40 +11,26 @@ Architektur:
 import asyncio
 import aiohttp
 import logging
-import hashlib
 import time
 import re
 from typing import Set,  List, Dict, Any, Optional
 from urllib.parse import urlencode, quote_plus
-from collections import OrderedDict
+from ..utils.http_client import http_clients
+from .search_cache import search_cache
 
 logger = logging.getLogger(__name__)
 
 # =============================================================================
-# CACHE SYSTEM
+# CACHE
 # =============================================================================
 
-_CACHE: OrderedDict[str, Dict[str, Any]] = OrderedDict()
-_CACHE_MAX = 500
-_CACHE_TTL = 300  # 5 Minuten
+ERROR_RESULT_TTL = 30  # Teilergebnisse / leere Ergebnisse nur kurz cachen
 
-def _cache_key(prefix: str, query: str, lang: str = "de") -> str:
-    h = hashlib.md5(f"{prefix}:{query}:{lang}".encode()).hexdigest()[:12]
-    return f"{prefix}_{h}"
 
-def _cache_get(key: str) -> Optional[Dict]:
-    if key in _CACHE:
-        entry = _CACHE[key]
-        if time.time() - entry["ts"] < _CACHE_TTL:
-            _CACHE.move_to_end(key)
-            return entry["data"]
-        del _CACHE[key]
-    return None
-
-def _cache_set(key: str, data: Dict) -> None:
-    _CACHE[key] = {"data": data, "ts": time.time()}
-    while len(_CACHE) > _CACHE_MAX:
-        _CACHE.popitem(last=False)
+def _result_ttl(result: Dict[str, Any], ttl: int) -> float:
+    if result.get("errors") or not result.get("total"):
+        return min(ttl, ERROR_RESULT_TTL)
+    return ttl
 
 
 # =============================================================================
@@ -89,7 +75,7 @@ async def search_searxng(
         
         page_results = []
         try:
-            async with aiohttp.ClientSession(timeout=timeout) as session:
+            async with http_clients.session("searxng", timeout=timeout) as session:
                 async with session.get(SEARXNG_URL, params=params) as resp:
                     if resp.status == 200:
                         data = await resp.json()
@@ -131,7 +117,7 @@ async def search_searxng(
             
             async def _fetch_group(p=params_copy):
                 try:
-                    async with aiohttp.ClientSession(timeout=timeout) as session:
+                    async with http_clients.session("searxng", timeout=timeout) as session:
                         async with session.get(SEARXNG_URL, params=p) as resp:
                             if resp.status == 200:
                                 data = await resp.json()
@@ -185,7 +171,7 @@ async def _old_search_searxng_backup(
     timeout = aiohttp.ClientTimeout(total=15)
     
     try:
-        async with aiohttp.ClientSession(timeout=timeout) as session:
+        async with http_clients.session("searxng", timeout=timeout) as session:
             async with session.get(SEARXNG_URL, params=params) as resp:
                 if resp.status == 200:
                     data = await resp.json()
@@ -224,7 +210,7 @@ async def search_searxng_images(query: str, max_results: int = 30, lang: str = "
     timeout = aiohttp.ClientTimeout(total=15)
     
     try:
-        async with aiohttp.ClientSession(timeout=timeout) as session:
+        async with http_clients.session("searxng", timeout=timeout) as session:
             async with session.get(SEARXNG_URL, params=params) as resp:
                 if resp.status == 200:
                     data = await resp.json()
@@ -267,7 +253,7 @@ async def search_wikipedia(query: str, max_results: int = 10, lang: str = "de")
     timeout = aiohttp.ClientTimeout(total=8)
     
     try:
-        async with aiohttp.ClientSession(timeout=timeout) as session:
+        async with http_clients.session("search", timeout=timeout) as session:
             async with session.get(url, params=params) as resp:
                 if resp.status == 200:
                     data = await resp.json()
@@ -295,7 +281,7 @@ async def search_wiby(query: str, max_results: int = 15) -> List[Dict[str, Any]]
     timeout = aiohttp.ClientTimeout(total=8)
     
     try:
-        async with aiohttp.ClientSession(timeout=timeout) as session:
+        async with http_clients.session("search", timeout=timeout) as session:
             async with session.get(url) as resp:
                 if resp.status == 200:
                     data = await resp.json()
@@ -322,7 +308,7 @@ async def search_grokipedia(query: str, num_results: int = 8) -> Dict[str, Any]:
     timeout = aiohttp.ClientTimeout(total=10)
     
     try:
-        async with aiohttp.ClientSession(timeout=timeout) as session:
+        async with http_clients.session("search", timeout=timeout) as session:
             async with session.get(url, params=params) as resp:
                 if resp.status == 200:
                     data = await resp.json()
@@ -350,7 +336,7 @@ async def search_ailinux(query: str, num_results: int = 15) -> Dict[str, Any]:
     timeout = aiohttp.ClientTimeout(total=10)
     
     try:
-        async with aiohttp.ClientSession(timeout=timeout) as session:
+        async with http_clients.session("search", timeout=timeout) as session:
             async with session.get(url, params=params) as resp:
                 if resp.status == 200:
                     data = await resp.json()
@@ -429,14 +415,38 @@ async def multi_search(
     """
     AILinux Multi-Search v2.1
     
-    Kombiniert SearXNG (9 Engines) mit zusätzlichen APIs
+    Kombiniert SearXNG (9 Engines) mit zusätzlichen APIs.
+    Gleichzeitige identische Anfragen teilen sich einen Fan-out (search_cache).
     """
-    cache_key = _cache_key("multi_v21", query, lang)
-    cached = _cache_get(cache_key)
-    if cached:
-        logger.info(f"Cache hit for '{query}'")
-        return cached
-    
+    providers = [
+        name for name, enabled in (
+            ("searxng", use_searxng),
+            ("wikipedia", use_wikipedia),
+            ("wiby", use_wiby),
+            ("grokipedia", use_grokipedia),
+            ("ailinux_news", use_ailinux_news),
+        ) if enabled
+    ]
+    result = await search_cache.get_or_fetch(
+        "multi_v21", query, providers,
+        lambda: _multi_search(query, max_results, lang, use_searxng, use_wikipedia,
+                              use_wiby, use_grokipedia, use_ailinux_news),
+        params={"max_results": max_results, "lang": lang},
+        ttl_for=_result_ttl,
+    )
+    return {**result, "query": query}
+
+
+async def _multi_search(
+    query: str,
+    max_results: int,
+    lang: str,
+    use_searxng: bool,
+    use_wikipedia: bool,
+    use_wiby: bool,
+    use_grokipedia: bool,
+    use_ailinux_news: bool,
+) -> Dict[str, Any]:
     tasks: List[asyncio.Future] = []
     task_names: List[str] = []
     
@@ -513,7 +523,6 @@ async def multi_search(
         "version": "2.1-searxng",
     }
     
-    _cache_set(cache_key, result)
     logger.info(f"Multi-Search v2.1 '{query}': {len(ranked_results)} results in {search_time:.2f}s")
     
     return result
@@ -545,11 +554,16 @@ async def quick_smart_search(query: str, max_results: int = 15, lang: str = "de"
 
 async def image_search(query: str, num_results: int = 30, lang: str = "de") -> Dict[str, Any]:
     """Bildersuche via SearXNG"""
-    cache_key = _cache_key("images", query, lang)
-    cached = _cache_get(cache_key)
-    if cached:
-        return cached
-    
+    result = await search_cache.get_or_fetch(
+        "images", query, ["searxng_images"],
+        lambda: _image_search(query, num_results, lang),
+        params={"num_results": num_results, "lang": lang},
+        ttl_for=_result_ttl,
+    )
+    return {**result, "query": query}
+
+
+async def _image_search(query: str, num_results: int, lang: str) -> Dict[str, Any]:
     start_time = time.time()
     results = await search_searxng_images(query, num_results, lang)
     elapsed = time.time() - start_time
@@ -562,8 +576,6 @@ async def image_search(query: str, num_results: int = 30, lang: str = "de") -> D
         "search_time_ms": round(elapsed * 1000, 2),
         "source": "searxng_images",
     }
-    
-    _cache_set(cache_key, result)
     return result
 
 
@@ -576,22 +588,34 @@ async def bing_image_search(*args, **kwargs):
 # SPEZIAL-SUCHEN
 # =============================================================================
 
+async def _cached_searxng(
+    kind: str, query: str, max_results: int, lang: str, **searxng_kwargs
+) -> Dict[str, Any]:
+    async def _fetch() -> Dict[str, Any]:
+        results = await search_searxng(query, max_results, lang, **searxng_kwargs)
+        return {"query": query, "results": results, "total": len(results)}
+
+    result = await search_cache.get_or_fetch(
+        kind, query, [f"searxng_{kind}"], _fetch,
+        params={"max_results": max_results, "lang": lang},
+        ttl_for=_result_ttl,
+    )
+    return {**result, "query": query}
+
+
 async def search_code(query: str, max_results: int = 20, lang: str = "en") -> Dict[str, Any]:
     """Code-Suche (GitHub, StackOverflow)"""
-    results = await search_searxng(query, max_results, lang, categories="it", engines=["github"])
-    return {"query": query, "results": results, "total": len(results)}
+    return await _cached_searxng("code", query, max_results, lang, categories="it", engines=["github"])
 
 
 async def search_science(query: str, max_results: int = 20, lang: str = "en") -> Dict[str, Any]:
     """Wissenschaftliche Suche (arXiv, Papers)"""
-    results = await search_searxng(query, max_results, lang, categories="science", engines=["arxiv"])
-    return {"query": query, "results": results, "total": len(results)}
+    return await _cached_searxng("science", query, max_results, lang, categories="science", engines=["arxiv"])
 
 
 async def search_news(query: str, max_results: int = 20, lang: str = "de") -> Dict[str, Any]:
     """News-Suche"""
-    results = await search_searxng(query, max_results, lang, categories="news", time_range="week")
-    return {"query": query, "results": results, "total": len(results)}
+    return await _cached_searxng("news", query, max_results, lang, categories="news", time_range="week")
 
 
 # =============================================================================
@@ -651,7 +675,7 @@ async def get_weather(lat: float = 52.28, lon: float = 7.44, location: str = "Rh
         "current_weather": True, "timezone": "Europe/Berlin",
     }
     try:
-        async with aiohttp.ClientSession() as session:
+        async with http_clients.session("search") as session:
             async with session.get(url, params=params, timeout=10) as resp:
                 if resp.status == 200:
                     data = await resp.json()
@@ -674,7 +698,7 @@ async def get_crypto_prices(coins: List[str] = None) -> Dict[str, Any]:
     url = "https://api.coingecko.com/api/v3/simple/price"
     params = {"ids": ",".join(coins), "vs_currencies": "usd,eur", "include_24hr_change": True}
     try:
-        async with aiohttp.ClientSession() as session:
+        async with http_clients.session("search") as session:
             async with session.get(url, params=params, timeout=10) as resp:
                 if resp.status == 200:
                     return await resp.json()
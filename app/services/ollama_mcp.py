@@ -12,11 +12,12 @@ Version: 2.80
 
 import asyncio
 import logging
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, List, Optional, Union
 
 import httpx
 
 from ..config import get_settings
+from .compute_backend import EmbeddingBatcher, make_embedding_batcher
 
 logger = logging.getLogger("ailinux.ollama_mcp")
 
@@ -33,6 +34,7 @@ class OllamaMCPService:
         # Convert to string if it's a Pydantic URL type
         self.base_url = str(base_url).rstrip("/")
         self._client: Optional[httpx.AsyncClient] = None
+        self._embed_batcher: Optional[EmbeddingBatcher] = None
 
     async def _get_client(self) -> httpx.AsyncClient:
         """Get or create HTTP client."""
@@ -291,28 +293,40 @@ class OllamaMCPService:
     async def embed(
         self,
         model: str,
-        input_text: str,
+        input_text: Union[str, List[str]],
     ) -> Dict[str, Any]:
-        """Generate embeddings."""
-        client = await self._get_client()
+        """Generate embeddings.
+
+        Concurrent calls for the same model are coalesced into one /api/embed request.
+        """
+        texts = [input_text] if isinstance(input_text, str) else list(input_text)
+        if self._embed_batcher is None:
+            self._embed_batcher = make_embedding_batcher(self._embed_batch)
         try:
-            response = await client.post(
-                "/api/embed",
-                json={"model": model, "input": input_text},
-                timeout=httpx.Timeout(60.0),
-            )
-            response.raise_for_status()
-            data = response.json()
-            embeddings = data.get("embeddings", [])
+            embeddings = list(await self._embed_batcher.submit(model, texts))
             return {
                 "embeddings": embeddings,
                 "model": model,
                 "dimensions": len(embeddings[0]) if embeddings else 0,
             }
-        except httpx.HTTPError as e:
+        except (httpx.HTTPError, ValueError) as e:
             logger.error(f"Failed to embed with {model}: {e}")
             return {"error": str(e), "embeddings": []}
 
+    async def _embed_batch(self, model: str, texts: List[str]) -> List[List[float]]:
+        """Single /api/embed request for a coalesced batch of texts."""
+        client = await self._get_client()
+        response = await client.post(
+            "/api/embed",
+            json={"model": model, "input": texts},
+            timeout=httpx.Timeout(60.0),
+        )
+        response.raise_for_status()
+        embeddings = response.json().get("embeddings", [])
+        if len(embeddings) != len(texts):
+            raise ValueError(f"Expected {len(texts)} embeddings from {model}, got {len(embeddings)}")
+        return embeddings
+
     # =========================================================================
     # Health Check
     # =========================================================================
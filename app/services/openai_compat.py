@@ -1,9 +1,12 @@
 from __future__ import annotations
 
+import asyncio
+import base64
 import json
+import struct
 import time
 from time import perf_counter
-from typing import AsyncGenerator, Iterable, List, Literal, Optional
+from typing import AsyncGenerator, Iterable, List, Literal, Optional, Sequence, Union
 from uuid import uuid4
 
 from fastapi.responses import StreamingResponse
@@ -11,7 +14,11 @@ from pydantic import BaseModel, Field
 
 from ..config import get_settings
 from ..services import chat as chat_service
+from ..services.compute_backend import compute
+from ..services.huggingface_inference import hf_inference
 from ..services.model_registry import ModelInfo, registry
+from ..services.ollama_mcp import ollama_mcp
+from ..services.vector_cache import vector_cache
 from ..utils.errors import api_error
 from ..utils.throttle import request_slot
 
@@ -40,6 +47,18 @@ class OpenAIChatCompletionRequest(BaseModel):
     stop: Optional[List[str]] = None
 
 
+class OpenAIEmbeddingRequest(BaseModel):
+    model: str
+    input: Union[str, List[str]]
+    encoding_format: Literal["float", "base64"] = "float"
+    user: Optional[str] = None
+
+
+MAX_EMBEDDING_INPUTS = 2048
+EMBEDDING_CHUNK_SIZE = 64       # texts per backend request
+EMBEDDING_CONCURRENCY = 4       # backend requests in flight per call
+
+
 def _estimate_tokens(text: str | None) -> int:
     if not text:
         return 0
@@ -235,3 +254,133 @@ async def stream_chat_completion(payload: OpenAIChatCompletionRequest) -> Stream
         yield "data: [DONE]\n\n"
 
     return StreamingResponse(generator(), media_type="text/event-stream")
+
+
+# Embedding backends: registry models (Ollama), "hf/<repo>" / "huggingface/<repo>"
+# via the HF Inference API, "local/<repo>" via the local compute backend.
+# Prefixed models must be listed in EMBEDDING_MODELS: they would otherwise
+# let any client spend the HF token or download and load any model.
+_EMBEDDING_PREFIXES = {"hf": "huggingface", "huggingface": "huggingface", "local": "local"}
+
+
+def _split_embedding_model(model: str) -> Optional[tuple[str, str]]:
+    """(backend, repo) for a prefixed model name, None for registry models."""
+    prefix, _, name = model.strip().partition("/")
+    backend = _EMBEDDING_PREFIXES.get(prefix.lower())
+    return (backend, name) if backend and name else None
+
+
+def _allowed_embedding_models() -> set[str]:
+    allowed = set()
+    for entry in get_settings().embedding_models.split(","):
+        split = _split_embedding_model(entry)
+        if split:
+            allowed.add(f"{split[0]}/{split[1]}")
+    return allowed
+
+
+async def _resolve_embedding_model(request_model: str) -> tuple[str, str, str]:
+    """Returns (cache id, backend, backend model name)."""
+    split = _split_embedding_model(request_model)
+    if split:
+        backend, name = split
+        cache_id = f"{backend}/{name}"
+        if cache_id not in _allowed_embedding_models():
+            raise api_error(
+                f"Embedding model '{request_model}' is not enabled on this server",
+                status_code=400,
+                code="embedding_model_not_allowed",
+            )
+        return cache_id, backend, name
+
+    resolved_model, model_info = await _resolve_model(request_model)
+    if model_info.provider != "ollama":
+        raise api_error(
+            f"Embeddings are not available for provider '{model_info.provider}'",
+            status_code=400,
+            code="embeddings_unsupported",
+        )
+    name = resolved_model.split("/", 1)[1] if resolved_model.startswith("ollama/") else resolved_model
+    return f"ollama/{name}", "ollama", name
+
+
+async def _embed_batch(backend: str, name: str, texts: List[str]) -> List[Sequence[float]]:
+    if backend == "ollama":
+        result = await ollama_mcp.embed(name, texts)
+        if result.get("error"):
+            raise api_error("Embedding backend failed", status_code=502, code="embedding_failed", internal_message=result["error"])
+        return result["embeddings"]
+
+    if backend == "huggingface":
+        try:
+            result = await hf_inference.embeddings(texts, model=name)
+        except Exception as e:
+            raise api_error("Embedding backend failed", status_code=502, code="embedding_failed", internal_message=str(e))
+        return result["embeddings"]
+
+    try:
+        result = await compute.embed(texts, model=name)
+    except RuntimeError as e:
+        raise api_error("Local embedding backend unavailable", status_code=503, code="embedding_unavailable", internal_message=str(e))
+    data = compute.to_cpu(result.data)
+    return data.tolist() if hasattr(data, "tolist") else list(data)
+
+
+def _encode_embedding(vector: Sequence[float], encoding_format: str) -> Union[List[float], str]:
+    if encoding_format == "base64":
+        # Little-endian float32, as returned by the OpenAI API
+        return base64.b64encode(struct.pack(f"<{len(vector)}f", *vector)).decode("ascii")
+    return list(vector)
+
+
+async def create_embeddings(payload: OpenAIEmbeddingRequest) -> dict[str, object]:
+    texts = [payload.input] if isinstance(payload.input, str) else list(payload.input)
+    if not texts:
+        raise api_error("At least one input is required", status_code=422, code="missing_input")
+    if len(texts) > MAX_EMBEDDING_INPUTS:
+        raise api_error(f"At most {MAX_EMBEDDING_INPUTS} inputs per request", status_code=422, code="too_many_inputs")
+    if any(not text for text in texts):
+        raise api_error("Inputs must not be empty", status_code=422, code="empty_input")
+
+    cache_id, backend, name = await _resolve_embedding_model(payload.model)
+
+    async def compute_missing(missing: List[str]) -> List[Sequence[float]]:
+        # Only texts neither cached nor in flight elsewhere reach the backend
+        semaphore = asyncio.Semaphore(EMBEDDING_CONCURRENCY)
+
+        async def run(chunk: List[str]) -> List[Sequence[float]]:
+            async with semaphore:
+                return await _embed_batch(backend, name, chunk)
+
+        chunks = [missing[i:i + EMBEDDING_CHUNK_SIZE] for i in range(0, len(missing), EMBEDDING_CHUNK_SIZE)]
+        # Model-Latenz-Tracking nur für echte Backend-Aufrufe, Cache-Treffer verfälschen sonst die Werte
+        model_start = perf_counter()
+        error_occurred = False
+        try:
+            async with request_slot():
+                parts = await asyncio.gather(*(run(chunk) for chunk in chunks))
+        except Exception:
+            error_occurred = True
+            raise
+        finally:
+            if _HAS_PERF_MONITOR:
+                latency_ms = (perf_counter() - model_start) * 1000
+                perf_monitor.record_model(cache_id, latency_ms, error=error_occurred)
+        return [vector for part in parts for vector in part]
+
+    vectors = await vector_cache.get_or_compute(cache_id, texts, compute_missing)
+
+    prompt_tokens = sum(_estimate_tokens(text) for text in texts)
+    return {
+        "object": "list",
+        "data": [
+            {
+                "object": "embedding",
+                "index": index,
+                "embedding": _encode_embedding(vector, payload.encoding_format),
+            }
+            for index, vector in enumerate(vectors)
+        ],
+        "model": payload.model,
+        "usage": {"prompt_tokens": prompt_tokens, "total_tokens": prompt_tokens},
+    }
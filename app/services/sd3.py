@@ -1,5 +1,6 @@
 from __future__ import annotations
 
+import asyncio
 import base64
 import httpx
 import logging
@@ -9,9 +10,12 @@ from typing import Any, Dict, Optional
 from ..config import get_settings
 from ..utils.errors import api_error
 from ..utils.http_client import HttpClient
+from .comfyui_tracker import ProgressCallback, get_comfyui_tracker
 
 logger = logging.getLogger("ailinux.sd3.service")
 
+COMFYUI_WAIT_TIMEOUT = 300.0  # 5 minutes max wait for SDXL generation
+
 class StableDiffusionService:
     def __init__(self):
         self._client: Optional[HttpClient] = None # For Automatic1111
@@ -47,7 +51,9 @@ class StableDiffusionService:
                                width: int = 512, height: int = 512,
                                steps: int = 20, cfg_scale: float = 7.0,
                                sampler_name: str = "Euler a",
-                               seed: int = -1, model: Optional[str] = None) -> Dict[str, Any]:
+                               seed: int = -1, model: Optional[str] = None,
+                               progress_callback: Optional[ProgressCallback] = None) -> Dict[str, Any]:
+        """Generate an image. progress_callback receives ComfyUI progress events."""
         self._ensure_client()
         settings = get_settings()
 
@@ -55,7 +61,7 @@ class StableDiffusionService:
             if settings.stable_diffusion_backend == "automatic1111":
                 return await self._generate_image_automatic1111(prompt, negative_prompt, width, height, steps, cfg_scale, sampler_name, seed, model)
             elif settings.stable_diffusion_backend == "comfyui":
-                return await self._generate_image_comfyui(prompt, negative_prompt, width, height, steps, cfg_scale, sampler_name, seed, model)
+                return await self._generate_image_comfyui(prompt, negative_prompt, width, height, steps, cfg_scale, sampler_name, seed, model, progress_callback)
             else:
                 raise api_error(f"Unknown Stable Diffusion backend: {settings.stable_diffusion_backend}", status_code=500, code="sd_backend_unknown")
         except Exception as exc:
@@ -128,7 +134,8 @@ class StableDiffusionService:
                                         width: int = 512, height: int = 512,
                                         steps: int = 20, cfg_scale: float = 7.0,
                                         sampler_name: str = "Euler a",
-                                        seed: int = -1, model: Optional[str] = None) -> Dict[str, Any]:
+                                        seed: int = -1, model: Optional[str] = None,
+                                        progress_callback: Optional[ProgressCallback] = None) -> Dict[str, Any]:
         logger.info(f"DEBUG: _generate_image_comfyui called with prompt: {prompt}")
 
         if not self._comfyui_client or not self._comfyui_base_url:
@@ -150,7 +157,7 @@ class StableDiffusionService:
 
         # Try SDXL first, fallback to SD 1.5 on memory failure
         try:
-            return await self._generate_with_workflow(prompt, negative_prompt, width, height, steps, cfg_scale, sampler_name, seed, model)
+            return await self._generate_with_workflow(prompt, negative_prompt, width, height, steps, cfg_scale, sampler_name, seed, model, progress_callback)
         except Exception as exc:
             logger.warning(f"Primary model {model} failed, attempting fallback: {exc}")
 
@@ -162,7 +169,7 @@ class StableDiffusionService:
                 for fallback_model in sd15_models:
                     try:
                         logger.info(f"Trying SD 1.5 fallback model: {fallback_model}")
-                        return await self._generate_with_workflow(prompt, negative_prompt, width, height, steps, cfg_scale, sampler_name, seed, fallback_model)
+                        return await self._generate_with_workflow(prompt, negative_prompt, width, height, steps, cfg_scale, sampler_name, seed, fallback_model, progress_callback)
                     except Exception as fallback_exc:
                         logger.warning(f"Fallback model {fallback_model} also failed: {fallback_exc}")
                         continue
@@ -174,7 +181,8 @@ class StableDiffusionService:
                                      width: int = 512, height: int = 512,
                                      steps: int = 20, cfg_scale: float = 7.0,
                                      sampler_name: str = "Euler a",
-                                     seed: int = -1, model: str = None) -> Dict[str, Any]:
+                                     seed: int = -1, model: str = None,
+                                     progress_callback: Optional[ProgressCallback] = None) -> Dict[str, Any]:
         """Generate image with ComfyUI workflow, supporting both SDXL and SD 1.5 models."""
 
         # Detect model type for appropriate workflow
@@ -196,12 +204,16 @@ class StableDiffusionService:
         # Use httpx.URL to properly construct the endpoint URL
         url = httpx.URL(self._comfyui_base_url).join("/prompt")
 
+        # Listen on the ComfyUI websocket before queueing so no event is missed
+        tracker = get_comfyui_tracker(self._comfyui_base_url, headers)
+        await tracker.start()
+
         try:
             logger.info(f"DEBUG: About to submit prompt to ComfyUI at {url} with model {model}")
             response = await self._comfyui_client.post(
                 str(url),
                 headers=headers,
-                json={"prompt": workflow, "client_id": "ailinux_backend"},
+                json={"prompt": workflow, "client_id": tracker.client_id},
                 timeout=self._comfyui_client.timeout,
             )
 
@@ -217,9 +229,7 @@ class StableDiffusionService:
 
             logger.info(f"ComfyUI prompt submitted. Prompt ID: {prompt_id}")
 
-            # Poll for completion and get the actual image
-            logger.info(f"Starting polling for prompt_id: {prompt_id}")
-            image_data = await self._poll_for_image_completion(prompt_id, headers)
+            image_data = await self._wait_for_image_completion(prompt_id, headers, progress_callback)
             return image_data
 
         except Exception as exc:
@@ -370,130 +380,63 @@ class StableDiffusionService:
             }
         }
 
-    async def _poll_for_image_completion(self, prompt_id: str, headers: Dict[str, str]) -> Dict[str, Any]:
-        """Poll ComfyUI history endpoint until image generation is complete."""
-        import asyncio
-        import base64
-
-        logger.info(f"DEBUG: _poll_for_image_completion called with prompt_id: {prompt_id}")
-
+    async def _wait_for_image_completion(self, prompt_id: str, headers: Dict[str, str],
+                                         progress_callback: Optional[ProgressCallback] = None) -> Dict[str, Any]:
+        """Wait for ComfyUI to finish the prompt (websocket events) and fetch the image."""
         if not self._comfyui_client or not self._comfyui_base_url:
-            logger.error("ComfyUI client not initialized for polling.")
-            raise RuntimeError("ComfyUI client not initialized for polling.")
+            logger.error("ComfyUI client not initialized for waiting.")
+            raise RuntimeError("ComfyUI client not initialized for waiting.")
 
-        logger.info(f"Starting polling for prompt_id: {prompt_id}")
-        max_attempts = 300  # 5 minutes max wait for SDXL generation
-        poll_interval = 2.0  # Check every 2 seconds
+        tracker = get_comfyui_tracker(self._comfyui_base_url, headers)
+        try:
+            prompt_history = await tracker.wait(prompt_id, timeout=COMFYUI_WAIT_TIMEOUT, on_progress=progress_callback)
+        except asyncio.TimeoutError:
+            # Timeout - return empty array instead of error
+            logger.error(f"Image generation timeout for prompt_id: {prompt_id}")
+            return {
+                "images": []
+            }
 
+        status_info = prompt_history.get("status", {})
+        outputs = prompt_history.get("outputs") or {}
 
+        if not status_info.get("completed") and not outputs:
+            # Generation failed - return empty array with error message
+            error_msg = status_info.get("error") or status_info.get("msg", "Unknown error")
+            logger.warning(f"Image generation failed for prompt_id {prompt_id}: {error_msg} - returning empty array")
+            return {
+                "images": [],
+                "error": f"Image generation failed: {error_msg}"
+            }
 
-        for attempt in range(max_attempts):
+        # Find the SaveImage node output (usually node "7" in our workflow)
+        for node_output in outputs.values():
+            images = node_output.get("images") or []
+            if not images:
+                continue
+            # ComfyUI provides images via /view endpoint
+            image_filename = images[0].get("filename")
+            if not image_filename:
+                continue
+            image_url = f"{self._comfyui_base_url}/view?filename={image_filename}&subfolder=&type=output"
             try:
-                logger.info(f"Polling attempt {attempt + 1}/{max_attempts}")
-                # Check history for this prompt_id
-                history_url = httpx.URL(self._comfyui_base_url).join("/history")
-                response = await self._comfyui_client.get(
-                    str(history_url),
+                image_response = await self._comfyui_client.get(
+                    image_url,
                     headers=headers,
                     timeout=self._comfyui_client.timeout,
                 )
-
-                if response.status_code == 200:
-                    history_data = response.json()
-                    logger.info(f"Polling attempt {attempt + 1}: History contains {len(history_data)} entries")
-
-
-
-                    # Check if our prompt_id is in the history and completed
-                    if prompt_id in history_data:
-                        logger.info(f"Found prompt_id {prompt_id} in history")
-                        prompt_history = history_data[prompt_id]
-                        status_info = prompt_history.get("status", {})
-                        logger.info(f"Prompt history status: {status_info}")
-                        logger.info(f"Prompt history has outputs: {'outputs' in prompt_history}")
-
-                        # Check status string
-                        status_str = status_info.get("status_str", "unknown")
-                        logger.info(f"Status string: {status_str}")
-
-                        # Check if generation is complete (has outputs)
-                        if "outputs" in prompt_history and prompt_history["outputs"]:
-                            logger.info(f"Found outputs for prompt_id {prompt_id}")
-                            outputs = prompt_history["outputs"]
-
-                            # Find the SaveImage node output (usually node "7" in our workflow)
-                            for node_id, node_output in outputs.items():
-                                if "images" in node_output:
-                                    images = node_output["images"]
-                                    if images:
-                                        # Get the first image
-                                        image_info = images[0]
-
-                                        # ComfyUI provides images via /view endpoint
-                                        image_filename = image_info.get("filename")
-                                        if image_filename:
-                                            image_url = f"{self._comfyui_base_url}/view?filename={image_filename}&subfolder=&type=output"
-
-                                            # Optionally download the image data
-                                            try:
-                                                image_response = await self._comfyui_client.get(
-                                                    image_url,
-                                                    headers=headers,
-                                                    timeout=self._comfyui_client.timeout,
-                                                )
-
-                                                if image_response.status_code == 200:
-                                                    # Convert to base64 for frontend
-                                                    image_b64 = base64.b64encode(image_response.content).decode('utf-8')
-                                                    image_data_url = f"data:image/png;base64,{image_b64}"
-
-                                                    logger.info(f"Image generation completed for prompt_id: {prompt_id}")
-                                                    return {
-                                                        "images": [image_data_url]
-                                                    }
-                                            except Exception as img_exc:
-                                                logger.warning(f"Failed to download image: {img_exc}")
-
-                            # If we get here, outputs exist but no images found
-                            logger.info(f"Generation completed but no images found for prompt_id: {prompt_id}")
-                            return {
-                                "images": []
-                            }
-
-                        elif status_str == "error" or status_info.get("completed") == False:
-                            # Generation failed - return empty array with error message
-                            error_msg = status_info.get("msg", "Unknown error")
-                            logger.warning(f"Image generation failed for prompt_id {prompt_id}: {error_msg} - returning empty array")
-                            return {
-                                "images": [],
-                                "error": f"Image generation failed: {error_msg}"
-                            }
-
-                        else:
-                            # Prompt found but not complete and not error - might be processing
-                            logger.info(f"Prompt {prompt_id} status: {status_str} - continuing to poll")
-
-                    else:
-                        # Prompt not found in history yet - continue polling
-                        logger.info(f"Prompt_id {prompt_id} not found in history (contains {len(history_data)} entries) - continuing to poll")
-
-                        # If we've been polling for more than 3 attempts and prompt is still not in history,
-                        # assume ComfyUI is not working and return empty array
-                        if attempt > 3:
-                            logger.warning(f"Prompt {prompt_id} not found in history after {attempt} attempts - ComfyUI may be failing, returning empty array")
-                            return {
-                                "images": []
-                            }
-
-                # Wait before next poll
-                await asyncio.sleep(poll_interval)
-
-            except Exception as poll_exc:
-                logger.warning(f"Error polling ComfyUI history (attempt {attempt + 1}): {poll_exc}")
-                await asyncio.sleep(poll_interval)
-
-        # Timeout - return empty array instead of error
-        logger.error(f"Image generation timeout for prompt_id: {prompt_id}")
+                if image_response.status_code == 200:
+                    # Convert to base64 for frontend
+                    image_b64 = base64.b64encode(image_response.content).decode('utf-8')
+                    logger.info(f"Image generation completed for prompt_id: {prompt_id}")
+                    return {
+                        "images": [f"data:image/png;base64,{image_b64}"]
+                    }
+            except Exception as img_exc:
+                logger.warning(f"Failed to download image: {img_exc}")
+
+        # Outputs exist but no images found
+        logger.info(f"Generation completed but no images found for prompt_id: {prompt_id}")
         return {
             "images": []
         }
@@ -0,0 +1,378 @@
+"""
+Shared search result cache.
+
+Two tiers: a per-process LRU (L1) in front of Redis or a local cache
+directory (L2) that all workers share and that survives restarts. Entries
+are keyed by the normalized query, the provider set and the request
+parameters. Their TTL is the shortest TTL of the providers involved.
+
+Identical concurrent searches are coalesced. Within a process, callers
+await the same in-flight fetch. Across workers, the first worker takes a
+fill lock in L2 and the others wait for its result instead of fanning
+out to SearXNG and the APIs themselves.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import re
+import secrets
+import tempfile
+import time
+import unicodedata
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, Iterable, Optional, Tuple
+
+import redis.asyncio as aioredis
+
+from ..config import get_settings
+from ..utils.singleflight import SingleFlight
+
+logger = logging.getLogger("ailinux.search_cache")
+
+L1_MAX_ENTRIES = 500
+L2_RETRY_INTERVAL = 30.0   # seconds without L2 after an error
+FILL_LOCK_TTL = 30.0       # max seconds a worker may hold the fill lock
+FILL_POLL_INTERVALS = (0.05, 0.1, 0.25)
+REDIS_PREFIX = "ailinux:search:"
+DEFAULT_TTL = 300
+
+# Seconds a provider's results stay fresh
+PROVIDER_TTLS: Dict[str, int] = {
+    "searxng": 300,
+    "searxng_images": 1800,
+    "searxng_news": 120,
+    "searxng_code": 1800,
+    "searxng_science": 3600,
+    "wikipedia": 3600,
+    "wiby": 1800,
+    "grokipedia": 1800,
+    "ailinux_news": 300,
+    "ddg": 600,
+}
+
+_SPACES = re.compile(r"\s+")
+
+
+def normalize_query(query: str) -> str:
+    """Case, width and whitespace variants of a query share one entry."""
+    return _SPACES.sub(" ", unicodedata.normalize("NFKC", query or "")).strip().casefold()
+
+
+def provider_ttl(providers: Iterable[str]) -> int:
+    return min((PROVIDER_TTLS.get(p, DEFAULT_TTL) for p in providers), default=DEFAULT_TTL)
+
+
+# ============================================================================
+# L2 backends
+# ============================================================================
+
+class _RedisL2:
+    name = "redis"
+
+    def __init__(self, url: str):
+        self._redis = aioredis.from_url(url, socket_timeout=1.0, socket_connect_timeout=1.0)
+
+    async def get(self, key: str) -> Optional[bytes]:
+        return await self._redis.get(REDIS_PREFIX + key)
+
+    async def set(self, key: str, value: bytes, ttl: float):
+        await self._redis.set(REDIS_PREFIX + key, value, px=max(1, int(ttl * 1000)))
+
+    async def lock(self, key: str, token: str) -> bool:
+        return bool(await self._redis.set(REDIS_PREFIX + "lock:" + key, token, nx=True, px=int(FILL_LOCK_TTL * 1000)))
+
+    async def locked(self, key: str) -> bool:
+        return bool(await self._redis.exists(REDIS_PREFIX + "lock:" + key))
+
+    async def unlock(self, key: str, token: str):
+        # Only release our own lock; it may have expired and been taken over
+        await self._redis.eval(
+            "if redis.call('GET', KEYS[1]) == ARGV[1] then return redis.call('DEL', KEYS[1]) end return 0",
+            1, REDIS_PREFIX + "lock:" + key, token,
+        )
+
+    async def aclose(self):
+        await self._redis.aclose()
+
+
+class _DiskL2:
+    """One file per entry: 8 bytes expiry timestamp, then the JSON payload."""
+    name = "disk"
+
+    def __init__(self, directory: Path):
+        self.directory = directory
+        self.directory.mkdir(parents=True, exist_ok=True)
+
+    def _path(self, key: str, suffix: str = ".json") -> Path:
+        return self.directory / key[:2] / f"{key}{suffix}"
+
+    def _read(self, key: str) -> Optional[bytes]:
+        try:
+            raw = self._path(key).read_bytes()
+        except FileNotFoundError:
+            return None
+        if len(raw) < 8 or int.from_bytes(raw[:8], "little") / 1000 < time.time():
+            return None
+        return raw[8:]
+
+    def _write(self, key: str, value: bytes, ttl: float):
+        path = self._path(key)
+        path.parent.mkdir(exist_ok=True)
+        tmp = path.with_suffix(f".{secrets.token_hex(4)}.tmp")
+        tmp.write_bytes(int((time.time() + ttl) * 1000).to_bytes(8, "little") + value)
+        os.replace(tmp, path)
+
+    def _lock(self, key: str, token: str) -> bool:
+        path = self._path(key, ".lock")
+        path.parent.mkdir(exist_ok=True)
+        try:
+            fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+        except FileExistsError:
+            try:
+                stale = time.time() - path.stat().st_mtime > FILL_LOCK_TTL
+            except FileNotFoundError:
+                stale = True
+            if not stale:
+                return False
+            # Holder died: take the lock over
+            path.unlink(missing_ok=True)
+            try:
+                fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+            except FileExistsError:
+                return False
+        with os.fdopen(fd, "w") as f:
+            f.write(token)
+        return True
+
+    def _locked(self, key: str) -> bool:
+        try:
+            return time.time() - self._path(key, ".lock").stat().st_mtime <= FILL_LOCK_TTL
+        except FileNotFoundError:
+            return False
+
+    def _unlock(self, key: str, token: str):
+        path = self._path(key, ".lock")
+        try:
+            if path.read_text() == token:
+                path.unlink()
+        except FileNotFoundError:
+            pass
+
+    async def get(self, key: str) -> Optional[bytes]:
+        return await asyncio.to_thread(self._read, key)
+
+    async def set(self, key: str, value: bytes, ttl: float):
+        await asyncio.to_thread(self._write, key, value, ttl)
+
+    async def lock(self, key: str, token: str) -> bool:
+        return await asyncio.to_thread(self._lock, key, token)
+
+    async def locked(self, key: str) -> bool:
+        return await asyncio.to_thread(self._locked, key)
+
+    async def unlock(self, key: str, token: str):
+        await asyncio.to_thread(self._unlock, key, token)
+
+    async def aclose(self):
+        pass
+
+
+# ============================================================================
+# Cache
+# ============================================================================
+
+class SearchCache:
+    """L1/L2 search cache with single-flight fetches."""
+
+    def __init__(self, l1_max: int = L1_MAX_ENTRIES, l2: Optional[str] = None):
+        self._l1: "OrderedDict[str, Tuple[float, Any]]" = OrderedDict()
+        self._l1_max = l1_max
+        self._l2_mode = l2
+        self._l2: Any = None
+        self._l2_down_until = 0.0
+        self._inflight: SingleFlight[Any] = SingleFlight()
+        self._stats = {
+            "l1_hits": 0,
+            "l2_hits": 0,
+            "misses": 0,
+            "coalesced": 0,
+            "remote_waits": 0,
+            "l2_errors": 0,
+        }
+
+    # --- keys ---
+
+    @staticmethod
+    def make_key(kind: str, query: str, providers: Iterable[str], params: Optional[Dict[str, Any]] = None) -> str:
+        material = json.dumps(
+            [kind, normalize_query(query), sorted(set(providers)), params or {}],
+            sort_keys=True, default=str, separators=(",", ":"),
+        )
+        return hashlib.blake2b(material.encode(), digest_size=16).hexdigest()
+
+    # --- L1 ---
+
+    def _l1_get(self, key: str) -> Optional[Any]:
+        entry = self._l1.get(key)
+        if entry is None:
+            return None
+        expires, value = entry
+        if expires < time.time():
+            del self._l1[key]
+            return None
+        self._l1.move_to_end(key)
+        return value
+
+    def _l1_set(self, key: str, value: Any, ttl: float):
+        self._l1[key] = (time.time() + ttl, value)
+        self._l1.move_to_end(key)
+        while len(self._l1) > self._l1_max:
+            self._l1.popitem(last=False)
+
+    # --- L2 ---
+
+    def _backend(self) -> Any:
+        if time.monotonic() < self._l2_down_until:
+            return None
+        if self._l2 is None:
+            settings = get_settings()
+            mode = (self._l2_mode or getattr(settings, "search_cache_l2", "redis") or "off").lower()
+            self._l2_mode = mode
+            if mode == "redis":
+                self._l2 = _RedisL2(settings.redis_url)
+            elif mode == "disk":
+                directory = getattr(settings, "search_cache_dir", None) or os.path.join(tempfile.gettempdir(), "ailinux-search-cache")
+                self._l2 = _DiskL2(Path(directory))
+            else:
+                return None
+        return self._l2
+
+    def _l2_failed(self, error: Exception):
+        self._stats["l2_errors"] += 1
+        self._l2_down_until = time.monotonic() + L2_RETRY_INTERVAL
+        logger.warning(f"Search cache L2 unavailable for {L2_RETRY_INTERVAL:g}s: {error}")
+
+    async def _l2_call(self, method: str, *args) -> Any:
+        backend = self._backend()
+        if backend is None:
+            return None
+        try:
+            return await getattr(backend, method)(*args)
+        except Exception as e:
+            self._l2_failed(e)
+            return None
+
+    async def _l2_get(self, key: str) -> Optional[Any]:
+        raw = await self._l2_call("get", key)
+        if raw is None:
+            return None
+        try:
+            return json.loads(raw)
+        except ValueError:
+            return None
+
+    # --- API ---
+
+    async def get_or_fetch(
+        self,
+        kind: str,
+        query: str,
+        providers: Iterable[str],
+        fetch: Callable[[], Awaitable[Any]],
+        params: Optional[Dict[str, Any]] = None,
+        ttl_for: Optional[Callable[[Any, int], float]] = None,
+    ) -> Any:
+        """
+        Return the cached result or run ``fetch`` once for all concurrent
+        callers. ``ttl_for(result, ttl)`` may shorten the TTL of a result
+        (0 = do not cache), e.g. for partial results after provider errors.
+        """
+        providers = list(providers)
+        key = self.make_key(kind, query, providers, params)
+
+        value = self._l1_get(key)
+        if value is not None:
+            self._stats["l1_hits"] += 1
+            return value
+
+        if key in self._inflight:
+            self._stats["coalesced"] += 1
+        return await self._inflight.run(key, lambda: self._load(key, providers, fetch, ttl_for))
+
+    async def _load(
+        self,
+        key: str,
+        providers: list,
+        fetch: Callable[[], Awaitable[Any]],
+        ttl_for: Optional[Callable[[Any, int], float]],
+    ) -> Any:
+        ttl = provider_ttl(providers)
+
+        value = await self._l2_get(key)
+        if value is not None:
+            self._stats["l2_hits"] += 1
+            self._l1_set(key, value, ttl)
+            return value
+
+        token = secrets.token_hex(8)
+        locked = await self._l2_call("lock", key, token)
+        if locked is False:
+            # Another worker is fetching: wait for its result
+            self._stats["remote_waits"] += 1
+            value = await self._wait_for_fill(key)
+            if value is not None:
+                self._l1_set(key, value, ttl)
+                return value
+            locked = await self._l2_call("lock", key, token)
+
+        self._stats["misses"] += 1
+        try:
+            value = await fetch()
+            entry_ttl = ttl_for(value, ttl) if ttl_for else ttl
+            if entry_ttl > 0:
+                self._l1_set(key, value, entry_ttl)
+                payload = json.dumps(value, ensure_ascii=False, default=str).encode("utf-8")
+                await self._l2_call("set", key, payload, entry_ttl)
+            return value
+        finally:
+            if locked:
+                await self._l2_call("unlock", key, token)
+
+    async def _wait_for_fill(self, key: str) -> Optional[Any]:
+        deadline = time.monotonic() + FILL_LOCK_TTL
+        attempt = 0
+        while time.monotonic() < deadline:
+            await asyncio.sleep(FILL_POLL_INTERVALS[min(attempt, len(FILL_POLL_INTERVALS) - 1)])
+            attempt += 1
+            value = await self._l2_get(key)
+            if value is not None:
+                return value
+            if not await self._l2_call("locked", key):
+                return await self._l2_get(key)  # holder gave up or failed
+        return None
+
+    def invalidate_local(self):
+        self._l1.clear()
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "l1_entries": len(self._l1),
+            "l2": self._l2_mode,
+            "l2_available": time.monotonic() >= self._l2_down_until,
+            "inflight": len(self._inflight),
+            **self._stats,
+        }
+
+    async def aclose(self):
+        if self._l2 is not None:
+            await self._l2.aclose()
+            self._l2 = None
+
+
+search_cache = SearchCache()
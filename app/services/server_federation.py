@@ -2,7 +2,6 @@ import json
 import asyncio
 import logging
 import time
-import httpx
 import os
 import hmac
 import hashlib
@@ -11,6 +10,7 @@ from dataclasses import dataclass, field
 from datetime import datetime, timedelta
 from typing import Dict, List, Optional, Any
 from enum import Enum
+from ..utils.http_client import http_clients
 
 """
 AILinux Server Federation v1.0
@@ -187,7 +187,7 @@ class ServerFederation:
     async def _check_node(self, node: FederationNode):
         """Health-Check für einen Node"""
         try:
-            async with httpx.AsyncClient(timeout=10.0) as client:
+            async with http_clients.client("federation", timeout=10.0) as client:
                 headers = {}
                 if node.secret_key:
                     headers["X-Federation-Key"] = node.secret_key
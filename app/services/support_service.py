@@ -3,11 +3,11 @@ AILinux Support Service v1.0
 ============================
 Claude Opus 4.5 als Support-Admin mit MCP-Zugang
 """
-import httpx
 import logging
 from typing import Dict, List, Optional, Any
 from datetime import datetime
 from pathlib import Path
+from ..utils.http_client import http_clients
 
 logger = logging.getLogger("ailinux.support")
 
@@ -73,7 +73,7 @@ class SupportService:
         messages = self._conversation_history[user_id][-10:]
         
         try:
-            async with httpx.AsyncClient(timeout=120) as client:
+            async with http_clients.client("anthropic", timeout=120) as client:
                 response = await client.post(
                     ANTHROPIC_API_URL,
                     headers={
@@ -143,7 +143,7 @@ class SupportService:
             return {"error": f"Tool '{tool_name}' not allowed for support", "allowed": ALLOWED_TOOLS}
         
         try:
-            async with httpx.AsyncClient(timeout=30) as client:
+            async with http_clients.client("local", timeout=30) as client:
                 response = await client.post(
                     "http://localhost:9000/mcp",
                     json={
@@ -23,7 +23,7 @@ import asyncio
 import importlib
 import time
 from pathlib import Path
-from typing import Dict, Any, Optional, List, Set
+from typing import Callable, Dict, Any, Optional, List, Set
 from dataclasses import dataclass, field
 
 logger = logging.getLogger("ailinux.system_control")
@@ -89,6 +89,23 @@ class HotReloader:
         self._reload_history: List[ReloadResult] = []
         self._last_reload_time: Dict[str, float] = {}
         self._module_versions: Dict[str, str] = {}
+        self._reload_listeners: Dict[str, Callable[[ReloadResult], None]] = {}
+
+    def add_reload_listener(self, name: str, callback: Callable[[ReloadResult], None]) -> None:
+        """
+        Register a callback invoked after every successful module reload.
+
+        Listeners are keyed by name so a reloaded module re-registering
+        itself replaces its previous callback instead of stacking up.
+        """
+        self._reload_listeners[name] = callback
+
+    def _notify_listeners(self, result: ReloadResult) -> None:
+        for name, callback in list(self._reload_listeners.items()):
+            try:
+                callback(result)
+            except Exception as e:
+                logger.error(f"Reload listener {name} failed after {result.module_name}: {e}")
 
     def _get_module_version(self, module) -> str:
         """Get version string from module (file mtime or __version__)"""
@@ -175,6 +192,8 @@ class HotReloader:
 
             logger.info(f"Hot-reloaded {module_name} ({old_version} -> {new_version}) in {reload_time_ms:.1f}ms")
 
+            self._notify_listeners(result)
+
             return result
 
         except Exception as e:
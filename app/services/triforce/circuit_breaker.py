@@ -4,15 +4,17 @@ Circuit Breaker, Cycle Detector & Rate Limiter v2.60
 Provides resilience patterns for the TriForce LLM Mesh:
 - Circuit Breaker: Prevents cascading failures with automatic fallback
 - Cycle Detector: Prevents infinite LLM call loops
-- Rate Limiter: Prevents API overload
+- Rate Limiter: Prevents API overload (shared across workers)
 """
 
 from dataclasses import dataclass, field
-from datetime import datetime, timedelta, timezone
+from datetime import datetime, timezone
 from enum import Enum
 from typing import Dict, List, Optional
 import logging
 
+from ...utils.rate_limit import LimitResult, SlidingWindow, shared_limiter
+
 logger = logging.getLogger("ailinux.triforce.circuit_breaker")
 
 
@@ -235,7 +237,12 @@ class CycleDetector:
 
 @dataclass
 class RateLimiter:
-    """Rate limiting for LLM calls"""
+    """
+    Rate limiting for LLM calls.
+
+    Requests per minute are counted with a sliding-window counter in the
+    shared limiter, so the limits hold across all workers.
+    """
     default_rpm: int = 60  # Requests per minute
 
     # Per-LLM rate limits (can be customized)
@@ -252,77 +259,37 @@ class RateLimiter:
         "minimax": 40,
     })
 
-    _requests: Dict[str, List[datetime]] = field(default_factory=dict)
+    def _policy(self, key: str) -> SlidingWindow:
+        return SlidingWindow(self.llm_limits.get(key, self.default_rpm), 60)
 
-    def is_allowed(self, llm_id: str) -> bool:
-        """Check if a request is allowed under rate limit"""
-        now = datetime.utcnow()
-        window_start = now - timedelta(minutes=1)
+    async def acquire(self, llm_id: str) -> LimitResult:
+        """Count a request if it is allowed under the rate limit"""
         key = llm_id.lower()
+        result = await shared_limiter.acquire(f"llm:{key}", self._policy(key))
+        if not result.allowed:
+            logger.debug(f"Rate limit reached for {llm_id}: {result.current:.0f}/{result.limit}")
+        return result
 
-        # Initialize if needed
-        if key not in self._requests:
-            self._requests[key] = []
-
-        # Clean old requests outside window
-        self._requests[key] = [
-            t for t in self._requests[key]
-            if t > window_start
-        ]
-
-        # Get limit for this LLM
-        limit = self.llm_limits.get(key, self.default_rpm)
-
-        # Check if under limit
-        if len(self._requests[key]) >= limit:
-            logger.debug(f"Rate limit reached for {llm_id}: {len(self._requests[key])}/{limit}")
-            return False
-
-        # Record this request
-        self._requests[key].append(now)
-        return True
-
-    def get_wait_time(self, llm_id: str) -> float:
-        """Get seconds to wait before next allowed request"""
-        key = llm_id.lower()
-
-        if key not in self._requests or not self._requests[key]:
-            return 0.0
-
-        # Get oldest request in window
-        oldest = min(self._requests[key])
-        wait = 60 - (datetime.utcnow() - oldest).total_seconds()
-        return max(0.0, wait)
-
-    def get_current_usage(self, llm_id: str) -> Dict:
+    async def get_current_usage(self, llm_id: str) -> Dict:
         """Get current rate limit usage for an LLM"""
         key = llm_id.lower()
-        limit = self.llm_limits.get(key, self.default_rpm)
-
-        now = datetime.utcnow()
-        window_start = now - timedelta(minutes=1)
-
-        if key in self._requests:
-            current = len([t for t in self._requests[key] if t > window_start])
-        else:
-            current = 0
-
+        usage = await shared_limiter.peek(f"llm:{key}", self._policy(key))
         return {
             "llm_id": llm_id,
-            "current": current,
-            "limit": limit,
-            "remaining": max(0, limit - current),
-            "reset_in": self.get_wait_time(llm_id),
+            "current": round(usage.current),
+            "limit": usage.limit,
+            "remaining": usage.remaining,
+            "reset_in": round(usage.retry_after, 1),
         }
 
     def set_limit(self, llm_id: str, rpm: int):
         """Set custom rate limit for an LLM"""
         self.llm_limits[llm_id.lower()] = rpm
 
-    def get_all_usage(self) -> List[Dict]:
+    async def get_all_usage(self) -> List[Dict]:
         """Get usage for all tracked LLMs"""
         return [
-            self.get_current_usage(llm_id)
+            await self.get_current_usage(llm_id)
             for llm_id in self.llm_limits.keys()
         ]
 
@@ -158,12 +158,13 @@ async def llm_call(
         }
 
     # 3. Rate Limiting
-    if not rate_limiter.is_allowed(target):
-        wait_time = rate_limiter.get_wait_time(target)
+    rate = await rate_limiter.acquire(target)
+    if not rate.allowed:
+        wait_time = rate.retry_after
         await audit_logger.log_rate_limited(
             llm_id=target,
-            current_rate=60,  # Approximate
-            limit=rate_limiter.llm_limits.get(target.lower(), 60),
+            current_rate=round(rate.current),
+            limit=rate.limit,
             trace_id=trace_id,
             session_id=session_id
         )
@@ -556,12 +557,12 @@ def get_available_llms() -> List[str]:
     ]
 
 
-def get_llm_status() -> Dict[str, Any]:
+async def get_llm_status() -> Dict[str, Any]:
     """Get status of all LLMs in the mesh"""
     status = {}
     for llm_id in MODEL_ALIASES.keys():
         breaker = circuit_registry.get_breaker(llm_id)
-        usage = rate_limiter.get_current_usage(llm_id)
+        usage = await rate_limiter.get_current_usage(llm_id)
         status[llm_id] = {
             "model_id": MODEL_ALIASES[llm_id],
             "circuit_state": breaker.state.value,
@@ -5,17 +5,23 @@ Parses @mcp.call() patterns from LLM output and executes them.
 
 Pattern: @mcp.call(tool_name, {"param1": "value1", "param2": "value2"})
 Result: [MCP_RESULT:tool_name] {"result": ...} or [MCP_ERROR:tool_name] {"error": ...}
+
+A param may use the output of an earlier call in the same response:
+"$result[0]" (by position) or "$result[web_search]" (latest earlier call of
+that tool). Such calls run after the referenced call; others run concurrently.
 """
 
 import re
 import json
+import asyncio
 import time
-from typing import List, Dict, Any, Optional, Tuple, Callable, Awaitable
+from typing import List, Dict, Any, Optional, Set, Tuple, Callable, Awaitable
 from dataclasses import dataclass
 import logging
 
 from .rbac import rbac_service
 from .audit_logger import audit_logger
+from .tool_registry import get_tool_concurrency, is_mutating_tool
 
 logger = logging.getLogger("ailinux.triforce.mcp_translator")
 
@@ -65,22 +71,22 @@ class MCPParser:
                 tool_name = match.group(1)
                 params_str = match.group(2)
 
-                try:
-                    # Try standard JSON parse
-                    params = json.loads(params_str)
-                except json.JSONDecodeError:
-                    # Try relaxed parsing
-                    params = self._parse_relaxed(params_str)
-
                 calls.append(MCPCall(
                     tool_name=tool_name,
-                    params=params,
+                    params=self.parse_params(params_str),
                     raw_text=match.group(0),
                     line_number=line_num
                 ))
 
         return calls
 
+    def parse_params(self, params_str: str) -> Dict[str, Any]:
+        """Parse the {params} part of a call, strict JSON first"""
+        try:
+            return json.loads(params_str)
+        except json.JSONDecodeError:
+            return self._parse_relaxed(params_str)
+
     def _parse_relaxed(self, s: str) -> Dict[str, Any]:
         """Parse JSON-like string with relaxed rules"""
         result = {}
@@ -124,6 +130,123 @@ class MCPParser:
         return bool(self.MCP_PATTERN.search(text))
 
 
+class MCPStreamScanner:
+    """
+    Resumable tokenizer for @mcp.call() in streamed text.
+
+    Accepts exactly what MCPParser.MCP_PATTERN accepts per line, but runs it
+    as a state machine over the new characters only. Each completed call is
+    returned once, from the feed() that closes it.
+    """
+
+    _LITERAL = "@mcp.call"
+
+    # States after the literal
+    _WS_OPEN, _WS_NAME, _NAME, _WS_COMMA, _WS_BRACE, _BODY, _WS_CLOSE = range(7)
+
+    def __init__(self):
+        self._parser = MCPParser()
+        self._buf = ""          # text from the current candidate '@' on
+        self._pos = 0           # chars of _buf consumed by the state machine
+        self._state = 0         # index into _LITERAL, then one of the states above
+        self._in_literal = True
+        self._line = 1          # line number of _buf[0]
+        self._name_span: Tuple[int, int] = (0, 0)
+        self._body_start = 0
+
+    def _reset(self):
+        self._pos = 0
+        self._state = 0
+        self._in_literal = True
+
+    def _skip_to_candidate(self, start: int):
+        """Drop _buf[:start] and everything up to the next '@'"""
+        self._line += self._buf.count("\n", 0, start)
+        self._buf = self._buf[start:]
+        at = self._buf.find("@")
+        if at < 0:
+            self._line += self._buf.count("\n")
+            self._buf = ""
+        else:
+            self._line += self._buf.count("\n", 0, at)
+            self._buf = self._buf[at:]
+        self._reset()
+
+    def _step(self, c: str, i: int) -> Optional[bool]:
+        """Advance by one char. True = call complete, False = no match, None = continue"""
+        if c == "\n":
+            return False
+        if self._in_literal:
+            if c != self._LITERAL[self._state]:
+                return False
+            self._state += 1
+            if self._state == len(self._LITERAL):
+                self._in_literal = False
+                self._state = self._WS_OPEN
+            return None
+
+        state = self._state
+        if state == self._BODY:
+            if c == "}":
+                self._state = self._WS_CLOSE
+            return None
+        if c.isspace() and state != self._NAME:
+            return None
+        is_word = c.isalnum() or c == "_"
+        if state == self._WS_OPEN and c == "(":
+            self._state = self._WS_NAME
+        elif state == self._WS_NAME and is_word:
+            self._state = self._NAME
+            self._name_span = (i, i + 1)
+        elif state == self._NAME and is_word:
+            self._name_span = (self._name_span[0], i + 1)
+        elif state == self._NAME and c.isspace():
+            self._state = self._WS_COMMA
+        elif state in (self._NAME, self._WS_COMMA) and c == ",":
+            self._state = self._WS_BRACE
+        elif state == self._WS_BRACE and c == "{":
+            self._state = self._BODY
+            self._body_start = i
+        elif state == self._WS_CLOSE and c == ")":
+            return True
+        else:
+            return False
+        return None
+
+    def feed(self, chunk: str) -> List[MCPCall]:
+        """Consume a chunk and return the calls it completed"""
+        calls: List[MCPCall] = []
+        if not self._buf:
+            at = chunk.find("@")
+            if at < 0:
+                self._line += chunk.count("\n")
+                return calls
+            self._line += chunk.count("\n", 0, at)
+            chunk = chunk[at:]
+        self._buf += chunk
+
+        while self._pos < len(self._buf):
+            i = self._pos
+            outcome = self._step(self._buf[i], i)
+            self._pos += 1
+            if outcome is None:
+                continue
+            if outcome:
+                end = i + 1
+                name_start, name_end = self._name_span
+                calls.append(MCPCall(
+                    tool_name=self._buf[name_start:name_end],
+                    params=self._parser.parse_params(self._buf[self._body_start:self._buf.index("}", self._body_start) + 1]),
+                    raw_text=self._buf[:end],
+                    line_number=self._line
+                ))
+                self._skip_to_candidate(end)
+            else:
+                # Same as the regex: retry from the next start position
+                self._skip_to_candidate(1)
+        return calls
+
+
 class MCPExecutor:
     """Executes MCP tool calls with security checks"""
 
@@ -215,13 +338,125 @@ class MCPExecutor:
                 execution_time_ms=execution_time_ms
             )
 
-    async def execute_all(self, calls: List[MCPCall]) -> List[MCPResult]:
-        """Execute all MCP calls sequentially"""
-        results = []
-        for call in calls:
-            result = await self.execute(call)
-            results.append(result)
-        return results
+    RESULT_REF = re.compile(r'\$result\[(\w+)\]')
+
+    def _references(self, calls: List[MCPCall], index: int) -> Set[int]:
+        """Indexes of earlier calls whose output call[index] references"""
+        refs: Set[int] = set()
+
+        def walk(value: Any):
+            if isinstance(value, str):
+                for ref in self.RESULT_REF.findall(value):
+                    j = self._resolve_ref(ref, calls, index)
+                    if j is not None:
+                        refs.add(j)
+            elif isinstance(value, dict):
+                for v in value.values():
+                    walk(v)
+            elif isinstance(value, list):
+                for v in value:
+                    walk(v)
+
+        walk(calls[index].params)
+        return refs
+
+    def plan(self, calls: List[MCPCall]) -> List[Tuple[Set[int], Set[int]]]:
+        """
+        Per call: (referenced call indexes, ordering-only dependencies).
+
+        Mutating tools wait for every earlier call, and every later call
+        waits for the last mutating one before it.
+        """
+        plan = []
+        last_mutating: Optional[int] = None
+        for i, call in enumerate(calls):
+            refs = self._references(calls, i)
+            if is_mutating_tool(call.tool_name):
+                order = set(range(i))
+                last_mutating = i
+            else:
+                order = {last_mutating} if last_mutating is not None and last_mutating != i else set()
+            plan.append((refs, order - refs))
+        return plan
+
+    def _substitute(self, value: Any, calls: List[MCPCall], index: int, results: Dict[int, MCPResult]) -> Any:
+        """Replace resolvable $result[...] references; unresolved ones stay literal text."""
+        if isinstance(value, str):
+            whole = self.RESULT_REF.fullmatch(value)
+            if whole:
+                j = self._resolve_ref(whole.group(1), calls, index)
+                return results[j].result if j in results else value
+
+            def embed(match):
+                j = self._resolve_ref(match.group(1), calls, index)
+                if j not in results:
+                    return match.group(0)
+                result = results[j].result
+                return result if isinstance(result, str) else json.dumps(result, ensure_ascii=False)
+
+            return self.RESULT_REF.sub(embed, value)
+        if isinstance(value, dict):
+            return {k: self._substitute(v, calls, index, results) for k, v in value.items()}
+        if isinstance(value, list):
+            return [self._substitute(v, calls, index, results) for v in value]
+        return value
+
+    @staticmethod
+    def _resolve_ref(ref: str, calls: List[MCPCall], index: int) -> Optional[int]:
+        """Index of the earlier call a reference points to, None if there is none"""
+        if ref.isdigit():
+            return int(ref) if int(ref) < index else None
+        return next((j for j in range(index - 1, -1, -1) if calls[j].tool_name == ref), None)
+
+    async def execute_all(self, calls: List[MCPCall], max_concurrency: int = 8) -> List[MCPResult]:
+        """
+        Execute MCP calls, independent ones concurrently.
+
+        At most max_concurrency calls run at once, and per tool no more than
+        its tool_registry limit. Results are returned in call order.
+        """
+        if len(calls) <= 1:
+            return [await self.execute(call) for call in calls]
+
+        plan = self.plan(calls)
+        limit = asyncio.Semaphore(max_concurrency)
+        tool_limits = {
+            name: asyncio.Semaphore(get_tool_concurrency(name))
+            for name in {call.tool_name for call in calls}
+        }
+        tasks: List[asyncio.Task] = []
+
+        async def run(index: int) -> MCPResult:
+            call = calls[index]
+            refs, order = plan[index]
+            waits = [tasks[j] for j in refs | order]
+            if waits:
+                await asyncio.wait(waits)
+
+            if refs:
+                failed = [calls[j].tool_name for j in sorted(refs) if not tasks[j].result().success]
+                if failed:
+                    return MCPResult(
+                        tool_name=call.tool_name,
+                        success=False,
+                        result=None,
+                        error=f"Dependency failed: {', '.join(failed)}",
+                        execution_time_ms=0
+                    )
+                results = {j: tasks[j].result() for j in refs}
+                call = MCPCall(
+                    tool_name=call.tool_name,
+                    params=self._substitute(call.params, calls, index, results),
+                    raw_text=call.raw_text,
+                    line_number=call.line_number
+                )
+
+            async with limit, tool_limits[call.tool_name]:
+                return await self.execute(call)
+
+        for index in range(len(calls)):
+            tasks.append(asyncio.create_task(run(index)))
+        return list(await asyncio.gather(*tasks))
 
 
 class MCPInjector:
@@ -336,45 +571,62 @@ class AsyncMCPProcessor:
     ):
         self.tools = tools
         self.llm_id = llm_id
+        self._scanner = MCPStreamScanner()
+        self._executor = MCPExecutor(tools, llm_id)
         self._pending_calls: List[MCPCall] = []
-        self._results: List[MCPResult] = []
-        self._buffer = ""
+        self._pending_tasks: List["asyncio.Task[MCPResult]"] = []
+        self._chunks: List[str] = []
+
+    def _dispatch(self, call: MCPCall, loop: asyncio.AbstractEventLoop) -> "asyncio.Task[MCPResult]":
+        """Start a call right away, after the previously dispatched one"""
+        previous = self._pending_tasks[-1] if self._pending_tasks else None
+
+        async def run() -> MCPResult:
+            if previous is not None:
+                await asyncio.wait([previous])
+            return await self._executor.execute(call)
+
+        return loop.create_task(run())
 
     def feed(self, chunk: str) -> Optional[str]:
         """
         Feed a text chunk and return processed output.
 
-        Buffers incomplete MCP calls and processes complete ones.
+        Only the new chunk is scanned. Calls completed by it start executing
+        immediately (in call order) while the rest of the response streams.
         """
-        self._buffer += chunk
-
-        # Check for complete MCP calls
-        parser = MCPParser()
-        calls = parser.parse(self._buffer)
-
-        if not calls:
-            # No complete calls yet, return chunk as-is
-            return chunk
-
-        # We have calls - they'll be processed asynchronously
-        self._pending_calls.extend(calls)
+        self._chunks.append(chunk)
+
+        calls = self._scanner.feed(chunk)
+        if calls:
+            try:
+                loop = asyncio.get_running_loop()
+            except RuntimeError:
+                loop = None  # executed in flush()
+            for call in calls:
+                self._pending_calls.append(call)
+                if loop is not None and len(self._pending_tasks) == len(self._pending_calls) - 1:
+                    self._pending_tasks.append(self._dispatch(call, loop))
 
         # Return the chunk for now (will be replaced later)
         return chunk
 
     async def flush(self) -> Tuple[str, List[MCPResult]]:
-        """Process all pending calls and return final text"""
+        """Wait for pending calls and return final text with injected results"""
+        text = "".join(self._chunks)
         if not self._pending_calls:
-            return self._buffer, []
+            return text, []
 
-        executor = MCPExecutor(self.tools, self.llm_id)
-        results = await executor.execute_all(self._pending_calls)
+        results = [await task for task in self._pending_tasks]
+        for call in self._pending_calls[len(results):]:
+            results.append(await self._executor.execute(call))
 
         injector = MCPInjector()
-        final_text = injector.inject(self._buffer, self._pending_calls, results)
+        final_text = injector.inject(text, self._pending_calls, results)
 
-        self._pending_calls.clear()
-        self._buffer = ""
+        self._pending_calls = []
+        self._pending_tasks = []
+        self._chunks = []
 
         return final_text, results
 
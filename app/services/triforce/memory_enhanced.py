@@ -7,8 +7,13 @@ Provides intelligent memory management for TriForce:
 - Versioning with history tracking
 - Project and tag-based filtering
 - LLM validation tracking
+
+Persistence: append-only write-ahead log (wal/NNNNNNNN.jsonl) plus a
+periodically compacted snapshot (memory.snapshot, msgpack when available).
 """
 
+import asyncio
+import os
 import uuid
 from datetime import datetime, timedelta
 from dataclasses import dataclass, field, asdict
@@ -18,8 +23,19 @@ import logging
 import json
 from pathlib import Path
 
+try:
+    import msgpack
+    _HAS_MSGPACK = True
+except ImportError:
+    msgpack = None
+    _HAS_MSGPACK = False
+
 logger = logging.getLogger("ailinux.triforce.memory")
 
+SNAPSHOT_FILE = "memory.snapshot"
+SNAPSHOT_MAGIC_MSGPACK = b"TFMEM1M\n"
+SNAPSHOT_MAGIC_JSON = b"TFMEM1J\n"
+
 
 class MemoryType(str, Enum):
     """Types of memory entries"""
@@ -132,11 +148,24 @@ class EnhancedMemoryService:
     def __init__(
         self,
         storage_dir: str = "/home/zombie/triforce/triforce/memory",
-        max_entries: int = 10000
+        max_entries: int = 10000,
+        compact_wal_bytes: int = 8 * 1024 * 1024
     ):
         self.storage_dir = Path(storage_dir)
         self.storage_dir.mkdir(parents=True, exist_ok=True)
+        self.wal_dir = self.storage_dir / "wal"
+        self.wal_dir.mkdir(exist_ok=True)
         self.max_entries = max_entries
+        self.compact_wal_bytes = compact_wal_bytes
+
+        # WAL state: records go to segment _wal_seq, segments below
+        # _snapshot_seq are covered by the snapshot
+        self._wal_seq = 1
+        self._snapshot_seq = 1
+        self._wal_bytes = 0
+        self._wal_records = 0
+        self._compact_task: Optional[asyncio.Task] = None
+        self._compactions = 0
 
         self._entries: Dict[str, MemoryEntry] = {}
         self._versions: Dict[str, List[str]] = {}  # original_id -> [version_ids]
@@ -304,6 +333,7 @@ class EnhancedMemoryService:
 
         entry = self._entries.pop(memory_id)
         self._remove_from_indexes(entry)
+        self._append_wal({"op": "del", "id": memory_id})
 
         logger.info(f"Deleted memory {memory_id}")
         return True
@@ -383,11 +413,21 @@ class EnhancedMemoryService:
             "avg_confidence": total_confidence / max(len(self._entries), 1),
             "expired": expired,
             "versions_tracked": len(self._versions),
+            "persistence": {
+                "snapshot_format": "msgpack" if _HAS_MSGPACK else "json",
+                "wal_segment": self._wal_seq,
+                "wal_records": self._wal_records,
+                "wal_bytes": self._wal_bytes,
+                "compactions": self._compactions,
+            },
         }
 
     # Internal methods
     def _add_entry(self, entry: MemoryEntry):
         """Add entry to memory and indexes"""
+        previous = self._entries.get(entry.id)
+        if previous is not None:
+            self._remove_from_indexes(previous)
         self._entries[entry.id] = entry
 
         # Index by project
@@ -427,37 +467,194 @@ class EnhancedMemoryService:
 
     async def _persist_entry(self, entry: MemoryEntry):
         """Persist entry to disk"""
+        self._append_wal({"op": "put", "entry": entry.to_dict()})
+
+    # Persistence: WAL + snapshot
+    def _wal_path(self, seq: int) -> Path:
+        return self.wal_dir / f"{seq:08d}.jsonl"
+
+    def _wal_segments(self) -> List[int]:
+        seqs = []
+        for path in self.wal_dir.glob("*.jsonl"):
+            try:
+                seqs.append(int(path.stem))
+            except ValueError:
+                continue
+        return sorted(seqs)
+
+    def _append_wal(self, record: Dict[str, Any]):
+        """Append one record to the active WAL segment"""
+        try:
+            line = json.dumps(record, ensure_ascii=False) + "\n"
+            with open(self._wal_path(self._wal_seq), "a", encoding="utf-8") as f:
+                f.write(line)
+            self._wal_bytes += len(line)
+            self._wal_records += 1
+        except Exception as e:
+            logger.error(f"Failed to persist memory record {record.get('id') or record['entry']['id']}: {e}")
+            return
+
+        if self._wal_bytes >= self.compact_wal_bytes or (
+            self._wal_records > 1000 and self._wal_records > 2 * len(self._entries)
+        ):
+            self._schedule_compaction()
+
+    def _schedule_compaction(self):
+        if self._compact_task is not None and not self._compact_task.done():
+            return
         try:
-            # Use project-based files
-            project = entry.project_id or "global"
-            filepath = self.storage_dir / f"memory_{project}.jsonl"
+            self._compact_task = asyncio.get_running_loop().create_task(self._background_compact())
+        except RuntimeError:
+            pass  # no loop yet, next write retries
 
-            with open(filepath, "a", encoding="utf-8") as f:
-                f.write(json.dumps(entry.to_dict(), ensure_ascii=False) + "\n")
+    async def _background_compact(self):
+        try:
+            await self.compact()
         except Exception as e:
-            logger.error(f"Failed to persist memory {entry.id}: {e}")
+            logger.error(f"Memory compaction failed: {e}")
+
+    async def compact(self) -> Dict[str, Any]:
+        """
+        Write a snapshot of the live state and drop the WAL it covers.
+
+        Crash safety: new records go to a fresh segment before the snapshot
+        is taken. The snapshot is written to a temp file, fsynced and swapped
+        in with os.replace, only then are covered segments and legacy
+        memory_*.jsonl files removed. A crash at any step leaves either the
+        old snapshot with all its segments or the new one.
+        """
+        covered_seq = self._wal_seq
+        self._wal_seq += 1
+        self._wal_bytes = 0
+        self._wal_records = 0
+
+        # Capture state synchronously; expired entries and superseded
+        # records (rewrites, deletes) are dropped here
+        rows = [e.to_dict() for e in self._entries.values() if not e.is_expired()]
+
+        path = await asyncio.to_thread(self._write_snapshot, rows, covered_seq + 1)
+        self._snapshot_seq = covered_seq + 1
+
+        for seq in self._wal_segments():
+            if seq <= covered_seq:
+                self._wal_path(seq).unlink(missing_ok=True)
+        for legacy in self.storage_dir.glob("memory_*.jsonl"):
+            legacy.unlink(missing_ok=True)
+
+        self._compactions += 1
+        logger.info(f"Compacted memory store: {len(rows)} entries -> {path.name}")
+        return {"entries": len(rows), "snapshot": str(path), "wal_segment": self._wal_seq}
+
+    def _write_snapshot(self, rows: List[Dict[str, Any]], wal_seq: int) -> Path:
+        """Write a columnar snapshot via temp file + fsync + rename"""
+        fields = list(MemoryEntry.__dataclass_fields__)
+        payload = {
+            "format": 1,
+            "wal_seq": wal_seq,
+            "created_at": datetime.utcnow().isoformat() + "Z",
+            "fields": fields,
+            "columns": {name: [row.get(name) for row in rows] for name in fields},
+        }
+        if _HAS_MSGPACK:
+            data = SNAPSHOT_MAGIC_MSGPACK + msgpack.packb(payload, use_bin_type=True)
+        else:
+            data = SNAPSHOT_MAGIC_JSON + json.dumps(payload, ensure_ascii=False).encode("utf-8")
+
+        path = self.storage_dir / SNAPSHOT_FILE
+        tmp_path = path.with_suffix(".tmp")
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+
+        dir_fd = os.open(self.storage_dir, os.O_RDONLY)
+        try:
+            os.fsync(dir_fd)
+        finally:
+            os.close(dir_fd)
+        return path
+
+    def _read_snapshot(self) -> Optional[Dict[str, Any]]:
+        path = self.storage_dir / SNAPSHOT_FILE
+        if not path.exists():
+            return None
+        data = path.read_bytes()
+        magic, body = data[:len(SNAPSHOT_MAGIC_JSON)], data[len(SNAPSHOT_MAGIC_JSON):]
+        if magic == SNAPSHOT_MAGIC_MSGPACK:
+            if not _HAS_MSGPACK:
+                raise RuntimeError("snapshot is msgpack encoded but msgpack is not installed")
+            return msgpack.unpackb(body, raw=False)
+        if magic == SNAPSHOT_MAGIC_JSON:
+            return json.loads(body.decode("utf-8"))
+        raise ValueError(f"unknown snapshot header {magic!r}")
+
+    def _load_entry(self, data: Dict[str, Any]):
+        entry = MemoryEntry.from_dict(data)
+        self._add_entry(entry)
 
     def _load_from_disk(self):
-        """Load entries from disk"""
+        """Load snapshot, then legacy JSONL files and WAL segments on top"""
         if not self.storage_dir.exists():
             return
 
-        count = 0
-        for filepath in self.storage_dir.glob("memory_*.jsonl"):
+        snapshot = None
+        try:
+            snapshot = self._read_snapshot()
+        except Exception as e:
+            logger.error(f"Failed to load memory snapshot: {e}")
+
+        if snapshot:
+            fields = snapshot["fields"]
+            columns = [snapshot["columns"][name] for name in fields]
+            for values in zip(*columns):
+                self._load_entry(dict(zip(fields, values)))
+            self._snapshot_seq = snapshot.get("wal_seq", 1)
+        else:
+            # Pre-WAL layout, folded into the first snapshot
+            for filepath in sorted(self.storage_dir.glob("memory_*.jsonl")):
+                try:
+                    with open(filepath, "r", encoding="utf-8") as f:
+                        for line in f:
+                            if line.strip():
+                                self._load_entry(json.loads(line))
+                except Exception as e:
+                    logger.error(f"Failed to load {filepath}: {e}")
+
+        segments = [seq for seq in self._wal_segments() if seq >= self._snapshot_seq]
+        for seq in segments:
+            filepath = self._wal_path(seq)
             try:
                 with open(filepath, "r", encoding="utf-8") as f:
                     for line in f:
-                        if line.strip():
-                            data = json.loads(line)
-                            entry = MemoryEntry.from_dict(data)
-                            if not entry.is_expired():
-                                self._add_entry(entry)
-                                count += 1
+                        if not line.strip():
+                            continue
+                        try:
+                            record = json.loads(line)
+                        except json.JSONDecodeError:
+                            # Torn write at the tail of a segment
+                            logger.warning(f"Skipping corrupt WAL record in {filepath.name}")
+                            continue
+                        if record.get("op") == "del":
+                            entry = self._entries.pop(record["id"], None)
+                            if entry is not None:
+                                self._remove_from_indexes(entry)
+                        else:
+                            self._load_entry(record["entry"])
+                        self._wal_records += 1
+                        self._wal_bytes += len(line)
             except Exception as e:
                 logger.error(f"Failed to load {filepath}: {e}")
 
-        if count:
-            logger.info(f"Loaded {count} memory entries from disk")
+        # Append to the newest segment instead of opening a new one per restart
+        self._wal_seq = max([self._snapshot_seq] + segments)
+
+        for entry in [e for e in self._entries.values() if e.is_expired()]:
+            self._entries.pop(entry.id)
+            self._remove_from_indexes(entry)
+
+        if self._entries:
+            logger.info(f"Loaded {len(self._entries)} memory entries from disk")
 
 
 # Singleton instance
@@ -307,7 +307,8 @@ TOOL_INDEX = {
                 "limit": {"type": "int", "optional": True, "default": 5, "description": "Max results"}
             },
             "example": '@mcp.call(web_search, {"query": "FastAPI best practices"})',
-            "required_permission": "health:check"
+            "required_permission": "health:check",
+            "max_concurrency": 5
         },
         {
             "name": "audit_log",
@@ -439,7 +440,8 @@ TOOL_INDEX = {
                 "height": {"type": "int", "optional": True, "default": 1024},
             },
             "example": '@mcp.call(hf_image, {"prompt": "A futuristic city at sunset"})',
-            "required_permission": "image:generate"
+            "required_permission": "image:generate",
+            "max_concurrency": 1
         },
         {
             "name": "hf_summarize",
@@ -511,6 +513,29 @@ TOOL_INDEX = {
 }
 
 
+# Concurrent calls per tool within one MCPExecutor.execute_all batch.
+# A tool entry may override its category with "max_concurrency".
+CATEGORY_CONCURRENCY = {
+    "memory": 8,
+    "code": 1,
+    "git": 1,
+    "file": 4,
+    "mesh": 4,
+    "system": 4,
+    "workspace": 2,
+    "huggingface": 2,
+    "gemini": 2,
+}
+DEFAULT_CONCURRENCY = 4
+
+# Permissions of tools with side effects; such calls are ordered against
+# the calls around them instead of running concurrently
+MUTATING_PERMISSIONS = {
+    "memory:write", "file:write", "git:write", "git:branch",
+    "code:exec", "deps:install", "tests:run", "audit:write",
+}
+
+
 def get_tools_by_category(category: ToolCategory) -> List[Dict[str, Any]]:
     """Get all tools in a category"""
     return [
@@ -527,6 +552,24 @@ def get_tool_by_name(name: str) -> Optional[Dict[str, Any]]:
     return None
 
 
+def get_tool_concurrency(name: str) -> int:
+    """Max concurrent calls of a tool within one batch"""
+    tool = get_tool_by_name(name)
+    if not tool:
+        return DEFAULT_CONCURRENCY
+    if "max_concurrency" in tool:
+        return tool["max_concurrency"]
+    return CATEGORY_CONCURRENCY.get(tool.get("category"), DEFAULT_CONCURRENCY)
+
+
+def is_mutating_tool(name: str) -> bool:
+    """Whether a tool has side effects (unknown tools count as mutating)"""
+    tool = get_tool_by_name(name)
+    if not tool:
+        return True
+    return tool.get("required_permission") in MUTATING_PERMISSIONS
+
+
 def get_all_tool_names() -> List[str]:
     """Get list of all tool names"""
     return [tool["name"] for tool in TOOL_INDEX["tools"]]
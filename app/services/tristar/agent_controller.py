@@ -8,6 +8,7 @@ Features:
 - System-Prompt-Injection von TriForce
 - Health Monitoring und Auto-Restart
 - MCP-Protokoll Bridging
+- Warm Worker Pool für call_agent (siehe agent_pool.py)
 """
 
 import asyncio
@@ -23,7 +24,9 @@ from datetime import datetime, timezone
 from enum import Enum
 from pathlib import Path
 from typing import Any, Dict, List, Optional
-import aiohttp
+
+from .agent_pool import AgentPoolBusy, AgentWorkerPool
+from ...utils.http_client import http_clients
 
 logger = logging.getLogger("ailinux.tristar.agent_controller")
 
@@ -250,6 +253,7 @@ class AgentController:
         self._initialized = False
         self._shutting_down = False  # Prevent auto-restart during shutdown
         self._monitor_task: Optional[asyncio.Task] = None
+        self._pools: Dict[str, AgentWorkerPool] = {}
         # Use localhost for internal API calls (no internet required)
         self._triforce_url = "http://localhost:9100/v1/triforce"
 
@@ -388,7 +392,7 @@ class AgentController:
 
         # 3. Fallback: TriForce API
         try:
-            async with aiohttp.ClientSession() as session:
+            async with http_clients.session("local") as session:
                 url = f"{self._triforce_url}/init"
                 async with session.post(url, json={"agent_type": agent_type.value}, timeout=10) as resp:
                     if resp.status == 200:
@@ -584,6 +588,9 @@ class AgentController:
                                 if not self._shutting_down:  # Double-check before restart
                                     await self.start_agent(agent_id)
 
+                for pool in self._pools.values():
+                    await pool.health_check()
+
             except asyncio.CancelledError:
                 break
             except Exception as e:
@@ -669,42 +676,45 @@ class AgentController:
                 "error": "Agent process not available",
             }
 
-        # Für interaktive CLI-Agenten: Starte neuen Prozess mit Nachricht
-        # Die MCP-Server-Prozesse sind nicht interaktiv, daher nutzen wir
-        # einen separaten Aufruf mit der Nachricht als Argument
+        # Stdin-basierte CLI-Agenten laufen über den Warm-Pool
+        pool = self._get_pool(instance)
+        if pool is not None:
+            try:
+                response, exit_code = await pool.call(message, timeout)
+            except AgentPoolBusy as e:
+                return {
+                    "agent_id": agent_id,
+                    "status": "busy",
+                    "error": str(e),
+                }
+            except asyncio.TimeoutError:
+                return {
+                    "agent_id": agent_id,
+                    "status": "timeout",
+                    "error": f"Agent did not respond within {timeout}s",
+                }
+            except Exception as e:
+                logger.error(f"Error calling agent {agent_id}: {e}")
+                return {
+                    "agent_id": agent_id,
+                    "status": "error",
+                    "error": str(e),
+                }
+            self._buffer_exchange(instance, message, response)
+            return {
+                "agent_id": agent_id,
+                "status": "success",
+                "response": response,
+                "exit_code": exit_code,
+            }
+
+        # Übrige Agenten: Starte neuen Prozess mit Nachricht als Argument
         try:
             agent_type = instance.config.agent_type
-            # Nutze die env aus der Config - die Wrapper-Scripts setzen HOME korrekt
-            env = os.environ.copy()
-            env.update(instance.config.env)
-            # Stelle sicher dass PATH die npm-global binaries enthält
-            env["PATH"] = "/root/.npm-global/bin:/usr/local/bin:/usr/bin:/bin"
-
-            # Baue Command basierend auf Agent-Typ
-            # Nutze Shell-Pipeline für stdin-basierte Kommunikation
-            # Escape message für sichere Shell-Ausführung
+            env = self._call_env(instance)
             safe_msg = shlex.quote(message)
 
-            # Hole HOME aus der Agent-Config für explizites Setzen im Bash-Befehl
-            agent_home = instance.config.env.get("HOME", "/root")
-
-            # Nutze TriForce Wrapper - diese setzen HOME/ENV korrekt
-            if agent_type == AgentType.CLAUDE:
-                cmd = [
-                    "bash", "-c",
-                    f"echo {safe_msg} | {TRIFORCE_BIN}/claude-triforce -p --output-format text 2>&1"
-                ]
-            elif agent_type == AgentType.CODEX:
-                cmd = [
-                    "bash", "-c",
-                    f"echo {safe_msg} | {TRIFORCE_BIN}/codex-triforce exec - --full-auto 2>&1"
-                ]
-            elif agent_type == AgentType.GEMINI:
-                cmd = [
-                    "bash", "-c",
-                    f"echo {safe_msg} | {TRIFORCE_BIN}/gemini-triforce --yolo 2>&1"
-                ]
-            elif agent_type == AgentType.OPENCODE:
+            if agent_type == AgentType.OPENCODE:
                 # WICHTIG: Sauberes Workspace ohne CLAUDE.md um unerwartete Task-Ausführung zu vermeiden
                 opencode_workspace = "/var/tristar/agents/opencode-workspace"
                 os.makedirs(opencode_workspace, exist_ok=True)
@@ -731,12 +741,7 @@ class AgentController:
                     timeout=timeout
                 )
                 response = stdout.decode("utf-8", errors="replace").strip()
-
-                # Speichere in Output-Buffer
-                instance.output_buffer.append(f">>> {message[:50]}...")
-                instance.output_buffer.append(response[:500])
-                if len(instance.output_buffer) > 100:
-                    instance.output_buffer = instance.output_buffer[-100:]
+                self._buffer_exchange(instance, message, response)
 
                 return {
                     "agent_id": agent_id,
@@ -761,19 +766,63 @@ class AgentController:
                 "error": str(e),
             }
 
+    def _call_env(self, instance: AgentInstance) -> Dict[str, str]:
+        """Environment für call_agent-Prozesse"""
+        # Nutze die env aus der Config - die Wrapper-Scripts setzen HOME korrekt
+        env = os.environ.copy()
+        env.update(instance.config.env)
+        # Stelle sicher dass PATH die npm-global binaries enthält
+        env["PATH"] = "/root/.npm-global/bin:/usr/local/bin:/usr/bin:/bin"
+        return env
+
+    def _get_pool(self, instance: AgentInstance) -> Optional[AgentWorkerPool]:
+        """Warm-Pool für Agenten, deren CLI den Prompt über stdin liest"""
+        agent_id = instance.config.agent_id
+        pool = self._pools.get(agent_id)
+        if pool is not None:
+            return pool
+
+        # Nutze TriForce Wrapper - diese setzen HOME/ENV korrekt
+        agent_type = instance.config.agent_type
+        if agent_type == AgentType.CLAUDE:
+            argv = [f"{TRIFORCE_BIN}/claude-triforce", "-p", "--output-format", "text"]
+        elif agent_type == AgentType.CODEX:
+            argv = [f"{TRIFORCE_BIN}/codex-triforce", "exec", "-", "--full-auto"]
+        elif agent_type == AgentType.GEMINI:
+            argv = [f"{TRIFORCE_BIN}/gemini-triforce", "--yolo"]
+        else:
+            return None  # Nachricht als Argument, nicht vorab startbar
+
+        pool = AgentWorkerPool(
+            agent_id,
+            argv,
+            cwd=instance.config.working_dir,
+            env=self._call_env(instance),
+        )
+        self._pools[agent_id] = pool
+        return pool
+
+    @staticmethod
+    def _buffer_exchange(instance: AgentInstance, message: str, response: str):
+        """Speichert Anfrage/Antwort im Output-Buffer"""
+        instance.output_buffer.append(f">>> {message[:50]}...")
+        instance.output_buffer.append(response[:500])
+        if len(instance.output_buffer) > 100:
+            instance.output_buffer = instance.output_buffer[-100:]
+
     async def broadcast(self, message: str, agent_ids: Optional[List[str]] = None) -> Dict[str, Any]:
         """Sendet Nachricht an mehrere Agenten"""
         await self._ensure_initialized()
 
         targets = agent_ids or list(self.agents.keys())
-        results = {}
-
-        for agent_id in targets:
-            try:
-                result = await self.call_agent(agent_id, message)
-                results[agent_id] = result
-            except Exception as e:
-                results[agent_id] = {"error": str(e)}
+        responses = await asyncio.gather(
+            *(self.call_agent(agent_id, message) for agent_id in targets),
+            return_exceptions=True,
+        )
+        results = {
+            agent_id: {"error": str(result)} if isinstance(result, Exception) else result
+            for agent_id, result in zip(targets, responses)
+        }
 
         return {"broadcast": True, "results": results}
 
@@ -795,6 +844,7 @@ class AgentController:
             "total_agents": len(self.agents),
             "by_status": by_status,
             "by_type": by_type,
+            "pools": {agent_id: pool.stats() for agent_id, pool in self._pools.items()},
         }
 
     async def shutdown(self):
@@ -810,6 +860,9 @@ class AgentController:
             except (asyncio.CancelledError, asyncio.TimeoutError):
                 pass
 
+        for pool in self._pools.values():
+            await pool.close()
+
         # Stop all agents with timeout
         for agent_id in list(self.agents.keys()):
             try:
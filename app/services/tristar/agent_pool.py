@@ -0,0 +1,242 @@
+"""
+Agent Worker Pool v2.80
+Vorgestartete CLI-Prozesse für AgentController.call_agent
+
+Die Agent-CLIs (claude -p, codex exec -, gemini) sind One-Shot-Prozesse:
+Prompt über stdin bis EOF, Antwort auf stdout, dann Exit. Der Pool startet
+pro Agent Prozesse im Voraus, sodass Node-Start und Modul-Laden bereits
+erledigt sind, wenn die Nachricht kommt.
+
+Protokoll pro Worker: Nachricht + "\\n" auf stdin, stdin schließen, stdout
+(inkl. stderr) bis EOF lesen. Jeder Worker bedient genau einen Request und
+wird danach im Hintergrund ersetzt.
+"""
+
+import asyncio
+import logging
+import time
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Tuple
+
+logger = logging.getLogger("ailinux.tristar.agent_pool")
+
+# Defaults pro Agent
+POOL_WARM_SIZE = 1          # bereitgehaltene Prozesse
+POOL_MAX_CONCURRENCY = 2    # gleichzeitige Requests
+POOL_MAX_QUEUE = 8          # wartende Requests, darüber -> AgentPoolBusy
+POOL_MAX_IDLE = 600         # Sekunden, danach wird ein Warm-Worker recycelt
+POOL_MAX_EARLY_DEATHS = 3   # Warm-Worker, die ohne Request sterben -> Warming aus
+
+
+class AgentPoolBusy(Exception):
+    """Warteschlange des Agenten ist voll"""
+
+
+@dataclass
+class _Worker:
+    process: asyncio.subprocess.Process
+    spawned_at: float = field(default_factory=time.monotonic)
+
+    @property
+    def alive(self) -> bool:
+        return self.process.returncode is None
+
+
+class AgentWorkerPool:
+    """Warm-Pool für einen CLI-Agenten"""
+
+    def __init__(
+        self,
+        agent_id: str,
+        argv: List[str],
+        cwd: str,
+        env: Dict[str, str],
+        warm_size: int = POOL_WARM_SIZE,
+        max_concurrency: int = POOL_MAX_CONCURRENCY,
+        max_queue: int = POOL_MAX_QUEUE,
+        max_idle: float = POOL_MAX_IDLE,
+    ):
+        self.agent_id = agent_id
+        self.argv = argv
+        self.cwd = cwd
+        self.env = env
+        self.warm_size = warm_size
+        self.max_queue = max_queue
+        self.max_idle = max_idle
+
+        self._idle: List[_Worker] = []
+        self._slots = asyncio.Semaphore(max_concurrency)
+        self._max_concurrency = max_concurrency
+        self._waiting = 0
+        self._active = 0
+        self._refill_task: Optional[asyncio.Task] = None
+        self._early_deaths = 0
+        self._warming_warned = False
+        self._closed = False
+
+        self._metrics = {
+            "calls": 0,
+            "warm_hits": 0,
+            "cold_starts": 0,
+            "rejected": 0,
+            "timeouts": 0,
+            "recycled": 0,
+        }
+
+    @property
+    def warming_enabled(self) -> bool:
+        return self.warm_size > 0 and self._early_deaths < POOL_MAX_EARLY_DEATHS
+
+    async def _spawn(self) -> _Worker:
+        process = await asyncio.create_subprocess_exec(
+            *self.argv,
+            cwd=self.cwd,
+            env=self.env,
+            stdin=asyncio.subprocess.PIPE,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.STDOUT,
+        )
+        return _Worker(process)
+
+    @staticmethod
+    def _discard(worker: _Worker):
+        if worker.alive:
+            try:
+                worker.process.kill()
+            except ProcessLookupError:
+                pass
+
+    def _take_idle(self) -> Optional[_Worker]:
+        while self._idle:
+            worker = self._idle.pop()
+            if worker.alive:
+                return worker
+            self._early_deaths += 1
+        return None
+
+    def _schedule_refill(self):
+        if self._closed or not self.warming_enabled:
+            return
+        if self._refill_task is None or self._refill_task.done():
+            self._refill_task = asyncio.create_task(self._refill())
+
+    async def _refill(self):
+        """Füllt den Pool auf warm_size auf"""
+        while not self._closed and self.warming_enabled and len(self._idle) < self.warm_size:
+            try:
+                self._idle.append(await self._spawn())
+            except Exception as e:
+                logger.warning(f"Could not pre-spawn worker for {self.agent_id}: {e}")
+                self._early_deaths += 1
+                return
+
+    async def call(self, message: str, timeout: float) -> Tuple[str, Optional[int]]:
+        """
+        Führt einen Request auf einem Worker aus.
+
+        ``timeout`` gilt für den ganzen Aufruf: Warten auf einen Slot, Kaltstart
+        und Antwort. Returns (output, exit_code). Raises AgentPoolBusy bei voller
+        Queue und asyncio.TimeoutError wenn der Agent nicht rechtzeitig antwortet.
+        """
+        if self._closed:
+            raise RuntimeError(f"Worker pool for {self.agent_id} is closed")
+        if self._active >= self._max_concurrency and self._waiting >= self.max_queue:
+            self._metrics["rejected"] += 1
+            raise AgentPoolBusy(f"Agent {self.agent_id} queue full ({self.max_queue} waiting)")
+
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + timeout
+
+        def remaining() -> float:
+            return max(0.0, deadline - loop.time())
+
+        self._waiting += 1
+        try:
+            await asyncio.wait_for(self._slots.acquire(), timeout=remaining())
+        except asyncio.TimeoutError:
+            self._metrics["timeouts"] += 1
+            raise
+        finally:
+            self._waiting -= 1
+
+        self._active += 1
+        self._metrics["calls"] += 1
+        try:
+            worker = self._take_idle()
+            if worker is not None:
+                self._metrics["warm_hits"] += 1
+                self._early_deaths = 0
+            else:
+                self._metrics["cold_starts"] += 1
+                worker = await self._spawn_within(remaining())
+            self._schedule_refill()
+
+            try:
+                stdout, _ = await asyncio.wait_for(
+                    worker.process.communicate((message + "\n").encode("utf-8")),
+                    timeout=remaining(),
+                )
+            except asyncio.TimeoutError:
+                self._metrics["timeouts"] += 1
+                self._discard(worker)
+                raise
+            except asyncio.CancelledError:
+                self._discard(worker)
+                raise
+            return stdout.decode("utf-8", errors="replace").strip(), worker.process.returncode
+        finally:
+            self._active -= 1
+            self._slots.release()
+
+    async def _spawn_within(self, timeout: float) -> _Worker:
+        """Kaltstart mit Zeitlimit; ein zu spät gestarteter Prozess wird beendet"""
+        spawn = asyncio.ensure_future(self._spawn())
+        try:
+            return await asyncio.wait_for(asyncio.shield(spawn), timeout=timeout)
+        except asyncio.TimeoutError:
+            self._metrics["timeouts"] += 1
+            spawn.add_done_callback(self._discard_spawned)
+            raise
+        except asyncio.CancelledError:
+            spawn.add_done_callback(self._discard_spawned)
+            raise
+
+    def _discard_spawned(self, spawn: "asyncio.Future[_Worker]"):
+        if not spawn.cancelled() and spawn.exception() is None:
+            self._discard(spawn.result())
+
+    async def health_check(self):
+        """Entfernt tote und zu lange wartende Worker und füllt nach"""
+        now = time.monotonic()
+        keep = []
+        for worker in self._idle:
+            if not worker.alive:
+                self._early_deaths += 1
+                logger.debug(f"Warm worker for {self.agent_id} died (exit {worker.process.returncode})")
+            elif now - worker.spawned_at > self.max_idle:
+                self._metrics["recycled"] += 1
+                self._discard(worker)
+            else:
+                keep.append(worker)
+        self._idle = keep
+        if self.warm_size > 0 and not self.warming_enabled and not self._warming_warned:
+            logger.warning(f"Pre-spawned workers for {self.agent_id} keep exiting, warming disabled")
+            self._warming_warned = True
+        self._schedule_refill()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "idle": len(self._idle),
+            "active": self._active,
+            "waiting": self._waiting,
+            "warming": self.warming_enabled,
+            **self._metrics,
+        }
+
+    async def close(self):
+        self._closed = True
+        if self._refill_task:
+            self._refill_task.cancel()
+        for worker in self._idle:
+            self._discard(worker)
+        self._idle.clear()
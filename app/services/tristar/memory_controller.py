@@ -18,18 +18,25 @@ Basiert auf Empfehlungen von:
 import asyncio
 import hashlib
 import json
+import re
 import time
 import uuid
 from dataclasses import dataclass, field
 from datetime import datetime, timezone, timedelta
 from typing import Dict, List, Optional, Set, Any, Tuple
 from pathlib import Path
-from collections import defaultdict
+from collections import OrderedDict, defaultdict
 import aiofiles
 import logging
 
 logger = logging.getLogger("ailinux.tristar.memory_controller")
 
+_TOKEN_RE = re.compile(r"\w+")
+
+
+def _tokenize(text: str) -> List[str]:
+    return _TOKEN_RE.findall(text)
+
 # ============================================================================
 # Data Structures
 # ============================================================================
@@ -139,12 +146,21 @@ class MemoryEntry:
 # ============================================================================
 
 class MemoryShard:
-    """Ein Shard des verteilten Memory Pools"""
+    """
+    Ein Shard des verteilten Memory Pools
+
+    Hält pro Shard einen Token-Index und einen Tag-Index, damit die
+    Substring-Suche nur Kandidaten prüft statt alle Einträge. ``entries``
+    ist zugleich die LRU-Ordnung (ältester Zugriff vorne).
+    """
 
     def __init__(self, shard_id: int, max_entries: int = 10000):
         self.shard_id = shard_id
         self.max_entries = max_entries
-        self.entries: Dict[str, MemoryEntry] = {}
+        self.entries: "OrderedDict[str, MemoryEntry]" = OrderedDict()
+        self._token_index: Dict[str, Set[str]] = defaultdict(set)
+        self._tag_index: Dict[str, Set[str]] = defaultdict(set)
+        self._entry_tokens: Dict[str, Set[str]] = {}
         self._lock = asyncio.Lock()
         self._metrics = {
             "stores": 0,
@@ -152,16 +168,92 @@ class MemoryShard:
             "evictions": 0,
             "hits": 0,
             "misses": 0,
+            "searches": 0,
+            "candidates_checked": 0,
         }
 
+    # ------------------------------------------------------------------
+    # Index Maintenance (nur unter self._lock aufrufen)
+    # ------------------------------------------------------------------
+
+    def _index(self, entry: MemoryEntry):
+        tokens = set(_tokenize(entry.content.lower()))
+        self._entry_tokens[entry.entry_id] = tokens
+        for token in tokens:
+            self._token_index[token].add(entry.entry_id)
+        for tag in entry.tags:
+            self._tag_index[tag].add(entry.entry_id)
+
+    def _unindex(self, entry: MemoryEntry):
+        for token in self._entry_tokens.pop(entry.entry_id, ()):
+            ids = self._token_index.get(token)
+            if ids is not None:
+                ids.discard(entry.entry_id)
+                if not ids:
+                    del self._token_index[token]
+        for tag in entry.tags:
+            ids = self._tag_index.get(tag)
+            if ids is not None:
+                ids.discard(entry.entry_id)
+                if not ids:
+                    del self._tag_index[tag]
+
+    def _remove(self, entry_id: str) -> Optional[MemoryEntry]:
+        entry = self.entries.pop(entry_id, None)
+        if entry is not None:
+            self._unindex(entry)
+        return entry
+
+    def _token_candidates(self, query_lower: str) -> Optional[Set[str]]:
+        """
+        Kandidaten-IDs für einen Substring-Query.
+
+        Tokens, die im Query beidseitig begrenzt sind, müssen im Content als
+        ganzes Token vorkommen. Randtokens können Teil eines längeren Tokens
+        sein (Suffix/Präfix/Infix) und werden über das Vokabular aufgelöst.
+        None bedeutet: Query enthält keine Tokens, alle Einträge prüfen.
+        """
+        spans = [(m.group(), m.start(), m.end()) for m in _TOKEN_RE.finditer(query_lower)]
+        if not spans:
+            return None
+
+        full = [tok for tok, start, end in spans if start > 0 and end < len(query_lower)]
+        if full:
+            postings = sorted((self._token_index.get(tok, set()) for tok in set(full)), key=len)
+            return set.intersection(*postings) if postings[0] else set()
+
+        candidate_sets = []
+        for tok, start, end in {spans[0], spans[-1]}:
+            if start > 0:
+                match = lambda term: term.startswith(tok)
+            elif end < len(query_lower):
+                match = lambda term: term.endswith(tok)
+            else:
+                match = lambda term: tok in term
+            ids: Set[str] = set()
+            for term, term_ids in self._token_index.items():
+                if match(term):
+                    ids |= term_ids
+            if not ids:
+                return set()
+            candidate_sets.append(ids)
+        return set.intersection(*candidate_sets)
+
+    # ------------------------------------------------------------------
+    # Operations
+    # ------------------------------------------------------------------
+
     async def store(self, entry: MemoryEntry) -> bool:
         """Speichert einen Eintrag im Shard"""
         async with self._lock:
+            self._remove(entry.entry_id)
+
             # Eviction wenn voll
             if len(self.entries) >= self.max_entries:
                 await self._evict_lru()
 
             self.entries[entry.entry_id] = entry
+            self._index(entry)
             self._metrics["stores"] += 1
             return True
 
@@ -172,29 +264,45 @@ class MemoryShard:
             entry = self.entries.get(entry_id)
             if entry:
                 if entry.is_expired():
-                    del self.entries[entry_id]
+                    self._remove(entry_id)
                     self._metrics["evictions"] += 1
                     self._metrics["misses"] += 1
                     return None
                 entry.touch()
+                self.entries.move_to_end(entry_id)
                 self._metrics["hits"] += 1
                 return entry
             self._metrics["misses"] += 1
             return None
 
     async def search(self, query: str, min_confidence: float = 0.0,
-                     tags: Optional[Set[str]] = None) -> List[MemoryEntry]:
+                     tags: Optional[Set[str]] = None,
+                     project_id: Optional[str] = None,
+                     memory_type: Optional[str] = None) -> List[MemoryEntry]:
         """Sucht Einträge im Shard"""
         results = []
         query_lower = query.lower()
 
         async with self._lock:
-            for entry in self.entries.values():
+            self._metrics["searches"] += 1
+            candidates = self._token_candidates(query_lower)
+            if tags:
+                tag_sets = sorted((self._tag_index.get(tag, set()) for tag in tags), key=len)
+                tag_ids = set.intersection(*tag_sets) if tag_sets[0] else set()
+                candidates = tag_ids if candidates is None else candidates & tag_ids
+            if candidates is None:
+                candidates = self.entries.keys()
+
+            self._metrics["candidates_checked"] += len(candidates)
+            for entry_id in candidates:
+                entry = self.entries[entry_id]
                 if entry.is_expired():
                     continue
                 if entry.aggregate_confidence < min_confidence:
                     continue
-                if tags and not tags.issubset(entry.tags):
+                if project_id and entry.project_id != project_id:
+                    continue
+                if memory_type and entry.memory_type != memory_type:
                     continue
                 if query_lower in entry.content.lower():
                     results.append(entry)
@@ -204,10 +312,7 @@ class MemoryShard:
     async def delete(self, entry_id: str) -> bool:
         """Löscht einen Eintrag"""
         async with self._lock:
-            if entry_id in self.entries:
-                del self.entries[entry_id]
-                return True
-            return False
+            return self._remove(entry_id) is not None
 
     async def get_expired(self) -> List[str]:
         """Gibt IDs abgelaufener Einträge zurück"""
@@ -218,14 +323,18 @@ class MemoryShard:
                     expired.append(entry_id)
         return expired
 
+    async def snapshot(self) -> List[MemoryEntry]:
+        """Kopie aller Einträge (retrieve() verschiebt die LRU-Ordnung)"""
+        async with self._lock:
+            return list(self.entries.values())
+
     async def _evict_lru(self):
-        """Entfernt den am längsten nicht genutzten Eintrag"""
+        """Entfernt den am längsten nicht genutzten Eintrag (O(1))"""
         if not self.entries:
             return
 
-        lru_id = min(self.entries.keys(),
-                     key=lambda k: self.entries[k].last_accessed)
-        del self.entries[lru_id]
+        lru_id = next(iter(self.entries))
+        self._remove(lru_id)
         self._metrics["evictions"] += 1
 
     def get_metrics(self) -> Dict[str, Any]:
@@ -233,6 +342,8 @@ class MemoryShard:
             "shard_id": self.shard_id,
             "entry_count": len(self.entries),
             "max_entries": self.max_entries,
+            "indexed_tokens": len(self._token_index),
+            "indexed_tags": len(self._tag_index),
             **self._metrics,
         }
 
@@ -270,7 +381,7 @@ class MemoryMCPController:
         ]
 
         # LRU Query Cache
-        self._query_cache: Dict[str, Tuple[float, List[MemoryEntry]]] = {}
+        self._query_cache: "OrderedDict[Tuple, Tuple[float, List[MemoryEntry]]]" = OrderedDict()
         self._cache_ttl = 60  # 1 Minute Cache
         self._cache_max_size = 1000
 
@@ -379,29 +490,22 @@ class MemoryMCPController:
     ) -> List[MemoryEntry]:
         """Sucht Memory-Einträge"""
         # Cache Check
-        cache_key = f"{query}:{min_confidence}:{tags}:{project_id}:{memory_type}"
-        if cache_key in self._query_cache:
-            cached_time, cached_results = self._query_cache[cache_key]
-            if time.time() - cached_time < self._cache_ttl:
-                self._metrics["cache_hits"] += 1
-                return cached_results[:limit]
+        cache_key = (query, min_confidence, tuple(sorted(tags)) if tags else None, project_id, memory_type)
+        cached_results = self._cached(cache_key)
+        if cached_results is not None:
+            self._metrics["cache_hits"] += 1
+            return cached_results[:limit]
 
         self._metrics["cache_misses"] += 1
         self._metrics["total_searches"] += 1
 
-        # Search across all shards
+        # Search across all shards concurrently
         tag_set = set(tags) if tags else None
-        all_results = []
-
-        for shard in self.shards:
-            results = await shard.search(query, min_confidence, tag_set)
-            all_results.extend(results)
-
-        # Filter by project and type
-        if project_id:
-            all_results = [e for e in all_results if e.project_id == project_id]
-        if memory_type:
-            all_results = [e for e in all_results if e.memory_type == memory_type]
+        shard_results = await asyncio.gather(*(
+            shard.search(query, min_confidence, tag_set, project_id, memory_type)
+            for shard in self.shards
+        ))
+        all_results = [entry for results in shard_results for entry in results]
 
         # Sort by confidence
         all_results.sort(key=lambda e: e.aggregate_confidence, reverse=True)
@@ -530,15 +634,25 @@ class MemoryMCPController:
     # Cache Management
     # ========================================================================
 
-    def _cache_result(self, key: str, results: List[MemoryEntry]):
-        """Cached ein Suchergebnis"""
-        if len(self._query_cache) >= self._cache_max_size:
-            # Entferne ältesten Eintrag
-            oldest_key = min(self._query_cache.keys(),
-                           key=lambda k: self._query_cache[k][0])
-            del self._query_cache[oldest_key]
+    def _cached(self, key: Tuple) -> Optional[List[MemoryEntry]]:
+        """Liefert ein gecachtes Suchergebnis (LRU + TTL)"""
+        hit = self._query_cache.get(key)
+        if hit is None:
+            return None
+        cached_time, results = hit
+        if time.time() - cached_time >= self._cache_ttl:
+            del self._query_cache[key]
+            return None
+        self._query_cache.move_to_end(key)
+        return results
 
+    def _cache_result(self, key: Tuple, results: List[MemoryEntry]):
+        """Cached ein Suchergebnis"""
         self._query_cache[key] = (time.time(), results)
+        self._query_cache.move_to_end(key)
+        while len(self._query_cache) > self._cache_max_size:
+            # Entferne am längsten nicht genutzten Eintrag
+            self._query_cache.popitem(last=False)
 
     def _invalidate_cache(self):
         """Invalidiert den Query Cache"""
@@ -554,7 +668,7 @@ class MemoryMCPController:
 
         async with aiofiles.open(persist_file, "w") as f:
             for shard in self.shards:
-                for entry in shard.entries.values():
+                for entry in await shard.snapshot():
                     await f.write(json.dumps(entry.to_dict()) + "\n")
 
         # LLM Registry
@@ -13,6 +13,7 @@ from __future__ import annotations
 import base64
 import logging
 from typing import Any, Dict, List, Optional
+from ..utils.http_client import http_clients
 
 logger = logging.getLogger("ailinux.mcp.txt2img")
 
@@ -105,6 +106,19 @@ TXT2IMG_TOOLS: List[Dict[str, Any]] = [
             "type": "object",
             "properties": {}
         }
+    },
+    {
+        "name": "txt2img_progress",
+        "description": "Get live progress (current node, step/steps) of running image generations",
+        "inputSchema": {
+            "type": "object",
+            "properties": {
+                "prompt_id": {
+                    "type": "string",
+                    "description": "ComfyUI prompt ID (omit to list all running generations)"
+                }
+            }
+        }
     }
 ]
 
@@ -114,7 +128,12 @@ TXT2IMG_TOOLS: List[Dict[str, Any]] = [
 # ============================================================================
 
 async def handle_txt2img_generate(params: Dict[str, Any]) -> Dict[str, Any]:
-    """Generate an image from text prompt."""
+    """
+    Generate an image from text prompt.
+
+    In-process callers may pass a callable as ``progress_callback``; it receives
+    ComfyUI progress events ({"prompt_id", "node", "value", "max", "done"}).
+    """
     from ..services.sd3 import sd3_service
     from ..config import get_settings
 
@@ -127,6 +146,7 @@ async def handle_txt2img_generate(params: Dict[str, Any]) -> Dict[str, Any]:
     height = params.get("height", 512)
     width = max(64, min(2048, (width // 64) * 64))
     height = max(64, min(2048, (height // 64) * 64))
+    progress_callback = params.get("progress_callback")
 
     try:
         result = await sd3_service.generate_image(
@@ -138,7 +158,8 @@ async def handle_txt2img_generate(params: Dict[str, Any]) -> Dict[str, Any]:
             cfg_scale=params.get("cfg_scale", 7.0),
             seed=params.get("seed", -1),
             model=params.get("model"),
-            sampler_name=params.get("sampler", "euler")
+            sampler_name=params.get("sampler", "euler"),
+            progress_callback=progress_callback if callable(progress_callback) else None,
         )
 
         # Check if we got images
@@ -224,7 +245,6 @@ async def handle_txt2img_models(params: Dict[str, Any]) -> Dict[str, Any]:
 
 async def handle_txt2img_status(params: Dict[str, Any]) -> Dict[str, Any]:
     """Check image generation backend status."""
-    import httpx
     from ..config import get_settings
 
     settings = get_settings()
@@ -239,7 +259,7 @@ async def handle_txt2img_status(params: Dict[str, Any]) -> Dict[str, Any]:
     # Check ComfyUI availability
     if settings.comfyui_url:
         try:
-            async with httpx.AsyncClient(timeout=5.0) as client:
+            async with http_clients.client("comfyui", timeout=5.0) as client:
                 resp = await client.get(f"{settings.comfyui_url}/system_stats")
                 if resp.status_code == 200:
                     status["available"] = True
@@ -255,7 +275,6 @@ async def handle_txt2img_status(params: Dict[str, Any]) -> Dict[str, Any]:
 
 async def handle_txt2img_queue(params: Dict[str, Any]) -> Dict[str, Any]:
     """Get ComfyUI queue status."""
-    import httpx
     from ..config import get_settings
 
     settings = get_settings()
@@ -264,7 +283,7 @@ async def handle_txt2img_queue(params: Dict[str, Any]) -> Dict[str, Any]:
         return {"error": "ComfyUI not configured", "queue": []}
 
     try:
-        async with httpx.AsyncClient(timeout=5.0) as client:
+        async with http_clients.client("comfyui", timeout=5.0) as client:
             resp = await client.get(f"{settings.comfyui_url}/queue")
             if resp.status_code == 200:
                 return resp.json()
@@ -273,6 +292,26 @@ async def handle_txt2img_queue(params: Dict[str, Any]) -> Dict[str, Any]:
         return {"error": str(e), "queue": []}
 
 
+async def handle_txt2img_progress(params: Dict[str, Any]) -> Dict[str, Any]:
+    """Get progress of running ComfyUI generations from the websocket tracker."""
+    from .comfyui_tracker import comfyui_trackers
+
+    prompt_id = params.get("prompt_id")
+    trackers = comfyui_trackers()
+
+    if prompt_id:
+        for tracker in trackers:
+            progress = tracker.progress(prompt_id)
+            if progress:
+                return progress
+        return {"prompt_id": prompt_id, "error": "Unknown or finished prompt"}
+
+    return {
+        "running": [job for tracker in trackers for job in tracker.active()],
+        "websocket_connected": any(tracker.connected for tracker in trackers),
+    }
+
+
 # ============================================================================
 # Helper Functions
 # ============================================================================
@@ -401,4 +440,5 @@ TXT2IMG_HANDLERS: Dict[str, Any] = {
     "txt2img_models": handle_txt2img_models,
     "txt2img_status": handle_txt2img_status,
     "txt2img_queue": handle_txt2img_queue,
+    "txt2img_progress": handle_txt2img_progress,
 }
@@ -13,6 +13,10 @@ from datetime import datetime
 import json
 from pathlib import Path
 
+from ..utils.rate_limit import shared_limiter
+
+TOKEN_USAGE_TTL = 2 * 86400  # Tageszähler, Key enthält das Datum
+
 class UserTier(str, Enum):
     GUEST = "guest"
     REGISTERED = "registered"
@@ -135,7 +139,6 @@ class UserTierService:
         paths = [Path(".vault/users"), Path("/opt/triforce/.vault/users"), Path("/home/zombie/triforce/.vault/users")]
         self.users_path = users_path or next((p for p in paths if p.parent.exists()), Path(".vault/users"))
         self.users_path.mkdir(parents=True, exist_ok=True)
-        self._token_usage: Dict[str, Dict] = {}
     
     def get_user_tier(self, user_id: str = None) -> UserTier:
         # Leere, anonymous oder None IDs = GUEST
@@ -225,14 +228,18 @@ class UserTierService:
         """Basis Token-Limit (für Cloud-Modelle)"""
         return TIER_CONFIGS[self.get_user_tier(user_id)].daily_token_limit
     
-    def track_tokens(self, user_id: str, tokens: int, model: str = None) -> Dict:
+    @staticmethod
+    def _usage_key(user_id: str, day: str) -> str:
+        """Shared Tageszähler (über alle Worker)"""
+        return f"tokens:{user_id}:{day}"
+
+    async def track_tokens(self, user_id: str, tokens: int, model: str = None) -> Dict:
         """Trackt Token-Verbrauch (berücksichtigt Ollama-Unlimited für Pro)"""
         today = datetime.now().strftime("%Y-%m-%d")
-        self._token_usage.setdefault(user_id, {})[today] = self._token_usage.get(user_id, {}).get(today, 0) + tokens
+        used = await shared_limiter.incr(self._usage_key(user_id, today), tokens, TOKEN_USAGE_TTL)
         
         # Limit basierend auf Modell
         limit = self.get_token_limit_for_model(user_id, model) if model else self.get_daily_token_limit(user_id)
-        used = self._token_usage[user_id][today]
         
         return {
             "used_today": used,
@@ -242,7 +249,7 @@ class UserTierService:
             "model": model
         }
     
-    def check_token_limit(self, user_id: str = None, model: str = None) -> Dict:
+    async def check_token_limit(self, user_id: str = None, model: str = None) -> Dict:
         """Prüft ob Token-Limit erreicht (berücksichtigt Ollama-Unlimited)"""
         limit = self.get_token_limit_for_model(user_id, model) if model else self.get_daily_token_limit(user_id)
         
@@ -250,7 +257,7 @@ class UserTierService:
         if limit == 0:
             return {"allowed": True, "unlimited": True, "model": model}
         
-        used = self._token_usage.get(user_id, {}).get(datetime.now().strftime("%Y-%m-%d"), 0) if user_id else 0
+        used = await shared_limiter.get(self._usage_key(user_id, datetime.now().strftime("%Y-%m-%d"))) if user_id else 0
         return {
             "allowed": used < limit,
             "used": used,
@@ -260,13 +267,12 @@ class UserTierService:
             "model": model
         }
     
-    def reset_token_usage(self, user_id: str) -> Dict:
+    async def reset_token_usage(self, user_id: str) -> Dict:
         """Reset Token-Usage für einen User (Admin-Funktion)"""
         today = datetime.now().strftime("%Y-%m-%d")
-        old_usage = self._token_usage.get(user_id, {}).get(today, 0)
-        
-        if user_id in self._token_usage:
-            self._token_usage[user_id][today] = 0
+        key = self._usage_key(user_id, today)
+        old_usage = await shared_limiter.get(key)
+        await shared_limiter.reset(key)
         
         return {
             "user_id": user_id,
@@ -276,12 +282,12 @@ class UserTierService:
             "date": today
         }
     
-    def get_token_usage(self, user_id: str) -> Dict:
+    async def get_token_usage(self, user_id: str) -> Dict:
         """Hole aktuellen Token-Verbrauch für einen User"""
         today = datetime.now().strftime("%Y-%m-%d")
         tier = self.get_user_tier(user_id)
         cfg = TIER_CONFIGS[tier]
-        used = self._token_usage.get(user_id, {}).get(today, 0)
+        used = await shared_limiter.get(self._usage_key(user_id, today))
         limit = cfg.daily_token_limit
         
         return {
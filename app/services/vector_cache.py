@@ -0,0 +1,305 @@
+"""
+Content-addressed embedding vector cache.
+
+Vectors are keyed by a hash of the model id and the input text, so a text
+that was embedded once is not sent to a backend again. There are two
+tiers: an LRU in memory bounded by size, and one file per vector on disk
+that all workers share and that survives restarts. Both tiers hold the
+encoded vector (float32, float16 or int8 with a per-vector scale), and
+every caller gets the decoded stored value. A cache hit therefore returns
+exactly what the miss returned.
+
+Identical texts requested concurrently are computed once.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import logging
+import os
+import secrets
+import struct
+from collections import OrderedDict
+from pathlib import Path
+from typing import Awaitable, Callable, Dict, List, Optional, Sequence
+
+from ..config import get_settings
+from ..utils.singleflight import SingleFlight
+
+logger = logging.getLogger("ailinux.vector_cache")
+
+DTYPES = {"float32": 0, "float16": 1, "int8": 2}
+_FORMATS = {0: "f", 1: "e", 2: "b"}
+_HEADER = struct.Struct("<2sBIf")  # magic, dtype, dimensions, scale
+_MAGIC = b"EV"
+PRUNE_EVERY = 5000  # disk writes between size checks
+
+Vector = List[float]
+
+
+def encode_vector(vector: Sequence[float], dtype: str = "float16") -> bytes:
+    """Pack a vector; falls back to float32 if it does not fit the dtype."""
+    code = DTYPES[dtype]
+    n = len(vector)
+    try:
+        if code == 2:
+            peak = max((abs(v) for v in vector), default=0.0)
+            scale = peak / 127 if peak else 1.0
+            payload = struct.pack(f"<{n}b", *(round(v / scale) for v in vector))
+        else:
+            scale = 1.0
+            payload = struct.pack(f"<{n}{_FORMATS[code]}", *vector)
+    except (OverflowError, ValueError, struct.error):
+        code, scale = 0, 1.0
+        payload = struct.pack(f"<{n}f", *vector)
+    return _HEADER.pack(_MAGIC, code, n, scale) + payload
+
+
+def decode_vector(blob: bytes) -> Vector:
+    magic, code, n, scale = _HEADER.unpack_from(blob)
+    if magic != _MAGIC or code not in _FORMATS:
+        raise ValueError("not an encoded vector")
+    values = struct.unpack_from(f"<{n}{_FORMATS[code]}", blob, _HEADER.size)
+    if code == 2:
+        return [v * scale for v in values]
+    return list(values)
+
+
+class _DiskTier:
+    """One file per vector below ``directory``, pruned oldest-first by size."""
+
+    def __init__(self, directory: Path, max_bytes: int):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        # Private to this user: planted .vec files would be served as vectors
+        self.directory.mkdir(mode=0o700, parents=True, exist_ok=True)
+        if self.directory.stat().st_uid != os.getuid():
+            raise PermissionError(f"{directory} is owned by another user")
+        os.chmod(self.directory, 0o700)
+        self._writes = 0
+
+    def _path(self, key: str) -> Path:
+        return self.directory / key[:2] / f"{key}.vec"
+
+    def read_many(self, keys: Sequence[str]) -> Dict[str, bytes]:
+        found = {}
+        for key in keys:
+            try:
+                found[key] = self._path(key).read_bytes()
+            except FileNotFoundError:
+                continue
+        return found
+
+    def write_many(self, blobs: Dict[str, bytes]):
+        for key, blob in blobs.items():
+            path = self._path(key)
+            path.parent.mkdir(exist_ok=True)
+            tmp = path.with_suffix(f".{secrets.token_hex(4)}.tmp")
+            tmp.write_bytes(blob)
+            os.replace(tmp, path)
+        self._writes += len(blobs)
+        if self._writes >= PRUNE_EVERY:
+            self._writes = 0
+            self.prune()
+
+    def prune(self) -> int:
+        """Delete the oldest vectors until the tier is below 90% of its limit."""
+        entries = []
+        total = 0
+        for shard in os.scandir(self.directory):
+            if not shard.is_dir():
+                continue
+            for entry in os.scandir(shard.path):
+                try:
+                    st = entry.stat()
+                except FileNotFoundError:
+                    continue
+                entries.append((st.st_mtime, st.st_size, entry.path))
+                total += st.st_size
+        if total <= self.max_bytes:
+            return 0
+        entries.sort()
+        target = self.max_bytes * 0.9
+        removed = 0
+        for _, size, path in entries:
+            if total <= target:
+                break
+            try:
+                os.unlink(path)
+            except FileNotFoundError:
+                pass
+            total -= size
+            removed += 1
+        logger.info(f"Vector cache pruned {removed} vectors")
+        return removed
+
+
+class VectorCache:
+    """Memory + disk cache of embedding vectors with single-flight computation."""
+
+    def __init__(self):
+        self._memory: "OrderedDict[str, bytes]" = OrderedDict()
+        self._memory_bytes = 0
+        self._max_memory_bytes = 0
+        self._dtype = "float16"
+        self._disk: Optional[_DiskTier] = None
+        self._configured = False
+        self._inflight: SingleFlight[Dict[str, bytes]] = SingleFlight()
+        self._writes: "set[asyncio.Task]" = set()
+        self._stats = {"memory_hits": 0, "disk_hits": 0, "misses": 0, "coalesced": 0, "disk_errors": 0}
+
+    def _configure(self):
+        if self._configured:
+            return
+        settings = get_settings()
+        self._dtype = settings.embedding_cache_dtype if settings.embedding_cache_dtype in DTYPES else "float16"
+        self._max_memory_bytes = settings.embedding_cache_memory_mb * 1024 * 1024
+        if settings.embedding_cache_disk_mb > 0:
+            try:
+                self._disk = _DiskTier(Path(settings.embedding_cache_dir), settings.embedding_cache_disk_mb * 1024 * 1024)
+            except OSError as e:
+                logger.warning(f"Vector cache disk tier disabled: {e}")
+        self._configured = True
+
+    @staticmethod
+    def make_key(model: str, text: str) -> str:
+        return hashlib.blake2b(f"{model}\0{text}".encode("utf-8"), digest_size=16).hexdigest()
+
+    # --- memory tier ---
+
+    def _memory_get(self, key: str) -> Optional[bytes]:
+        blob = self._memory.get(key)
+        if blob is not None:
+            self._memory.move_to_end(key)
+        return blob
+
+    def _memory_put(self, key: str, blob: bytes):
+        old = self._memory.pop(key, None)
+        if old is not None:
+            self._memory_bytes -= len(old)
+        self._memory[key] = blob
+        self._memory_bytes += len(blob)
+        while self._memory_bytes > self._max_memory_bytes and self._memory:
+            _, evicted = self._memory.popitem(last=False)
+            self._memory_bytes -= len(evicted)
+
+    # --- disk tier ---
+
+    async def _disk_read(self, keys: List[str]) -> Dict[str, bytes]:
+        if self._disk is None or not keys:
+            return {}
+        try:
+            return await asyncio.to_thread(self._disk.read_many, keys)
+        except OSError as e:
+            self._stats["disk_errors"] += 1
+            logger.warning(f"Vector cache disk read failed: {e}")
+            return {}
+
+    async def _disk_write(self, blobs: Dict[str, bytes]):
+        try:
+            await asyncio.to_thread(self._disk.write_many, blobs)
+        except OSError as e:
+            self._stats["disk_errors"] += 1
+            logger.warning(f"Vector cache disk write failed: {e}")
+
+    # --- API ---
+
+    async def get_or_compute(
+        self,
+        model: str,
+        texts: Sequence[str],
+        compute: Callable[[List[str]], Awaitable[Sequence[Sequence[float]]]],
+    ) -> List[Vector]:
+        """
+        Vectors for ``texts`` in input order. ``compute`` is called once
+        with the distinct texts found in neither tier nor in flight, and
+        must return one vector per text.
+        """
+        self._configure()
+        results: List[Optional[Vector]] = [None] * len(texts)
+        missing: Dict[str, List[int]] = {}
+
+        for i, text in enumerate(texts):
+            key = self.make_key(model, text)
+            blob = self._memory_get(key)
+            if blob is not None:
+                self._stats["memory_hits"] += 1
+                results[i] = decode_vector(blob)
+            else:
+                missing.setdefault(key, []).append(i)
+
+        def fill(key: str, blob: bytes):
+            vector = decode_vector(blob)
+            for i in missing[key]:
+                results[i] = vector
+
+        for key, blob in (await self._disk_read(list(missing))).items():
+            try:
+                fill(key, blob)
+            except (ValueError, struct.error):
+                continue  # damaged file, recompute
+            self._stats["disk_hits"] += len(missing[key])
+            self._memory_put(key, blob)
+            del missing[key]
+
+        # One task per batch; followers of another request's batch wait on that task
+        tasks: Dict[asyncio.Task, List[str]] = {}
+        own = []
+        for key in missing:
+            task = self._inflight.pending(key)
+            if task is None:
+                own.append(key)
+            else:
+                self._stats["coalesced"] += len(missing[key])
+                tasks.setdefault(task, []).append(key)
+
+        if own:
+            self._stats["misses"] += len(own)
+            own_texts = [texts[missing[key][0]] for key in own]
+            task = self._inflight.start(own, lambda: self._compute(model, own, own_texts, compute))
+            tasks[task] = own
+
+        batches = await asyncio.gather(*(self._inflight.wait(task) for task in tasks))
+        for keys, blobs in zip(tasks.values(), batches):
+            for key in keys:
+                fill(key, blobs[key])
+
+        return results  # type: ignore[return-value]
+
+    async def _compute(
+        self,
+        model: str,
+        keys: List[str],
+        texts: List[str],
+        compute: Callable[[List[str]], Awaitable[Sequence[Sequence[float]]]],
+    ) -> Dict[str, bytes]:
+        vectors = await compute(texts)
+        if len(vectors) != len(keys):
+            raise ValueError(f"Expected {len(keys)} embeddings from {model}, got {len(vectors)}")
+        blobs = {key: encode_vector(vector, self._dtype) for key, vector in zip(keys, vectors)}
+        for key, blob in blobs.items():
+            self._memory_put(key, blob)
+        if self._disk is not None:
+            task = asyncio.create_task(self._disk_write(blobs))
+            self._writes.add(task)
+            task.add_done_callback(self._writes.discard)
+        return blobs
+
+    def get_stats(self) -> Dict[str, object]:
+        return {
+            "dtype": self._dtype,
+            "memory_entries": len(self._memory),
+            "memory_mb": round(self._memory_bytes / 1024**2, 2),
+            "disk": str(self._disk.directory) if self._disk else None,
+            "inflight": len(self._inflight),
+            **self._stats,
+        }
+
+    async def aclose(self):
+        """Wait for pending disk writes."""
+        if self._writes:
+            await asyncio.gather(*self._writes, return_exceptions=True)
+
+
+vector_cache = VectorCache()
@@ -1,7 +1,6 @@
 from __future__ import annotations
 
 import asyncio
-import base64
 import os
 import tempfile
 from pathlib import Path
@@ -9,15 +8,14 @@ from typing import Optional, Tuple
 
 import httpx
 import google.generativeai as genai
-from PIL import Image
-import io
 
 from ..config import get_settings
 from ..services.model_registry import ModelInfo
 from ..utils.errors import api_error
 from ..utils.http import extract_http_error
-from ..utils.http_client import HttpClient
+from ..utils.http_client import HttpClient, http_clients
 from ..utils.model_helpers import strip_provider_prefix
+from .image_pipeline import image_pipeline
 
 MAX_IMAGE_BYTES = 10 * 1024 * 1024  # 10MB
 
@@ -73,7 +71,7 @@ async def analyze(
     if image_bytes is None and image_url:
         # try lightweight HEAD first
         try:
-            async with httpx.AsyncClient(timeout=httpx.Timeout(get_settings().request_timeout)) as client:
+            async with http_clients.client("default", timeout=httpx.Timeout(get_settings().request_timeout)) as client:
                 head = await client.head(image_url, follow_redirects=True)
                 ct = head.headers.get("content-type")
                 cl = head.headers.get("content-length")
@@ -195,32 +193,6 @@ def _persist_temp_file(data: bytes, filename: Optional[str]) -> None:
     )
 
 
-def _optimize_image(image_bytes: bytes, max_size: int = 1024) -> bytes:
-    try:
-        with Image.open(io.BytesIO(image_bytes)) as img:
-            # Convert to RGB to avoid transparency issues/palette modes
-            if img.mode in ('RGBA', 'LA') or (img.mode == 'P' and 'transparency' in img.info):
-                background = Image.new('RGB', img.size, (255, 255, 255))
-                if img.mode == 'P':
-                    img = img.convert('RGBA')
-                background.paste(img, mask=img.split()[3])
-                img = background
-            elif img.mode != 'RGB':
-                img = img.convert('RGB')
-
-            width, height = img.size
-            if width > max_size or height > max_size:
-                ratio = min(max_size / width, max_size / height)
-                new_size = (int(width * ratio), int(height * ratio))
-                img = img.resize(new_size, Image.Resampling.LANCZOS)
-            
-            out_io = io.BytesIO()
-            img.save(out_io, format='JPEG', quality=85)
-            return out_io.getvalue()
-    except Exception:
-        return image_bytes
-
-
 async def _analyze_with_ollama_data(
     model: str,
     prompt: str,
@@ -229,10 +201,10 @@ async def _analyze_with_ollama_data(
     settings = get_settings()
     
     # Optimize image to prevent Ollama OOM/crashes
-    image_bytes = _optimize_image(image_bytes)
-    
+    optimized = await image_pipeline.optimize(image_bytes)
+
     url = httpx.URL(str(settings.ollama_base)).join("/api/chat")
-    encoded = base64.b64encode(image_bytes).decode("ascii")
+    encoded = optimized.b64
     body = {
         "model": model,
         "messages": [
@@ -254,7 +226,7 @@ async def _dispatch_ollama(url: httpx.URL, payload: dict, timeout_ms: Optional[i
     settings = get_settings()
     timeout = httpx.Timeout(timeout_ms / 1000 if timeout_ms else settings.request_timeout)
     try:
-        async with httpx.AsyncClient(timeout=timeout) as client:
+        async with http_clients.client("ollama", timeout=timeout) as client:
             response = await client.post(url, json=payload)
     except httpx.RequestError as exc:
         raise api_error(
@@ -321,9 +293,7 @@ async def _analyze_with_gemini_data(
     *,
     api_key: str,
 ) -> str:
-    img = Image.open(io.BytesIO(image_bytes))
-    
-    return await _dispatch_gemini(model, prompt, img, api_key)
+    return await _dispatch_gemini(model, prompt, await _gemini_image(image_bytes), api_key)
 
 
 async def _analyze_with_gemini_url(
@@ -334,11 +304,37 @@ async def _analyze_with_gemini_url(
     api_key: str,
 ) -> str:
     _, image_data = await _download_image(image_url)
-    img = Image.open(io.BytesIO(image_data))
-    return await _dispatch_gemini(model, prompt, img, api_key=api_key)
+    return await _dispatch_gemini(model, prompt, await _gemini_image(image_data), api_key=api_key)
+
 
+def _sniff_gemini_type(image_bytes: bytes) -> Optional[str]:
+    """Media type of a format Gemini accepts as is (JPEG, PNG, WebP), else None."""
+    if image_bytes.startswith(b"\xff\xd8\xff"):
+        return "image/jpeg"
+    if image_bytes.startswith(b"\x89PNG\r\n\x1a\n"):
+        return "image/png"
+    if image_bytes[:4] == b"RIFF" and image_bytes[8:12] == b"WEBP":
+        return "image/webp"
+    return None
 
-async def _dispatch_gemini(model_name: str, prompt: str, image: Image, api_key: str) -> str:
+
+async def _gemini_image(image_bytes: bytes) -> dict:
+    """
+    Encoded image part for Gemini (the SDK would otherwise re-encode a PIL image on the loop).
+
+    Supported formats within MAX_IMAGE_BYTES are sent unchanged, at full
+    resolution; anything else is converted to JPEG, at most 3072px.
+    """
+    mime_type = _sniff_gemini_type(image_bytes)
+    if mime_type and len(image_bytes) <= MAX_IMAGE_BYTES:
+        return {"mime_type": mime_type, "data": image_bytes}
+    optimized = await image_pipeline.optimize(image_bytes, max_size=3072)
+    if optimized.media_type is None:
+        raise api_error("Image could not be decoded", status_code=415, code="unsupported_image_type")
+    return {"mime_type": optimized.media_type, "data": optimized.data}
+
+
+async def _dispatch_gemini(model_name: str, prompt: str, image: dict, api_key: str) -> str:
     genai.configure(api_key=api_key)
     target_model = strip_provider_prefix(model_name)
     model = genai.GenerativeModel(target_model)
@@ -362,7 +358,7 @@ async def _download_image(url: str) -> Tuple[str, bytes]:
     settings = get_settings()
     timeout = httpx.Timeout(settings.request_timeout)
     try:
-        async with httpx.AsyncClient(timeout=timeout) as client:
+        async with http_clients.client("default", timeout=timeout) as client:
             response = await client.get(url)
             response.raise_for_status()
 
@@ -400,7 +396,7 @@ async def _analyze_with_anthropic_data(
     data within the message content.
     """
     # Optimize image to prevent issues with large images
-    optimized_bytes = _optimize_image(image_bytes, max_size=2048)
+    optimized = await image_pipeline.optimize(image_bytes, max_size=2048)
 
     # Map model aliases
     target_model = ANTHROPIC_VISION_ALIASES.get(model)
@@ -416,10 +412,9 @@ async def _analyze_with_anthropic_data(
         "image/webp": "image/webp",
         "image/gif": "image/gif",
     }
-    media_type = media_type_map.get(content_type.lower(), "image/png")
-
-    # Encode image to base64
-    encoded = base64.b64encode(optimized_bytes).decode("ascii")
+    # Optimized images are JPEG, undecodable input is passed through as uploaded
+    media_type = optimized.media_type or media_type_map.get(content_type.lower(), "image/png")
+    encoded = optimized.b64
 
     headers = {
         "x-api-key": api_key,
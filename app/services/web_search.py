@@ -9,16 +9,14 @@ from __future__ import annotations
 import asyncio
 import aiohttp
 import logging
-import time
 import hashlib
 import html
 from typing import List, Dict, Any, Set
+from ..utils.http_client import http_clients
+from .search_cache import search_cache
 
 logger = logging.getLogger("ailinux.web_search")
 
-_cache: Dict[str, tuple] = {}
-_CACHE_TTL = 600
-
 LANG_MAP_DDG = {
     "de": "de-de", "en": "en-us", "fr": "fr-fr", "es": "es-es",
     "it": "it-it", "nl": "nl-nl", "pl": "pl-pl", "ru": "ru-ru",
@@ -28,20 +26,6 @@ LANG_MAP_DDG = {
 WIKI_LANGS = {"de": "de", "en": "en", "fr": "fr", "es": "es", "it": "it", "nl": "nl", "pl": "pl", "ru": "ru"}
 
 
-def _cache_get(key: str) -> Any:
-    if key in _cache:
-        data, ts = _cache[key]
-        if time.time() - ts < _CACHE_TTL:
-            return data
-    return None
-
-def _cache_set(key: str, data: Any):
-    _cache[key] = (data, time.time())
-    if len(_cache) > 500:
-        oldest = sorted(_cache.items(), key=lambda x: x[1][1])[:100]
-        for k, _ in oldest:
-            del _cache[k]
-
 def _url_hash(url: str) -> str:
     url = url.lower().rstrip('/').replace('https://', '').replace('http://', '').replace('www.', '')
     return hashlib.md5(url.encode()).hexdigest()[:12]
@@ -82,7 +66,7 @@ async def _search_wiby(query: str, max_results: int = 15) -> List[Dict[str, Any]
     """Wiby.me - Indie Web Index."""
     results = []
     try:
-        async with aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(total=6)) as session:
+        async with http_clients.session("search", timeout=aiohttp.ClientTimeout(total=6)) as session:
             async with session.get(f"https://wiby.me/json/?q={query}") as resp:
                 if resp.status == 200:
                     data = await resp.json()
@@ -104,7 +88,7 @@ async def _search_wikipedia(query: str, lang: str = "de", max_results: int = 5)
     results = []
     wiki_lang = WIKI_LANGS.get(lang, "en")
     try:
-        async with aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(total=5)) as session:
+        async with http_clients.session("search", timeout=aiohttp.ClientTimeout(total=5)) as session:
             params = {"action": "opensearch", "search": query, "limit": max_results, "namespace": 0, "format": "json"}
             async with session.get(f"https://{wiki_lang}.wikipedia.org/w/api.php", params=params) as resp:
                 if resp.status == 200:
@@ -125,11 +109,17 @@ async def _search_wikipedia(query: str, lang: str = "de", max_results: int = 5)
 
 async def search_multi_api(query: str, target_results: int = 50, lang: str = "de") -> List[Dict[str, Any]]:
     """Multi-API Suche: DDG-Varianten + Wiby + Wikipedia."""
-    cache_key = f"multi8:{query}:{target_results}:{lang}"
-    cached = _cache_get(cache_key)
-    if cached:
-        return cached
-    
+    # Der Fan-out hängt nicht von target_results ab: ein Eintrag für alle Größen
+    results = await search_cache.get_or_fetch(
+        "multi8", query, ["ddg", "wiby", "wikipedia"],
+        lambda: _search_multi_api(query, lang),
+        params={"lang": lang},
+        ttl_for=lambda results, ttl: ttl if results else 0,
+    )
+    return results[:target_results]
+
+
+async def _search_multi_api(query: str, lang: str) -> List[Dict[str, Any]]:
     tasks = [
         _search_ddg(query, 40, lang),
         _search_ddg(f"{query} guide", 20, lang),
@@ -159,8 +149,7 @@ async def search_multi_api(query: str, target_results: int = 50, lang: str = "de
                 source_stats[src] = source_stats.get(src, 0) + 1
     
     logger.info(f"Multi-API '{query}' ({lang}): {len(unique_results)} unique - {source_stats}")
-    _cache_set(cache_key, unique_results)
-    return unique_results[:target_results]
+    return unique_results
 
 
 async def search_web(
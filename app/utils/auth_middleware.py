@@ -5,16 +5,20 @@ Authentication Middleware for /v1 and /v1/mcp
 Port-based authentication:
 - X-Forwarded-Port: 9100 → Auth required (external via Apache)
 - No X-Forwarded-Port → No auth (internal/direct/public endpoints)
+
+AuthStage runs inside the request pipeline (utils/request_pipeline.py) and
+records its decision in the shared RequestContext (ctx.auth).
 """
 
 from __future__ import annotations
 
 import logging
-from typing import Callable
+from typing import Any, Dict, Optional
 
 from fastapi import Request
 from fastapi.responses import JSONResponse
-from starlette.middleware.base import BaseHTTPMiddleware
+
+from .request_pipeline import PipelineStage, RequestContext, RequestPipeline
 
 from .mcp_auth import (
     is_valid_token,
@@ -53,22 +57,23 @@ PUBLIC_PATHS = [
 AUTH_REQUIRED_PORT = 9100
 
 
-class AuthMiddleware(BaseHTTPMiddleware):
+class AuthStage(PipelineStage):
     """
-    Port-based authentication middleware.
+    Port-based authentication stage.
     
     - X-Forwarded-Port: 9100 → require auth (external via Apache proxy)
     - No X-Forwarded-Port or other port → bypass (internal/public)
     """
 
-    async def dispatch(self, request: Request, call_next: Callable):
-        path = request.url.path
+    def on_request(self, ctx: RequestContext, scope: Dict[str, Any]) -> Optional[JSONResponse]:
+        path = ctx.path
 
         # Skip auth for public paths
         for public in PUBLIC_PATHS:
             if path.startswith(public) or path == public.rstrip("/"):
-                logger.info(f"AUTH_SKIP | Path: {path} | Matched: {public}")
-                return await call_next(request)
+                logger.debug(f"AUTH_SKIP | Path: {path} | Matched: {public}")
+                ctx.auth = "public"
+                return None
 
         # Check if path needs protection
         needs_auth = False
@@ -78,13 +83,14 @@ class AuthMiddleware(BaseHTTPMiddleware):
                 break
 
         if not needs_auth:
-            return await call_next(request)
+            ctx.auth = "public"
+            return None
 
         # === Port-based auth decision ===
         # Apache sets X-Forwarded-Port: 9100 for EXTERNAL requests
         # Public endpoints (like /api/public/search) don't have this header
-        forwarded_port_str = request.headers.get("X-Forwarded-Port", "")
-        client_ip = request.client.host if request.client else "unknown"
+        forwarded_port_str = ctx.headers.get("x-forwarded-port", "")
+        client_ip = ctx.client_ip or "unknown"
         
         # Parse forwarded port
         forwarded_port = None
@@ -97,45 +103,49 @@ class AuthMiddleware(BaseHTTPMiddleware):
         # Only require auth if X-Forwarded-Port is 9100 (external)
         if forwarded_port != AUTH_REQUIRED_PORT:
             logger.debug(f"AUTH_OK | IP: {client_ip} | X-Fwd-Port: {forwarded_port_str or 'none'} | Method: port_bypass")
-            return await call_next(request)
+            ctx.auth = "port_bypass"
+            return None
 
         # External request (port 9100) → requires authentication
         logger.debug(f"AUTH_CHECK | IP: {client_ip} | X-Fwd-Port: {forwarded_port} | Path: {path}")
         
-        auth_header = request.headers.get("Authorization", "")
+        auth_header = ctx.headers.get("authorization", "")
 
         # Check if auth is configured
         if not MCP_AUTH_USER or not MCP_AUTH_PASS:
             logger.error(f"AUTH_ERROR | IP: {client_ip} | Reason: auth_not_configured")
-            return self._unauthorized_response(request, "Server authentication not configured")
+            return self._unauthorized_response(ctx, scope, "Server authentication not configured")
 
         # Method 1: Bearer Token
         if auth_header.lower().startswith("bearer "):
             token = auth_header[7:].strip()
             if is_valid_token(token):
                 logger.debug(f"AUTH_OK | IP: {client_ip} | X-Fwd-Port: {forwarded_port} | Method: bearer")
-                return await call_next(request)
+                ctx.auth = "bearer"
+                return None
             else:
                 logger.warning(f"AUTH_FAIL | IP: {client_ip} | Reason: invalid_bearer")
-                return self._unauthorized_response(request, "Invalid bearer token")
+                return self._unauthorized_response(ctx, scope, "Invalid bearer token")
 
         # Method 2: Basic Auth
         if auth_header.lower().startswith("basic "):
-            username, password = _extract_basic_auth(request)
+            username, password = _extract_basic_auth(Request(scope))
             if _validate_credentials(username, password):
                 logger.debug(f"AUTH_OK | IP: {client_ip} | X-Fwd-Port: {forwarded_port} | Method: basic | User: {username}")
-                return await call_next(request)
+                ctx.auth = "basic"
+                return None
             else:
                 logger.warning(f"AUTH_FAIL | IP: {client_ip} | Reason: invalid_basic")
-                return self._unauthorized_response(request, "Invalid credentials")
+                return self._unauthorized_response(ctx, scope, "Invalid credentials")
 
         # No auth provided
         logger.warning(f"AUTH_FAIL | IP: {client_ip} | X-Fwd-Port: {forwarded_port} | Reason: no_credentials | Path: {path}")
-        return self._unauthorized_response(request, "Authentication required")
+        return self._unauthorized_response(ctx, scope, "Authentication required")
 
-    def _unauthorized_response(self, request: Request, detail: str) -> JSONResponse:
+    def _unauthorized_response(self, ctx: RequestContext, scope: Dict[str, Any], detail: str) -> JSONResponse:
         """Return 401 with proper WWW-Authenticate header."""
-        base_url = str(request.base_url).rstrip("/")
+        ctx.auth = "denied"
+        base_url = str(Request(scope).base_url).rstrip("/")
         auth_server = f"{base_url}/.well-known/oauth-authorization-server"
 
         return JSONResponse(
@@ -145,3 +155,10 @@ class AuthMiddleware(BaseHTTPMiddleware):
                 "WWW-Authenticate": f'Bearer realm="mcp", authorization_server="{auth_server}"'
             }
         )
+
+
+class AuthMiddleware(RequestPipeline):
+    """Stand-alone ASGI form of AuthStage."""
+
+    def __init__(self, app):
+        super().__init__(app, [AuthStage()])
@@ -2,9 +2,12 @@ from __future__ import annotations
 import asyncio
 import logging
 from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from http.cookiejar import CookieJar, DefaultCookiePolicy
 from threading import Lock
-from typing import Dict, Optional, Tuple
+from typing import Any, AsyncIterator, Dict, Optional, Tuple
 
+import aiohttp
 import httpx
 
 logger = logging.getLogger("ailinux.http")
@@ -15,6 +18,277 @@ RETRY_BACKOFF: Tuple[int, ...] = (1, 2, 4)  # Sekunden
 RETRYABLE_STATUS = (408, 429, 500, 502, 503, 504)
 RETRYABLE_EXC = (httpx.ConnectError, httpx.ReadTimeout, httpx.RemoteProtocolError)
 
+
+def _no_cookie_jar() -> CookieJar:
+    """Cookie jar that neither stores nor sends cookies.
+
+    Shared clients serve many callers and users; a Set-Cookie from one
+    response must not leak into requests made on behalf of someone else.
+    Per-request ``cookies=`` still work.
+    """
+    return CookieJar(policy=DefaultCookiePolicy(allowed_domains=[]))
+
+
+# ---------------------------------------------------------------------------
+# Pooled clients per upstream
+# ---------------------------------------------------------------------------
+
+@dataclass(frozen=True)
+class UpstreamPolicy:
+    """Connection, timeout and retry policy for one upstream."""
+    timeout: float = 30.0
+    connect_timeout: float = 5.0
+    max_connections: int = 100          # per upstream pool
+    max_connections_per_host: int = 20  # aiohttp; httpx pools are per upstream already
+    max_keepalive: int = 20
+    keepalive_expiry: float = 60.0
+    http2: bool = True                  # negotiated via ALPN, https only
+    retries: int = 3                    # attempts incl. the first one
+    backoff: Tuple[int, ...] = RETRY_BACKOFF
+    dns_cache_ttl: int = 300            # aiohttp resolver cache (seconds)
+
+
+UPSTREAM_POLICIES: Dict[str, UpstreamPolicy] = {
+    "default": UpstreamPolicy(),
+    # Local services: plain HTTP/1.1, long generations
+    "ollama": UpstreamPolicy(timeout=300.0, http2=False, max_keepalive=32, max_connections_per_host=32),
+    "local": UpstreamPolicy(timeout=120.0, http2=False, retries=1),
+    "comfyui": UpstreamPolicy(timeout=300.0, http2=False, retries=1),
+    "searxng": UpstreamPolicy(timeout=15.0, http2=False, max_keepalive=16),
+    # Hosted LLM APIs
+    "anthropic": UpstreamPolicy(timeout=120.0),
+    "openai": UpstreamPolicy(timeout=120.0),
+    "gemini": UpstreamPolicy(timeout=120.0),
+    "mistral": UpstreamPolicy(timeout=120.0),
+    "groq": UpstreamPolicy(timeout=60.0),
+    "cerebras": UpstreamPolicy(timeout=60.0),
+    "cohere": UpstreamPolicy(timeout=60.0),
+    "openrouter": UpstreamPolicy(timeout=120.0),
+    "together": UpstreamPolicy(timeout=60.0),
+    "fireworks": UpstreamPolicy(timeout=60.0),
+    "cloudflare": UpstreamPolicy(timeout=60.0),
+    "github": UpstreamPolicy(timeout=30.0),
+    "huggingface": UpstreamPolicy(timeout=120.0),
+    # Many hosts behind one pool: cap per host, not just overall
+    "search": UpstreamPolicy(timeout=10.0, max_connections=200, max_connections_per_host=8, retries=1),
+    "mesh": UpstreamPolicy(timeout=120.0, http2=False, max_connections_per_host=8),
+    "federation": UpstreamPolicy(timeout=30.0, max_connections_per_host=8),
+}
+
+
+def _as_httpx_timeout(timeout: Any) -> Any:
+    if timeout is None or isinstance(timeout, httpx.Timeout):
+        return timeout
+    return httpx.Timeout(timeout)
+
+
+def _as_aiohttp_timeout(timeout: Any) -> Any:
+    if timeout is None or isinstance(timeout, aiohttp.ClientTimeout):
+        return timeout
+    return aiohttp.ClientTimeout(total=timeout)
+
+
+class _ScopedClient:
+    """
+    View on a shared client with per-call defaults (timeout, auth, headers).
+
+    Request methods fill in the defaults unless the call passes its own.
+    close()/aclose() are no-ops so that existing ``async with`` call sites
+    can't tear down the shared pool.
+    """
+
+    _REQUEST_METHODS = frozenset({"request", "get", "post", "put", "patch", "delete", "head", "options", "stream", "ws_connect"})
+
+    def __init__(self, client: Any, defaults: Dict[str, Any]) -> None:
+        self._client = client
+        self._defaults = defaults
+
+    def _wrap(self, method):
+        def call(*args, **kwargs):
+            for key, value in self._defaults.items():
+                if key == "headers" and kwargs.get("headers") is not None:
+                    kwargs["headers"] = {**value, **kwargs["headers"]}
+                else:
+                    kwargs.setdefault(key, value)
+            return method(*args, **kwargs)
+        return call
+
+    def __getattr__(self, name: str) -> Any:
+        attr = getattr(self._client, name)
+        if name in self._REQUEST_METHODS and self._defaults:
+            return self._wrap(attr)
+        return attr
+
+    async def close(self) -> None:
+        return None
+
+    async def aclose(self) -> None:
+        return None
+
+    async def __aenter__(self) -> "_ScopedClient":
+        return self
+
+    async def __aexit__(self, *exc: Any) -> None:
+        return None
+
+
+class HttpClientManager:
+    """
+    Owns long-lived pooled httpx/aiohttp clients keyed by upstream name.
+
+    Each upstream gets its own keep-alive pool with connection caps and
+    HTTP/2 per UPSTREAM_POLICIES. aiohttp sessions cache DNS lookups; httpx
+    resolves once per pooled connection. Clients are bound to the event
+    loop that created them and are recreated for a different loop.
+
+    Shared clients keep no cookies. httpx clients do not follow redirects
+    (httpx default); call sites opt in with ``follow_redirects=True``.
+
+    Retries follow the upstream policy: the pooled httpx transport retries
+    failed connection attempts for every call (nothing was sent yet, so this
+    is safe for POST too); request() additionally retries timeouts and
+    retryable status codes with backoff, for idempotent calls.
+    """
+
+    def __init__(self) -> None:
+        self._httpx: Dict[str, Tuple[asyncio.AbstractEventLoop, httpx.AsyncClient]] = {}
+        self._aiohttp: Dict[str, Tuple[asyncio.AbstractEventLoop, aiohttp.ClientSession]] = {}
+
+    @staticmethod
+    def policy(upstream: str) -> UpstreamPolicy:
+        return UPSTREAM_POLICIES.get(upstream) or UPSTREAM_POLICIES["default"]
+
+    def httpx_client(self, upstream: str = "default") -> httpx.AsyncClient:
+        loop = asyncio.get_running_loop()
+        entry = self._httpx.get(upstream)
+        if entry and entry[0] is loop and not entry[1].is_closed:
+            return entry[1]
+
+        policy = self.policy(upstream)
+        transport = httpx.AsyncHTTPTransport(
+            limits=httpx.Limits(
+                max_connections=policy.max_connections,
+                max_keepalive_connections=policy.max_keepalive,
+                keepalive_expiry=policy.keepalive_expiry,
+            ),
+            http2=policy.http2,
+            retries=max(0, policy.retries - 1),
+        )
+        client = httpx.AsyncClient(
+            timeout=httpx.Timeout(policy.timeout, connect=policy.connect_timeout),
+            transport=transport,
+            cookies=_no_cookie_jar(),
+        )
+        self._httpx[upstream] = (loop, client)
+        return client
+
+    def aiohttp_session(self, upstream: str = "default") -> aiohttp.ClientSession:
+        loop = asyncio.get_running_loop()
+        entry = self._aiohttp.get(upstream)
+        if entry and entry[0] is loop and not entry[1].closed:
+            return entry[1]
+
+        policy = self.policy(upstream)
+        connector = aiohttp.TCPConnector(
+            limit=policy.max_connections,
+            limit_per_host=policy.max_connections_per_host,
+            ttl_dns_cache=policy.dns_cache_ttl,
+            keepalive_timeout=policy.keepalive_expiry,
+        )
+        session = aiohttp.ClientSession(
+            connector=connector,
+            cookie_jar=aiohttp.DummyCookieJar(),
+            timeout=aiohttp.ClientTimeout(total=policy.timeout, connect=policy.connect_timeout),
+        )
+        self._aiohttp[upstream] = (loop, session)
+        return session
+
+    @asynccontextmanager
+    async def client(
+        self,
+        upstream: str = "default",
+        *,
+        timeout: Any = None,
+        auth: Any = None,
+        headers: Optional[Dict[str, str]] = None,
+    ) -> AsyncIterator[httpx.AsyncClient]:
+        """Drop-in for ``async with httpx.AsyncClient(timeout=...) as client``."""
+        defaults: Dict[str, Any] = {}
+        if timeout is not None:
+            defaults["timeout"] = _as_httpx_timeout(timeout)
+        if auth is not None:
+            defaults["auth"] = auth
+        if headers:
+            defaults["headers"] = headers
+        yield _ScopedClient(self.httpx_client(upstream), defaults)
+
+    @asynccontextmanager
+    async def session(
+        self,
+        upstream: str = "default",
+        *,
+        timeout: Any = None,
+        headers: Optional[Dict[str, str]] = None,
+    ) -> AsyncIterator[aiohttp.ClientSession]:
+        """Drop-in for ``async with aiohttp.ClientSession(timeout=...) as session``."""
+        defaults: Dict[str, Any] = {}
+        if timeout is not None:
+            defaults["timeout"] = _as_aiohttp_timeout(timeout)
+        if headers:
+            defaults["headers"] = headers
+        yield _ScopedClient(self.aiohttp_session(upstream), defaults)
+
+    async def request(self, upstream: str, method: str, url: str, **kwargs: Any) -> httpx.Response:
+        """httpx request with the upstream's retry policy (idempotent calls)."""
+        policy = self.policy(upstream)
+        client = self.httpx_client(upstream)
+        if "timeout" in kwargs:
+            kwargs["timeout"] = _as_httpx_timeout(kwargs["timeout"])
+        attempts = max(1, kwargs.pop("retries", policy.retries))
+        for attempt in range(attempts):
+            last = attempt == attempts - 1
+            try:
+                resp = await client.request(method, url, **kwargs)
+                if resp.status_code in RETRYABLE_STATUS and not last:
+                    raise httpx.HTTPStatusError("retryable status", request=resp.request, response=resp)
+                resp.raise_for_status()
+                return resp
+            except httpx.HTTPStatusError as e:
+                if last or e.response.status_code not in RETRYABLE_STATUS:
+                    raise
+                await e.response.aclose()
+            except RETRYABLE_EXC:
+                if last:
+                    raise
+            delay = policy.backoff[min(attempt, len(policy.backoff) - 1)]
+            logger.warning("Retrying %s %s attempt=%d delay=%ss upstream=%s", method, url, attempt + 1, delay, upstream)
+            await asyncio.sleep(delay)
+        raise RuntimeError("unreachable")
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "httpx": sorted(name for name, (_, c) in self._httpx.items() if not c.is_closed),
+            "aiohttp": sorted(name for name, (_, s) in self._aiohttp.items() if not s.closed),
+        }
+
+    async def aclose(self) -> None:
+        """Close all pooled clients (app shutdown)."""
+        httpx_clients, self._httpx = self._httpx, {}
+        sessions, self._aiohttp = self._aiohttp, {}
+        for _, client in httpx_clients.values():
+            try:
+                await client.aclose()
+            except Exception as exc:
+                logger.debug("Error closing httpx client: %s", exc)
+        for _, session in sessions.values():
+            try:
+                await session.close()
+            except Exception as exc:
+                logger.debug("Error closing aiohttp session: %s", exc)
+
+
+http_clients = HttpClientManager()
+
 class HttpClient:
     _shared_clients: Dict[str, httpx.AsyncClient] = {}
     _lock = Lock()
@@ -42,19 +316,35 @@ class HttpClient:
         key = f"{base_url}"
         with HttpClient._lock:
             if key not in HttpClient._shared_clients:
+                policy = UPSTREAM_POLICIES["default"]
                 self._client = httpx.AsyncClient(
                     timeout=self.timeout,
                     follow_redirects=self.follow_redirects,
                     base_url=base_url or "",
                     headers=headers or {},
                     http2=True,
+                    cookies=_no_cookie_jar(),
+                    limits=httpx.Limits(
+                        max_connections=policy.max_connections,
+                        max_keepalive_connections=policy.max_keepalive,
+                        keepalive_expiry=policy.keepalive_expiry,
+                    ),
                 )
                 HttpClient._shared_clients[key] = self._client
             else:
                 self._client = HttpClient._shared_clients[key]
 
     async def close(self) -> None:
-        await self._client.aclose()
+        # Shared per base_url; closing it here would break every other user
+        return None
+
+    @classmethod
+    async def aclose_shared(cls) -> None:
+        """Close all shared clients (app shutdown)."""
+        with cls._lock:
+            clients, cls._shared_clients = list(cls._shared_clients.values()), {}
+        for shared in clients:
+            await shared.aclose()
 
     async def _request(self, method: str, url: str, *, name: Optional[str] = None, **kwargs) -> httpx.Response:
         name = name or method.upper()
@@ -122,4 +412,13 @@ async def client(
     finally:
         await hc.close()
 
-__all__ = ["HttpClient", "client", "DEFAULT_TIMEOUT", "RETRY_BACKOFF"]
+__all__ = [
+    "HttpClient",
+    "client",
+    "DEFAULT_TIMEOUT",
+    "RETRY_BACKOFF",
+    "HttpClientManager",
+    "UpstreamPolicy",
+    "UPSTREAM_POLICIES",
+    "http_clients",
+]
@@ -333,6 +333,8 @@ async def require_mcp_auth(request: Request) -> str:
     
     X-Forwarded-Port: 9100 → Auth required (external)
     No X-Forwarded-Port → Bypass (internal/public)
+
+    A validated credential is stored as ``request.state.mcp_principal``.
     """
     client_ip = request.client.host if request.client else "unknown"
     auth_header = request.headers.get("Authorization", "")
@@ -357,6 +359,7 @@ async def require_mcp_auth(request: Request) -> str:
         token = auth_header[7:].strip()
         if is_valid_token(token):
             logger.debug(f"AUTH_OK | IP: {client_ip} | Method: bearer")
+            request.state.mcp_principal = "token:" + hashlib.blake2b(token.encode(), digest_size=8).hexdigest()
             return "oauth_client"
         else:
             logger.warning(f"AUTH_FAIL | IP: {client_ip} | Reason: invalid_bearer")
@@ -367,6 +370,7 @@ async def require_mcp_auth(request: Request) -> str:
         username, password = _extract_basic_auth(request)
         if _validate_credentials(username, password):
             logger.debug(f"AUTH_OK | IP: {client_ip} | Method: basic | User: {username}")
+            request.state.mcp_principal = "user:" + username
             return username
         else:
             logger.warning(f"AUTH_FAIL | IP: {client_ip} | Reason: invalid_basic")
@@ -11,10 +11,11 @@ Provides metrics for:
 """
 
 from prometheus_client import Counter, Histogram, Gauge, generate_latest, CONTENT_TYPE_LATEST
-from fastapi import Request, Response
-import time
+from fastapi import Response
 import logging
 
+from .request_pipeline import PipelineStage, RequestContext
+
 logger = logging.getLogger("ailinux.metrics")
 
 # Request Metrics
@@ -100,47 +101,62 @@ QUEUE_PROCESSING_TIME = Histogram(
     ['queue_name']
 )
 
+# RAM-Mode Persistence Metrics
+PERSIST_BYTES_TOTAL = Counter(
+    'ailinux_persist_bytes_total',
+    'Bytes copied from RAM to the persist directory'
+)
+
+PERSIST_FILES_TOTAL = Counter(
+    'ailinux_persist_files_total',
+    'Files synced to the persist directory',
+    ['op']  # op: copy, append, delete
+)
+
+PERSIST_FLUSH_LAG_SECONDS = Histogram(
+    'ailinux_persist_flush_lag_seconds',
+    'Time from the first change to its flush to disk',
+    buckets=(0.5, 1.0, 2.0, 5.0, 10.0, 30.0, 60.0, 300.0)
+)
+
+PERSIST_DIRTY_FILES = Gauge(
+    'ailinux_persist_dirty_files',
+    'Changed files waiting for the next flush'
+)
+
+
+def normalize_endpoint(path: str) -> str:
+    """Normalize endpoint path to reduce cardinality."""
+    # Replace IDs with placeholders
+    parts = path.split('/')
+    normalized = []
+    for part in parts:
+        if part and (part.isdigit() or len(part) == 36 or part.startswith('mem_')):
+            normalized.append('{id}')
+        else:
+            normalized.append(part)
+    return '/'.join(normalized)
+
 
-class MetricsMiddleware:
-    """Middleware to collect request metrics."""
+class MetricsStage(PipelineStage):
+    """Request pipeline stage collecting request metrics."""
 
-    async def __call__(self, request: Request, call_next):
-        start_time = time.time()
+    def on_request(self, ctx: RequestContext, scope):
         ACTIVE_CONNECTIONS.inc()
+        return None
 
-        try:
-            response = await call_next(request)
-            process_time = time.time() - start_time
-
-            # Skip metrics endpoint to avoid recursion
-            if request.url.path != "/metrics":
-                endpoint = self._normalize_endpoint(request.url.path)
-                method = request.method
-                status = str(response.status_code)
-
-                REQUEST_COUNT.labels(
-                    endpoint=endpoint,
-                    method=method,
-                    status=status
-                ).inc()
-
-                REQUEST_LATENCY.labels(endpoint=endpoint).observe(process_time)
-
-            return response
-        finally:
-            ACTIVE_CONNECTIONS.dec()
-
-    def _normalize_endpoint(self, path: str) -> str:
-        """Normalize endpoint path to reduce cardinality."""
-        # Replace IDs with placeholders
-        parts = path.split('/')
-        normalized = []
-        for part in parts:
-            if part and (part.isdigit() or len(part) == 36 or part.startswith('mem_')):
-                normalized.append('{id}')
-            else:
-                normalized.append(part)
-        return '/'.join(normalized)
+    def on_finish(self, ctx: RequestContext):
+        ACTIVE_CONNECTIONS.dec()
+
+        # Skip metrics endpoint to avoid recursion
+        if ctx.path != "/metrics":
+            endpoint = normalize_endpoint(ctx.path)
+            REQUEST_COUNT.labels(
+                endpoint=endpoint,
+                method=ctx.method,
+                status=str(ctx.status_code)
+            ).inc()
+            REQUEST_LATENCY.labels(endpoint=endpoint).observe(ctx.latency)
 
 
 def get_metrics_response() -> Response:
@@ -194,3 +210,13 @@ def set_queue_size(queue_name: str, size: int):
 def record_queue_processing(queue_name: str, duration: float):
     """Record queue processing time."""
     QUEUE_PROCESSING_TIME.labels(queue_name=queue_name).observe(duration)
+
+
+def record_persist_flush(copied: int, appended: int, deleted: int, nbytes: int, lag: float, dirty: int):
+    """Record one RAM-mode persistence flush."""
+    PERSIST_FILES_TOTAL.labels(op="copy").inc(copied)
+    PERSIST_FILES_TOTAL.labels(op="append").inc(appended)
+    PERSIST_FILES_TOTAL.labels(op="delete").inc(deleted)
+    PERSIST_BYTES_TOTAL.inc(nbytes)
+    PERSIST_FLUSH_LAG_SECONDS.observe(lag)
+    PERSIST_DIRTY_FILES.set(dirty)
@@ -5,9 +5,11 @@ Provides intelligent file I/O for RAM-mode operation:
 - Write-through for critical files (prompts, configs, credentials)
 - Write-back for non-critical files (logs, temp data)
 - Automatic detection of RAM-mode vs disk-mode
+- Incremental persistence: only changed files are copied (PersistEngine)
 
 Critical files are written to BOTH RAM and disk immediately.
-Non-critical files are written to RAM only (streamed to disk by background sync).
+Non-critical files are written to RAM and marked dirty; the persist engine
+copies them to disk in batches, at most FLUSH_WINDOW seconds later.
 
 Usage:
     from app.utils.rammode_io import write_file, read_file, is_critical_path
@@ -21,10 +23,15 @@ Usage:
 """
 
 import asyncio
+import fcntl
 import os
+import secrets
 import shutil
+import stat
+import threading
+import time
 from pathlib import Path
-from typing import Optional, Union
+from typing import Any, Dict, List, Optional, Tuple, Union
 import logging
 
 # Try to use aiofiles for async I/O
@@ -34,12 +41,22 @@ try:
 except ImportError:
     _HAS_AIOFILES = False
 
+try:
+    from .metrics import record_persist_flush
+except ImportError:
+    record_persist_flush = None
+
 logger = logging.getLogger("ailinux.rammode_io")
 
 # Configuration
 TMPFS_MOUNT = Path("/var/tristar")
 PERSIST_DIR = Path("/opt/triforce/persist")
 
+FLUSH_WINDOW = 2.0        # seconds changes are coalesced before a flush
+RAMMODE_CHECK_TTL = 30.0  # seconds the tmpfs mount check is cached
+TMP_SUFFIX = ".persist-tmp"
+STALE_TMP_AGE = 600.0     # seconds before a temp file counts as left over by a dead process
+
 # Critical paths that need immediate disk persistence (write-through)
 # These are written to BOTH RAM and disk immediately
 CRITICAL_PATTERNS = [
@@ -59,8 +76,32 @@ NON_CRITICAL_PATTERNS = [
 ]
 
 
+_rammode_checked: Tuple[float, bool] = (0.0, False)
+
+
 def is_rammode_active() -> bool:
-    """Check if RAM-mode (tmpfs) is active"""
+    """Check if RAM-mode (tmpfs) is active (cached for RAMMODE_CHECK_TTL)"""
+    global _rammode_checked
+    checked_at, active = _rammode_checked
+    now = time.monotonic()
+    if checked_at and now - checked_at < RAMMODE_CHECK_TTL:
+        return active
+    active = _detect_rammode()
+    _rammode_checked = (now, active)
+    return active
+
+
+def _detect_rammode() -> bool:
+    try:
+        fstype = None
+        with open("/proc/mounts") as f:
+            for line in f:
+                fields = line.split()
+                if len(fields) >= 3 and fields[1] == str(TMPFS_MOUNT):
+                    fstype = fields[2]  # last entry wins (over-mounts)
+        return fstype == "tmpfs"
+    except OSError:
+        pass
     try:
         import subprocess
         result = subprocess.run(
@@ -120,6 +161,300 @@ def get_persist_path(ram_path: Union[str, Path]) -> Path:
     return PERSIST_DIR / rel_path
 
 
+def _is_append_only(path: Path) -> bool:
+    """Logs only grow: a shorter persist copy is a prefix of the RAM file."""
+    return str(path).startswith(str(TMPFS_MOUNT / "logs") + "/")
+
+
+class PersistEngine:
+    """
+    Incremental RAM -> disk persistence.
+
+    write_file, delete_file and write_log mark changed paths dirty. A
+    background task copies them to PERSIST_DIR in batches, at most
+    FLUSH_WINDOW seconds after the first change. A path missing from RAM
+    is deleted from the persist directory.
+
+    - Copies go to a temporary file that is renamed over the target, so
+      the persist directory never holds half-written files. Temp names are
+      unique per process, since every uvicorn worker runs an engine.
+    - Logs that only grew get just their new tail appended, under an
+      flock on the persist copy.
+    - Directory syncs skip files whose size and mtime already match.
+    - start() reconciles the whole tree the same way. Changes that were
+      still dirty when a previous process died are persisted then.
+    """
+
+    def __init__(self, window: float = FLUSH_WINDOW):
+        self.window = window
+        self._dirty: Dict[Path, float] = {}  # RAM path -> first change (monotonic)
+        self._task: Optional[asyncio.Task] = None
+        self._io_lock = threading.Lock()  # flush thread vs. sync_to_persist callers
+        self._stats: Dict[str, Any] = {
+            "flushes": 0,
+            "files_copied": 0,
+            "files_appended": 0,
+            "files_deleted": 0,
+            "files_skipped": 0,
+            "bytes_copied": 0,
+            "errors": 0,
+            "last_flush_lag_s": 0.0,
+            "max_flush_lag_s": 0.0,
+            "last_flush_at": None,
+        }
+
+    # ------------------------------------------------------------------
+    # Dirty tracking
+    # ------------------------------------------------------------------
+    def mark_dirty(self, path: Union[str, Path]):
+        """Schedule a RAM path (file, directory or deleted file) for the next flush."""
+        path = Path(path)
+        if not str(path).startswith(str(TMPFS_MOUNT)):
+            return
+        self._dirty.setdefault(path, time.monotonic())
+        if self._task is None or self._task.done():
+            try:
+                self._task = asyncio.get_running_loop().create_task(self._run())
+            except RuntimeError:
+                pass  # no loop: picked up by the next flush
+
+    async def _run(self):
+        while self._dirty:
+            await asyncio.sleep(self.window)
+            await self.flush()
+
+    async def flush(self) -> bool:
+        """Persist all dirty paths now."""
+        if not self._dirty:
+            return True
+        batch, self._dirty = self._dirty, {}
+        failed = await asyncio.to_thread(self._flush_batch, batch)
+        for path in failed:
+            self._dirty.setdefault(path, batch[path])  # retried with the next flush
+        return not failed
+
+    async def persist_now(self, path: Union[str, Path]) -> bool:
+        """Write-through: persist one path immediately (off the event loop)."""
+        path = Path(path)
+        self._dirty.pop(path, None)
+        return await asyncio.to_thread(self.sync_path, path)
+
+    # ------------------------------------------------------------------
+    # Copying (worker threads)
+    # ------------------------------------------------------------------
+    def _flush_batch(self, batch: Dict[Path, float]) -> List[Path]:
+        if not is_rammode_active():
+            return []
+        before = dict(self._stats)
+        failed: List[Path] = []
+        with self._io_lock:
+            for path in batch:
+                try:
+                    self._sync(path)
+                except OSError as e:
+                    self._stats["errors"] += 1
+                    logger.warning(f"Failed to persist {path}: {e}")
+                    failed.append(path)
+            lag = time.monotonic() - min(batch.values())
+            self._stats["flushes"] += 1
+            self._stats["last_flush_lag_s"] = round(lag, 3)
+            self._stats["max_flush_lag_s"] = round(max(lag, self._stats["max_flush_lag_s"]), 3)
+            self._stats["last_flush_at"] = time.time()
+        if record_persist_flush:
+            record_persist_flush(
+                self._stats["files_copied"] - before["files_copied"],
+                self._stats["files_appended"] - before["files_appended"],
+                self._stats["files_deleted"] - before["files_deleted"],
+                self._stats["bytes_copied"] - before["bytes_copied"],
+                lag,
+                len(self._dirty),
+            )
+        logger.debug(f"Persist flush: {len(batch)} paths, lag {lag:.2f}s")
+        return failed
+
+    def sync_path(self, path: Union[str, Path]) -> bool:
+        """Synchronously persist a file or directory (incremental)."""
+        if not is_rammode_active():
+            return True
+        path = Path(path)
+        if not str(path).startswith(str(TMPFS_MOUNT)):
+            return False
+        try:
+            with self._io_lock:
+                self._sync(path)
+            return True
+        except OSError as e:
+            self._stats["errors"] += 1
+            logger.error(f"Failed to sync {path}: {e}")
+            return False
+
+    def _sync(self, path: Path, delete: bool = True):
+        target = get_persist_path(path)
+        try:
+            st = path.stat()
+        except FileNotFoundError:
+            if delete:
+                self._remove(target)
+            return
+        if stat.S_ISDIR(st.st_mode):
+            self._sync_tree(path, target, delete)
+        elif stat.S_ISREG(st.st_mode):
+            # Explicitly changed: same size and mtime can still differ in content
+            self._copy_file(path, target, st, force=True)
+
+    def _remove(self, target: Path):
+        try:
+            if target.is_dir():
+                shutil.rmtree(target)
+            else:
+                target.unlink()
+            self._stats["files_deleted"] += 1
+        except FileNotFoundError:
+            pass
+
+    def _copy_file(self, src: Path, dst: Path, st: os.stat_result, force: bool = False):
+        try:
+            dst_st = dst.stat()
+        except FileNotFoundError:
+            dst_st = None
+        if not force and dst_st and dst_st.st_size == st.st_size and dst_st.st_mtime_ns == st.st_mtime_ns:
+            self._stats["files_skipped"] += 1
+            return
+
+        if dst_st and 0 < dst_st.st_size < st.st_size and _is_append_only(src):
+            with open(src, "rb") as fsrc, open(dst, "ab") as fdst:
+                # Another worker may be appending the same tail
+                fcntl.flock(fdst, fcntl.LOCK_EX)
+                copied = os.fstat(fdst.fileno()).st_size
+                if copied < st.st_size:
+                    fsrc.seek(copied)
+                    shutil.copyfileobj(fsrc, fdst)
+                    fdst.flush()
+                    os.fsync(fdst.fileno())
+                    os.utime(dst, ns=(st.st_atime_ns, st.st_mtime_ns))
+                    self._stats["files_appended"] += 1
+                    self._stats["bytes_copied"] += st.st_size - copied
+                else:
+                    self._stats["files_skipped"] += 1
+            return
+
+        dst.parent.mkdir(parents=True, exist_ok=True)
+        tmp = dst.with_name(f".{dst.name}.{os.getpid()}-{secrets.token_hex(4)}{TMP_SUFFIX}")
+        try:
+            with open(src, "rb") as fsrc, open(tmp, "wb") as fdst:
+                shutil.copyfileobj(fsrc, fdst)
+                fdst.flush()
+                os.fsync(fdst.fileno())
+            shutil.copymode(src, tmp)
+            os.utime(tmp, ns=(st.st_atime_ns, st.st_mtime_ns))
+            os.replace(tmp, dst)
+        except BaseException:
+            tmp.unlink(missing_ok=True)
+            raise
+        self._stats["files_copied"] += 1
+        self._stats["bytes_copied"] += st.st_size
+
+    def _sync_tree(self, src_dir: Path, dst_dir: Path, delete: bool = True):
+        """
+        Copy changed files; with delete, also remove what is gone from RAM.
+
+        A file that fails is logged and skipped so the rest of the tree is
+        still synced; OSError is raised at the end so the caller retries.
+        """
+        failed = 0
+        for dirpath, dirnames, filenames in os.walk(src_dir):
+            for name in filenames:
+                src = Path(dirpath) / name
+                try:
+                    st = src.lstat()
+                    if stat.S_ISREG(st.st_mode):
+                        self._copy_file(src, get_persist_path(src), st)
+                except FileNotFoundError:
+                    continue
+                except OSError as e:
+                    failed += 1
+                    logger.warning(f"Failed to persist {src}: {e}")
+
+        if dst_dir.is_dir():
+            stale_before = time.time() - STALE_TMP_AGE
+            for dirpath, dirnames, filenames in os.walk(dst_dir):
+                rel = Path(dirpath).relative_to(PERSIST_DIR)
+                for name in filenames:
+                    path = Path(dirpath) / name
+                    try:
+                        if name.endswith(TMP_SUFFIX):
+                            # Interrupted copy; a recent one may belong to another worker
+                            if path.stat().st_ctime < stale_before:
+                                path.unlink()
+                        elif delete and not (TMPFS_MOUNT / rel / name).exists():
+                            self._remove(path)
+                    except FileNotFoundError:
+                        continue
+                    except OSError as e:
+                        failed += 1
+                        logger.warning(f"Failed to clean up {path}: {e}")
+                if delete:
+                    for name in list(dirnames):
+                        if not (TMPFS_MOUNT / rel / name).exists():
+                            try:
+                                self._remove(Path(dirpath) / name)
+                            except OSError as e:
+                                failed += 1
+                                logger.warning(f"Failed to remove {Path(dirpath) / name}: {e}")
+                            dirnames.remove(name)
+
+        if failed:
+            raise OSError(f"{failed} paths under {src_dir} could not be persisted")
+
+    # ------------------------------------------------------------------
+    # Lifecycle
+    # ------------------------------------------------------------------
+    async def start(self):
+        """Reconcile RAM and persist directory in the background (no deletes)."""
+        if not is_rammode_active():
+            return
+
+        def _reconcile():
+            with self._io_lock:
+                self._sync(TMPFS_MOUNT, delete=False)
+
+        async def _run_reconcile():
+            started = time.monotonic()
+            try:
+                await asyncio.to_thread(_reconcile)
+                logger.info(
+                    f"Persist reconcile done in {time.monotonic() - started:.1f}s: "
+                    f"{self._stats['files_copied']} copied, {self._stats['files_skipped']} unchanged"
+                )
+            except Exception as e:
+                logger.error(f"Persist reconcile failed: {e}")
+
+        asyncio.create_task(_run_reconcile())
+
+    async def close(self):
+        """Flush pending changes and stop the background task."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except (asyncio.CancelledError, Exception):
+                pass
+            self._task = None
+        await self.flush()
+
+    def get_stats(self) -> Dict[str, Any]:
+        oldest = min(self._dirty.values(), default=None)
+        return {
+            "rammode": is_rammode_active(),
+            "dirty": len(self._dirty),
+            "flush_lag_s": round(time.monotonic() - oldest, 3) if oldest is not None else 0.0,
+            **self._stats,
+        }
+
+
+persist_engine = PersistEngine()
+
+
 async def write_file(
     path: Union[str, Path],
     content: Union[str, bytes],
@@ -162,25 +497,14 @@ async def write_file(
             else:
                 path.write_bytes(content)
 
-        # Write-through: also write to persist directory
-        if write_through and is_rammode_active():
-            persist_path = get_persist_path(path)
-            persist_path.parent.mkdir(parents=True, exist_ok=True)
-
-            if isinstance(content, str):
-                if _HAS_AIOFILES:
-                    async with aiofiles.open(persist_path, "w", encoding=encoding) as f:
-                        await f.write(content)
-                else:
-                    persist_path.write_text(content, encoding=encoding)
+        # Write-through: persist immediately; otherwise with the next flush
+        if is_rammode_active():
+            if write_through:
+                if not await persist_engine.persist_now(path):
+                    return False
+                logger.debug(f"Write-through: {path}")
             else:
-                if _HAS_AIOFILES:
-                    async with aiofiles.open(persist_path, "wb") as f:
-                        await f.write(content)
-                else:
-                    persist_path.write_bytes(content)
-
-            logger.debug(f"Write-through: {path} -> {persist_path}")
+                persist_engine.mark_dirty(path)
 
         return True
 
@@ -253,12 +577,13 @@ async def delete_file(
         if path.exists():
             path.unlink()
 
-        # Write-through: also delete from persist
-        if write_through and is_rammode_active():
-            persist_path = get_persist_path(path)
-            if persist_path.exists():
-                persist_path.unlink()
-                logger.debug(f"Write-through delete: {persist_path}")
+        # Write-through: also delete from persist now; otherwise with the next flush
+        if is_rammode_active():
+            if write_through:
+                await persist_engine.persist_now(path)
+                logger.debug(f"Write-through delete: {path}")
+            else:
+                persist_engine.mark_dirty(path)
 
         return True
 
@@ -272,37 +597,19 @@ def sync_to_persist(path: Union[str, Path]) -> bool:
     Synchronously copy a file/directory to persist.
     Use for immediate backup of important changes.
 
+    Only files that differ from their persist copy are copied; files
+    removed from RAM are removed from persist.
+
     Args:
         path: Path to sync
 
     Returns:
         True if successful
     """
-    if not is_rammode_active():
-        return True  # Not in RAM mode, nothing to sync
-
-    path = Path(path)
-
-    if not str(path).startswith(str(TMPFS_MOUNT)):
-        return False
-
-    try:
-        persist_path = get_persist_path(path)
-
-        if path.is_dir():
-            if persist_path.exists():
-                shutil.rmtree(persist_path)
-            shutil.copytree(path, persist_path)
-        else:
-            persist_path.parent.mkdir(parents=True, exist_ok=True)
-            shutil.copy2(path, persist_path)
-
+    ok = persist_engine.sync_path(path)
+    if ok:
         logger.info(f"Synced to persist: {path}")
-        return True
-
-    except Exception as e:
-        logger.error(f"Failed to sync {path}: {e}")
-        return False
+    return ok
 
 
 async def force_sync_all() -> bool:
@@ -313,12 +620,12 @@ async def force_sync_all() -> bool:
     if not is_rammode_active():
         return True
 
-    success = True
+    success = await persist_engine.flush()
 
     for pattern in CRITICAL_PATTERNS:
         source = TMPFS_MOUNT / pattern.rstrip("/")
         if source.exists():
-            if not sync_to_persist(source):
+            if not await asyncio.to_thread(sync_to_persist, source):
                 success = False
 
     return success
@@ -366,6 +673,8 @@ async def write_log(category: str, content: str) -> bool:
         else:
             with open(path, "a", encoding="utf-8") as f:
                 f.write(content + "\n")
+        if is_rammode_active():
+            persist_engine.mark_dirty(path)
         return True
     except Exception as e:
         logger.error(f"Failed to write log: {e}")
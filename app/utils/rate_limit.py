@@ -0,0 +1,583 @@
+"""
+Rate limits and quota counters shared by all workers.
+
+Limits are declared as policies: TokenBucket (burst capacity with steady
+refill) or SlidingWindow (sliding-window counter: the current and the
+previous fixed window, the previous one weighted by how much of it still
+overlaps the sliding window). Each policy keeps a constant amount of state
+per key, so a check is O(1) no matter how many requests are in the window.
+
+State lives in one of two backends:
+
+- redis: a Lua script updates every policy of a check atomically, using the
+  Redis clock. Limits hold across workers and hosts.
+- local: a fixed-size hash table in a memory-mapped file (/dev/shm), with
+  byte-range locks per slot group. Limits hold across the workers of one host.
+
+The redis backend falls back to the local one while Redis is unreachable.
+"""
+
+from __future__ import annotations
+
+import fcntl
+import hashlib
+import logging
+import math
+import mmap
+import os
+import struct
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple, Union
+
+import redis.asyncio as aioredis
+
+from ..config import get_settings
+
+logger = logging.getLogger("ailinux.rate_limit")
+
+REDIS_PREFIX = "ailinux:rl:"
+REDIS_TIMEOUT = 1.0           # seconds per Redis call before using the local table
+REDIS_RETRY_INTERVAL = 30.0   # seconds to stay on the local table after a Redis error
+
+LOCAL_GROUPS = 2048           # slot groups in the local table
+GROUP_SLOTS = 8               # slots per group, a key only probes its own group
+
+_MAGIC = b"TFRLIM1\n"
+_HEADER = struct.Struct("<8sII")        # magic, version, groups
+_HEADER_SIZE = 64
+_SLOT = struct.Struct("<Qdddd")         # key hash, expires, a, b, c
+_SLOT_HEAD = struct.Struct("<Qd")
+_GROUP_BYTES = GROUP_SLOTS * _SLOT.size
+_VERSION = 1
+
+State = Tuple[float, float, float]
+
+
+@dataclass(frozen=True)
+class _Outcome:
+    allowed: bool
+    remaining: int
+    retry_after: float
+    current: float
+    state: Optional[State] = None
+    expires: float = 0.0
+
+
+@dataclass(frozen=True)
+class TokenBucket:
+    """Up to ``capacity`` requests at once, refilled at ``refill_per_sec``."""
+    capacity: float
+    refill_per_sec: float
+
+    kind = "tb"
+
+    @property
+    def name(self) -> str:
+        return "tb"
+
+    @property
+    def limit(self) -> int:
+        return int(self.capacity)
+
+    @property
+    def params(self) -> Tuple[float, float]:
+        return float(self.capacity), float(self.refill_per_sec)
+
+    def evaluate(self, state: Optional[State], cost: float, now: float) -> _Outcome:
+        # state: (tokens, updated_at, -)
+        capacity, rate = self.params
+        tokens = capacity
+        if state is not None:
+            tokens = min(capacity, state[0] + max(0.0, now - state[1]) * rate)
+        need = max(cost, 1)
+        allowed = tokens >= cost
+        retry = (need - tokens) / rate if tokens < need else 0.0
+        if allowed:
+            tokens -= cost
+        return _Outcome(
+            allowed, math.floor(tokens), retry, capacity - tokens,
+            (tokens, now, 0.0), now + (capacity - tokens) / rate + 1,
+        )
+
+
+@dataclass(frozen=True)
+class SlidingWindow:
+    """At most ``limit`` requests in any ``window`` seconds (sliding-window counter)."""
+    limit: int
+    window: float
+
+    kind = "sw"
+
+    @property
+    def name(self) -> str:
+        return f"sw{self.window:g}"
+
+    @property
+    def params(self) -> Tuple[float, float]:
+        return float(self.limit), float(self.window)
+
+    def evaluate(self, state: Optional[State], cost: float, now: float) -> _Outcome:
+        # state: (window index, count in that window, count in the window before)
+        limit, window = self.params
+        idx = math.floor(now / window)
+        cur = prev = 0.0
+        if state is not None:
+            if state[0] == idx:
+                cur, prev = state[1], state[2]
+            elif state[0] == idx - 1:
+                prev = state[1]
+        elapsed = (now - idx * window) / window
+        estimate = prev * (1 - elapsed) + cur
+        need = max(cost, 1)
+        allowed = estimate + cost <= limit
+
+        retry = 0.0
+        if estimate + need > limit:
+            room = limit - cur - need
+            if room >= 0:
+                # the previous window's share fades out
+                retry = ((1 - room / prev) - elapsed) * window
+            else:
+                # only possible once this window has become the previous one
+                fade = 1.0
+                if cur > 0:
+                    fade = min(1.0, max(0.0, 1 - (limit - need) / cur))
+                retry = (1 - elapsed + fade) * window
+
+        if allowed:
+            cur += cost
+            estimate += cost
+        return _Outcome(
+            allowed, max(0, math.floor(limit - estimate)), retry, estimate,
+            (float(idx), cur, prev), (idx + 2) * window,
+        )
+
+
+Policy = Union[TokenBucket, SlidingWindow]
+
+
+@dataclass(frozen=True)
+class LimitResult:
+    """Outcome of a check, reported for the most restrictive policy."""
+    allowed: bool
+    limit: int
+    remaining: int
+    retry_after: float
+    current: float
+    policy: Optional[Policy] = None
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "allowed": self.allowed,
+            "limit": self.limit,
+            "remaining": self.remaining,
+            "retry_after": round(self.retry_after, 3),
+            "current": round(self.current, 3),
+        }
+
+
+def _combine(policies: Sequence[Policy], outcomes: Sequence[_Outcome]) -> LimitResult:
+    pairs = list(zip(policies, outcomes))
+    blocked = [pair for pair in pairs if not pair[1].allowed]
+    if blocked:
+        policy, outcome = max(blocked, key=lambda pair: pair[1].retry_after)
+        return LimitResult(False, policy.limit, outcome.remaining, outcome.retry_after, outcome.current, policy)
+    policy, outcome = min(pairs, key=lambda pair: pair[1].remaining)
+    retry = max(o.retry_after for o in outcomes)
+    return LimitResult(True, policy.limit, outcome.remaining, retry, outcome.current, policy)
+
+
+# ============================================================================
+# Redis backend
+# ============================================================================
+
+# KEYS: one hash per policy. ARGV: cost, then kind, p1, p2 for every policy.
+# Mirrors TokenBucket.evaluate / SlidingWindow.evaluate.
+_ACQUIRE_LUA = """
+if redis.replicate_commands then redis.replicate_commands() end
+local t = redis.call('TIME')
+local now = tonumber(t[1]) + tonumber(t[2]) / 1000000
+local cost = tonumber(ARGV[1])
+local need = math.max(cost, 1)
+local out, states, all_ok = {}, {}, true
+for i, key in ipairs(KEYS) do
+  local kind = ARGV[i * 3 - 1]
+  local p1 = tonumber(ARGV[i * 3])
+  local p2 = tonumber(ARGV[i * 3 + 1])
+  local s = redis.call('HMGET', key, 'a', 'b', 'c')
+  local a, b, c = tonumber(s[1]), tonumber(s[2]), tonumber(s[3])
+  local ok, remaining, retry, current, ttl
+  if kind == 'tb' then
+    local tokens = p1
+    if a then tokens = math.min(p1, a + math.max(0, now - b) * p2) end
+    ok = tokens >= cost
+    retry = 0
+    if tokens < need then retry = (need - tokens) / p2 end
+    if ok then tokens = tokens - cost end
+    remaining = math.floor(tokens)
+    current = p1 - tokens
+    a, b, c = tokens, now, 0
+    ttl = (p1 - tokens) / p2 + 1
+  else
+    local idx = math.floor(now / p2)
+    local cur, prev = 0, 0
+    if a == idx then cur, prev = b, c elseif a == idx - 1 then prev = b end
+    local elapsed = (now - idx * p2) / p2
+    local est = prev * (1 - elapsed) + cur
+    ok = est + cost <= p1
+    retry = 0
+    if est + need > p1 then
+      local room = p1 - cur - need
+      if room >= 0 then
+        retry = ((1 - room / prev) - elapsed) * p2
+      else
+        local fade = 1
+        if cur > 0 then fade = math.min(1, math.max(0, 1 - (p1 - need) / cur)) end
+        retry = (1 - elapsed + fade) * p2
+      end
+    end
+    if ok then cur = cur + cost; est = est + cost end
+    remaining = math.max(0, math.floor(p1 - est))
+    current = est
+    a, b, c = idx, cur, prev
+    ttl = (idx + 2) * p2 - now
+  end
+  if not ok then all_ok = false end
+  states[i] = {a, b, c, ttl}
+  out[#out + 1] = ok and 1 or 0
+  out[#out + 1] = tostring(remaining)
+  out[#out + 1] = tostring(retry)
+  out[#out + 1] = tostring(current)
+end
+if all_ok and cost > 0 then
+  for i, key in ipairs(KEYS) do
+    local st = states[i]
+    redis.call('HSET', key, 'a', st[1], 'b', st[2], 'c', st[3])
+    redis.call('PEXPIRE', key, math.ceil(st[4] * 1000))
+  end
+end
+return out
+"""
+
+_INCR_LUA = """
+local v = redis.call('INCRBY', KEYS[1], ARGV[1])
+if redis.call('TTL', KEYS[1]) < 0 then redis.call('EXPIRE', KEYS[1], ARGV[2]) end
+return v
+"""
+
+
+class _RedisBackend:
+    def __init__(self, url: str):
+        self.url = url
+        self._redis: Optional[aioredis.Redis] = None
+        self._acquire_script = None
+        self._incr_script = None
+
+    def _client(self) -> aioredis.Redis:
+        if self._redis is None:
+            self._redis = aioredis.from_url(
+                self.url,
+                decode_responses=True,
+                socket_timeout=REDIS_TIMEOUT,
+                socket_connect_timeout=REDIS_TIMEOUT,
+            )
+            self._acquire_script = self._redis.register_script(_ACQUIRE_LUA)
+            self._incr_script = self._redis.register_script(_INCR_LUA)
+        return self._redis
+
+    async def acquire(self, entries: Sequence[Tuple[str, Policy]], cost: float) -> List[_Outcome]:
+        self._client()
+        args: List[Any] = [cost]
+        for _, policy in entries:
+            args.extend((policy.kind, *policy.params))
+        raw = await self._acquire_script(keys=[REDIS_PREFIX + sub for sub, _ in entries], args=args)
+        return [
+            _Outcome(bool(int(raw[i])), int(float(raw[i + 1])), float(raw[i + 2]), float(raw[i + 3]))
+            for i in range(0, len(raw), 4)
+        ]
+
+    async def incr(self, key: str, amount: int, ttl: int) -> int:
+        self._client()
+        return int(await self._incr_script(keys=[REDIS_PREFIX + key], args=[amount, ttl]))
+
+    async def get(self, key: str) -> int:
+        value = await self._client().get(REDIS_PREFIX + key)
+        return int(value) if value else 0
+
+    async def delete(self, keys: Sequence[str]):
+        await self._client().delete(*(REDIS_PREFIX + key for key in keys))
+
+    async def aclose(self):
+        if self._redis is not None:
+            await self._redis.aclose()
+            self._redis = None
+
+
+# ============================================================================
+# Local shared-memory backend
+# ============================================================================
+
+def _default_table_path() -> str:
+    base = "/dev/shm" if os.path.isdir("/dev/shm") else tempfile.gettempdir()
+    return os.path.join(base, "ailinux-ratelimit.tbl")
+
+
+class _LocalTable:
+    """
+    Fixed-size hash table in a shared mmap file.
+
+    A key hashes to one group of GROUP_SLOTS slots and is only looked up
+    there. Expired slots are reused first, otherwise the slot expiring
+    soonest is evicted. fcntl range locks cover one group each; they are
+    per process, so a thread lock serializes the threads of this process.
+    """
+
+    def __init__(self, path: str, groups: int = LOCAL_GROUPS):
+        self.path = path
+        self.groups = groups
+        self.evictions = 0
+        self._size = _HEADER_SIZE + groups * _GROUP_BYTES
+        self._thread_lock = threading.Lock()
+
+        header = _HEADER.pack(_MAGIC, _VERSION, groups)
+        fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o600)
+        try:
+            fcntl.lockf(fd, fcntl.LOCK_EX)  # whole file, excludes all group locks
+            try:
+                if os.fstat(fd).st_size != self._size or os.pread(fd, _HEADER.size, 0) != header:
+                    os.ftruncate(fd, 0)
+                    os.ftruncate(fd, self._size)
+                    os.pwrite(fd, header, 0)
+            finally:
+                fcntl.lockf(fd, fcntl.LOCK_UN)
+            self._mm = mmap.mmap(fd, self._size)
+        except BaseException:
+            os.close(fd)
+            raise
+        self._fd = fd
+
+    def _locate(self, key: str) -> Tuple[int, int]:
+        h = int.from_bytes(hashlib.blake2b(key.encode(), digest_size=8).digest(), "little")
+        return h % self.groups, h or 1
+
+    @staticmethod
+    def _group_offset(group: int) -> int:
+        return _HEADER_SIZE + group * _GROUP_BYTES
+
+    @contextmanager
+    def _locked(self, groups: Iterable[int]) -> Iterator[None]:
+        ordered = sorted(set(groups))  # fixed order, no lock cycles between processes
+        with self._thread_lock:
+            for group in ordered:
+                fcntl.lockf(self._fd, fcntl.LOCK_EX, _GROUP_BYTES, self._group_offset(group))
+            try:
+                yield
+            finally:
+                for group in reversed(ordered):
+                    fcntl.lockf(self._fd, fcntl.LOCK_UN, _GROUP_BYTES, self._group_offset(group))
+
+    def _find(self, group: int, h: int, now: float, create: bool) -> Optional[int]:
+        base = self._group_offset(group)
+        free = oldest = None
+        oldest_expires = math.inf
+        for i in range(GROUP_SLOTS):
+            offset = base + i * _SLOT.size
+            slot_hash, expires = _SLOT_HEAD.unpack_from(self._mm, offset)
+            if slot_hash == h:
+                return offset
+            if slot_hash == 0 or expires <= now:
+                if free is None:
+                    free = offset
+            elif expires < oldest_expires:
+                oldest, oldest_expires = offset, expires
+        if not create:
+            return None
+        if free is None:
+            free = oldest
+            self.evictions += 1
+        _SLOT.pack_into(self._mm, free, h, 0.0, 0.0, 0.0, 0.0)
+        return free
+
+    def _state(self, offset: Optional[int], now: float) -> Optional[State]:
+        if offset is None:
+            return None
+        _, expires, a, b, c = _SLOT.unpack_from(self._mm, offset)
+        return (a, b, c) if expires > now else None
+
+    def acquire(self, entries: Sequence[Tuple[str, Policy]], cost: float, now: float) -> List[_Outcome]:
+        located = [(self._locate(sub), policy) for sub, policy in entries]
+        with self._locked(group for (group, _), _ in located):
+            outcomes = [
+                policy.evaluate(self._state(self._find(group, h, now, False), now), cost, now)
+                for (group, h), policy in located
+            ]
+            if cost > 0 and all(o.allowed for o in outcomes):
+                for ((group, h), _), outcome in zip(located, outcomes):
+                    offset = self._find(group, h, now, True)
+                    _SLOT.pack_into(self._mm, offset, h, outcome.expires, *outcome.state)
+        return outcomes
+
+    def incr(self, key: str, amount: int, ttl: int, now: float) -> int:
+        group, h = self._locate(key)
+        with self._locked((group,)):
+            offset = self._find(group, h, now, True)
+            _, expires, value, _, _ = _SLOT.unpack_from(self._mm, offset)
+            if expires <= now:
+                value, expires = 0.0, now + ttl
+            value += amount
+            _SLOT.pack_into(self._mm, offset, h, expires, value, 0.0, 0.0)
+        return int(value)
+
+    def get(self, key: str, now: float) -> int:
+        group, h = self._locate(key)
+        with self._locked((group,)):
+            state = self._state(self._find(group, h, now, False), now)
+        return int(state[0]) if state else 0
+
+    def delete(self, keys: Sequence[str], now: float):
+        located = [self._locate(key) for key in keys]
+        with self._locked(group for group, _ in located):
+            for group, h in located:
+                offset = self._find(group, h, now, False)
+                if offset is not None:
+                    _SLOT.pack_into(self._mm, offset, 0, 0.0, 0.0, 0.0, 0.0)
+
+    def close(self):
+        self._mm.close()
+        os.close(self._fd)
+
+
+# ============================================================================
+# Limiter
+# ============================================================================
+
+class SharedLimiter:
+    """Rate limit checks and quota counters on the configured backend."""
+
+    def __init__(self, backend: Optional[str] = None, redis_url: Optional[str] = None, table_path: Optional[str] = None):
+        self._backend = backend
+        self._redis_url = redis_url
+        self._table_path = table_path
+        self._redis: Optional[_RedisBackend] = None
+        self._local: Optional[_LocalTable] = None
+        self._redis_down_until = 0.0
+        self._stats = {"checks": 0, "denied": 0, "redis_errors": 0, "local_fallbacks": 0}
+
+    @property
+    def backend(self) -> str:
+        if self._backend is None:
+            configured = (getattr(get_settings(), "rate_limit_backend", "redis") or "redis").lower()
+            self._backend = configured if configured in ("redis", "local") else "redis"
+        return self._backend
+
+    @property
+    def local(self) -> _LocalTable:
+        if self._local is None:
+            path = self._table_path or getattr(get_settings(), "rate_limit_shm_path", None) or _default_table_path()
+            self._local = _LocalTable(path)
+        return self._local
+
+    def _redis_backend(self) -> Optional[_RedisBackend]:
+        if self.backend != "redis" or time.monotonic() < self._redis_down_until:
+            return None
+        if self._redis is None:
+            self._redis = _RedisBackend(self._redis_url or get_settings().redis_url)
+        return self._redis
+
+    def _redis_failed(self, error: Exception):
+        self._stats["redis_errors"] += 1
+        self._redis_down_until = time.monotonic() + REDIS_RETRY_INTERVAL
+        logger.warning(f"Rate limit Redis unavailable, using host-local limits for {REDIS_RETRY_INTERVAL:g}s: {error}")
+
+    @staticmethod
+    def _entries(key: str, policies: Sequence[Policy]) -> List[Tuple[str, Policy]]:
+        if not policies:
+            raise ValueError("at least one policy is required")
+        return [(f"{key}|{policy.name}", policy) for policy in policies]
+
+    async def _evaluate(self, key: str, policies: Sequence[Policy], cost: float) -> LimitResult:
+        entries = self._entries(key, policies)
+        redis_backend = self._redis_backend()
+        outcomes = None
+        if redis_backend is not None:
+            try:
+                outcomes = await redis_backend.acquire(entries, cost)
+            except Exception as e:
+                self._redis_failed(e)
+        if outcomes is None:
+            if self.backend == "redis":
+                self._stats["local_fallbacks"] += 1
+            outcomes = self.local.acquire(entries, cost, time.time())
+        return _combine(policies, outcomes)
+
+    async def acquire(self, key: str, *policies: Policy, cost: float = 1) -> LimitResult:
+        """Consume ``cost`` from every policy of ``key`` if all of them allow it."""
+        result = await self._evaluate(key, policies, cost)
+        self._stats["checks"] += 1
+        if not result.allowed:
+            self._stats["denied"] += 1
+        return result
+
+    async def peek(self, key: str, *policies: Policy) -> LimitResult:
+        """Current usage of ``key`` without consuming anything."""
+        return await self._evaluate(key, policies, 0)
+
+    async def incr(self, key: str, amount: int, ttl: int) -> int:
+        """Add to a quota counter that expires ``ttl`` seconds after its first increment."""
+        redis_backend = self._redis_backend()
+        if redis_backend is not None:
+            try:
+                return await redis_backend.incr(f"n:{key}", int(amount), int(ttl))
+            except Exception as e:
+                self._redis_failed(e)
+        return self.local.incr(f"{key}|n", int(amount), int(ttl), time.time())
+
+    async def get(self, key: str) -> int:
+        """Current value of a quota counter (0 if unset or expired)."""
+        redis_backend = self._redis_backend()
+        if redis_backend is not None:
+            try:
+                return await redis_backend.get(f"n:{key}")
+            except Exception as e:
+                self._redis_failed(e)
+        return self.local.get(f"{key}|n", time.time())
+
+    async def reset(self, key: str, *policies: Policy):
+        """Drop the state of ``key``'s policies, or of the counter ``key`` without policies."""
+        if policies:
+            keys = [sub for sub, _ in self._entries(key, policies)]
+            redis_keys = keys
+        else:
+            keys, redis_keys = [f"{key}|n"], [f"n:{key}"]
+        redis_backend = self._redis_backend()
+        if redis_backend is not None:
+            try:
+                await redis_backend.delete(redis_keys)
+            except Exception as e:
+                self._redis_failed(e)
+        if self._local is not None or redis_backend is None:
+            self.local.delete(keys, time.time())
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "backend": self.backend,
+            "redis_available": self.backend == "redis" and time.monotonic() >= self._redis_down_until,
+            "local_table": self._local.path if self._local else None,
+            "local_evictions": self._local.evictions if self._local else 0,
+            **self._stats,
+        }
+
+    async def aclose(self):
+        if self._redis is not None:
+            await self._redis.aclose()
+            self._redis = None
+        if self._local is not None:
+            self._local.close()
+            self._local = None
+
+
+shared_limiter = SharedLimiter()
@@ -0,0 +1,175 @@
+"""
+Pure-ASGI request pipeline.
+
+One middleware layer runs every per-request hook: metrics, the performance
+monitor, TriForce request logging and, if enabled, port-based auth. Each
+hook is a stage. All stages share one RequestContext, so a request gets
+one timing source, one trace id and one auth decision.
+
+Unlike BaseHTTPMiddleware, the pipeline adds no task hop per layer and
+does not wrap the response. ASGI messages are forwarded unchanged, so
+streaming bodies (SSE) pass through chunk by chunk. The pipeline only
+observes status and body size on the way.
+"""
+
+from __future__ import annotations
+
+import inspect
+import ipaddress
+import logging
+import uuid
+from dataclasses import dataclass, field
+from time import perf_counter
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Sequence
+
+logger = logging.getLogger("ailinux.request_pipeline")
+
+ASGIApp = Callable[[Dict[str, Any], Callable, Callable], Awaitable[None]]
+
+TRACE_HEADER = b"x-trace-id"
+
+
+def forwarded_client_ip(headers: Any, peer: Optional[str]) -> Optional[str]:
+    """
+    Client IP behind the reverse proxy.
+
+    X-Forwarded-For is only trusted from loopback/private peers (the proxy);
+    its last entry is the address the proxy itself saw.
+    """
+    forwarded = headers.get("x-forwarded-for")
+    if not forwarded or not peer:
+        return peer
+    try:
+        peer_addr = ipaddress.ip_address(peer)
+    except ValueError:
+        return peer
+    if not (peer_addr.is_loopback or peer_addr.is_private):
+        return peer
+    candidate = forwarded.rsplit(",", 1)[-1].strip()
+    try:
+        return str(ipaddress.ip_address(candidate))
+    except ValueError:
+        return peer
+
+
+@dataclass
+class RequestContext:
+    """Per-request state shared by all pipeline stages."""
+    method: str
+    path: str
+    headers: Dict[str, str]
+    trace_id: str
+    client_ip: Optional[str] = None
+    started: float = field(default_factory=perf_counter)
+    first_byte: Optional[float] = None
+    finished: Optional[float] = None
+    status_code: int = 500
+    response_size: int = 0
+    error: Optional[str] = None
+    auth: Optional[str] = None  # set by the auth stage: method used or "denied"
+
+    @classmethod
+    def from_scope(cls, scope: Dict[str, Any]) -> "RequestContext":
+        # Header names are lowercase in ASGI; the last value of a repeated header wins
+        headers = {k.decode("latin-1"): v.decode("latin-1") for k, v in scope.get("headers", ())}
+        client = scope.get("client")
+        return cls(
+            method=scope.get("method", "GET"),
+            path=scope.get("path", ""),
+            headers=headers,
+            trace_id=headers.get("x-trace-id") or headers.get("x-correlation-id") or uuid.uuid4().hex[:12],
+            client_ip=forwarded_client_ip(headers, client[0] if client else None),
+        )
+
+    @property
+    def request_size(self) -> Optional[int]:
+        try:
+            return int(self.headers["content-length"])
+        except (KeyError, ValueError):
+            return None
+
+    @property
+    def latency(self) -> float:
+        """Seconds until the response started (headers sent), like the old middlewares measured."""
+        end = self.first_byte or self.finished or perf_counter()
+        return end - self.started
+
+    @property
+    def duration(self) -> float:
+        """Seconds until the last body chunk was sent."""
+        return (self.finished or perf_counter()) - self.started
+
+
+class PipelineStage:
+    """
+    A hook set run by RequestPipeline; override what is needed.
+
+    on_request may return an ASGI response (e.g. a starlette Response) to
+    answer the request without calling the application. on_finish runs
+    after the response has been sent or the application raised; it may be
+    a coroutine function. It only runs for stages whose on_request ran.
+    """
+
+    def on_request(self, ctx: RequestContext, scope: Dict[str, Any]) -> Optional[ASGIApp]:
+        return None
+
+    def on_finish(self, ctx: RequestContext) -> Optional[Awaitable[None]]:
+        return None
+
+
+class RequestPipeline:
+    """Pure ASGI middleware running all stages around the application."""
+
+    def __init__(self, app: ASGIApp, stages: Sequence[PipelineStage] = ()):
+        self.app = app
+        self.stages: List[PipelineStage] = list(stages)
+
+    async def __call__(self, scope: Dict[str, Any], receive: Callable, send: Callable):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        ctx = RequestContext.from_scope(scope)
+        # request.state.trace_id / .request_context for route handlers
+        state = scope.setdefault("state", {})
+        state["trace_id"] = ctx.trace_id
+        state["request_context"] = ctx
+
+        async def send_wrapper(message: Dict[str, Any]):
+            kind = message["type"]
+            if kind == "http.response.start":
+                ctx.first_byte = perf_counter()
+                ctx.status_code = message["status"]
+                headers = message.get("headers") or []
+                if not any(name.lower() == TRACE_HEADER for name, _ in headers):
+                    message["headers"] = [*headers, (TRACE_HEADER, ctx.trace_id.encode("latin-1"))]
+            elif kind == "http.response.body":
+                ctx.response_size += len(message.get("body", b""))
+            await send(message)
+
+        entered: List[PipelineStage] = []
+        try:
+            rejection = None
+            for stage in self.stages:
+                entered.append(stage)
+                rejection = stage.on_request(ctx, scope)
+                if rejection is not None:
+                    break
+            if rejection is not None:
+                await rejection(scope, receive, send_wrapper)
+            else:
+                await self.app(scope, receive, send_wrapper)
+        except Exception as e:
+            ctx.error = str(e)
+            if ctx.first_byte is None:
+                ctx.status_code = 500
+            raise
+        finally:
+            ctx.finished = perf_counter()
+            for stage in entered:
+                try:
+                    result = stage.on_finish(ctx)
+                    if inspect.isawaitable(result):
+                        await result
+                except Exception as e:
+                    logger.debug(f"Pipeline stage {type(stage).__name__} failed: {e}")
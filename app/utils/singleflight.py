@@ -0,0 +1,73 @@
+"""
+Single-flight execution for asyncio.
+
+Concurrent callers asking for the same key share one execution. The work
+runs in its own task and every caller awaits it through a shield. A
+caller that is cancelled (e.g. its client disconnected) therefore only
+stops waiting. The work keeps running for the other callers and is
+cancelled only when nobody waits for it any more.
+
+One task may serve several keys, e.g. a batch computed for many inputs.
+"""
+
+from __future__ import annotations
+
+import asyncio
+from typing import Awaitable, Callable, Dict, Generic, Hashable, Iterable, Optional, TypeVar
+
+T = TypeVar("T")
+
+
+class SingleFlight(Generic[T]):
+    """In-flight tasks by key, with waiter counting."""
+
+    def __init__(self):
+        self._tasks: Dict[Hashable, "asyncio.Task[T]"] = {}
+        self._waiters: Dict["asyncio.Task[T]", int] = {}
+
+    def __len__(self) -> int:
+        return len(self._tasks)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._tasks
+
+    def pending(self, key: Hashable) -> Optional["asyncio.Task[T]"]:
+        return self._tasks.get(key)
+
+    def start(self, keys: Iterable[Hashable], fn: Callable[[], Awaitable[T]]) -> "asyncio.Task[T]":
+        """Run ``fn`` in a new task registered under all ``keys``."""
+        keys = list(keys)
+        task = asyncio.ensure_future(fn())
+        for key in keys:
+            self._tasks[key] = task
+
+        def done(finished: "asyncio.Task[T]"):
+            for key in keys:
+                if self._tasks.get(key) is finished:
+                    del self._tasks[key]
+            self._waiters.pop(finished, None)
+            if not finished.cancelled():
+                finished.exception()  # waiters re-raise it; no "never retrieved" warning if all left
+
+        task.add_done_callback(done)
+        return task
+
+    async def wait(self, task: "asyncio.Task[T]") -> T:
+        """Await ``task``; the last waiter to be cancelled cancels the task."""
+        self._waiters[task] = self._waiters.get(task, 0) + 1
+        try:
+            return await asyncio.shield(task)
+        except asyncio.CancelledError:
+            if not task.done() and self._waiters.get(task, 0) <= 1:
+                task.cancel()
+            raise
+        finally:
+            if task in self._waiters:
+                self._waiters[task] -= 1
+
+    async def run(self, key: Hashable, fn: Callable[[], Awaitable[T]]) -> T:
+        """Join the execution for ``key`` or start ``fn`` for it."""
+        task = self._tasks.get(key)
+        if task is None:
+            task = self.start([key], fn)
+        return await self.wait(task)
@@ -15,6 +15,8 @@ This enables TriStar to access all system logs for analysis and debugging.
 import asyncio
 import json
 import logging
+import os
+import threading
 import time
 import uuid
 from collections import deque
@@ -23,9 +25,8 @@ from datetime import datetime, timezone
 from enum import Enum
 from pathlib import Path
 from typing import Any, Dict, List, Optional, Set
-from starlette.middleware.base import BaseHTTPMiddleware
-from starlette.requests import Request
-from starlette.responses import Response
+
+from .request_pipeline import PipelineStage, RequestContext, RequestPipeline
 
 logger = logging.getLogger("ailinux.triforce.central")
 
@@ -57,6 +58,15 @@ class LogLevel(str, Enum):
     CRITICAL = "critical"
 
 
+_LEVEL_NUMBERS = {
+    LogLevel.DEBUG: logging.DEBUG,
+    LogLevel.INFO: logging.INFO,
+    LogLevel.WARNING: logging.WARNING,
+    LogLevel.ERROR: logging.ERROR,
+    LogLevel.CRITICAL: logging.CRITICAL,
+}
+
+
 @dataclass
 class TriForceLogEntry:
     """A unified log entry for TriForce"""
@@ -243,6 +253,223 @@ class TriForceLogHandler(logging.Handler):
             pass
 
 
+# Background file writer
+LOG_QUEUE_MAX = 20000          # records waiting for the writer thread
+LOG_ERROR_RESERVE = 2000       # extra room for error records when the queue is full
+LOG_BATCH_MAX = 1000           # records per write batch, also wakes the writer early
+LOG_FLUSH_INTERVAL = 0.5       # seconds the idle writer waits for more records
+LOG_FSYNC_INTERVAL = 2.0       # seconds between fsyncs of written files
+LOG_MAX_BYTES = 100 * 1024 * 1024
+LOG_HANDLE_IDLE = 300.0        # close file handles unused this long
+
+
+@dataclass
+class _LogFile:
+    """An open log stream"""
+    path: Path
+    handle: Any
+    size: int
+    last_write: float
+    dirty: bool = False
+
+
+class LogWriter:
+    """
+    Background thread that writes the file logs.
+
+    Callers only append to a deque, so logging does no locking and no file
+    I/O on the event loop. The writer thread keeps one open handle per log
+    stream, writes each stream's records of a batch with a single write,
+    fsyncs periodically and rotates by date (new path) and size. When the
+    queue backs up, debug records are shed first and, once it is full,
+    everything below error.
+    """
+
+    def __init__(self, max_queue: int = LOG_QUEUE_MAX, max_bytes: int = LOG_MAX_BYTES):
+        self.max_queue = max_queue
+        self.shed_debug_at = max_queue // 2
+        self.max_bytes = max_bytes
+        self._queue: deque = deque()
+        self._wake = threading.Event()
+        self._files: Dict[str, _LogFile] = {}  # stream -> open file
+        self._thread: Optional[threading.Thread] = None
+        self._start_lock = threading.Lock()
+        self._closed = False
+        self._last_error_log = 0.0
+        self._stats = {
+            "written": 0,
+            "batches": 0,
+            "fsyncs": 0,
+            "rotations": 0,
+            "shed_debug": 0,
+            "dropped": 0,
+            "errors": 0,
+        }
+
+    def submit(self, stream: str, path: Path, record: Any, level: int = logging.INFO) -> bool:
+        """
+        Queue a record for ``path``. ``record`` is a str, a dict or an object
+        with to_json(); it is serialized on the writer thread.
+
+        Returns False if the record was shed.
+        """
+        depth = len(self._queue)
+        if level < logging.INFO and depth >= self.shed_debug_at:
+            self._stats["shed_debug"] += 1
+            return False
+        if depth >= self.max_queue and (level < logging.ERROR or depth >= self.max_queue + LOG_ERROR_RESERVE):
+            self._stats["dropped"] += 1
+            return False
+        if self._thread is None:
+            self._start()
+        self._queue.append((stream, path, record))
+        if depth + 1 == LOG_BATCH_MAX:
+            self._wake.set()
+        return True
+
+    def _start(self):
+        with self._start_lock:
+            if self._thread is None and not self._closed:
+                self._thread = threading.Thread(target=self._run, name="triforce-log-writer", daemon=True)
+                self._thread.start()
+
+    # --- Writer thread ---
+
+    def _run(self):
+        last_sync = time.monotonic()
+        while True:
+            if not self._queue:
+                if self._closed:
+                    break
+                self._wake.wait(LOG_FLUSH_INTERVAL)
+                self._wake.clear()
+
+            batch = []
+            while self._queue and len(batch) < LOG_BATCH_MAX:
+                batch.append(self._queue.popleft())
+            if batch:
+                self._write_batch(batch)
+
+            now = time.monotonic()
+            if now - last_sync >= LOG_FSYNC_INTERVAL:
+                self._sync()
+                self._close_idle(now)
+                last_sync = now
+
+        self._sync()
+        for log_file in self._files.values():
+            self._close_file(log_file)
+        self._files.clear()
+
+    @staticmethod
+    def _encode(record: Any) -> str:
+        if isinstance(record, str):
+            return record
+        if hasattr(record, "to_json"):
+            return record.to_json()
+        return json.dumps(record, ensure_ascii=False, default=str)
+
+    def _write_batch(self, batch: List[tuple]):
+        # Group per stream and path; dict order keeps each stream's order
+        groups: Dict[tuple, List[str]] = {}
+        for stream, path, record in batch:
+            try:
+                groups.setdefault((stream, path), []).append(self._encode(record))
+            except Exception as e:
+                self._error(f"Failed to encode log record for {stream}: {e}")
+
+        for (stream, path), lines in groups.items():
+            data = ("\n".join(lines) + "\n").encode("utf-8")
+            try:
+                log_file = self._file_for(stream, path, len(data))
+                log_file.handle.write(data)
+                log_file.size += len(data)
+                log_file.last_write = time.monotonic()
+                log_file.dirty = True
+                self._stats["written"] += len(lines)
+            except Exception as e:
+                self._error(f"Failed to write to {stream} log: {e}")
+        self._stats["batches"] += 1
+
+    def _file_for(self, stream: str, path: Path, incoming: int) -> _LogFile:
+        log_file = self._files.get(stream)
+        if log_file is not None and log_file.path != path:
+            # Time rotation: the stream moved on to a new dated file
+            self._close_file(log_file)
+            log_file = None
+        if log_file is not None and log_file.size and log_file.size + incoming > self.max_bytes:
+            self._close_file(log_file)
+            self._rotate(path)
+            log_file = None
+        if log_file is None:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            if path.exists() and path.stat().st_size + incoming > self.max_bytes:
+                self._rotate(path)
+            handle = open(path, "ab", buffering=0)
+            log_file = _LogFile(path, handle, os.fstat(handle.fileno()).st_size, time.monotonic())
+            self._files[stream] = log_file
+        return log_file
+
+    def _rotate(self, path: Path):
+        """Size rotation: name_DATE.log -> name_DATE.N.log"""
+        n = 1
+        while (target := path.with_name(f"{path.stem}.{n}{path.suffix}")).exists():
+            n += 1
+        path.rename(target)
+        self._stats["rotations"] += 1
+
+    def _sync(self):
+        for log_file in self._files.values():
+            if log_file.dirty:
+                try:
+                    os.fsync(log_file.handle.fileno())
+                    self._stats["fsyncs"] += 1
+                except OSError as e:
+                    self._error(f"Failed to fsync {log_file.path}: {e}")
+                log_file.dirty = False
+
+    def _close_idle(self, now: float):
+        for stream, log_file in list(self._files.items()):
+            if now - log_file.last_write > LOG_HANDLE_IDLE:
+                self._close_file(log_file)
+                del self._files[stream]
+
+    def _close_file(self, log_file: _LogFile):
+        try:
+            if log_file.dirty:
+                os.fsync(log_file.handle.fileno())
+            log_file.handle.close()
+        except OSError:
+            pass
+
+    def _error(self, message: str):
+        self._stats["errors"] += 1
+        now = time.monotonic()
+        if now - self._last_error_log > 60:
+            self._last_error_log = now
+            logger.error(message)
+
+    # --- Control ---
+
+    def close(self, timeout: float = 5.0):
+        """Write out queued records and stop the writer thread (blocking)"""
+        self._closed = True
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            **self._stats,
+            "queued": len(self._queue),
+            "open_files": len(self._files),
+        }
+
+
+# Shared by the central logger and the multi-file logger
+log_writer = LogWriter()
+
+
 class TriForceCentralLogger:
     """
     Central logging service that collects all logs and posts to TriForce.
@@ -544,29 +771,21 @@ class TriForceCentralLogger:
                 logger.error(f"Error in periodic flush: {e}")
 
     async def _flush(self):
-        """Flush pending entries to disk"""
+        """Hand pending entries to the background writer"""
         if not self._pending:
             return
 
         today = datetime.now(timezone.utc).strftime("%Y-%m-%d")
         log_file = self.log_dir / f"triforce_{today}.jsonl"
 
-        try:
-            entries_to_flush = self._pending.copy()
-            self._pending.clear()
+        entries_to_flush = self._pending.copy()
+        self._pending.clear()
 
-            with open(log_file, "a", encoding="utf-8") as f:
-                for entry in entries_to_flush:
-                    f.write(entry.to_json() + "\n")
+        for entry in entries_to_flush:
+            log_writer.submit("central", log_file, entry, _LEVEL_NUMBERS.get(entry.level, logging.INFO))
 
-            self._stats["total_flushed"] += len(entries_to_flush)
-            logger.debug(f"Flushed {len(entries_to_flush)} log entries to {log_file}")
-
-        except Exception as e:
-            self._stats["errors"] += 1
-            logger.error(f"Failed to flush logs: {e}")
-            # Put entries back for retry
-            self._pending.extend(entries_to_flush)
+        self._stats["total_flushed"] += len(entries_to_flush)
+        logger.debug(f"Flushed {len(entries_to_flush)} log entries to {log_file}")
 
     async def force_flush(self):
         """Force flush all pending entries"""
@@ -628,6 +847,7 @@ class TriForceCentralLogger:
             "buffer_size": len(self._buffer),
             "pending_flush": len(self._pending),
             "websocket_clients": len(self._websockets),
+            "writer": log_writer.get_stats(),
         }
 
     async def read_log_file(self, date: str) -> List[Dict[str, Any]]:
@@ -649,88 +869,54 @@ class TriForceCentralLogger:
         return entries
 
 
-class TriForceLoggingMiddleware(BaseHTTPMiddleware):
+class TriForceLoggingStage(PipelineStage):
     """
-    FastAPI middleware that logs all API traffic to TriForce.
+    Request pipeline stage that logs all API traffic to TriForce.
     """
 
-    def __init__(self, app, central_logger: TriForceCentralLogger):
-        super().__init__(app)
-        self.central_logger = central_logger
-
-        # Paths to exclude from logging (health checks, metrics)
-        self.exclude_paths = {
-            "/health",
-            "/healthz",
-            "/ready",
-            "/metrics",
-            "/favicon.ico",
-        }
-
-    async def dispatch(self, request: Request, call_next):
-        # Skip excluded paths
-        if request.url.path in self.exclude_paths:
-            return await call_next(request)
+    # Paths to exclude from logging (health checks, metrics)
+    EXCLUDE_PATHS = frozenset({
+        "/health",
+        "/healthz",
+        "/ready",
+        "/metrics",
+        "/favicon.ico",
+    })
 
-        # Generate trace ID
-        trace_id = request.headers.get("X-Trace-ID") or \
-                   request.headers.get("X-Correlation-ID") or \
-                   str(uuid.uuid4())[:12]
+    def __init__(self, central_logger: TriForceCentralLogger):
+        self.central_logger = central_logger
 
-        # Store in request state
-        request.state.trace_id = trace_id
+    def on_finish(self, ctx: RequestContext):
+        if ctx.path in self.EXCLUDE_PATHS:
+            return
 
-        # Get request info
-        client_ip = request.client.host if request.client else None
-        user_agent = request.headers.get("User-Agent")
+        # Log to TriForce (fire and forget)
+        asyncio.create_task(
+            self.central_logger.log_api_request(
+                method=ctx.method,
+                path=ctx.path,
+                status_code=ctx.status_code,
+                latency_ms=ctx.latency * 1000,
+                trace_id=ctx.trace_id,
+                client_ip=ctx.client_ip,
+                user_agent=ctx.headers.get("user-agent"),
+                request_size=ctx.request_size,
+                response_size=ctx.response_size,
+                error_message=ctx.error,
+            )
+        )
 
-        # Try to get request size
-        request_size = None
-        if "content-length" in request.headers:
-            try:
-                request_size = int(request.headers["content-length"])
-            except ValueError:
-                pass
 
-        start_time = time.time()
-        error_message = None
-        response = None
+class TriForceLoggingMiddleware(RequestPipeline):
+    """
+    ASGI middleware that logs all API traffic to TriForce.
 
-        try:
-            response = await call_next(request)
-            status_code = response.status_code
-        except Exception as e:
-            error_message = str(e)
-            status_code = 500
-            raise
-        finally:
-            latency_ms = (time.time() - start_time) * 1000
-
-            # Get response size if available
-            response_size = None
-            if response and hasattr(response, 'headers') and "content-length" in response.headers:
-                try:
-                    response_size = int(response.headers["content-length"])
-                except (ValueError, AttributeError):
-                    pass
-
-            # Log to TriForce (fire and forget)
-            asyncio.create_task(
-                self.central_logger.log_api_request(
-                    method=request.method,
-                    path=request.url.path,
-                    status_code=status_code,
-                    latency_ms=latency_ms,
-                    trace_id=trace_id,
-                    client_ip=client_ip,
-                    user_agent=user_agent,
-                    request_size=request_size,
-                    response_size=response_size,
-                    error_message=error_message,
-                )
-            )
+    Stand-alone form of TriForceLoggingStage; main.py runs the stage inside
+    the shared request pipeline instead.
+    """
 
-        return response
+    def __init__(self, app, central_logger: TriForceCentralLogger):
+        super().__init__(app, [TriForceLoggingStage(central_logger)])
 
 
 # Singleton instance
@@ -762,9 +948,8 @@ class MultiFileLogger:
         (self.log_dir / "agents").mkdir(exist_ok=True)
         (self.log_dir / "system").mkdir(exist_ok=True)
 
-        # File handles cache
-        self._files = {}
-        self._lock = asyncio.Lock()
+        # File handles are kept by the background writer
+        self._writer = log_writer
 
     def _get_dated_path(self, subdir: str, name: str) -> Path:
         """Get dated log file path"""
@@ -782,7 +967,8 @@ class MultiFileLogger:
             "latency_ms": round(latency_ms, 2),
             "error": error,
         }
-        await self._write("mcp", "mcpserver", entry)
+        # Protocol traffic is the bulk of the volume: shed first under load
+        await self._write("mcp", "mcpserver", entry, logging.WARNING if error else logging.DEBUG)
     
     async def log_mcp_tool_call(
         self, 
@@ -828,7 +1014,7 @@ class MultiFileLogger:
             "result_preview": (result_preview[:300] + "...") if result_preview and len(result_preview) > 300 else result_preview,
             "error": error,
         }
-        await self._write("mcp", "mcp_calls", entry)
+        await self._write("mcp", "mcp_calls", entry, logging.WARNING if error else logging.INFO)
 
     async def log_v1_api(self, method: str, path: str, status: int, latency_ms: float, client: str = None):
         """Log REST API /v1/ traffic"""
@@ -841,7 +1027,7 @@ class MultiFileLogger:
             "latency_ms": round(latency_ms, 2),
             "client": client,
         }
-        await self._write("api", "v1", entry)
+        await self._write("api", "v1", entry, logging.WARNING if status >= 500 else logging.DEBUG)
 
     async def log_triforce(self, event: str, details: Dict[str, Any] = None):
         """Log TriForce system events"""
@@ -877,7 +1063,7 @@ class MultiFileLogger:
             "latency_ms": round(latency_ms, 2),
             "error": error,
         }
-        await self._write("api", "aichat", entry)
+        await self._write("api", "aichat", entry, logging.WARNING if error else logging.INFO)
 
     async def log_error(self, source: str, error_type: str, message: str, trace: str = None):
         """Log errors to consolidated error log"""
@@ -889,17 +1075,18 @@ class MultiFileLogger:
             "message": message,
             "trace": trace[:1000] if trace else None,
         }
-        await self._write("system", "errors", entry)
+        await self._write("system", "errors", entry, logging.ERROR)
 
-    async def _write(self, subdir: str, name: str, entry: Dict[str, Any]):
-        """Write entry to log file"""
-        async with self._lock:
-            try:
-                path = self._get_dated_path(subdir, name)
-                with open(path, "a", encoding="utf-8") as f:
-                    f.write(json.dumps(entry, ensure_ascii=False, default=str) + "\n")
-            except Exception as e:
-                logger.error(f"Failed to write to {name} log: {e}")
+    async def _write(self, subdir: str, name: str, entry: Dict[str, Any], level: int = logging.INFO):
+        """Queue entry for its log file (no I/O on the caller's path)"""
+        self._writer.submit(f"{subdir}/{name}", self._get_dated_path(subdir, name), entry, level)
+
+    def close(self):
+        """Write out queued entries (blocking)"""
+        self._writer.close()
+
+    def get_stats(self) -> Dict[str, Any]:
+        return self._writer.get_stats()
 
 
 # Multi-file logger instance
@@ -11,7 +11,7 @@ import base64
 import httpx
 import json
 import logging
-from typing import Any, Dict, List, Optional, Tuple
+from typing import Any, Callable, Dict, List, Optional, Tuple
 from urllib.parse import urljoin
 
 logger = logging.getLogger("ailinux.comfy_client")
@@ -20,7 +20,8 @@ logger = logging.getLogger("ailinux.comfy_client")
 class ComfyUIClient:
     """Client for interacting with ComfyUI API."""
 
-    def __init__(self, base_url: str, username: Optional[str] = None, password: Optional[str] = None, timeout: int = 1800):
+    def __init__(self, base_url: str, username: Optional[str] = None, password: Optional[str] = None, timeout: int = 1800,
+                 tracker: Optional[Any] = None):
         """
         Initialize ComfyUI client.
 
@@ -29,12 +30,18 @@ class ComfyUIClient:
             username: Optional username for authentication
             password: Optional password for authentication
             timeout: Request timeout in seconds (default 1800s = 30 min for 4K generations)
+            tracker: Optional completion tracker (app.services.comfyui_tracker) that
+                receives job events over the ComfyUI websocket. Without it, jobs are
+                polled via /history/{prompt_id}.
         """
         self.base_url = base_url.rstrip('/')
         self.username = username
         self.password = password
         self.timeout = timeout
         self.client = httpx.AsyncClient(timeout=timeout)
+        self.tracker = tracker
+        if tracker is not None and not tracker.headers:
+            tracker.headers = self._get_auth_headers()
 
     def _get_auth_headers(self) -> Dict[str, str]:
         """Get authentication headers if credentials are provided."""
@@ -45,13 +52,13 @@ class ComfyUIClient:
             headers["Authorization"] = f"Basic {encoded_auth}"
         return headers
 
-    async def submit_prompt(self, workflow: Dict[str, Any], client_id: str = "ailinux_backend") -> str:
+    async def submit_prompt(self, workflow: Dict[str, Any], client_id: Optional[str] = None) -> str:
         """
         Submit a workflow prompt to ComfyUI.
 
         Args:
             workflow: ComfyUI workflow JSON
-            client_id: Client identifier
+            client_id: Client identifier (defaults to the tracker's client id)
 
         Returns:
             Prompt ID for tracking the job
@@ -62,9 +69,14 @@ class ComfyUIClient:
         url = urljoin(self.base_url, "/prompt")
         headers = self._get_auth_headers()
 
+        if self.tracker is not None:
+            # Events only reach the socket that is connected when the job runs
+            await self.tracker.start()
+            client_id = client_id or self.tracker.client_id
+
         payload = {
             "prompt": workflow,
-            "client_id": client_id
+            "client_id": client_id or "ailinux_backend"
         }
 
         logger.info(f"Submitting prompt to ComfyUI at {url}")
@@ -89,14 +101,16 @@ class ComfyUIClient:
             logger.error(f"Failed to submit prompt: {e}")
             raise
 
-    async def wait_for_result(self, prompt_id: str, poll_interval: int = 2, max_wait: int = 1800) -> Dict[str, Any]:
+    async def wait_for_result(self, prompt_id: str, poll_interval: int = 2, max_wait: int = 1800,
+                              on_progress: Optional[Callable[[Dict[str, Any]], Any]] = None) -> Dict[str, Any]:
         """
         Wait for a prompt to complete and return the result.
 
         Args:
             prompt_id: The prompt ID to wait for
-            poll_interval: Seconds between status checks
+            poll_interval: Seconds between status checks (without tracker)
             max_wait: Maximum time to wait in seconds (default 1800s = 30 min for 4K generations)
+            on_progress: Called with progress events (requires a tracker)
 
         Returns:
             History data containing the completed job information
@@ -105,7 +119,14 @@ class ComfyUIClient:
             TimeoutError: If job doesn't complete within max_wait
             Exception: If job fails or other error occurs
         """
-        url = urljoin(self.base_url, "/history")
+        if self.tracker is not None:
+            try:
+                job_data = await self.tracker.wait(prompt_id, timeout=max_wait, on_progress=on_progress)
+            except asyncio.TimeoutError:
+                raise TimeoutError(f"Job {prompt_id} did not complete within {max_wait} seconds")
+            return self._check_job(prompt_id, job_data)
+
+        url = urljoin(self.base_url, f"/history/{prompt_id}")
         headers = self._get_auth_headers()
 
         elapsed = 0
@@ -119,22 +140,9 @@ class ComfyUIClient:
                 if prompt_id in history:
                     job_data = history[prompt_id]
                     status = job_data.get("status", {})
-
-                    if status.get("completed", False):
-                        logger.info(f"Job {prompt_id} completed successfully")
-                        return job_data
-                    else:
-                        status_str = (status.get("status_str") or "").lower()
-                        error_msg = status.get("error")
-                        if status_str == "error" or error_msg:
-                            if not error_msg:
-                                for message in status.get("messages", []):
-                                    if isinstance(message, list) and len(message) == 2 and message[0] == "execution_error":
-                                        error_msg = message[1].get("exception_message", "Unknown error")
-                                        break
-                            error_msg = error_msg or status_str or "Unknown error"
-                            logger.error(f"Job {prompt_id} failed: {error_msg}")
-                            raise Exception(f"ComfyUI job failed: {error_msg}")
+                    status_str = (status.get("status_str") or "").lower()
+                    if status.get("completed", False) or status_str == "error" or status.get("error"):
+                        return self._check_job(prompt_id, job_data)
 
                 await asyncio.sleep(poll_interval)
                 elapsed += poll_interval
@@ -145,6 +153,24 @@ class ComfyUIClient:
 
         raise TimeoutError(f"Job {prompt_id} did not complete within {max_wait} seconds")
 
+    @staticmethod
+    def _check_job(prompt_id: str, job_data: Dict[str, Any]) -> Dict[str, Any]:
+        """Return finished job data or raise if the job failed."""
+        status = job_data.get("status", {})
+        if status.get("completed", False):
+            logger.info(f"Job {prompt_id} completed successfully")
+            return job_data
+
+        error_msg = status.get("error")
+        if not error_msg:
+            for message in status.get("messages", []):
+                if isinstance(message, list) and len(message) == 2 and message[0] == "execution_error":
+                    error_msg = message[1].get("exception_message", "Unknown error")
+                    break
+        error_msg = error_msg or (status.get("status_str") or "").lower() or "Unknown error"
+        logger.error(f"Job {prompt_id} failed: {error_msg}")
+        raise Exception(f"ComfyUI job failed: {error_msg}")
+
     async def download_output_image(self, filename: str, subfolder: str = "", image_type: str = "output") -> bytes:
         """
         Download a generated image from ComfyUI.